@@ -1,59 +1,48 @@
+import asyncio
+import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from binance.client import Client
+import ccxt
 from ta.volatility import BollingerBands
-from datetime import datetime, timedelta
-import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'trading_system'))
+from exchange.components.backfill_manager import BackfillManager, load_candles
 
 # Binance API 설정 (공개 데이터만 사용)
-client = Client()
+client = ccxt.binance({'enableRateLimit': True})
 
 # 전략 파라미터
-SYMBOL = 'BTCUSDT'
-INTERVAL_MAIN = Client.KLINE_INTERVAL_30MINUTE
-INTERVAL_SUB = Client.KLINE_INTERVAL_1MINUTE
+SYMBOL = 'BTC/USDT'
+INTERVAL_MAIN = '30m'
+INTERVAL_SUB = '1m'
 LIMIT = 1000
 MONTHS = 6
 LEVERAGE = 20
 INITIAL_BALANCE = 1000.0
 
 def get_klines(symbol, interval, start_time, end_time):
-    klines = []
-    while start_time < end_time:
-        temp = client.get_klines(
-            symbol=symbol,
-            interval=interval,
-            startTime=int(start_time.timestamp() * 1000),
-            endTime=int(min(end_time, start_time + timedelta(minutes=interval_to_minutes(interval)*LIMIT)).timestamp() * 1000),
-            limit=LIMIT
-        )
-        if not temp:
-            break
-        klines.extend(temp)
-        start_time = datetime.fromtimestamp(temp[-1][0] / 1000) + timedelta(minutes=interval_to_minutes(interval))
-        time.sleep(0.2)
-    return klines
-
-def interval_to_minutes(interval):
-    if 'm' in interval:
-        return int(interval.replace('m', ''))
-    if 'h' in interval:
-        return int(interval.replace('h', '')) * 60
-    return 1
+    """병렬/재개 가능한 백필로 캔들 수집 (.npz 캐시, 중단 후 재실행 시 이어서 진행)"""
+    output = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          f"{symbol.replace('/', '')}_{interval}_{start_time:%Y%m%d}_{end_time:%Y%m%d}.npz")
+    manager = BackfillManager(client, max_concurrency=4, page_limit=LIMIT)
+    summary = asyncio.run(manager.backfill(
+        symbol, interval,
+        int(start_time.timestamp() * 1000), int(end_time.timestamp() * 1000),
+        output
+    ))
+    print(f"  {interval}: {summary['candles']}개 캔들 ({summary['candles_per_second']:.0f} candles/sec)")
+    return load_candles(output)
 
 def fetch_data():
-    end = datetime.utcnow()
+    # UTC 자정 기준으로 고정해 같은 날 재실행 시 백필 체크포인트를 그대로 재사용
+    end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
     start = end - timedelta(days=30 * MONTHS)
     print("📥 Binance에서 최근 6개월치 30분봉 + 1분봉 데이터 수집 중...")
-    main_klines = get_klines(SYMBOL, INTERVAL_MAIN, start, end)
-    sub_klines = get_klines(SYMBOL, INTERVAL_SUB, start, end)
-    df_main = pd.DataFrame(main_klines, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', '_', '_', '_', '_', '_', '_'])
-    df_sub = pd.DataFrame(sub_klines, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', '_', '_', '_', '_', '_', '_'])
-    for df in [df_main, df_sub]:
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df.set_index('timestamp', inplace=True)
-        df[['open', 'high', 'low', 'close', 'volume']] = df[['open', 'high', 'low', 'close', 'volume']].astype(float)
+    df_main = get_klines(SYMBOL, INTERVAL_MAIN, start, end)
+    df_sub = get_klines(SYMBOL, INTERVAL_SUB, start, end)
     return df_main, df_sub
 
 def simulate_trades(df_main, df_sub):
@@ -75,6 +75,11 @@ class MultiTimeframeAnalyzer:
             if df is None or len(df) < 100:
                 return self._get_default_result(weight)
             
+            # Skip series with missing bars until the gap repair completes
+            if df.attrs.get('degraded'):
+                self.logger.warning(f"{symbol} {timeframe} 캔들 누락 복구 중 - 기본값 사용")
+                return self._get_default_result(weight)
+            
             # Calculate indicators
             indicators = EnhancedTechnicalIndicators.calculate_all_indicators(df)
             
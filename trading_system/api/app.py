@@ -570,13 +570,14 @@ async def get_balance():
         raise HTTPException(status_code=503, detail="Trading engine not initialized")
     
     try:
-        # 직접 거래소에서 잔고 조회
+        # 엔진과 공유하는 잔고 캐시 (동시 요청은 거래소 조회 1회로 합쳐짐)
         try:
             balance = await trading_engine.exchange.get_balance()
         except Exception as e:
             logging.warning(f"Balance fetch failed, using fallback: {e}")
             balance = {
-                'USDT': {'free': trading_engine.config.FALLBACK_BALANCE, 'used': 0.0, 'total': trading_engine.config.FALLBACK_BALANCE}
+                'balances': {'USDT': {'free': trading_engine.config.FALLBACK_BALANCE, 'used': 0.0,
+                                      'total': trading_engine.config.FALLBACK_BALANCE}}
             }
         
         positions = trading_engine.db.get_open_positions()
@@ -587,7 +588,7 @@ async def get_balance():
             for pos in positions
         )
         
-        free_balance = balance.get('USDT', {}).get('free', trading_engine.config.FALLBACK_BALANCE)
+        free_balance = balance.get('balances', {}).get('USDT', {}).get('free', trading_engine.config.FALLBACK_BALANCE)
         total_balance = free_balance + used_balance
         
         return {
@@ -612,7 +613,7 @@ async def get_dashboard():
         raise HTTPException(status_code=503, detail="Trading engine not initialized")
     
     try:
-        # Get comprehensive dashboard data
+        # Get comprehensive dashboard data (shared balance cache)
         balance = await trading_engine.exchange.get_balance()
         positions = trading_engine.db.get_open_positions()
         performance = trading_engine.db.get_daily_performance()
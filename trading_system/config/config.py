@@ -111,6 +111,7 @@ class TradingConfig:
         "BTCUSDT": 20,
         "ETHUSDT": 10
     })
+    MARGIN_MODE: str = "isolated"  # 선물 마진 모드 (isolated / cross)
     
     # Portfolio Allocation - BTC 70% : ETH 30%
     PORTFOLIO_WEIGHTS: Dict[str, float] = field(default_factory=lambda: {
@@ -155,6 +156,7 @@ class TradingConfig:
     FALLBACK_BALANCE: float = 1000.0  # API 실패 시 사용할 기본 잔고 (기존 10000에서 보수적으로 변경)
     ENABLE_DYNAMIC_BALANCE: bool = True  # 실제 API 잔고 사용 여부 (False면 FALLBACK_BALANCE 사용)
     BALANCE_CACHE_TIMEOUT: int = 30  # 잔고 조회 캐시 시간 (초)
+    CAPITAL_RECONCILE_INTERVAL: float = 300.0  # 잔고 푸시 수신 중 자본 스냅샷 REST 재조회 주기 (초)
     
     # 🛡️ SAFETY: Paper Trading Mode (실전 거래 전 테스트용)
     PAPER_TRADING: bool = False  # True: 시뮬레이션 모드, False: 실전 거래
@@ -176,6 +178,15 @@ class TradingConfig:
             "max_stop_distance": 0.015,
         }
     })
+    ATR_CACHE_TTL: float = 900.0  # 진입 전 손절/익절 사전 계산에 쓰는 ATR 캐시 유효 시간 (초)
+    ATTACHED_TPSL_ENABLED: bool = True  # 단일 진입 주문에 거래소 프리셋 TP/SL 첨부 (분할 체결 시 기존 방식)
+    ATR_MULTIPLIER_TABLE_PATH: str = "atr_multiplier_table.json"  # 최적화된 심볼/방향/체제별 ATR 배수 (python -m utils.atr_backtest로 생성, 시작 시 로드)
+    ATR_OPT_STOP_GRID: List[float] = field(default_factory=lambda: [1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0])
+    ATR_OPT_PROFIT_GRID: List[float] = field(default_factory=lambda: [1.5, 2.0, 2.5, 3.0, 3.5, 4.0, 5.0, 6.0])
+    ATR_OPT_RUNGS: int = 3  # successive halving 단계 수 (마지막 단계는 전체 기간)
+    ATR_OPT_ETA: int = 3  # 단계마다 상위 1/eta만 남기고 평가 구간은 eta배로
+    ATR_OPT_MIN_TRADES: int = 10  # 테이블 채택에 필요한 최소 거래 수 (체제별)
+    ATR_OPT_WORKERS: int = 0  # 최적화 워커 프로세스 수 (0 = CPU 코어 수)
     
     # ⚡ 개선된 트레일링 스톱 (현실적 활성화 조건)
     TRAILING_STOP: Dict[str, Dict[str, float]] = field(default_factory=lambda: {
@@ -219,15 +230,50 @@ class TradingConfig:
     MAKER_FEE: float = 0.0002  # 0.02%
     TAKER_FEE: float = 0.0006  # 0.06%
     
+    # Order Execution Algorithms (호가 깊이 기반 분할 주문)
+    EXECUTION_ALGO_ENABLED: bool = True  # False면 항상 단일 시장가 주문
+    EXECUTION_DEFAULT_ALGO: str = "twap"  # 한 번에 체결하기 큰 주문에 사용 (twap / iceberg / participation)
+    EXECUTION_BOOK_LEVELS: int = 50  # 자식 주문 크기 계산에 쓰는 호가 단계 수
+    EXECUTION_DEPTH_BAND: float = 0.002  # mid 대비 이 범위(0.2%) 안의 호가만 깊이로 계산
+    EXECUTION_MAX_BOOK_FRACTION: float = 0.2  # 자식 주문 최대 크기 = 범위 내 깊이의 20%
+    EXECUTION_TWAP_DURATION: float = 60.0  # TWAP/아이스버그 최대 실행 시간 (초)
+    EXECUTION_TWAP_SLICES: int = 6  # TWAP 분할 수
+    EXECUTION_ICEBERG_REFRESH: float = 5.0  # 아이스버그/참여율 주문 간격 (초)
+    EXECUTION_PARTICIPATION_RATE: float = 0.1  # 참여율 알고리즘: 시장 거래량 대비 최대 비율
+    
+    # Pre-trade Impact Estimation (호가 깊이 기반 사전 슬리피지 추정)
+    PRETRADE_MAX_SLIPPAGE_BPS: float = 15.0  # 예상 VWAP이 mid 대비 이 값(bp)을 넘지 않도록 포지션 크기 제한
+    PRETRADE_BOOK_MAX_AGE: float = 5.0  # 이보다 오래된 로컬 호가는 추정에 사용하지 않음 (초)
+    
     # Performance Targets
     DAILY_LOSS_LIMIT: float = 0.05  # 5%
     WEEKLY_LOSS_LIMIT: float = 0.15  # 15%
     MONTHLY_TARGET: float = 0.40  # 40%
     MAX_DRAWDOWN: float = 0.20  # 20%
     
+    # Portfolio Exposure (EWMA 공분산 기반)
+    EXPOSURE_TIMEFRAME: str = "1h"  # 수익률 공분산 계산 봉
+    EXPOSURE_LOOKBACK: int = 500  # 초기화에 쓰는 봉 수
+    EXPOSURE_EWMA_LAMBDA: float = 0.97  # 감쇠 계수 (클수록 과거 비중 큼)
+    EXPOSURE_MIN_OBSERVATIONS: int = 50  # 이보다 적으면 익스포저 제한 미적용
+    EXPOSURE_BENCHMARK: str = "BTCUSDT"  # 베타 기준 심볼
+    EXPOSURE_MAX_BETA: float = 5.0  # BTC 환산 명목가치 / 자본 한도
+    EXPOSURE_MAX_DAILY_VOL: float = 0.15  # 포트폴리오 일간 변동성 / 자본 한도
+    
+    # Portfolio VaR / Stress (익스포저 수익률 행렬 사용)
+    VAR_CONFIDENCE: float = 0.99  # VaR/CVaR 신뢰수준
+    VAR_HORIZON_BARS: int = 24  # 보유 기간 (EXPOSURE_TIMEFRAME 봉 수)
+    VAR_MAX_CVAR: float = 0.10  # 보유 기간 CVaR / 자본 한도
+    STRESS_MAX_LOSS: float = 0.25  # 최악 스트레스 시나리오 손실 / 자본 한도
+    VAR_SIZE_CANDIDATES: int = 32  # 사전 점검 시 한 번에 평가하는 후보 거래 크기 수
+    
     # Kelly Criterion Settings
     KELLY_FRACTION: float = 0.25  # Use 25% of Kelly suggestion for safety
     MIN_TRADES_FOR_KELLY: int = 20  # Minimum trades for Kelly calculation
+    KELLY_WINDOW: int = 50  # 심볼별 롤링 윈도우 (최근 청산 거래 수)
+    KELLY_DECAY: float = 1.0  # 거래당 지수 감쇠 (1.0 = 윈도우 내 동일 가중)
+    KELLY_DEFAULT_FRACTION: float = 0.1  # 표본 부족 시 Kelly 지수
+    KELLY_MAX_FRACTION: float = 0.25  # Kelly 지수 상한
     
     # ML Model Settings
     ML_RETRAIN_HOURS: int = 24  # Retrain every 24 hours
@@ -245,6 +291,7 @@ class TradingConfig:
     
     # 주문 재시도 횟수 (trading_system2 호환)
     ORDER_RETRY: int = 3
+    CLIENT_ORDER_ID_PREFIX: str = "ts"  # 클라이언트 주문 ID 접두사 (재시도/오류 후 동일 주문 조회용)
     
     # News Filtering Settings  
     MIN_NEWS_CONFIDENCE: float = 0.6  # 60% minimum confidence (더 엄격한 필터링)
@@ -265,6 +312,9 @@ class TradingConfig:
     # System Settings
     TIMEZONE: str = "Asia/Seoul"
     DATABASE_PATH: str = "advanced_trading_v3.db"
+    MARKET_METADATA_PATH: str = "market_metadata_cache.json"  # 선물 마켓 사양 디스크 캐시
+    MARKET_METADATA_TTL: int = 86400  # 디스크 캐시 유효기간 (초)
+    MARKET_METADATA_REFRESH_INTERVAL: int = 3600  # 백그라운드 갱신 간격 (초)
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     LOG_LEVEL: str = "INFO"
@@ -297,6 +347,25 @@ class TradingConfig:
     NOTIFICATION_MIN_INTERVAL: int = 60  # 알림 최소 간격 (초)
     HTTP_TIMEOUT: int = 30  # HTTP 요청 타임아웃 (초)
     CAPITAL_UPDATE_INTERVAL: int = 30  # 자본 추적 업데이트 간격 (초)
+    PRICE_FALLBACK_POLL_INTERVAL: float = 10.0  # WebSocket 장애 시 REST 가격 폴링 기본 간격 (초, 포지션 없음)
+    PRICE_FALLBACK_MIN_INTERVAL: float = 2.0  # 포지션이 많을 때 REST 가격 폴링 최소 간격 (초)
+    PRICE_STALE_TIMEOUT: float = 15.0  # WebSocket 가격이 이 시간 이상 갱신되지 않으면 REST 대체 (초)
+    PRIVATE_WS_ENABLED: bool = True  # 주문/체결/포지션/잔고 private WebSocket 구독
+    PRIVATE_WS_RECONCILE_INTERVAL: int = 300  # private WS 상태와 REST 대조 주기 (초)
+    POSITION_FLUSH_INTERVAL: float = 5.0  # 포지션 변경분 DB 일괄 저장 간격 (초, 개시/종료/부분청산은 즉시)
+    RECONCILE_INTERVAL: float = 15.0  # 전체 포지션/미체결 주문 일괄 대조 주기 (초)
+    RECONCILE_CONFIRMATIONS: int = 2  # 거래소에 없는 포지션을 종료 처리하기 전 연속 확인 횟수
+    RISK_STATE_CROSS_CHECK_INTERVAL: float = 600.0  # 인메모리 리스크 상태와 DB 교차 검증 주기 (초)
+    EMERGENCY_MAX_CONCURRENT_CLOSES: int = 10  # 긴급 청산 시 동시 청산 주문 수 상한 (남은 REST 예산 내)
+    EMERGENCY_CLOSE_RETRIES: int = 1  # 긴급 청산 실패 심볼 재시도 횟수
+    
+    # Adaptive Cycle Pacing (API 예산 및 변동성 기반)
+    API_RATE_BUDGET_PER_MINUTE: int = 600  # 분당 REST 호출 예산 (여유율 계산 기준)
+    PACING_MIN_INTERVAL: int = 60  # 변동성 높은 심볼 최소 분석 간격 (초)
+    PACING_MAX_INTERVAL: int = 900  # 조용한 심볼 최대 분석 간격 (초)
+    PACING_MIN_SYMBOL_GAP: float = 0.2  # API 여유가 충분할 때 심볼 간 대기 (초)
+    PACING_MAX_SYMBOL_GAP: float = 5.0  # API 여유가 없을 때 심볼 간 대기 (초)
+    PACING_LOW_HEADROOM: float = 0.3  # 이 여유율 미만이면 전체 간격을 늘림
     
     def validate(self) -> list:
         """Check for missing essential configuration"""
@@ -3,6 +3,7 @@ Performance DAO
 성과 관련 데이터베이스 접근 객체
 """
 
+import json
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from .base_dao import BaseDAO
@@ -70,6 +71,30 @@ class PerformanceDAO(BaseDAO):
                     sample_size INTEGER DEFAULT 0
                 )
             ''',
+            'kelly_state': '''
+                CREATE TABLE IF NOT EXISTS kelly_state (
+                    symbol TEXT PRIMARY KEY,
+                    trades TEXT NOT NULL,
+                    win_rate REAL DEFAULT 0,
+                    avg_win REAL DEFAULT 0,
+                    avg_loss REAL DEFAULT 0,
+                    kelly_fraction REAL DEFAULT 0,
+                    sample_size INTEGER DEFAULT 0,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''',
+            'realized_fills': '''
+                CREATE TABLE IF NOT EXISTS realized_fills (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    trade_id INTEGER,
+                    symbol TEXT NOT NULL,
+                    quantity REAL NOT NULL,
+                    price REAL NOT NULL,
+                    pnl REAL NOT NULL,
+                    reason TEXT,
+                    timestamp DATETIME NOT NULL
+                )
+            ''',
             'drawdown_tracking': '''
                 CREATE TABLE IF NOT EXISTS drawdown_tracking (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -218,10 +243,8 @@ class PerformanceDAO(BaseDAO):
             return cached_data
         
         query = '''
-            SELECT kelly_fraction FROM kelly_tracking 
-            WHERE symbol = ? 
-            ORDER BY timestamp DESC 
-            LIMIT 1
+            SELECT kelly_fraction FROM kelly_state 
+            WHERE symbol = ?
         '''
         
         result = self._execute_query(query, (symbol,), fetch_one=True)
@@ -231,6 +254,82 @@ class PerformanceDAO(BaseDAO):
         self._set_cached_data(cache_key, kelly_fraction, ttl=1800)  # 30분 캐시
         return kelly_fraction
     
+    def get_kelly_windows(self, window: int) -> Dict[str, List[float]]:
+        """심볼별 Kelly 거래 윈도우 (오래된 것부터) - kelly_state가 없으면 kelly_tracking 이력에서 복원"""
+        windows = {
+            row['symbol']: json.loads(row['trades'])
+            for row in self._execute_query('SELECT symbol, trades FROM kelly_state')
+        }
+        
+        query = '''
+            SELECT symbol, trade_pnl_percent FROM (
+                SELECT symbol, trade_pnl_percent, timestamp, id,
+                       ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY timestamp DESC, id DESC) AS rn
+                FROM kelly_tracking
+            )
+            WHERE rn <= ?
+            ORDER BY symbol, timestamp, id
+        '''
+        legacy: Dict[str, List[float]] = {}
+        for row in self._execute_query(query, (window,)):
+            if row['symbol'] not in windows:
+                legacy.setdefault(row['symbol'], []).append(row['trade_pnl_percent'])
+        
+        windows.update(legacy)
+        return windows
+    
+    def save_realized_fill(self, fill_data: Dict[str, Any]) -> Optional[int]:
+        """부분 청산 실현 손익 저장 (trades.pnl은 최종 청산분만 담음)"""
+        query = '''
+            INSERT INTO realized_fills (trade_id, symbol, quantity, price, pnl, reason, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        '''
+        params = (
+            fill_data.get('trade_id'),
+            fill_data['symbol'],
+            fill_data['quantity'],
+            fill_data['price'],
+            fill_data['pnl'],
+            fill_data.get('reason'),
+            fill_data.get('timestamp') or datetime.now()
+        )
+        return self._execute_insert(query, params)
+    
+    def get_daily_realized_pnl(self, since: str) -> Dict[str, float]:
+        """일별 실현 손익 (USDT) - 청산 거래 + 부분 청산 - {'YYYY-MM-DD': pnl}"""
+        query = '''
+            SELECT day, SUM(pnl) AS pnl_usdt FROM (
+                SELECT date(close_time) AS day, pnl
+                FROM trades
+                WHERE status = 'closed' AND close_time >= ?
+                UNION ALL
+                SELECT date(timestamp) AS day, pnl
+                FROM realized_fills
+                WHERE timestamp >= ?
+            )
+            GROUP BY day
+        '''
+        return {row['day']: float(row['pnl_usdt'] or 0) for row in self._execute_query(query, (since, since))}
+    
+    def save_kelly_state(self, symbol: str, trades: List[float], stats: Dict[str, float]) -> bool:
+        """심볼당 한 행으로 Kelly 윈도우 저장"""
+        query = '''
+            INSERT OR REPLACE INTO kelly_state (
+                symbol, trades, win_rate, avg_win, avg_loss, kelly_fraction, sample_size, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        '''
+        params = (
+            symbol,
+            json.dumps(trades),
+            stats.get('win_rate', 0),
+            stats.get('avg_win', 0),
+            stats.get('avg_loss', 0),
+            stats.get('kelly_fraction', 0),
+            stats.get('sample_size', 0)
+        )
+        self._clear_cache_pattern(f"kelly_fraction:{symbol}")
+        return self._execute_query(query, params, fetch_all=False) > 0
+    
     def update_kelly_tracking(self, symbol: str, trade_pnl_percent: float) -> bool:
         """Kelly 추적 업데이트"""
         # 최근 20거래 데이터로 Kelly 계산
@@ -40,6 +40,7 @@ class PositionDAO(BaseDAO):
                     unrealized_pnl REAL DEFAULT 0,
                     realized_pnl REAL DEFAULT 0,
                     fees_paid REAL DEFAULT 0,
+                    attached_tpsl INTEGER DEFAULT 0,
                     last_update DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             ''',
@@ -60,6 +61,11 @@ class PositionDAO(BaseDAO):
         
         for table_name, create_sql in tables.items():
             self._execute_query(create_sql, fetch_all=False)
+        
+        # 기존 DB 마이그레이션: 진입 주문에 거래소 TP/SL이 첨부됐는지 여부
+        columns = {col['name'] for col in self.get_table_info('positions')}
+        if 'attached_tpsl' not in columns:
+            self._execute_query("ALTER TABLE positions ADD COLUMN attached_tpsl INTEGER DEFAULT 0", fetch_all=False)
     
     def add_position(self, position_data: Dict[str, Any]) -> int:
         """포지션 추가"""
@@ -77,8 +83,8 @@ class PositionDAO(BaseDAO):
                 symbol, trade_id, entry_price, current_price, quantity, side,
                 pnl, pnl_percent, stop_loss, take_profit, trailing_stop,
                 status, margin_used, leverage, liquidation_price,
-                unrealized_pnl, realized_pnl, fees_paid
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                unrealized_pnl, realized_pnl, fees_paid, attached_tpsl
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         '''
         
         params = (
@@ -99,7 +105,8 @@ class PositionDAO(BaseDAO):
             sanitized_data.get('liquidation_price'),
             sanitized_data.get('unrealized_pnl', 0),
             sanitized_data.get('realized_pnl', 0),
-            sanitized_data.get('fees_paid', 0)
+            sanitized_data.get('fees_paid', 0),
+            int(bool(sanitized_data.get('attached_tpsl', False)))
         )
         
         return self._execute_insert(query, params)
@@ -159,6 +166,43 @@ class PositionDAO(BaseDAO):
         result = self._execute_query(query, tuple(params), fetch_all=False)
         return result > 0
     
+    def update_positions_batch(self, updates: Dict[int, Dict[str, Any]]) -> int:
+        """여러 포지션 업데이트를 하나의 트랜잭션으로 일괄 반영"""
+        if not updates:
+            return 0
+        
+        if not hasattr(self, '_position_columns'):
+            self._position_columns = {col['name'] for col in self.get_table_info('positions')}
+        
+        # 같은 컬럼 조합끼리 묶어 executemany
+        groups: Dict[tuple, List[tuple]] = {}
+        for position_id, update_data in updates.items():
+            sanitized_data = self._sanitize_data(update_data)
+            fields = tuple(sorted(f for f in sanitized_data if f != 'id' and f in self._position_columns))
+            if not fields:
+                continue
+            groups.setdefault(fields, []).append(
+                tuple(sanitized_data[f] for f in fields) + (position_id,)
+            )
+        
+        if not groups:
+            return 0
+        
+        self._clear_cache_pattern("positions:*")
+        
+        updated = 0
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            for fields, params_list in groups.items():
+                set_clause = ', '.join(f"{f} = ?" for f in fields)
+                cursor.executemany(
+                    f"UPDATE positions SET {set_clause}, last_update = CURRENT_TIMESTAMP WHERE id = ?",
+                    params_list
+                )
+                updated += len(params_list)
+        
+        return updated
+    
     def close_position(self, position_id: int, exit_price: float, exit_reason: str = 'manual') -> bool:
         """포지션 종료"""
         # 포지션 정보 조회
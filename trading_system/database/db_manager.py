@@ -125,6 +125,10 @@ class EnhancedDatabaseManager:
         """포지션 업데이트"""
         return self.position_dao.update_position(position_id, update_data)
     
+    def update_positions_batch(self, updates: Dict[int, Dict[str, Any]]) -> int:
+        """포지션 일괄 업데이트 (write-behind flush용)"""
+        return self.position_dao.update_positions_batch(updates)
+    
     def close_position(self, position_id: int, exit_price: float, exit_reason: str = 'manual') -> bool:
         """포지션 종료"""
         return self.position_dao.close_position(position_id, exit_price, exit_reason)
@@ -153,14 +157,7 @@ class EnhancedDatabaseManager:
         """Kelly fraction 조회"""
         try:
             if self.performance_dao:
-                kelly_data = self.performance_dao.get_kelly_data(symbol)
-                # Kelly fraction 계산 로직 (간단한 구현)
-                total_trades = kelly_data.get('total_trades', 0)
-                winning_trades = kelly_data.get('winning_trades', 0)
-                if total_trades > 0:
-                    win_rate = winning_trades / total_trades
-                    return min(win_rate, 0.25)  # 최대 25%로 제한
-                return 0.1  # 기본값
+                return self.performance_dao.get_kelly_fraction(symbol)
             return 0.1
         except Exception as e:
             self.logger.error(f"Kelly fraction 조회 실패: {e}")
@@ -237,6 +234,44 @@ class EnhancedDatabaseManager:
         except Exception as e:
             self.logger.error(f"Kelly 추적 업데이트 실패: {e}")
     
+    def save_realized_fill(self, **fill_data) -> Optional[int]:
+        """부분 청산 실현 손익 저장"""
+        try:
+            if self.performance_dao:
+                return self.performance_dao.save_realized_fill(fill_data)
+        except Exception as e:
+            self.logger.error(f"부분 청산 손익 저장 실패: {e}")
+    
+    def get_daily_realized_pnl(self, since: str) -> Dict[str, float]:
+        """일별 실현 손익 (USDT) 조회"""
+        try:
+            if self.performance_dao:
+                return self.performance_dao.get_daily_realized_pnl(since)
+            return {}
+        except Exception as e:
+            self.logger.error(f"일별 실현 손익 조회 실패: {e}")
+            return {}
+    
+    def get_kelly_windows(self, window: int) -> Dict[str, List[float]]:
+        """심볼별 Kelly 거래 윈도우 조회"""
+        try:
+            if self.performance_dao:
+                return self.performance_dao.get_kelly_windows(window)
+            return {}
+        except Exception as e:
+            self.logger.error(f"Kelly 윈도우 조회 실패: {e}")
+            return {}
+    
+    def save_kelly_state(self, symbol: str, trades: List[float], stats: Dict[str, float]) -> bool:
+        """Kelly 윈도우 저장"""
+        try:
+            if self.performance_dao:
+                return self.performance_dao.save_kelly_state(symbol, trades, stats)
+            return False
+        except Exception as e:
+            self.logger.error(f"Kelly 상태 저장 실패: {e}")
+            return False
+    
     def update_daily_performance(self, date: str, performance_data: Dict):
         """Update daily performance"""
         try:
@@ -4,5 +4,6 @@ Engine module for the trading system
 
 from .advanced_trading_engine import AdvancedTradingEngine
 from .trading_engine import TradingEngine
+from .cycle_pacer import CyclePacer
 
-__all__ = ['AdvancedTradingEngine', 'TradingEngine']
\ No newline at end of file
+__all__ = ['AdvancedTradingEngine', 'TradingEngine', 'CyclePacer']
\ No newline at end of file
@@ -35,6 +35,7 @@ try:
     from ..utils.balance_safe_handler import balance_handler
     from ..utils.telegram_safe_formatter import telegram_formatter
     from ..utils.websocket_resilient_manager import ws_manager
+    from .cycle_pacer import CyclePacer
 except ImportError:
     import sys
     import os
@@ -60,6 +61,7 @@ except ImportError:
     from indicators.technical import EnhancedTechnicalIndicators
     from strategies.btc_strategy import BTCTradingStrategy
     from strategies.eth_strategy import ETHTradingStrategy
+    from engine.cycle_pacer import CyclePacer
 
 
 class AdvancedTradingEngine:
@@ -74,9 +76,12 @@ class AdvancedTradingEngine:
         self.exchange = EnhancedBitgetExchangeManager(config)
         self.notifier = NotificationManager(config)
         self.position_manager = PositionManager(config, self.exchange, self.db, self.notifier)
-        self.risk_manager = RiskManager(config, self.db)
-        self.capital_tracker = CapitalTracker(config, self.db, self.notifier, self.exchange)
+        self.risk_manager = RiskManager(config, self.db, self.exchange.impact_estimator,
+                                        self.position_manager.risk_state)
+        self.capital_tracker = CapitalTracker(config, self.db, self.notifier, self.exchange,
+                                              self.position_manager.reconciler, self.position_manager.risk_state)
         self.performance_analyzer = PerformanceAnalyzer(self.db)
+        self.cycle_pacer = CyclePacer(config, self.exchange)
         
         # Analysis components
         self.multi_tf_analyzer = MultiTimeframeAnalyzer(config)
@@ -246,6 +251,10 @@ class AdvancedTradingEngine:
                     self.logger.warning(f"{symbol} 데이터 부족")
                     return
                 
+                if df.attrs.get('degraded'):
+                    self.logger.warning(f"{symbol} {primary_tf} 캔들 누락 복구 중 - 진입 분석 건너뜀")
+                    return
+                
                 # Calculate comprehensive indicators
                 self.logger.info(f"기술적 지표 계산 중...")
                 indicators = EnhancedTechnicalIndicators.calculate_all_indicators(df)
@@ -771,11 +780,10 @@ class AdvancedTradingEngine:
                 )
                 return
             
-            # Get open positions
-            open_positions = self.db.get_open_positions()
+            # Get open positions (shared reconciliation snapshot, no extra query)
+            open_positions = self.position_manager.reconciler.get_snapshot().positions
             
-            # 🚨 Enhanced: Real-time capital tracker check
-            await self.capital_tracker.force_update()  # Get latest data
+            # 🚨 Enhanced: Real-time capital tracker check (snapshot kept current by push/fill events)
             
             # Calculate estimated position cost
             estimated_position_size = total_capital * 0.05  # Initial estimate
@@ -808,8 +816,12 @@ class AdvancedTradingEngine:
             for i, pos in enumerate(open_positions):
                 self.logger.debug(f"   포지션 {i+1}: {pos.get('symbol')} qty={pos.get('quantity')} price={pos.get('entry_price')}")
             
+            # 사전 체결 영향 추정용 최신 호가 (실패 시 깊이 제한 없이 진행)
+            side = 'buy' if signal['direction'] == 'long' else 'sell'
+            await self.exchange.get_orderbook(symbol, self.config.EXECUTION_BOOK_LEVELS)
+            
             allocated_capital = self.risk_manager.calculate_position_allocation(
-                symbol, total_capital, open_positions
+                symbol, total_capital, open_positions, side
             )
             
             # 🔥 CRITICAL FIX: Enhanced checks for None allocated_capital
@@ -860,7 +872,7 @@ class AdvancedTradingEngine:
                                        'signal': signal,
                                        'allocated_capital': allocated_capital,
                                        'current_price': current_price,
-                                       'kelly_fraction': self.db.get_kelly_fraction(symbol)
+                                       'kelly_fraction': self.risk_manager.get_kelly_fraction(symbol)
                                    })
             
             # Open position
@@ -913,28 +925,21 @@ class AdvancedTradingEngine:
             )
     
     async def _handle_emergency(self, symbol: str, news_sentiment: Dict):
-        """Handle emergency news situation"""
+        """Handle emergency news situation - 동시 청산 후 기록/알림"""
         self.logger.warning(f"🚨 {symbol} 긴급 상황")
         
+        # Flatten first: DB 기록과 알림은 거래소 청산 확인 이후
+        report = await self.position_manager.emergency_flatten([symbol], '긴급_뉴스')
+        
         # Log emergency
         self.db.log_system_event('CRITICAL', 'Emergency',
                                f"{symbol} 긴급 상황 감지",
-                               {'news': news_sentiment})
-        
-        # Get all positions for the symbol
-        positions = self.db.get_open_positions(symbol)
+                               {'news': news_sentiment, 'flatten': report})
         
-        if positions:
-            self.logger.info(f"{symbol} {len(positions)}개 포지션 마감 중")
-            
-            # Close all positions
-            for position in positions:
-                try:
-                    await self.position_manager._close_position(
-                        position, '긴급_뉴스', position.get('current_price', 0)
-                    )
-                except Exception as e:
-                    self.logger.error(f"포지션 {position['id']} 마감 실패: {e}")
+        if report['failed']:
+            action = f"청산 실패 ({', '.join(report['failed'])}) - 수동 확인 필요"
+        else:
+            action = f"모든 포지션 마감됨 ({report['positions_closed']}개, {report['time_to_flat']:.2f}초)"
         
         # Send emergency notification
         await self.notifier.send_notification(
@@ -942,7 +947,7 @@ class AdvancedTradingEngine:
             f"뉴스: {news_sentiment.get('latest_news', '알 수 없음')}\n"
             f"감성: {news_sentiment.get('sentiment', 0):.2f}\n"
             f"영향: {news_sentiment.get('impact', '알 수 없음')}\n\n"
-            f"조치: 모든 포지션 마감됨",
+            f"조치: {action}",
             priority='emergency'
         )
     
@@ -982,21 +987,37 @@ class AdvancedTradingEngine:
             # Update ML predictions with results
             await self.update_ml_predictions()
             
-            # Analyze each symbol
-            for symbol in self.config.SYMBOLS:
+            # Newly closed bars into the exposure covariance (cached candles)
+            try:
+                await self.risk_manager.refresh_exposure(self.exchange)
+            except Exception as e:
+                self.logger.warning(f"익스포저 공분산 갱신 실패: {e}")
+            
+            # ATR for pre-computed stops attached to entry orders
+            await self.position_manager.prime_stop_inputs(self.config.SYMBOLS)
+            
+            # Analyze symbols that are due (volatile symbols more often)
+            for symbol in self.cycle_pacer.due_symbols(self.config.SYMBOLS):
+                failed = False
                 try:
                     await self.analyze_and_trade(symbol)
                     
-                    # Small delay between symbols to avoid rate limits
-                    await asyncio.sleep(2)
-                    
                 except Exception as e:
+                    failed = True
                     self.logger.error(f"{symbol} 거래 사이클 오류: {e}")
-                    await self.notifier.send_error_notification(
-                        f"{symbol} 거래 사이클 오류",
-                        str(e),
-                        "TradingCycle"
-                    )
+                    # 연속 실패 중에는 첫 실패만 알림 (재시도는 백오프 간격으로)
+                    if not self.cycle_pacer.failures.get(symbol):
+                        await self.notifier.send_error_notification(
+                            f"{symbol} 거래 사이클 오류",
+                            str(e),
+                            "TradingCycle"
+                        )
+                finally:
+                    # 실패해도 다음 분석 시각을 예약해 같은 심볼이 매초 재시도되지 않도록
+                    await self.cycle_pacer.observe(symbol, self._get_primary_timeframe(symbol), failed=failed)
+                
+                # Delay between symbols scaled by rate-limit headroom
+                await asyncio.sleep(self.cycle_pacer.symbol_gap())
             
             # After analyzing all symbols, manage positions
             self.logger.info("\n모든 포지션 관리 중...")
@@ -1060,6 +1081,10 @@ Kelly 평균: {daily_perf['kelly_fraction']:.3f}
         except Exception as e:
             self.logger.error(f"성과 업데이트 전송 실패: {e}")
     
+    def get_next_cycle_delay(self) -> float:
+        """Seconds until the next symbol is due for analysis"""
+        return self.cycle_pacer.seconds_until_next(self.config.SYMBOLS)
+    
     def get_system_status(self) -> Dict:
         """Get enhanced comprehensive system status with health metrics"""
         uptime = datetime.now() - self.startup_time
@@ -1256,6 +1281,11 @@ Kelly 평균: {daily_perf['kelly_fraction']:.3f}
                     except (asyncio.CancelledError, asyncio.TimeoutError):
                         pass
             
+            # Flush pending position changes before the DB goes away
+            if hasattr(self, 'position_manager'):
+                await self.position_manager.shutdown()
+                self.logger.info("✅ 포지션 북 저장 완료")
+            
             # 2. Shutdown capital tracker (has background tasks)
             if hasattr(self, 'capital_tracker'):
                 await self.capital_tracker.shutdown()
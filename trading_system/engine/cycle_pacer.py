@@ -0,0 +1,141 @@
+"""
+Adaptive Cycle Pacer
+Schedules per-symbol analysis from rate-limit headroom and recent volatility
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Import handling for both direct and package imports
+try:
+    from ..config.config import TradingConfig
+except ImportError:
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config.config import TradingConfig
+
+
+class CyclePacer:
+    """Per-symbol pacing: volatile symbols are analysed sooner, quiet ones later"""
+
+    def __init__(self, config: TradingConfig, exchange, baseline_alpha: float = 0.05):
+        self.config = config
+        self.exchange = exchange
+        self.baseline_alpha = baseline_alpha
+        self.logger = logging.getLogger(__name__)
+
+        self.next_due: Dict[str, float] = {}
+        self.intervals: Dict[str, float] = {}
+        self.atr_percent: Dict[str, float] = {}
+        self.atr_baseline: Dict[str, float] = {}
+        self.failures: Dict[str, int] = {}
+
+    def get_headroom(self) -> float:
+        """거래소 레이어의 REST 예산 여유율"""
+        try:
+            return self.exchange.get_rate_limit_headroom()
+        except Exception:
+            return 1.0
+
+    def _headroom_stretch(self, headroom: float) -> float:
+        """여유율이 낮으면 모든 간격을 비례해서 늘림"""
+        low = self.config.PACING_LOW_HEADROOM
+        if headroom >= low:
+            return 1.0
+        return low / max(headroom, 0.05)
+
+    def get_activity(self, symbol: str) -> float:
+        """Recent ATR% relative to the symbol's own EWMA baseline (1.0 = normal)"""
+        atr = self.atr_percent.get(symbol)
+        baseline = self.atr_baseline.get(symbol)
+        if not atr or not baseline:
+            return 1.0
+        return atr / baseline
+
+    @staticmethod
+    def _latest_atr_percent(df, period: int = 14) -> Optional[float]:
+        """최근 period 봉의 ATR을 종가 대비 %로 계산"""
+        if df is None or len(df) <= period:
+            return None
+        high = df['high'].to_numpy(dtype=float)[-(period + 1):]
+        low = df['low'].to_numpy(dtype=float)[-(period + 1):]
+        close = df['close'].to_numpy(dtype=float)[-(period + 1):]
+        prev_close = close[:-1]
+        tr = np.maximum(high[1:] - low[1:],
+                        np.maximum(np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)))
+        if close[-1] <= 0:
+            return None
+        return float(tr.mean() / close[-1] * 100)
+
+    async def observe(self, symbol: str, timeframe: str, failed: bool = False):
+        """분석 직후(실패 포함) 변동성을 갱신하고 다음 분석 시각 예약 (캐시된 캔들 사용)"""
+        try:
+            df = await self.exchange.fetch_ohlcv_with_cache(symbol, timeframe)
+            atr_pct = self._latest_atr_percent(df)
+            if atr_pct:
+                self.atr_percent[symbol] = atr_pct
+                baseline = self.atr_baseline.get(symbol, atr_pct)
+                self.atr_baseline[symbol] = baseline + self.baseline_alpha * (atr_pct - baseline)
+        except Exception as e:
+            self.logger.debug(f"{symbol} 변동성 갱신 실패: {e}")
+
+        interval = self.get_symbol_interval(symbol)
+        if failed:
+            # 연속 실패 시 지수 백오프 (최대 PACING_MAX_INTERVAL)
+            self.failures[symbol] = self.failures.get(symbol, 0) + 1
+            backoff = interval * 2 ** min(self.failures[symbol] - 1, 6)
+            interval = max(interval, min(backoff, float(self.config.PACING_MAX_INTERVAL)))
+        else:
+            self.failures.pop(symbol, None)
+        self.intervals[symbol] = interval
+        self.next_due[symbol] = time.time() + interval
+
+    def get_symbol_interval(self, symbol: str) -> float:
+        """Analysis interval for symbol from volatility and API headroom"""
+        base = self.config.TRADING_CYCLE_INTERVAL / max(self.get_activity(symbol), 1e-6)
+        interval = min(max(base, self.config.PACING_MIN_INTERVAL), self.config.PACING_MAX_INTERVAL)
+        return interval * self._headroom_stretch(self.get_headroom())
+
+    def due_symbols(self, symbols: List[str]) -> List[str]:
+        """분석 시각이 된 심볼 (변동성 높은 순)"""
+        now = time.time()
+        due = [s for s in symbols if self.next_due.get(s, 0.0) <= now]
+        return sorted(due, key=self.get_activity, reverse=True)
+
+    def symbol_gap(self) -> float:
+        """Delay between symbols, longer as API headroom shrinks"""
+        headroom = self.get_headroom()
+        gap_min = self.config.PACING_MIN_SYMBOL_GAP
+        gap_max = self.config.PACING_MAX_SYMBOL_GAP
+        return gap_min + (gap_max - gap_min) * (1.0 - headroom)
+
+    def seconds_until_next(self, symbols: List[str]) -> float:
+        """Sleep until the next symbol is due"""
+        now = time.time()
+        due_times = [self.next_due.get(s, 0.0) for s in symbols]
+        if not due_times:
+            return float(self.config.TRADING_CYCLE_INTERVAL)
+        wait = min(due_times) - now
+        return min(max(wait, 1.0), float(self.config.PACING_MAX_INTERVAL))
+
+    def get_status(self) -> Dict:
+        """페이싱 상태"""
+        now = time.time()
+        return {
+            'headroom': self.get_headroom(),
+            'symbol_gap': self.symbol_gap(),
+            'symbols': {
+                s: {
+                    'atr_percent': self.atr_percent.get(s),
+                    'activity': self.get_activity(s),
+                    'interval': self.intervals.get(s),
+                    'failures': self.failures.get(s, 0),
+                    'due_in': max(0.0, self.next_due.get(s, 0.0) - now)
+                }
+                for s in self.next_due
+            }
+        }
@@ -13,10 +13,15 @@ try:
     from ..config.config import TradingConfig
     from ..utils.errors import ExchangeError
     from ..utils.balance_safe_handler import balance_handler
+    from ..utils.impact_estimator import ImpactEstimator
     from .components.utils import ExchangeUtils
     from .components.websocket_manager import WebSocketManager
     from .components.order_manager import OrderManager
     from .components.data_manager import DataManager
+    from .components.market_metadata import MarketMetadataManager
+    from .components.backfill_manager import BackfillManager
+    from .components.private_stream import PrivateStreamManager
+    from .components.execution_algos import ExecutionAlgoEngine
 except ImportError:
     import sys
     import os
@@ -24,10 +29,15 @@ except ImportError:
     from config.config import TradingConfig
     from utils.errors import ExchangeError
     from utils.balance_safe_handler import balance_handler
+    from utils.impact_estimator import ImpactEstimator
     from .components.utils import ExchangeUtils
     from .components.websocket_manager import WebSocketManager
     from .components.order_manager import OrderManager
     from .components.data_manager import DataManager
+    from .components.market_metadata import MarketMetadataManager
+    from .components.backfill_manager import BackfillManager
+    from .components.private_stream import PrivateStreamManager
+    from .components.execution_algos import ExecutionAlgoEngine
 
 
 class EnhancedBitgetExchangeManager:
@@ -51,10 +61,21 @@ class EnhancedBitgetExchangeManager:
         })
         
         # Initialize components
-        self.utils = ExchangeUtils(config)
-        self.ws_manager = WebSocketManager(config)
-        self.order_manager = OrderManager(config, self.exchange, self.utils, self.ws_manager)
-        self.data_manager = DataManager(config, self.exchange, self.utils, self.ws_manager)
+        self.market_metadata = MarketMetadataManager(config, self.exchange)
+        self.utils = ExchangeUtils(config, self.market_metadata)
+        self.utils.track_requests(self.exchange)
+        self.ws_manager = WebSocketManager(config, self.exchange)
+        self.private_stream = PrivateStreamManager(config, self.exchange, self.utils)
+        self.impact_estimator = ImpactEstimator(config.PRETRADE_BOOK_MAX_AGE)
+        self.order_manager = OrderManager(config, self.exchange, self.utils, self.ws_manager, self.private_stream,
+                                          self.impact_estimator)
+        self.data_manager = DataManager(config, self.exchange, self.utils, self.ws_manager,
+                                        self.market_metadata, self.private_stream, self.impact_estimator)
+        self.execution = ExecutionAlgoEngine(config, self, self.utils, self.impact_estimator)
+        
+        # 공유 잔고 캐시: 푸시 잔고로 갱신, 체결 시 무효화
+        self.private_stream.add_listener('account', balance_handler.update_from_push)
+        self.private_stream.add_listener('fill', balance_handler.invalidate)
         
         # Rate limiting
         self.rate_limiter = self.utils.create_rate_limiter()
@@ -69,12 +90,21 @@ class EnhancedBitgetExchangeManager:
         try:
             self.logger.info("🚀 Bitget Exchange Manager 초기화 시작")
             
+            # Load swap market specifications (disk cache first)
+            await self.market_metadata.start()
+            
             # Set position mode to one-way
             await self.order_manager.set_position_mode_oneway()
             
+            # Apply leverage/margin mode once so orders skip the per-order round trip
+            await self.order_manager.prime_leverage(list(self.config.LEVERAGE.keys()))
+            
             # Start WebSocket manager
             await self.ws_manager.start()
             
+            # Orders, fills, positions and balance arrive by push; REST only reconciles
+            await self.private_stream.start()
+            
             # Wait a bit for initial WebSocket connection
             await asyncio.sleep(2)
             
@@ -92,8 +122,13 @@ class EnhancedBitgetExchangeManager:
             
             # Stop WebSocket manager
             await self.ws_manager.stop()
+            await self.private_stream.stop()
+            
+            # Stop market metadata refresh
+            await self.market_metadata.stop()
             
-            # Clear caches
+            # Stop candle gap repair and clear caches
+            await self.data_manager.gap_monitor.stop()
             self.data_manager.clear_cache()
             
             self.logger.info("✅ Bitget Exchange Manager 종료 완료")
@@ -112,25 +147,62 @@ class EnhancedBitgetExchangeManager:
         """Get current price for symbol"""
         return self.data_manager.get_current_price(symbol)
     
+    async def refresh_prices(self, symbols: List[str]) -> int:
+        """Refresh prices for several symbols with one batched request"""
+        return await self.ws_manager.poll_prices(symbols)
+    
+    def add_price_listener(self, listener):
+        """Subscribe to price store updates"""
+        self.ws_manager.add_price_listener(listener)
+    
+    def add_private_listener(self, channel: str, listener):
+        """Subscribe to pushed 'orders', 'fill', 'positions' or 'account' updates"""
+        self.private_stream.add_listener(channel, listener)
+    
+    def update_tracked_positions(self, symbols: List[str]):
+        """Update symbols with open positions for price fallback polling"""
+        self.ws_manager.update_tracked_positions(symbols)
+    
     # Order management methods
     async def place_order(self, symbol: str, side: str, amount: float, 
                          order_type: str = 'market', price: Optional[float] = None,
                          params: Optional[Dict] = None) -> Dict:
         """Place order"""
-        return await self.order_manager.place_order(symbol, side, amount, order_type, price, params)
+        result = await self.order_manager.place_order(symbol, side, amount, order_type, price, params)
+        balance_handler.invalidate()
+        return result
+    
+    async def execute_order(self, symbol: str, side: str, amount: float, algo: str = 'auto', **kwargs) -> Dict:
+        """Market-style order sliced by TWAP/iceberg/participation when it is large for the book"""
+        return await self.execution.execute(symbol, side, amount, algo, **kwargs)
+    
+    def start_execution(self, algo: str, symbol: str, side: str, amount: float, **kwargs) -> str:
+        """Run an execution algorithm in the background; returns a job id"""
+        return self.execution.start(algo, symbol, side, amount, **kwargs)
+    
+    def cancel_execution(self, job_id: str) -> bool:
+        """Stop a running execution algorithm after its in-flight child order"""
+        return self.execution.cancel(job_id)
+    
+    async def fetch_tpsl_plans(self, symbol: str) -> List[Dict]:
+        """Open position TP/SL plan orders (preset TP/SL attached to entries)"""
+        return await self.order_manager.fetch_tpsl_plans(symbol)
     
     async def place_stop_loss_order(self, symbol: str, side: str, amount: float, 
                                    stop_price: float) -> Dict:
         """Place stop loss order"""
         return await self.order_manager.place_stop_loss_order(symbol, side, amount, stop_price)
     
-    async def modify_stop_loss(self, symbol: str, order_id: str, new_stop_price: float) -> Dict:
+    async def modify_stop_loss(self, symbol: str, order_id: str, new_stop_price: float,
+                               side: Optional[str] = None, amount: Optional[float] = None) -> Dict:
         """Modify existing stop loss order"""
-        return await self.order_manager.modify_stop_loss(symbol, order_id, new_stop_price)
+        return await self.order_manager.modify_stop_loss(symbol, order_id, new_stop_price, side, amount)
     
     async def close_position(self, symbol: str, reason: str = "manual") -> Dict:
         """Close all positions for symbol"""
-        return await self.order_manager.close_position(symbol, reason)
+        result = await self.order_manager.close_position(symbol, reason)
+        balance_handler.invalidate()
+        return result
     
     async def set_leverage(self, symbol: str, leverage: int):
         """Set leverage for symbol"""
@@ -145,9 +217,14 @@ class EnhancedBitgetExchangeManager:
         """Fetch OHLCV data with caching"""
         return await self.data_manager.fetch_ohlcv_with_cache(symbol, timeframe, limit)
     
+    def is_series_degraded(self, symbol: str, timeframe: str) -> bool:
+        """Whether the cached candle series has unrepaired gaps"""
+        return self.data_manager.is_series_degraded(symbol, timeframe)
+    
     async def get_balance(self) -> Dict:
-        """Get account balance - BalanceSafeHandler 적용"""
-        return await balance_handler.get_safe_balance(self)
+        """Get account balance - 엔진/자본 추적기/API가 공유하는 BalanceSafeHandler 캐시"""
+        # 푸시 잔고는 리스너가 캐시에 바로 반영, 캐시 만료 시에도 푸시가 살아있으면 REST 호출 없음
+        return await balance_handler.get_safe_balance(self, max_cache_age=self.config.BALANCE_CACHE_TIMEOUT)
     
     async def get_balance_async(self) -> Dict:
         """직접 잔고 조회 (BalanceSafeHandler에서 사용)"""
@@ -165,10 +242,22 @@ class EnhancedBitgetExchangeManager:
         """Get orderbook data"""
         return await self.data_manager.get_orderbook(symbol, limit)
     
+    def estimate_impact(self, symbol: str, side: str, amount: float = None, notional: float = None):
+        """Expected VWAP/slippage/impact from the latest fetched order book (None if stale)"""
+        return self.impact_estimator.estimate(symbol, side, amount=amount, notional=notional)
+    
     async def get_market_info(self, symbol: str) -> Dict:
         """Get market information"""
         return await self.data_manager.get_market_info(symbol)
     
+    def get_market_spec(self, symbol: str):
+        """Get preloaded contract specification for symbol"""
+        return self.market_metadata.get_spec(self.format_symbol(symbol))
+    
+    def get_tradable_symbols(self, quote: str = 'USDT') -> List[str]:
+        """Get all loaded swap symbols for symbol scanning"""
+        return self.market_metadata.get_symbols(quote)
+    
     async def get_trading_fees(self, symbol: str) -> Dict:
         """Get trading fees"""
         return await self.data_manager.get_trading_fees(symbol)
@@ -177,6 +266,13 @@ class EnhancedBitgetExchangeManager:
         """Get recent trades"""
         return await self.data_manager.get_recent_trades(symbol, limit)
     
+    async def backfill_ohlcv(self, symbol: str, timeframe: str, start_ms: int, end_ms: int,
+                             output_path: str, max_concurrency: int = 4) -> Dict:
+        """Download historical candles in parallel under the shared rate limit"""
+        backfiller = BackfillManager(self.exchange, self.utils, self.rate_limiter,
+                                     max_concurrency=max_concurrency)
+        return await backfiller.backfill(self.format_symbol(symbol), timeframe, start_ms, end_ms, output_path)
+    
     # Utility methods
     async def calculate_position_size(self, symbol: str, position_value: float) -> float:
         """Calculate position size"""
@@ -201,6 +297,10 @@ class EnhancedBitgetExchangeManager:
         """Check and enforce rate limits"""
         await self.utils.check_rate_limit(self.rate_limiter)
     
+    def get_rate_limit_headroom(self) -> float:
+        """Get unused fraction of the REST call budget"""
+        return self.utils.get_rate_limit_headroom()
+    
     # Health check methods
     def get_health_status(self) -> Dict:
         """Get overall health status"""
@@ -208,7 +308,18 @@ class EnhancedBitgetExchangeManager:
             'ws_connected': self.ws_manager.is_connected(),
             'error_count': self.error_count,
             'max_errors': self.max_errors,
+            'rate_limit_headroom': self.get_rate_limit_headroom(),
             'cache_stats': self.data_manager.get_cache_stats(),
+            'market_metadata': self.market_metadata.get_status(),
+            'candle_gaps': self.data_manager.get_gap_metrics(),
+            'stop_amends': self.order_manager.stop_stats,
+            'order_idempotency': {**self.order_manager.order_id_stats, 'in_flight': len(self.order_manager._inflight_orders)},
+            'private_stream': self.private_stream.get_status(),
+            'leverage_cache': {
+                **self.order_manager.leverage_stats,
+                'symbols': {s: {'leverage': lev, 'margin_mode': mode}
+                            for s, (lev, mode) in self.order_manager.leverage_cache.items()}
+            },
             'components': {
                 'utils': 'active',
                 'websocket': 'active' if self.ws_manager.is_connected() else 'inactive',
@@ -7,10 +7,24 @@ from .utils import ExchangeUtils
 from .websocket_manager import WebSocketManager
 from .order_manager import OrderManager
 from .data_manager import DataManager
+from .market_metadata import MarketMetadataManager, MarketSpec
+from .backfill_manager import BackfillManager
+from .gap_monitor import CandleGapMonitor
+from .private_stream import PrivateStreamManager
+from .execution_algos import ExecutionAlgoEngine, ExecutionReport
+from .sim_matching import SimulatedMatchingEngine
 
 __all__ = [
     'ExchangeUtils',
     'WebSocketManager', 
     'OrderManager',
-    'DataManager'
+    'DataManager',
+    'MarketMetadataManager',
+    'MarketSpec',
+    'BackfillManager',
+    'CandleGapMonitor',
+    'PrivateStreamManager',
+    'ExecutionAlgoEngine',
+    'ExecutionReport',
+    'SimulatedMatchingEngine'
 ]
\ No newline at end of file
@@ -0,0 +1,280 @@
+"""
+Historical Candle Backfill Manager
+Parallel, resumable OHLCV downloader writing compact columnar .npz files
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from ...utils.errors import DataError
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from utils.errors import DataError
+
+
+OHLCV_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+def save_candles(path: str, candles: np.ndarray):
+    """(N, 6) OHLCV 배열을 컬럼별 압축 .npz로 저장"""
+    tmp_path = f"{path}.tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        timestamp=candles[:, 0].astype(np.int64),
+        open=candles[:, 1], high=candles[:, 2], low=candles[:, 3],
+        close=candles[:, 4], volume=candles[:, 5]
+    )
+    os.replace(tmp_path, path)
+
+
+def load_candles(path: str) -> pd.DataFrame:
+    """Load a backfilled .npz file as a timestamp-indexed OHLCV DataFrame"""
+    with np.load(path) as data:
+        df = pd.DataFrame({col: data[col] for col in OHLCV_COLUMNS})
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index('timestamp', inplace=True)
+    return df
+
+
+class BackfillManager:
+    """Downloads historical candles in concurrent chunks under a shared rate limit"""
+
+    def __init__(self, exchange, utils=None, rate_limiter: Optional[Dict] = None,
+                 max_concurrency: int = 4, page_limit: int = 200, max_retries: int = 3):
+        self.exchange = exchange
+        self.utils = utils
+        self.rate_limiter = rate_limiter or (utils.create_rate_limiter() if utils else None)
+        self.max_concurrency = max_concurrency
+        self.page_limit = page_limit
+        self.max_retries = max_retries
+        self.logger = logging.getLogger(__name__)
+
+        self.stats = {'candles': 0, 'requests': 0, 'retries': 0, 'chunks_skipped': 0}
+
+    def _timeframe_ms(self, timeframe: str) -> int:
+        """Timeframe string ('15m') to milliseconds"""
+        return int(self.exchange.parse_timeframe(timeframe) * 1000)
+
+    def _plan_chunks(self, start_ms: int, end_ms: int, timeframe_ms: int,
+                     candles_per_chunk: int) -> List[Tuple[int, int]]:
+        """요청 구간을 [start, end) 청크로 분할"""
+        span = timeframe_ms * candles_per_chunk
+        start_ms -= start_ms % timeframe_ms
+        return [(s, min(s + span, end_ms)) for s in range(start_ms, end_ms, span)]
+
+    async def backfill(self, symbol: str, timeframe: str, start_ms: int, end_ms: int,
+                       output_path: str, candles_per_chunk: int = 1000) -> Dict:
+        """Backfill [start_ms, end_ms) into output_path, resuming from any checkpoint"""
+        started = time.time()
+        timeframe_ms = self._timeframe_ms(timeframe)
+        chunks = self._plan_chunks(start_ms, end_ms, timeframe_ms, candles_per_chunk)
+
+        parts_dir = f"{output_path}.parts"
+        checkpoint_path = os.path.join(parts_dir, 'checkpoint.json')
+        os.makedirs(parts_dir, exist_ok=True)
+        checkpoint = self._load_checkpoint(checkpoint_path, symbol, timeframe)
+
+        pending = [c for c in chunks if str(c[0]) not in checkpoint['done']]
+        self.stats['chunks_skipped'] = len(chunks) - len(pending)
+        if self.stats['chunks_skipped']:
+            self.logger.info(f"🔄 {symbol} {timeframe} 백필 재개: {self.stats['chunks_skipped']}/{len(chunks)} 청크 완료됨")
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        checkpoint_lock = asyncio.Lock()
+
+        empty: List[Tuple[int, int]] = []
+
+        async def run_chunk(chunk: Tuple[int, int]):
+            async with semaphore:
+                candles = await self._fetch_chunk(symbol, timeframe, timeframe_ms, *chunk)
+                if not len(candles):
+                    # 빈 응답은 일시 오류일 수 있으므로 상장 이전으로 확인될 때만 완료 처리
+                    empty.append(chunk)
+                    return
+                save_candles(os.path.join(parts_dir, f"{chunk[0]}.npz"), candles)
+                async with checkpoint_lock:
+                    checkpoint['done'][str(chunk[0])] = int(len(candles))
+                    if candles[0, 0] > chunk[0]:
+                        # 청크 중간부터 데이터 시작 = 상장 후보 (가장 이른 데이터 청크일 때만 인정)
+                        checkpoint['listing_candle'] = int(min(checkpoint.get('listing_candle') or candles[0, 0], candles[0, 0]))
+                    self._save_checkpoint(checkpoint_path, checkpoint)
+                self.stats['candles'] += len(candles)
+
+        results = await asyncio.gather(*(run_chunk(c) for c in pending), return_exceptions=True)
+        failed = [r for r in results if isinstance(r, Exception)]
+        if failed:
+            self.logger.error(f"❌ {symbol} {timeframe} 백필 청크 {len(failed)}개 실패 - 다시 실행하면 이어서 진행: {failed[0]}")
+
+        unresolved = {str(c[0]) for c, r in zip(pending, results) if isinstance(r, Exception)}
+        listing_ms, inferred = self._listing_ms(symbol, checkpoint, chunks, unresolved)
+        # 캔들에서 추정한 상장 시점은 이전 실행에서도 비어 있던 청크에만 적용 (일시적 빈 응답 배제)
+        seen_empty = set(checkpoint.get('empty_chunks', []))
+        pre_listing = [c for c in empty if listing_ms is not None and c[1] <= listing_ms
+                       and (not inferred or str(c[0]) in seen_empty)]
+        empty = [c for c in empty if c not in pre_listing]
+        for chunk in pre_listing:
+            checkpoint['done'][str(chunk[0])] = 0
+        checkpoint['empty_chunks'] = [str(c[0]) for c in empty]
+        self._save_checkpoint(checkpoint_path, checkpoint)
+        if empty:
+            self.logger.warning(f"⚠️ {symbol} {timeframe} 빈 청크 {len(empty)}개 - 다음 실행에서 재시도")
+
+        total = self._merge_parts(parts_dir, checkpoint, output_path)
+        elapsed = max(time.time() - started, 1e-9)
+        fetched = sum(checkpoint['done'].get(str(c[0]), 0) for c in pending)
+        result = {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'output_path': output_path,
+            'candles': total,
+            'fetched': fetched,
+            'elapsed_seconds': elapsed,
+            'candles_per_second': fetched / elapsed,
+            'requests': self.stats['requests'],
+            'retries': self.stats['retries'],
+            'chunks': len(chunks),
+            'chunks_resumed': self.stats['chunks_skipped'],
+            'chunks_failed': len(failed),
+            'chunks_empty': len(empty),
+            'chunks_pre_listing': len(pre_listing),
+            'complete': not failed and not empty
+        }
+        self.logger.info(f"✅ {symbol} {timeframe} 백필 완료: {total}개 캔들, "
+                         f"{result['candles_per_second']:.0f} candles/sec")
+        return result
+
+    def _listing_ms(self, symbol: str, checkpoint: Dict, chunks: List[Tuple[int, int]],
+                    unresolved: set) -> Tuple[Optional[int], bool]:
+        """(listing time, inferred) from market info, else from the earliest non-empty chunk if it starts mid-chunk"""
+        try:
+            created = (self.exchange.market(symbol) or {}).get('created')
+        except Exception:
+            created = None
+        if created:
+            return int(created), False
+
+        listing = checkpoint.get('listing_candle')
+        if not listing:
+            return None, False
+        for start, end in chunks:
+            if str(start) in unresolved:
+                return None, False  # 앞선 청크 실패 - 더 이른 데이터 여부 미확인
+            if checkpoint['done'].get(str(start)):
+                # 중간 공백(장애 등)이 아니라 첫 데이터 청크에서 시작할 때만 상장으로 간주
+                return (int(listing), True) if start < listing < end else (None, False)
+        return None, False
+
+    async def _fetch_chunk(self, symbol: str, timeframe: str, timeframe_ms: int,
+                           chunk_start: int, chunk_end: int) -> np.ndarray:
+        """한 청크를 페이지 단위로 수집"""
+        rows = []
+        since = chunk_start
+        while since < chunk_end:
+            page = await self._fetch_page(symbol, timeframe, since)
+            page = [c for c in page if chunk_start <= c[0] < chunk_end]
+            if not page:
+                break
+            rows.extend(page)
+            since = page[-1][0] + timeframe_ms
+
+        if not rows:
+            return np.empty((0, 6))
+        return np.asarray(rows, dtype=np.float64)[:, :6]
+
+    async def _fetch_page(self, symbol: str, timeframe: str, since: int) -> List[List]:
+        """공유 rate limit 하에 재시도하며 한 페이지 조회"""
+        for attempt in range(self.max_retries):
+            try:
+                if self.utils and self.rate_limiter is not None:
+                    await self.utils.check_rate_limit(self.rate_limiter)
+                self.stats['requests'] += 1
+                return await asyncio.get_event_loop().run_in_executor(
+                    None,
+                    self.exchange.fetch_ohlcv,
+                    symbol,
+                    timeframe,
+                    since,
+                    self.page_limit
+                )
+            except Exception as e:
+                self.stats['retries'] += 1
+                if attempt == self.max_retries - 1:
+                    raise DataError(f"{symbol} {timeframe} 백필 실패 (since={since}): {e}")
+                wait_time = 2 ** attempt
+                self.logger.warning(f"⚠️ 백필 요청 실패, {wait_time}초 후 재시도: {e}")
+                await asyncio.sleep(wait_time)
+        return []
+
+    def _merge_parts(self, parts_dir: str, checkpoint: Dict, output_path: str) -> int:
+        """완료된 청크 파일을 정렬/중복제거 후 하나의 .npz로 병합"""
+        arrays = []
+        for chunk_start, count in checkpoint['done'].items():
+            part_path = os.path.join(parts_dir, f"{chunk_start}.npz")
+            if count and os.path.exists(part_path):
+                with np.load(part_path) as data:
+                    arrays.append(np.column_stack([data[col] for col in OHLCV_COLUMNS]).astype(np.float64))
+
+        if not arrays:
+            return 0
+
+        candles = np.concatenate(arrays)
+        _, unique_idx = np.unique(candles[:, 0], return_index=True)
+        candles = candles[unique_idx]
+        save_candles(output_path, candles)
+        return len(candles)
+
+    def _load_checkpoint(self, path: str, symbol: str, timeframe: str) -> Dict:
+        """체크포인트 로드 (다른 심볼/타임프레임이면 새로 시작)"""
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    checkpoint = json.load(f)
+                if checkpoint.get('symbol') == symbol and checkpoint.get('timeframe') == timeframe:
+                    return checkpoint
+            except Exception as e:
+                self.logger.warning(f"⚠️ 체크포인트 로드 실패, 새로 시작: {e}")
+        return {'symbol': symbol, 'timeframe': timeframe, 'done': {}}
+
+    def _save_checkpoint(self, path: str, checkpoint: Dict):
+        """체크포인트 원자적 저장"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, path)
+
+
+if __name__ == '__main__':
+    import argparse
+    import ccxt
+
+    parser = argparse.ArgumentParser(description='Parallel, resumable OHLCV backfill')
+    parser.add_argument('symbol')
+    parser.add_argument('timeframe')
+    parser.add_argument('start', help='YYYY-MM-DD')
+    parser.add_argument('end', help='YYYY-MM-DD')
+    parser.add_argument('--exchange', default='bitget')
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    exchange = getattr(ccxt, args.exchange)({'enableRateLimit': True, 'options': {'defaultType': 'swap'}})
+    output = args.output or f"{args.symbol.replace('/', '').replace(':', '_')}_{args.timeframe}.npz"
+
+    manager = BackfillManager(exchange, max_concurrency=args.concurrency)
+    summary = asyncio.run(manager.backfill(
+        args.symbol, args.timeframe,
+        int(pd.Timestamp(args.start, tz='UTC').timestamp() * 1000),
+        int(pd.Timestamp(args.end, tz='UTC').timestamp() * 1000),
+        output
+    ))
+    print(json.dumps(summary, indent=2))
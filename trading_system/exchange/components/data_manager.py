@@ -13,27 +13,36 @@ from cachetools import TTLCache
 try:
     from ...config.config import TradingConfig
     from ...utils.errors import ExchangeError
+    from .gap_monitor import CandleGapMonitor
 except ImportError:
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
     from config.config import TradingConfig
     from utils.errors import ExchangeError
+    from exchange.components.gap_monitor import CandleGapMonitor
 
 
 class DataManager:
     """Manages market data fetching and caching"""
     
-    def __init__(self, config: TradingConfig, exchange, utils, ws_manager=None):
+    def __init__(self, config: TradingConfig, exchange, utils, ws_manager=None, market_metadata=None,
+                 private_stream=None, impact_estimator=None):
         self.config = config
         self.exchange = exchange
         self.utils = utils
         self.ws_manager = ws_manager
+        self.market_metadata = market_metadata
+        self.private_stream = private_stream
+        self.impact_estimator = impact_estimator
         self.logger = logging.getLogger(__name__)
         
         # Cache
         self.cache = TTLCache(maxsize=config.INDICATOR_CACHE_SIZE, ttl=config.CACHE_TTL)
         
+        # Gap detection and repair for cached candle series
+        self.gap_monitor = CandleGapMonitor(exchange, utils, on_repaired=self._merge_repaired_bars)
+        
         # Error tracking
         self.error_count = 0
         self.max_errors = 5
@@ -52,11 +61,28 @@ class DataManager:
         
         # Cache the result
         if not df.empty:
+            df = self.gap_monitor.inspect(symbol, timeframe, df)
             self.cache[cache_key] = df
             self.logger.debug(f"데이터 캐시됨: {cache_key}")
         
         return df
     
+    def _merge_repaired_bars(self, symbol: str, timeframe: str, bars: pd.DataFrame):
+        """Merge backfilled bars into every cached frame of the series"""
+        prefix = f"{symbol}_{timeframe}_"
+        for cache_key in [k for k in list(self.cache.keys()) if isinstance(k, str) and k.startswith(prefix)]:
+            cached = self.cache.get(cache_key)
+            if cached is None:
+                continue
+            merged = pd.concat([cached, bars])
+            merged = merged[~merged.index.duplicated(keep='first')].sort_index()
+            merged = merged.iloc[-len(cached):] if len(merged) > len(cached) else merged
+            self.cache[cache_key] = self.gap_monitor.inspect(symbol, timeframe, merged)
+    
+    def is_series_degraded(self, symbol: str, timeframe: str) -> bool:
+        """Whether the cached candle series still has missing bars"""
+        return self.gap_monitor.is_degraded(symbol, timeframe)
+    
     async def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int = 1000) -> pd.DataFrame:
         """Fetch OHLCV data from exchange"""
         try:
@@ -97,6 +123,10 @@ class DataManager:
     async def get_balance(self) -> Dict:
         """Get account balance"""
         try:
+            # Pushed balance from the private stream - no REST call
+            if self.private_stream and self.private_stream.is_live('account'):
+                return self.private_stream.get_balance()
+            
             await self.utils.check_rate_limit(self.utils.create_rate_limiter())
             
             # 🛡️ PAPER_TRADING 모드 체크
@@ -124,6 +154,10 @@ class DataManager:
     async def get_positions(self, symbol: Optional[str] = None) -> List[Dict]:
         """Get current positions"""
         try:
+            # Pushed positions from the private stream - no REST call
+            if self.private_stream and self.private_stream.is_live('positions'):
+                return self.private_stream.get_positions(symbol)
+            
             await self.utils.check_rate_limit(self.utils.create_rate_limiter())
             
             # 🛡️ PAPER_TRADING 모드 체크
@@ -178,6 +212,10 @@ class DataManager:
                 limit
             )
             
+            # 가져온 호가는 사전 체결 영향 추정용 로컬 북으로도 보관
+            if self.impact_estimator:
+                self.impact_estimator.update(symbol, orderbook)
+            
             self.error_count = 0
             return orderbook
             
@@ -187,11 +225,15 @@ class DataManager:
     
     async def get_market_info(self, symbol: str) -> Dict:
         """Get market information for symbol"""
+        market_symbol = self.utils.format_symbol(symbol)
+        
+        # Serve from preloaded metadata without touching the exchange
+        if self.market_metadata and self.market_metadata.is_loaded():
+            return self.market_metadata.get_market_info(market_symbol)
+        
         try:
             await self.utils.check_rate_limit(self.utils.create_rate_limiter())
             
-            market_symbol = self.utils.format_symbol(symbol)
-            
             # Load markets if not already loaded
             if not hasattr(self.exchange, 'markets') or not self.exchange.markets:
                 await asyncio.get_event_loop().run_in_executor(
@@ -210,6 +252,11 @@ class DataManager:
     
     async def get_trading_fees(self, symbol: str) -> Dict:
         """Get trading fees for symbol"""
+        if self.market_metadata:
+            fees = self.market_metadata.get_fees(self.utils.format_symbol(symbol))
+            if fees:
+                return fees
+        
         try:
             market_info = await self.get_market_info(symbol)
             
@@ -236,9 +283,9 @@ class DataManager:
     
     def get_current_price(self, symbol: str) -> Optional[float]:
         """Get current price for symbol"""
-        # Try WebSocket first
-        if self.ws_manager and self.ws_manager.is_connected():
-            price = self.ws_manager.get_current_price(symbol)
+        # Try shared price store first (WebSocket or batched REST fallback)
+        if self.ws_manager:
+            price = self.ws_manager.get_current_price(symbol, max_age=self.config.PRICE_STALE_TIMEOUT * 2)
             if price:
                 return price
         
@@ -276,6 +323,10 @@ class DataManager:
             self.error_count = self.utils.handle_error(e, self.error_count, self.max_errors)
             return []
     
+    def get_gap_metrics(self) -> Dict:
+        """Get candle gap detection and repair metrics"""
+        return self.gap_monitor.get_metrics()
+    
     def clear_cache(self):
         """Clear all cached data"""
         self.cache.clear()
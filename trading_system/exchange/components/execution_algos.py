@@ -0,0 +1,338 @@
+"""
+Execution Algorithms
+TWAP, iceberg and participation-rate slicing with child sizes from local order book depth
+"""
+
+import asyncio
+import itertools
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class ExecutionReport:
+    """Parent order outcome"""
+    job_id: str
+    algo: str
+    symbol: str
+    side: str
+    requested: float
+    filled: float = 0.0
+    notional: float = 0.0
+    arrival_price: float = 0.0
+    child_orders: List[Dict] = field(default_factory=list)
+    started: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    cancelled: bool = False
+
+    @property
+    def average_price(self) -> float:
+        return self.notional / self.filled if self.filled else 0.0
+
+    @property
+    def slippage_bps(self) -> float:
+        """Average fill vs arrival mid, positive = worse for us"""
+        if not self.filled or not self.arrival_price:
+            return 0.0
+        sign = 1 if self.side == 'buy' else -1
+        return sign * (self.average_price - self.arrival_price) / self.arrival_price * 1e4
+
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.job_id,
+            'algo': self.algo,
+            'symbol': self.symbol,
+            'side': self.side,
+            'requested': self.requested,
+            'filled': self.filled,
+            'fill_ratio': self.filled / self.requested if self.requested else 0.0,
+            'average_price': self.average_price,
+            'arrival_price': self.arrival_price,
+            'slippage_bps': self.slippage_bps,
+            'child_orders': len(self.child_orders),
+            'elapsed_seconds': (self.finished or time.time()) - self.started,
+            'cancelled': self.cancelled
+        }
+
+
+class ExecutionAlgoEngine:
+    """
+    Slices parent orders into child orders sized from visible depth.
+
+    venue must provide async get_orderbook(symbol, limit), place_order(symbol, side, amount,
+    order_type, price, params) and get_recent_trades(symbol, limit) - the exchange manager
+    in production, SimulatedMatchingEngine in tests. With an impact_estimator, sizing decisions
+    taken before the first child reuse its cached book while it is fresh.
+    """
+
+    def __init__(self, config, venue, utils=None, impact_estimator=None):
+        self.config = config
+        self.venue = venue
+        self.utils = utils
+        self.impact_estimator = impact_estimator
+        self.logger = logging.getLogger(__name__)
+
+        self.jobs: Dict[str, Tuple[asyncio.Task, ExecutionReport]] = {}
+        self._cancel_flags: Dict[str, asyncio.Event] = {}
+        self._job_seq = itertools.count(1)
+
+    # ------------------------------------------------------------------ sizing
+
+    def _round_amount(self, symbol: str, amount: float) -> float:
+        """Round down to the symbol's lot precision"""
+        precision = self.utils._get_precision(symbol) if self.utils else 8
+        factor = 10 ** precision
+        return math.floor(amount * factor + 1e-9) / factor
+
+    def _min_amount(self, symbol: str) -> float:
+        return self.utils._get_min_amount(symbol) if self.utils else 0.0
+
+    async def _book(self, symbol: str, cached: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """(bids, asks) as (N, 2) arrays of price, amount; cached=True reuses a fresh estimator book"""
+        if cached and self.impact_estimator is not None:
+            levels = self.impact_estimator.get_levels(symbol)
+            if levels is not None:
+                return levels
+        orderbook = await self.venue.get_orderbook(symbol, self.config.EXECUTION_BOOK_LEVELS) or {}
+        bids = np.asarray(orderbook.get('bids') or [], dtype=float).reshape(-1, 2)[:, :2]
+        asks = np.asarray(orderbook.get('asks') or [], dtype=float).reshape(-1, 2)[:, :2]
+        return bids, asks
+
+    @staticmethod
+    def _mid(bids: np.ndarray, asks: np.ndarray) -> float:
+        if len(bids) and len(asks):
+            return (bids[0, 0] + asks[0, 0]) / 2
+        if len(asks):
+            return asks[0, 0]
+        return bids[0, 0] if len(bids) else 0.0
+
+    def _depth_within_band(self, levels: np.ndarray, mid: float, side: str) -> float:
+        """Opposite-side amount reachable within EXECUTION_DEPTH_BAND of mid"""
+        if not len(levels) or mid <= 0:
+            return 0.0
+        band = self.config.EXECUTION_DEPTH_BAND
+        if side == 'buy':
+            mask = levels[:, 0] <= mid * (1 + band)
+        else:
+            mask = levels[:, 0] >= mid * (1 - band)
+        return float(levels[mask, 1].sum())
+
+    async def child_size(self, symbol: str, side: str, remaining: float,
+                         target: Optional[float] = None, cached: bool = False) -> Tuple[float, float]:
+        """Child amount capped at EXECUTION_MAX_BOOK_FRACTION of in-band depth, plus current mid"""
+        bids, asks = await self._book(symbol, cached)
+        mid = self._mid(bids, asks)
+        depth = self._depth_within_band(asks if side == 'buy' else bids, mid, side)
+        # 호가 정보가 없으면 깊이 제한 없이 목표 수량 사용
+        cap = depth * self.config.EXECUTION_MAX_BOOK_FRACTION if depth > 0 else remaining
+        size = min(remaining, target if target is not None else remaining, cap)
+        size = max(size, self._min_amount(symbol)) if size > 0 else 0.0
+        return self._round_amount(symbol, min(size, remaining)), mid
+
+    async def choose_algo(self, symbol: str, side: str, amount: float) -> str:
+        """한 번에 체결 가능한 크기면 단일 주문, 아니면 기본 알고리즘"""
+        if not self.config.EXECUTION_ALGO_ENABLED:
+            return 'market'
+        # 진입 판단은 사전 영향 추정기의 호가로 충분 - 오래된 경우에만 REST 조회
+        child, _ = await self.child_size(symbol, side, amount, cached=True)
+        return 'market' if child >= amount else self.config.EXECUTION_DEFAULT_ALGO
+
+    # --------------------------------------------------------------- lifecycle
+
+    def start(self, algo: str, symbol: str, side: str, amount: float, **kwargs) -> str:
+        """Run an algorithm in the background; returns the job id"""
+        runner = {
+            'market': self._run_market,
+            'twap': self._run_twap,
+            'iceberg': self._run_iceberg,
+            'participation': self._run_participation
+        }.get(algo)
+        if runner is None:
+            raise ValueError(f"알 수 없는 실행 알고리즘: {algo}")
+
+        job_id = f"{algo}-{symbol}-{next(self._job_seq)}"
+        report = ExecutionReport(job_id, algo, symbol, side, amount)
+        self._cancel_flags[job_id] = asyncio.Event()
+        task = asyncio.get_running_loop().create_task(self._run(runner, report, **kwargs))
+        self.jobs[job_id] = (task, report)
+        return job_id
+
+    async def _run(self, runner, report: ExecutionReport, **kwargs) -> ExecutionReport:
+        try:
+            bids, asks = await self._book(report.symbol, cached=True)
+            report.arrival_price = self._mid(bids, asks)
+            await runner(report, **kwargs)
+        except asyncio.CancelledError:
+            report.cancelled = True
+        except Exception as e:
+            self.logger.error(f"❌ {report.job_id} 실행 오류: {e}")
+        finally:
+            report.finished = time.time()
+            self._cancel_flags.pop(report.job_id, None)
+            self.logger.info(
+                f"📦 {report.job_id} 완료: {report.filled}/{report.requested} @ {report.average_price:.4f} "
+                f"(슬리피지 {report.slippage_bps:.1f}bp, 자식주문 {len(report.child_orders)}개)"
+            )
+        return report
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop slicing after the in-flight child order; already filled amount is kept"""
+        flag = self._cancel_flags.get(job_id)
+        if flag is None:
+            return False
+        flag.set()
+        return True
+
+    async def wait(self, job_id: str) -> ExecutionReport:
+        task, _ = self.jobs[job_id]
+        return await task
+
+    def get_report(self, job_id: str) -> Optional[Dict]:
+        job = self.jobs.get(job_id)
+        return job[1].to_dict() if job else None
+
+    async def execute(self, symbol: str, side: str, amount: float, algo: str = 'auto', **kwargs) -> Dict:
+        """Run to completion and return a ccxt-like aggregated parent order"""
+        if algo == 'auto':
+            algo = await self.choose_algo(symbol, side, amount)
+        report = await self.wait(self.start(algo, symbol, side, amount, **kwargs))
+        self.jobs.pop(report.job_id, None)
+        return {
+            'id': report.child_orders[0].get('id') if report.child_orders else None,
+            'symbol': symbol,
+            'side': side,
+            'amount': amount,
+            'filled': report.filled,
+            'price': report.average_price or None,
+            'average': report.average_price or None,
+            'status': 'closed' if report.filled >= amount else ('canceled' if report.cancelled else 'partial'),
+            'slippage': report.slippage_bps / 1e4,
+            'execution': report.to_dict(),
+            'child_order_ids': [o.get('id') for o in report.child_orders]
+        }
+
+    # ---------------------------------------------------------------- children
+
+    def _cancelled(self, report: ExecutionReport) -> bool:
+        flag = self._cancel_flags.get(report.job_id)
+        if flag is not None and flag.is_set():
+            report.cancelled = True
+            return True
+        return False
+
+    async def _sleep_or_cancel(self, report: ExecutionReport, seconds: float) -> bool:
+        """Sleep; True if cancelled meanwhile"""
+        flag = self._cancel_flags.get(report.job_id)
+        if flag is None:
+            await asyncio.sleep(seconds)
+            return False
+        try:
+            await asyncio.wait_for(flag.wait(), timeout=seconds)
+            report.cancelled = True
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _send_child(self, report: ExecutionReport, amount: float, order_type: str = 'market',
+                          price: Optional[float] = None, params: Optional[Dict] = None) -> float:
+        """Place one child order and fold its fill into the report"""
+        if amount <= 0:
+            return 0.0
+        if order_type == 'limit':
+            params = {**(params or {}), 'timeInForce': 'IOC'}
+        order = await self.venue.place_order(report.symbol, report.side, amount, order_type, price, params)
+        if not order or not order.get('id'):
+            return 0.0
+
+        if order.get('filled') is None:
+            # 체결량을 확인할 수 없으면 체결로 간주하지 않음 (IOC 미체결 클립이 포지션으로 기록되지 않도록)
+            self.logger.warning(f"⚠️ {report.job_id} 자식주문 {order.get('id')} 체결량 미확인 - 0으로 처리")
+        filled = float(order.get('filled') or 0.0)
+        fill_price = float(order.get('average') or order.get('price') or price or report.arrival_price)
+        report.filled += filled
+        report.notional += filled * fill_price
+        report.child_orders.append({'id': order.get('id'), 'amount': amount, 'filled': filled,
+                                    'price': fill_price, 'type': order_type, 'ts': time.time()})
+        return filled
+
+    def _remaining(self, report: ExecutionReport) -> float:
+        return self._round_amount(report.symbol, report.requested - report.filled)
+
+    # -------------------------------------------------------------- algorithms
+
+    async def _run_market(self, report: ExecutionReport, params: Optional[Dict] = None):
+        """Single order; params pass through (e.g. preset TP/SL attached to the entry)"""
+        await self._send_child(report, report.requested, params=params)
+
+    async def _run_twap(self, report: ExecutionReport, duration: float = None, slices: int = None):
+        """Equal time slices; each child also capped by in-band depth"""
+        duration = duration if duration is not None else self.config.EXECUTION_TWAP_DURATION
+        slices = max(1, slices or self.config.EXECUTION_TWAP_SLICES)
+        interval = duration / slices
+
+        for n in range(slices):
+            remaining = self._remaining(report)
+            if remaining < self._min_amount(report.symbol) or remaining <= 0 or self._cancelled(report):
+                break
+            target = remaining if n == slices - 1 else remaining / (slices - n)
+            child, _ = await self.child_size(report.symbol, report.side, remaining, target)
+            await self._send_child(report, child)
+            if n < slices - 1 and await self._sleep_or_cancel(report, interval):
+                break
+
+    async def _run_iceberg(self, report: ExecutionReport, display_size: float = None,
+                           refresh: float = None, max_duration: float = None):
+        """Show only a slice at the touch (limit IOC); wait for the book to refill between clips"""
+        refresh = refresh if refresh is not None else self.config.EXECUTION_ICEBERG_REFRESH
+        deadline = time.time() + (max_duration if max_duration is not None else self.config.EXECUTION_TWAP_DURATION)
+
+        while time.time() < deadline and not self._cancelled(report):
+            remaining = self._remaining(report)
+            if remaining <= 0 or remaining < self._min_amount(report.symbol):
+                break
+
+            bids, asks = await self._book(report.symbol)
+            levels = asks if report.side == 'buy' else bids
+            if not len(levels):
+                if await self._sleep_or_cancel(report, refresh):
+                    break
+                continue
+
+            touch_price, touch_amount = levels[0]
+            clip = display_size or touch_amount * self.config.EXECUTION_MAX_BOOK_FRACTION
+            clip = self._round_amount(report.symbol, max(min(clip, remaining), self._min_amount(report.symbol)))
+            await self._send_child(report, min(clip, remaining), 'limit', float(touch_price))
+            if await self._sleep_or_cancel(report, refresh):
+                break
+
+    async def _run_participation(self, report: ExecutionReport, rate: float = None,
+                                 interval: float = None, max_duration: float = None):
+        """Trade at most rate × market volume printed since the previous slice"""
+        rate = rate if rate is not None else self.config.EXECUTION_PARTICIPATION_RATE
+        interval = interval if interval is not None else self.config.EXECUTION_ICEBERG_REFRESH
+        deadline = time.time() + (max_duration if max_duration is not None else self.config.EXECUTION_TWAP_DURATION)
+        last_ts = int(time.time() * 1000)
+
+        while time.time() < deadline and not self._cancelled(report):
+            if await self._sleep_or_cancel(report, interval):
+                break
+            remaining = self._remaining(report)
+            if remaining <= 0 or remaining < self._min_amount(report.symbol):
+                break
+
+            trades = await self.venue.get_recent_trades(report.symbol, 200) or []
+            fresh = [t for t in trades if (t.get('timestamp') or 0) > last_ts]
+            if fresh:
+                last_ts = max(t['timestamp'] for t in fresh)
+            volume = float(sum(t.get('amount') or 0 for t in fresh))
+            if volume <= 0:
+                continue
+
+            child, _ = await self.child_size(report.symbol, report.side, remaining, volume * rate)
+            if child >= self._min_amount(report.symbol):
+                await self._send_child(report, child)
@@ -0,0 +1,154 @@
+"""
+Candle Gap Monitor
+Detects missing bars in stored OHLCV series and repairs them with targeted backfills
+"""
+
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class CandleGapMonitor:
+    """Finds timestamp gaps per series and schedules prioritized small backfills"""
+
+    def __init__(self, exchange, utils, on_repaired: Optional[Callable] = None, max_gap_bars: int = 200):
+        self.exchange = exchange
+        self.utils = utils
+        self.on_repaired = on_repaired  # (symbol, timeframe, bars_df) -> None
+        self.max_gap_bars = max_gap_bars
+        self.logger = logging.getLogger(__name__)
+
+        # (symbol, timeframe) -> outstanding gap start timestamps (ms)
+        self.degraded: Dict[Tuple[str, str], Set[int]] = {}
+        self.pending: Set[Tuple[str, str, int]] = set()
+        self.unfillable: Set[Tuple[str, str, int]] = set()  # 거래소에도 데이터가 없는 구간
+        self.repair_queue: Optional[asyncio.PriorityQueue] = None
+        self.repair_task = None
+        self._sequence = 0
+
+        self.metrics = {'gaps_found': 0, 'gaps_filled': 0, 'bars_filled': 0, 'repairs_failed': 0}
+
+    def _timeframe_ms(self, timeframe: str) -> int:
+        """Timeframe string ('15m') to milliseconds"""
+        return int(self.exchange.parse_timeframe(timeframe) * 1000)
+
+    def find_gaps(self, df: pd.DataFrame, timeframe: str) -> List[Tuple[int, int]]:
+        """Return (first_missing_ms, missing_bar_count) for every gap in the series"""
+        if df is None or len(df) < 2:
+            return []
+
+        timeframe_ms = self._timeframe_ms(timeframe)
+        ts = df.index.asi8 // 1_000_000  # datetime64[ns] -> ms
+        diffs = np.diff(ts)
+        gap_idx = np.nonzero(diffs > timeframe_ms)[0]
+
+        return [(int(ts[i] + timeframe_ms), int(diffs[i] // timeframe_ms - 1)) for i in gap_idx]
+
+    def inspect(self, symbol: str, timeframe: str, df: pd.DataFrame) -> pd.DataFrame:
+        """시리즈 갭 검사 - 갭이 있으면 degraded 표시 후 복구 예약"""
+        key = (symbol, timeframe)
+        gaps = [g for g in self.find_gaps(df, timeframe) if (symbol, timeframe, g[0]) not in self.unfillable]
+
+        if not gaps:
+            if key in self.degraded:
+                del self.degraded[key]
+            df.attrs['degraded'] = False
+            return df
+
+        previous = self.degraded.get(key, set())
+        self.degraded[key] = {gap_start for gap_start, _ in gaps}
+        for gap_start, missing in gaps:
+            if gap_start not in previous:
+                self.metrics['gaps_found'] += 1
+            if (symbol, timeframe, gap_start) not in self.pending:
+                self.pending.add((symbol, timeframe, gap_start))
+                self._schedule_repair(symbol, timeframe, gap_start, missing)
+
+        self.logger.warning(f"⚠️ {symbol} {timeframe} 캔들 누락 {len(gaps)}구간 "
+                            f"({sum(m for _, m in gaps)}개 봉) - 복구 예약")
+        df.attrs['degraded'] = True
+        return df
+
+    def is_degraded(self, symbol: str, timeframe: str) -> bool:
+        """Whether the series still has unrepaired gaps"""
+        return bool(self.degraded.get((symbol, timeframe)))
+
+    def _schedule_repair(self, symbol: str, timeframe: str, gap_start: int, missing: int):
+        """최근 갭 우선, 같은 시점이면 작은 갭 우선으로 복구 큐에 추가"""
+        if self.repair_queue is None:
+            self.repair_queue = asyncio.PriorityQueue()
+        if self.repair_task is None or self.repair_task.done():
+            self.repair_task = asyncio.create_task(self._repair_worker())
+
+        self._sequence += 1
+        priority = (-gap_start, missing, self._sequence)
+        self.repair_queue.put_nowait((priority, symbol, timeframe, gap_start, missing))
+
+    async def _repair_worker(self):
+        """복구 큐 처리"""
+        while True:
+            try:
+                _, symbol, timeframe, gap_start, missing = await self.repair_queue.get()
+                await self._repair_gap(symbol, timeframe, gap_start, missing)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"❌ 캔들 갭 복구 작업 오류: {e}")
+
+    async def _repair_gap(self, symbol: str, timeframe: str, gap_start: int, missing: int):
+        """누락 구간만 소규모 백필"""
+        key = (symbol, timeframe)
+        try:
+            await self.utils.check_rate_limit(self.utils.create_rate_limiter())
+
+            limit = min(missing, self.max_gap_bars)
+            ohlcv = await asyncio.get_event_loop().run_in_executor(
+                None,
+                self.exchange.fetch_ohlcv,
+                self.utils.format_symbol(symbol),
+                timeframe,
+                gap_start,
+                limit
+            )
+            gap_end = gap_start + missing * self._timeframe_ms(timeframe)
+            bars = [c for c in (ohlcv or []) if gap_start <= c[0] < gap_end]
+
+            if bars:
+                bars_df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+                bars_df['timestamp'] = pd.to_datetime(bars_df['timestamp'], unit='ms')
+                bars_df.set_index('timestamp', inplace=True)
+                if self.on_repaired:
+                    self.on_repaired(symbol, timeframe, bars_df)
+                self.metrics['bars_filled'] += len(bars)
+                self.metrics['gaps_filled'] += 1
+            else:
+                # 거래소에도 데이터가 없는 구간(거래 중단 등)은 재시도하지 않음
+                self.unfillable.add((symbol, timeframe, gap_start))
+
+            self.pending.discard((symbol, timeframe, gap_start))
+            self.degraded.get(key, set()).discard(gap_start)
+            if key in self.degraded and not self.degraded[key]:
+                del self.degraded[key]
+                self.logger.info(f"✅ {symbol} {timeframe} 캔들 갭 복구 완료")
+
+        except Exception as e:
+            self.metrics['repairs_failed'] += 1
+            # degraded 상태는 유지하고 다음 inspect에서 다시 예약
+            self.pending.discard((symbol, timeframe, gap_start))
+            self.logger.error(f"❌ {symbol} {timeframe} 캔들 갭 복구 실패: {e}")
+
+    async def stop(self):
+        """Stop the repair worker"""
+        if self.repair_task and not self.repair_task.done():
+            self.repair_task.cancel()
+
+    def get_metrics(self) -> Dict:
+        """갭 탐지/복구 통계"""
+        return {
+            **self.metrics,
+            'degraded_series': [f"{s}_{tf}" for (s, tf), gaps in self.degraded.items() if gaps],
+            'pending_repairs': self.repair_queue.qsize() if self.repair_queue else 0
+        }
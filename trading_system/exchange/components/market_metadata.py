@@ -0,0 +1,245 @@
+"""
+Bitget Market Metadata Manager
+Loads, persists and serves contract specifications for all swap markets
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any
+
+try:
+    from ...config.config import TradingConfig
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from config.config import TradingConfig
+
+
+@dataclass
+class MarketSpec:
+    """Contract specification for a single swap market"""
+    symbol: str  # 내부 심볼 (BTCUSDT)
+    market_symbol: str  # CCXT 통합 심볼 (BTC/USDT:USDT)
+    contract_size: float
+    tick_size: float
+    lot_size: float
+    min_amount: float
+    min_notional: float
+    maker_fee: float
+    taker_fee: float
+
+    @property
+    def amount_precision(self) -> int:
+        """Decimal places implied by the lot size"""
+        return _decimals(self.lot_size)
+
+    @property
+    def price_precision(self) -> int:
+        """Decimal places implied by the tick size"""
+        return _decimals(self.tick_size)
+
+
+def _decimals(step: float) -> int:
+    """스텝 크기(0.001)를 소수 자릿수(3)로 변환"""
+    if not step or step >= 1:
+        return 0
+    return max(0, int(round(-math.log10(step))))
+
+
+def _precision_to_step(value: Any, default: float) -> float:
+    """CCXT precision 값을 스텝 크기로 변환 (DECIMAL_PLACES / TICK_SIZE 모드 모두 지원)"""
+    if value is None:
+        return default
+    value = float(value)
+    if value >= 1 and value.is_integer():
+        return 10 ** -int(value)
+    return value
+
+
+class MarketMetadataManager:
+    """Swap market specification cache with disk persistence and background refresh"""
+
+    def __init__(self, config: TradingConfig, exchange):
+        self.config = config
+        self.exchange = exchange
+        self.logger = logging.getLogger(__name__)
+
+        self.cache_path = config.MARKET_METADATA_PATH
+        self.ttl = config.MARKET_METADATA_TTL
+        self.refresh_interval = config.MARKET_METADATA_REFRESH_INTERVAL
+
+        # O(1) 조회용 인덱스 (내부 심볼 / CCXT 통합 심볼 모두)
+        self.specs: Dict[str, MarketSpec] = {}
+        self.loaded_at: Optional[float] = None
+        self.source: Optional[str] = None
+        self.refresh_task = None
+
+    async def start(self):
+        """Load metadata (disk first, exchange if stale) and start background refresh"""
+        if not self._load_from_disk():
+            await self.refresh()
+
+        if self.refresh_task is None or self.refresh_task.done():
+            self.refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop background refresh"""
+        if self.refresh_task and not self.refresh_task.done():
+            self.refresh_task.cancel()
+
+    async def refresh(self) -> bool:
+        """Reload all swap markets from the exchange and persist them"""
+        try:
+            markets = await asyncio.get_event_loop().run_in_executor(
+                None,
+                self.exchange.load_markets,
+                True
+            )
+            swap_markets = {k: m for k, m in markets.items() if m.get('swap')}
+            self._build_index(swap_markets)
+            self.loaded_at = time.time()
+            self.source = 'exchange'
+            self._save_to_disk(swap_markets)
+            self.logger.info(f"✅ 마켓 메타데이터 로드 완료: {len(swap_markets)}개 선물 마켓")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"❌ 마켓 메타데이터 갱신 실패: {e}")
+            return False
+
+    async def _refresh_loop(self):
+        """Background refresh loop"""
+        while True:
+            try:
+                await asyncio.sleep(self.refresh_interval)
+                await self.refresh()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"마켓 메타데이터 갱신 루프 오류: {e}")
+
+    def _load_from_disk(self) -> bool:
+        """디스크 캐시가 TTL 이내면 로드"""
+        try:
+            if not os.path.exists(self.cache_path):
+                return False
+
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+
+            saved_at = payload.get('saved_at', 0)
+            if time.time() - saved_at > self.ttl:
+                self.logger.info("마켓 메타데이터 디스크 캐시 만료 - 거래소에서 다시 로드")
+                return False
+
+            markets = payload.get('markets', {})
+            self._build_index(markets)
+            self.loaded_at = saved_at
+            self.source = 'disk'
+
+            # CCXT 인스턴스에도 주입해 첫 주문 시 load_markets 호출을 피함
+            try:
+                self.exchange.set_markets(list(markets.values()))
+            except Exception as e:
+                self.logger.debug(f"CCXT 마켓 주입 실패 (무시): {e}")
+
+            self.logger.info(f"✅ 마켓 메타데이터 디스크 캐시 로드: {len(markets)}개 선물 마켓")
+            return True
+
+        except Exception as e:
+            self.logger.warning(f"⚠️ 마켓 메타데이터 디스크 캐시 로드 실패: {e}")
+            return False
+
+    def _save_to_disk(self, markets: Dict[str, Dict]):
+        """원자적 교체로 디스크 캐시 저장"""
+        try:
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'saved_at': time.time(), 'markets': markets}, f, default=str)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            self.logger.warning(f"⚠️ 마켓 메타데이터 저장 실패: {e}")
+
+    def _build_index(self, markets: Dict[str, Dict]):
+        """CCXT 마켓 딕셔너리에서 조회 인덱스 구성"""
+        specs = {}
+        for market_symbol, market in markets.items():
+            spec = self._to_spec(market_symbol, market)
+            specs[spec.symbol] = spec
+            specs[spec.market_symbol] = spec
+        self.specs = specs
+
+    def _to_spec(self, market_symbol: str, market: Dict) -> MarketSpec:
+        """Convert a CCXT market into a MarketSpec"""
+        precision = market.get('precision') or {}
+        limits = market.get('limits') or {}
+        lot_size = _precision_to_step(precision.get('amount'), 0.001)
+        min_amount = (limits.get('amount') or {}).get('min') or lot_size
+
+        return MarketSpec(
+            symbol=market.get('id') or market_symbol.split(':')[0].replace('/', ''),
+            market_symbol=market.get('symbol') or market_symbol,
+            contract_size=float(market.get('contractSize') or 1.0),
+            tick_size=_precision_to_step(precision.get('price'), 0.01),
+            lot_size=lot_size,
+            min_amount=float(min_amount),
+            min_notional=float((limits.get('cost') or {}).get('min') or 0.0),
+            maker_fee=float(market.get('maker') if market.get('maker') is not None else self.config.MAKER_FEE),
+            taker_fee=float(market.get('taker') if market.get('taker') is not None else self.config.TAKER_FEE)
+        )
+
+    # Lookups
+    def get_spec(self, symbol: str) -> Optional[MarketSpec]:
+        """Get market spec by internal or unified symbol"""
+        return self.specs.get(symbol)
+
+    def get_contract_size(self, symbol: str) -> Optional[float]:
+        """Contract size for symbol"""
+        spec = self.specs.get(symbol)
+        return spec.contract_size if spec else None
+
+    def get_tick_size(self, symbol: str) -> Optional[float]:
+        """Price tick size for symbol"""
+        spec = self.specs.get(symbol)
+        return spec.tick_size if spec else None
+
+    def get_lot_size(self, symbol: str) -> Optional[float]:
+        """Amount step for symbol"""
+        spec = self.specs.get(symbol)
+        return spec.lot_size if spec else None
+
+    def get_min_notional(self, symbol: str) -> Optional[float]:
+        """Minimum order notional for symbol"""
+        spec = self.specs.get(symbol)
+        return spec.min_notional if spec else None
+
+    def get_fees(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Maker/taker fee tier for symbol"""
+        spec = self.specs.get(symbol)
+        return {'maker': spec.maker_fee, 'taker': spec.taker_fee} if spec else None
+
+    def get_symbols(self, quote: str = 'USDT') -> List[str]:
+        """All loaded internal swap symbols for a quote currency (for symbol scanning)"""
+        return sorted({s.symbol for s in self.specs.values() if s.symbol.endswith(quote)})
+
+    def get_market_info(self, symbol: str) -> Dict:
+        """Market spec as a plain dict"""
+        spec = self.specs.get(symbol)
+        return asdict(spec) if spec else {}
+
+    def is_loaded(self) -> bool:
+        """Whether any market specs are available"""
+        return bool(self.specs)
+
+    def get_status(self) -> Dict[str, Any]:
+        """메타데이터 캐시 상태"""
+        return {
+            'markets': len({s.symbol for s in self.specs.values()}),
+            'source': self.source,
+            'age_seconds': (time.time() - self.loaded_at) if self.loaded_at else None
+        }
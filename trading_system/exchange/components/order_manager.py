@@ -4,9 +4,12 @@ Handles order placement, modification, and position management
 """
 
 import asyncio
+import hashlib
+import itertools
 import logging
 import time
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+import ccxt
 
 try:
     from ...config.config import TradingConfig
@@ -22,21 +25,127 @@ except ImportError:
 class OrderManager:
     """Manages order placement and position operations"""
     
-    def __init__(self, config: TradingConfig, exchange, utils, ws_manager=None):
+    def __init__(self, config: TradingConfig, exchange, utils, ws_manager=None, private_stream=None,
+                 impact_estimator=None):
         self.config = config
         self.exchange = exchange
         self.utils = utils
         self.ws_manager = ws_manager
+        self.private_stream = private_stream
+        self.impact_estimator = impact_estimator
         self.logger = logging.getLogger(__name__)
         
         # Error tracking
         self.error_count = 0
         self.max_errors = 5
+        
+        # Applied (leverage, margin mode) per symbol - skips set_leverage when unchanged
+        self.leverage_cache: Dict[str, Tuple[int, str]] = {}
+        self.leverage_stats = {'hits': 0, 'sets': 0, 'invalidations': 0}
+        
+        # Stop-loss amend coalescing: latest target per stop order, one drain task per order
+        self._stop_targets: Dict[str, Tuple[float, Optional[str], Optional[float]]] = {}
+        self._stop_tasks: Dict[str, asyncio.Future] = {}
+        self.stop_order_alias: Dict[str, str] = {}  # replaced order id -> new order id
+        self.stop_stats = {'requests': 0, 'coalesced': 0, 'amended': 0, 'replaced': 0, 'failed': 0}
+        
+        # Idempotent submission: one task per in-flight intent, client order id fixed per intent
+        self._inflight_orders: Dict[Tuple, asyncio.Future] = {}
+        self._client_seq = itertools.count()
+        self.order_id_stats = {'deduped': 0, 'retries': 0, 'recovered': 0}
+    
+    def _desired_leverage(self, symbol: str) -> Tuple[int, str]:
+        """Leverage/margin mode the config currently asks for"""
+        return int(self.config.LEVERAGE.get(symbol, 10)), self.config.MARGIN_MODE
+    
+    async def ensure_leverage(self, symbol: str) -> bool:
+        """캐시와 설정이 같으면 REST 호출 없이 통과, 다르면(설정 변경 포함) 재설정"""
+        desired = self._desired_leverage(symbol)
+        if self.leverage_cache.get(symbol) == desired:
+            self.leverage_stats['hits'] += 1
+            return True
+        return await self.set_leverage(symbol, desired[0])
+    
+    def invalidate_leverage(self, symbol: Optional[str] = None):
+        """Forget applied leverage (one symbol or all) so the next order re-applies it"""
+        if symbol is None:
+            self.leverage_cache.clear()
+        else:
+            self.leverage_cache.pop(symbol, None)
+        self.leverage_stats['invalidations'] += 1
+    
+    @staticmethod
+    def _is_leverage_mismatch(error: Exception) -> bool:
+        """Exchange rejection caused by leverage or margin mode differing from what we assumed"""
+        message = str(error).lower()
+        return any(k in message for k in ('leverage', 'margin mode', 'marginmode', 'margin_mode'))
+    
+    async def prime_leverage(self, symbols: List[str]):
+        """시작 시 거래소의 현재 레버리지/마진 모드를 조회해 캐시 채우기 (다르면 설정)"""
+        if self.config.PAPER_TRADING:
+            for symbol in symbols:
+                self.leverage_cache[symbol] = self._desired_leverage(symbol)
+            return
+        
+        async def prime(symbol: str):
+            desired = self._desired_leverage(symbol)
+            try:
+                if self.exchange.has.get('fetchLeverage'):
+                    current = await asyncio.get_event_loop().run_in_executor(
+                        None,
+                        self.exchange.fetch_leverage,
+                        self.utils.format_symbol(symbol),
+                        {'marginCoin': 'USDT'}
+                    )
+                    applied = (int(current.get('longLeverage') or 0), current.get('marginMode'))
+                    if applied == desired and int(current.get('shortLeverage') or 0) == desired[0]:
+                        self.leverage_cache[symbol] = desired
+                        return
+            except Exception as e:
+                self.logger.debug(f"{symbol} 레버리지 조회 실패, 직접 설정: {e}")
+            await self.set_leverage(symbol, desired[0])
+        
+        await asyncio.gather(*(prime(s) for s in symbols))
+        self.logger.info(f"✅ 레버리지 캐시 준비: {len(self.leverage_cache)}/{len(symbols)}개 심볼")
+    
+    @staticmethod
+    def _intent_key(symbol: str, side: str, amount: float, order_type: str,
+                    price: Optional[float], params: Optional[Dict]) -> Tuple:
+        """Identity of an order intent - identical keys in flight are the same order"""
+        params = params or {}
+        return (symbol, side, order_type, round(float(amount), 10), price,
+                bool(params.get('reduceOnly')), params.get('stopPrice'), params.get('clientOrderId'))
+    
+    def _client_order_id(self, intent: Tuple) -> str:
+        """Client order id fixed for the lifetime of one intent (reused across every retry)"""
+        digest = hashlib.sha1(repr(intent).encode()).hexdigest()[:8]
+        return f"{self.config.CLIENT_ORDER_ID_PREFIX}{int(time.time() * 1000):x}{next(self._client_seq) & 0xffff:04x}{digest}"
     
     async def place_order(self, symbol: str, side: str, amount: float, 
                          order_type: str = 'market', price: Optional[float] = None,
                          params: Optional[Dict] = None) -> Dict:
-        """Place order with enhanced parameters"""
+        """Place order with enhanced parameters; an identical intent already in flight is joined, not resent"""
+        intent = self._intent_key(symbol, side, amount, order_type, price, params)
+        
+        task = self._inflight_orders.get(intent)
+        if task is not None and not task.done():
+            self.order_id_stats['deduped'] += 1
+            self.logger.warning(f"⚠️ {symbol} {side} {amount} 동일 주문 진행 중 - 중복 전송 생략")
+            return await asyncio.shield(task)
+        
+        client_id = (params or {}).get('clientOrderId') or self._client_order_id(intent)
+        task = asyncio.ensure_future(
+            self._place_order(symbol, side, amount, order_type, price, params, client_id)
+        )
+        self._inflight_orders[intent] = task
+        task.add_done_callback(
+            lambda t: self._inflight_orders.pop(intent) if self._inflight_orders.get(intent) is t else None
+        )
+        return await asyncio.shield(task)
+    
+    async def _place_order(self, symbol: str, side: str, amount: float, order_type: str,
+                           price: Optional[float], params: Optional[Dict], client_id: str) -> Dict:
+        """Submit one intent under a fixed client order id"""
         await self.utils.check_rate_limit(self.utils.create_rate_limiter())
         
         # 🛡️ PAPER_TRADING 모드 체크
@@ -44,7 +153,8 @@ class OrderManager:
             self.logger.info(f"🟡 PAPER_TRADING: {symbol} {side} {amount} @ {price or '시장가'} (모의 주문)")
             # 시뮬레이션 주문 응답 생성
             return {
-                'id': f'paper_{int(time.time())}',
+                'id': f'paper_{client_id}',
+                'clientOrderId': client_id,
                 'symbol': symbol,
                 'side': side,
                 'amount': amount,
@@ -58,34 +168,30 @@ class OrderManager:
         try:
             market_symbol = self.utils.format_symbol(symbol)
             
-            # Set leverage
-            leverage = self.config.LEVERAGE.get(symbol, 10)
-            await self.set_leverage(symbol, leverage)
+            # Leverage is only re-applied when the cache says it differs from config
+            await self.ensure_leverage(symbol)
             
             # Calculate slippage for market orders
-            if order_type == 'market' and self.ws_manager and self.ws_manager.is_connected():
-                estimated_price = self._estimate_execution_price(symbol, side)
+            if order_type == 'market':
+                estimated_price = self._estimate_execution_price(symbol, side, amount)
             else:
                 estimated_price = price
             
             # Bitget specific parameters for futures trading
             order_params = {
-                'marginMode': 'isolated',  # isolated margin mode
+                'marginMode': self.config.MARGIN_MODE,
                 'timeInForce': 'IOC',      # Immediate or Cancel
-                **(params or {})
+                **(params or {}),
+                'clientOrderId': client_id
             }
             
-            # Place order
-            order = await asyncio.get_event_loop().run_in_executor(
-                None,
-                self.exchange.create_order,
-                market_symbol,
-                order_type,
-                side,
-                amount,
-                price,
-                order_params
-            )
+            order = await self._submit_order(symbol, market_symbol, order_type, side, amount, price,
+                                             order_params, client_id)
+            order.setdefault('clientOrderId', client_id)
+            
+            # Market/IOC responses carry only the id - take fill details from the push or REST
+            if order_params.get('timeInForce') == 'IOC' or order_type == 'market':
+                await self._resolve_fill(symbol, market_symbol, order)
             
             # Calculate actual slippage
             if order_type == 'market' and estimated_price:
@@ -94,20 +200,114 @@ class OrderManager:
                 order['slippage'] = slippage
             
             self.error_count = 0
-            self.logger.info(f"주문 실행: {symbol} {side} {amount} @ {price or '시장가'}")
+            self.logger.info(f"주문 실행: {symbol} {side} {amount} @ {price or '시장가'} ({client_id})")
             return order
             
         except Exception as e:
             self.error_count = self.utils.handle_error(e, self.error_count, self.max_errors)
             return {}
     
+    async def _resolve_fill(self, symbol: str, market_symbol: str, order: Dict):
+        """Fill filled/average/status into an id-only response; filled stays None if still unknown"""
+        if not order.get('id') or (order.get('filled') is not None and order.get('average')):
+            return
+        fields = ('filled', 'average', 'status')
+        if self.private_stream and self.private_stream.is_live('orders'):
+            pushed = await self.private_stream.wait_for_order(order['id'])
+            if pushed and pushed.get('filled') is not None:
+                order.update({k: pushed[k] for k in fields if pushed.get(k) is not None})
+                order['price'] = order.get('price') or pushed.get('average')
+                return
+        try:
+            fetched = await asyncio.get_event_loop().run_in_executor(
+                None, self.exchange.fetch_order, order['id'], market_symbol
+            )
+            if fetched and fetched.get('filled') is not None:
+                order.update({k: fetched[k] for k in fields if fetched.get(k) is not None})
+                order['price'] = order.get('price') or fetched.get('average')
+        except Exception as e:
+            self.logger.warning(f"⚠️ {symbol} 주문 체결 조회 실패 ({order['id']}): {e}")
+    
+    async def _submit_order(self, symbol: str, market_symbol: str, order_type: str, side: str,
+                            amount: float, price: Optional[float], order_params: Dict, client_id: str) -> Dict:
+        """create_order with retries; after any failure the client id is looked up before resending"""
+        attempts = max(1, self.config.ORDER_RETRY)
+        leverage_retried = False
+        attempt = 0
+        while True:
+            try:
+                return await asyncio.get_event_loop().run_in_executor(
+                    None,
+                    self.exchange.create_order,
+                    market_symbol,
+                    order_type,
+                    side,
+                    amount,
+                    price,
+                    order_params
+                )
+            except Exception as e:
+                if self._is_leverage_mismatch(e) and not leverage_retried:
+                    # 거래소 설정이 캐시와 달라진 경우 - 한 번 재설정 후 재시도
+                    self.logger.warning(f"⚠️ {symbol} 레버리지/마진 모드 불일치 감지, 재설정 후 재시도: {e}")
+                    leverage_retried = True
+                    self.invalidate_leverage(symbol)
+                    await self.ensure_leverage(symbol)
+                    continue
+                
+                # 타임아웃 등으로 응답만 잃었을 수 있음 - 같은 client id로 먼저 조회
+                landed = await self.find_order_by_client_id(symbol, client_id)
+                if landed:
+                    self.order_id_stats['recovered'] += 1
+                    self.logger.warning(f"♻️ {symbol} 주문 오류 후 거래소에서 확인됨 ({client_id}): {e}")
+                    return landed
+                
+                attempt += 1
+                if attempt >= attempts or not isinstance(e, ccxt.NetworkError):
+                    raise
+                self.order_id_stats['retries'] += 1
+                self.logger.warning(f"🔄 {symbol} 주문 재전송 {attempt}/{attempts - 1} ({client_id}): {e}")
+                await asyncio.sleep(0.5 * attempt)
+    
+    async def find_order_by_client_id(self, symbol: str, client_id: str) -> Optional[Dict]:
+        """Order placed under client_id, from the private stream or REST; None if it never landed"""
+        if self.private_stream:
+            pushed = self.private_stream.get_order_by_client_id(client_id)
+            if pushed:
+                return dict(pushed)
+        try:
+            return await asyncio.get_event_loop().run_in_executor(
+                None,
+                self.exchange.fetch_order,
+                None,
+                self.utils.format_symbol(symbol),
+                {'clientOid': client_id}
+            )
+        except Exception as e:
+            self.logger.debug(f"{symbol} client id 조회 결과 없음 ({client_id}): {e}")
+            return None
+    
+    async def fetch_tpsl_plans(self, symbol: str) -> List[Dict]:
+        """Open position TP/SL plan orders for symbol (including presets attached to entry orders)"""
+        if self.config.PAPER_TRADING:
+            return []
+        await self.utils.check_rate_limit(self.utils.create_rate_limiter())
+        plans = await asyncio.get_event_loop().run_in_executor(
+            None,
+            lambda: self.exchange.fetch_open_orders(
+                self.utils.format_symbol(symbol), None, None, {'trigger': True, 'planType': 'profit_loss'}
+            )
+        )
+        return list(plans or [])
+    
     async def place_stop_loss_order(self, symbol: str, side: str, amount: float, 
                                    stop_price: float) -> Dict:
         """Place stop loss order"""
         params = {
             'stopPrice': stop_price,
             'triggerType': 'market_price',
-            'timeInForce': 'GTC'
+            'timeInForce': 'GTC',
+            'reduceOnly': True
         }
         
         return await self.place_order(
@@ -119,48 +319,125 @@ class OrderManager:
             params
         )
     
-    async def modify_stop_loss(self, symbol: str, order_id: str, new_stop_price: float) -> Dict:
-        """Modify existing stop loss order"""
+    async def modify_stop_loss(self, symbol: str, order_id: str, new_stop_price: float,
+                               side: Optional[str] = None, amount: Optional[float] = None) -> Dict:
+        """Move a stop-loss order; bursts for the same order collapse to the latest level"""
+        self.stop_stats['requests'] += 1
+        
+        # 🛡️ PAPER_TRADING 모드 체크
+        if self.config.PAPER_TRADING:
+            self.logger.info(f"🟡 PAPER_TRADING: {symbol} 스탑로스 수정 {order_id} -> {new_stop_price} (모의)")
+            return {
+                'id': order_id,
+                'symbol': symbol,
+                'stopPrice': new_stop_price,
+                'status': 'open',
+                'paper_trade': True
+            }
+        
+        order_id = self._resolve_stop_id(order_id)
+        self._stop_targets[order_id] = (new_stop_price, side, amount)
+        
+        task = self._stop_tasks.get(order_id)
+        if task is not None and not task.done():
+            # 진행 중인 수정이 끝나면 최신 레벨 하나만 전송됨
+            self.stop_stats['coalesced'] += 1
+            return await asyncio.shield(task)
+        
+        task = asyncio.ensure_future(self._drain_stop_amends(symbol, order_id))
+        self._stop_tasks[order_id] = task
+        return await asyncio.shield(task)
+    
+    def _resolve_stop_id(self, order_id: str) -> str:
+        """Follow replacements to the live stop order id"""
+        while order_id in self.stop_order_alias:
+            order_id = self.stop_order_alias[order_id]
+        return order_id
+    
+    async def _drain_stop_amends(self, symbol: str, order_id: str) -> Dict:
+        """대기 중인 최신 목표가만 순차 적용"""
+        current = order_id
+        result = {}
+        try:
+            while current in self._stop_targets:
+                price, side, amount = self._stop_targets.pop(current)
+                result = await self._amend_stop(symbol, current, price, side, amount)
+                
+                new_id = result.get('id')
+                if new_id and new_id != current:
+                    # 교체 주문으로 바뀐 경우 이후 요청도 새 주문으로 이어지도록 연결
+                    self.stop_order_alias[current] = new_id
+                    if current in self._stop_targets:
+                        self._stop_targets[new_id] = self._stop_targets.pop(current)
+                    self._stop_tasks[new_id] = self._stop_tasks.pop(current, None)
+                    current = new_id
+            return result
+        finally:
+            self._stop_tasks.pop(current, None)
+    
+    async def _amend_stop(self, symbol: str, order_id: str, new_stop_price: float,
+                          side: Optional[str], amount: Optional[float]) -> Dict:
+        """Plan-order modify in one call; otherwise place the new stop before cancelling the old one"""
         try:
             await self.utils.check_rate_limit(self.utils.create_rate_limiter())
-            
-            # 🛡️ PAPER_TRADING 모드 체크
-            if self.config.PAPER_TRADING:
-                self.logger.info(f"🟡 PAPER_TRADING: {symbol} 스탑로스 수정 {order_id} -> {new_stop_price} (모의)")
-                return {
-                    'id': order_id,
-                    'symbol': symbol,
-                    'stopPrice': new_stop_price,
-                    'status': 'open',
-                    'paper_trade': True
-                }
-            
             market_symbol = self.utils.format_symbol(symbol)
             
-            # Cancel existing order and place new one
-            await asyncio.get_event_loop().run_in_executor(
-                None,
-                self.exchange.cancel_order,
-                order_id,
-                market_symbol
-            )
+            if side is None or amount is None:
+                existing = await asyncio.get_event_loop().run_in_executor(
+                    None,
+                    self.exchange.fetch_order,
+                    order_id,
+                    market_symbol,
+                    {'trigger': True}
+                )
+                side = side or existing.get('side')
+                amount = amount or existing.get('amount')
+            
+            if self.exchange.has.get('editOrder'):
+                try:
+                    order = await asyncio.get_event_loop().run_in_executor(
+                        None,
+                        self.exchange.edit_order,
+                        order_id,
+                        market_symbol,
+                        'market',
+                        side,
+                        amount,
+                        None,
+                        {'triggerPrice': new_stop_price, 'triggerType': 'market_price'}
+                    )
+                    self.stop_stats['amended'] += 1
+                    self.error_count = 0
+                    self.logger.info(f"스탑로스 수정 완료: {symbol} {new_stop_price}")
+                    return {**order, 'id': order.get('id') or order_id}
+                except Exception as e:
+                    self.logger.debug(f"{symbol} 스탑 주문 수정 API 실패, 교체 방식 사용: {e}")
             
-            # Wait a bit for cancellation to process
-            await asyncio.sleep(0.5)
+            # Place-then-cancel: the position is never left without a stop
+            new_order = await self.place_stop_loss_order(symbol, side, amount, new_stop_price)
+            if not new_order or not new_order.get('id'):
+                self.stop_stats['failed'] += 1
+                self.logger.error(f"❌ {symbol} 새 스탑로스 주문 실패 - 기존 스탑 유지")
+                return {}
             
-            # Place new stop loss order
-            new_order = await self.place_stop_loss_order(
-                symbol, 
-                'sell',  # Assuming we're modifying a sell stop loss
-                0.001,   # Minimal amount for modification
-                new_stop_price
-            )
+            try:
+                await asyncio.get_event_loop().run_in_executor(
+                    None,
+                    self.exchange.cancel_order,
+                    order_id,
+                    market_symbol,
+                    {'trigger': True}
+                )
+            except Exception as e:
+                self.logger.warning(f"⚠️ {symbol} 기존 스탑로스 {order_id} 취소 실패: {e}")
             
+            self.stop_stats['replaced'] += 1
             self.error_count = 0
-            self.logger.info(f"스탑로스 수정 완료: {symbol} {new_stop_price}")
+            self.logger.info(f"스탑로스 교체 완료: {symbol} {new_stop_price}")
             return new_order
             
         except Exception as e:
+            self.stop_stats['failed'] += 1
             self.error_count = self.utils.handle_error(e, self.error_count, self.max_errors)
             return {}
     
@@ -193,7 +470,9 @@ class OrderManager:
                         symbol,
                         side,
                         amount,
-                        'market'
+                        'market',
+                        None,
+                        {'reduceOnly': True}
                     )
                     results.append(close_order)
             
@@ -213,6 +492,7 @@ class OrderManager:
             # 🛡️ PAPER_TRADING 모드 체크
             if self.config.PAPER_TRADING:
                 self.logger.debug(f"🟡 PAPER_TRADING: {symbol} 레버리지 설정 {leverage}x (모의)")
+                self.leverage_cache[symbol] = (int(leverage), self.config.MARGIN_MODE)
                 return True
             
             market_symbol = self.utils.format_symbol(symbol)
@@ -223,14 +503,17 @@ class OrderManager:
                 self.exchange.set_leverage,
                 leverage,
                 market_symbol,
-                {'marginMode': 'isolated'}
+                {'marginMode': self.config.MARGIN_MODE}
             )
             
+            self.leverage_cache[symbol] = (int(leverage), self.config.MARGIN_MODE)
+            self.leverage_stats['sets'] += 1
             self.logger.debug(f"레버리지 설정: {symbol} {leverage}x")
             return True
             
         except Exception as e:
-            # Leverage setting failures are not critical
+            # Leverage setting failures are not critical; retry on the next order
+            self.leverage_cache.pop(symbol, None)
             self.logger.warning(f"레버리지 설정 실패 {symbol}: {e}")
             return False
     
@@ -255,9 +538,15 @@ class OrderManager:
             self.logger.warning(f"포지션 모드 설정 실패: {e}")
             return False
     
-    def _estimate_execution_price(self, symbol: str, side: str) -> Optional[float]:
+    def _estimate_execution_price(self, symbol: str, side: str, amount: float = None) -> Optional[float]:
         """Estimate execution price based on orderbook"""
-        if not self.ws_manager:
+        # 최근 호가 깊이가 있으면 주문 수량만큼 호가를 소진한 예상 VWAP 사용
+        if self.impact_estimator and amount:
+            estimate = self.impact_estimator.estimate(symbol, side, amount=amount)
+            if estimate and estimate.fillable > 0:
+                return estimate.vwap
+        
+        if not self.ws_manager or not self.ws_manager.is_connected():
             return None
             
         price_data = self.ws_manager.price_data.get(symbol, {})
@@ -0,0 +1,359 @@
+"""
+Bitget Private Stream Manager
+Authenticated WebSocket channels for orders, fills, positions and account balance
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+try:
+    from ...config.config import TradingConfig
+    from ...utils.websocket_resilient_manager import ws_manager
+except ImportError:
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from config.config import TradingConfig
+    from utils.websocket_resilient_manager import ws_manager
+
+
+PRIVATE_WS_URL = 'wss://ws.bitget.com/v2/ws/private'
+PRIVATE_CHANNELS = ('orders', 'fill', 'positions', 'account')
+TERMINAL_ORDER_STATUSES = ('filled', 'canceled', 'cancelled')
+
+
+class PrivateStreamManager:
+    """Keeps orders, fills, positions and balance in sync from push updates; REST only reconciles"""
+
+    CONNECTION_NAME = 'bitget_private'
+
+    def __init__(self, config: TradingConfig, exchange, utils=None):
+        self.config = config
+        self.exchange = exchange  # REST 대조용 CCXT 인스턴스
+        self.utils = utils
+        self.logger = logging.getLogger(__name__)
+
+        # Pushed state
+        self.orders: Dict[str, Dict] = {}
+        self.client_order_ids: Dict[str, str] = {}  # clientOid -> order id
+        self.fills = deque(maxlen=500)
+        self.positions: Dict[str, List[Dict]] = {}  # symbol -> ccxt-style positions
+        self.balance: Dict = {}
+        self.last_update: Dict[str, float] = {}
+
+        # Snapshots received since the last (re)connect - state is only trusted once complete
+        self.snapshots = set()
+        self.order_waiters: Dict[str, List[asyncio.Future]] = {}
+        self.listeners: Dict[str, List[Callable]] = {channel: [] for channel in PRIVATE_CHANNELS}
+
+        self.running = False
+        self.reconcile_task = None
+        self.stats = {'messages': 0, 'order_updates': 0, 'fills': 0, 'reconciles': 0, 'drift': 0}
+
+    def is_enabled(self) -> bool:
+        """Private stream only runs for live trading with API credentials"""
+        return (self.config.PRIVATE_WS_ENABLED and not self.config.PAPER_TRADING
+                and bool(self.config.BITGET_API_KEY and self.config.BITGET_SECRET_KEY))
+
+    async def start(self) -> bool:
+        """인증 후 private 채널 구독, 주기적 REST 대조 시작"""
+        if not self.is_enabled():
+            self.logger.info("🟡 Private WebSocket 비활성 - REST 조회 사용")
+            return False
+
+        channels = [
+            {'instType': 'USDT-FUTURES', 'channel': channel,
+             ('coin' if channel == 'account' else 'instId'): 'default'}
+            for channel in PRIVATE_CHANNELS
+        ]
+        success = await ws_manager.connect(
+            name=self.CONNECTION_NAME,
+            url=PRIVATE_WS_URL,
+            params={'channels': channels},
+            message_handler=self._handle_message,
+            on_connect=self._login
+        )
+
+        self.running = True
+        if self.reconcile_task is None or self.reconcile_task.done():
+            self.reconcile_task = asyncio.create_task(self._reconcile_loop())
+
+        if success:
+            self.logger.info("✅ Private WebSocket 연결 (주문/체결/포지션/잔고)")
+        else:
+            self.logger.error("❌ Private WebSocket 연결 실패 - REST 조회 사용")
+        return success
+
+    async def stop(self):
+        """Disconnect and stop reconciliation"""
+        self.running = False
+        if self.reconcile_task and not self.reconcile_task.done():
+            self.reconcile_task.cancel()
+        await ws_manager.disconnect(self.CONNECTION_NAME)
+        self.snapshots.clear()
+
+    def _sign(self, timestamp: str) -> str:
+        message = f"{timestamp}GET/user/verify"
+        digest = hmac.new(self.config.BITGET_SECRET_KEY.encode(), message.encode(), hashlib.sha256).digest()
+        return base64.b64encode(digest).decode()
+
+    async def _login(self, websocket):
+        """매 연결마다 로그인 - 재연결 시 이전 상태는 스냅샷 재수신 전까지 신뢰하지 않음"""
+        self.snapshots.clear()
+        timestamp = str(int(time.time()))
+        await websocket.send(json.dumps({
+            'op': 'login',
+            'args': [{
+                'apiKey': self.config.BITGET_API_KEY,
+                'passphrase': self.config.BITGET_PASSPHRASE,
+                'timestamp': timestamp,
+                'sign': self._sign(timestamp)
+            }]
+        }))
+
+        response = json.loads(await asyncio.wait_for(websocket.recv(), timeout=10))
+        if response.get('event') != 'login' or str(response.get('code', '0')) != '0':
+            raise ConnectionError(f"Private WebSocket 로그인 실패: {response.get('msg', response)}")
+        self.logger.info("🔐 Private WebSocket 로그인 성공")
+
+    def is_live(self, *channels: str) -> bool:
+        """Connection healthy and a snapshot of every requested channel received"""
+        if not self.running:
+            return False
+        status = ws_manager.get_connection_status(self.CONNECTION_NAME)
+        if 'error' in status or not status.get('is_healthy'):
+            return False
+        return all(channel in self.snapshots for channel in channels)
+
+    def add_listener(self, channel: str, listener: Callable):
+        """Register listener(payload) for a private channel ('orders', 'fill', 'positions', 'account')"""
+        if listener not in self.listeners[channel]:
+            self.listeners[channel].append(listener)
+
+    def _notify(self, channel: str, payload):
+        for listener in self.listeners.get(channel, []):
+            try:
+                listener(payload)
+            except Exception as e:
+                self.logger.error(f"Private 채널 리스너 오류 ({channel}): {e}")
+
+    async def _handle_message(self, data: Dict):
+        """Route pushed private channel data"""
+        try:
+            channel = data.get('arg', {}).get('channel')
+            if channel not in PRIVATE_CHANNELS or 'data' not in data:
+                if data.get('event') == 'error':
+                    self.logger.error(f"Private WebSocket 오류: {data.get('msg')}")
+                return
+
+            self.stats['messages'] += 1
+            self.last_update[channel] = time.time()
+
+            if channel == 'orders':
+                for item in data['data']:
+                    self._on_order(item)
+            elif channel == 'fill':
+                for item in data['data']:
+                    self.fills.append(item)
+                    self.stats['fills'] += 1
+                    self._notify('fill', item)
+            elif channel == 'positions':
+                self._on_positions(data['data'], snapshot=data.get('action') == 'snapshot')
+            elif channel == 'account':
+                self._on_account(data['data'])
+
+            # 증분 업데이트만으로는 전체 상태를 신뢰할 수 없음 - 스냅샷 수신 시에만 표시
+            if data.get('action') == 'snapshot':
+                self.snapshots.add(channel)
+
+        except Exception as e:
+            self.logger.error(f"Private 메시지 처리 오류: {e}")
+
+    def _on_order(self, item: Dict):
+        """Order push -> ccxt-style order; wake anyone waiting on it"""
+        filled = float(item.get('accBaseVolume') or 0)
+        order = {
+            'id': item.get('orderId'),
+            'clientOrderId': item.get('clientOid'),
+            'symbol': item.get('instId'),
+            'side': item.get('side'),
+            'amount': float(item.get('size') or 0),
+            'filled': filled,
+            'average': float(item.get('priceAvg') or 0) or None,
+            'price': float(item.get('priceAvg') or item.get('price') or 0) or None,
+            'status': item.get('status'),
+            'timestamp': int(item.get('uTime') or item.get('cTime') or 0),
+            'info': item
+        }
+        self.orders[order['id']] = order
+        if order['clientOrderId']:
+            self.client_order_ids[order['clientOrderId']] = order['id']
+        self.stats['order_updates'] += 1
+        self._notify('orders', order)
+
+        if order['status'] in TERMINAL_ORDER_STATUSES:
+            for waiter in self.order_waiters.pop(order['id'], []):
+                if not waiter.done():
+                    waiter.set_result(order)
+            if len(self.orders) > 1000:
+                # 오래된 완료 주문 정리
+                for order_id in list(self.orders)[:500]:
+                    if self.orders[order_id]['status'] in TERMINAL_ORDER_STATUSES:
+                        self.client_order_ids.pop(self.orders.pop(order_id).get('clientOrderId'), None)
+
+    @staticmethod
+    def _internal_symbol(symbol: str) -> str:
+        """'BTC/USDT:USDT' or 'BTCUSDT' -> 'BTCUSDT'"""
+        return symbol.split(':')[0].replace('/', '')
+
+    def _position_entry(self, symbol: str, side: str, contracts: float, item: Dict = None) -> Dict:
+        """ccxt-style position dict (symbol in CCXT format like fetch_positions)"""
+        item = item or {}
+        return {
+            'symbol': self.utils.format_symbol(symbol) if self.utils else symbol,
+            'side': side,
+            'contracts': contracts,
+            'entryPrice': float(item.get('openPriceAvg') or 0),
+            'markPrice': float(item.get('markPrice') or 0) or None,
+            'unrealizedPnl': float(item.get('unrealizedPL') or 0),
+            'leverage': float(item.get('leverage') or 0),
+            'marginMode': item.get('marginMode'),
+            'liquidationPrice': float(item.get('liquidationPrice') or 0),
+            'info': item
+        }
+
+    def _on_positions(self, items: List[Dict], snapshot: bool):
+        """Position push -> ccxt-style positions keyed by internal symbol"""
+        updated: Dict[str, List[Dict]] = {}
+        for item in items:
+            symbol = self._internal_symbol(item.get('instId', ''))
+            updated.setdefault(symbol, []).append(
+                self._position_entry(symbol, item.get('holdSide'), float(item.get('total') or 0), item)
+            )
+        if snapshot:
+            self.positions = updated
+        else:
+            self.positions.update(updated)
+        self._notify('positions', self.get_positions())
+
+    def _on_account(self, items: List[Dict]):
+        """Account push -> ccxt-style balance"""
+        for item in items:
+            if item.get('marginCoin', 'USDT').upper() != 'USDT':
+                continue
+            free = float(item.get('available') or 0)
+            total = float(item.get('usdtEquity') or item.get('equity') or 0)
+            used = max(total - free, 0.0)
+            self.balance = {
+                'USDT': {'free': free, 'used': used, 'total': total},
+                'free': {'USDT': free},
+                'used': {'USDT': used},
+                'total': {'USDT': total},
+                'info': [item],
+                'source': 'ws'
+            }
+        self._notify('account', self.balance)
+
+    def get_positions(self, symbol: Optional[str] = None) -> List[Dict]:
+        """Pushed open positions (contracts > 0)"""
+        entries = self.positions.get(symbol, []) if symbol else [p for ps in self.positions.values() for p in ps]
+        return [p for p in entries if p['contracts'] > 0]
+
+    def get_balance(self) -> Dict:
+        """Pushed USDT balance"""
+        return dict(self.balance)
+
+    def get_order(self, order_id: str) -> Optional[Dict]:
+        """Latest pushed state of an order"""
+        return self.orders.get(order_id)
+
+    def get_order_by_client_id(self, client_id: str) -> Optional[Dict]:
+        """Latest pushed state of the order placed under client_id"""
+        order_id = self.client_order_ids.get(client_id)
+        return self.orders.get(order_id) if order_id else None
+
+    async def wait_for_order(self, order_id: str, timeout: float = 2.0) -> Optional[Dict]:
+        """주문이 체결/취소 완료될 때까지 대기 (푸시 수신 즉시 반환)"""
+        order = self.orders.get(order_id)
+        if order and order['status'] in TERMINAL_ORDER_STATUSES:
+            return order
+        if not self.is_live():
+            return None
+
+        waiter = asyncio.get_event_loop().create_future()
+        self.order_waiters.setdefault(order_id, []).append(waiter)
+        try:
+            return await asyncio.wait_for(waiter, timeout=timeout)
+        except asyncio.TimeoutError:
+            return self.orders.get(order_id)
+        finally:
+            waiters = self.order_waiters.get(order_id)
+            if waiters and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self.order_waiters[order_id]
+
+    async def _reconcile_loop(self):
+        """REST는 주기적 대조에만 사용"""
+        while self.running:
+            try:
+                await asyncio.sleep(self.config.PRIVATE_WS_RECONCILE_INTERVAL)
+                await self.reconcile()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"❌ Private 상태 대조 오류: {e}")
+
+    async def reconcile(self):
+        """Compare pushed positions/balance with REST and adopt REST on drift"""
+        if self.utils:
+            await self.utils.check_rate_limit(self.utils.create_rate_limiter())
+        loop = asyncio.get_event_loop()
+        rest_positions = await loop.run_in_executor(None, self.exchange.fetch_positions)
+        rest_balance = await loop.run_in_executor(None, self.exchange.fetch_balance)
+        self.stats['reconciles'] += 1
+
+        rest_contracts = {}
+        for p in rest_positions or []:
+            if float(p.get('contracts') or 0) > 0:
+                rest_contracts[(self._internal_symbol(p['symbol']), p.get('side'))] = float(p['contracts'])
+        pushed_contracts = {(self._internal_symbol(p['symbol']), p['side']): p['contracts']
+                            for p in self.get_positions()}
+
+        if rest_contracts != pushed_contracts:
+            self.stats['drift'] += 1
+            self.logger.warning(f"⚠️ Private WS 포지션 불일치 - REST 기준으로 보정: ws={pushed_contracts}, rest={rest_contracts}")
+            self.positions = {}
+            for p in rest_positions or []:
+                if float(p.get('contracts') or 0) > 0:
+                    self.positions.setdefault(self._internal_symbol(p['symbol']), []).append(p)
+
+        usdt = (rest_balance or {}).get('USDT') or {}
+        if usdt and abs(float(usdt.get('total') or 0) - self.balance.get('USDT', {}).get('total', 0)) > 1e-6:
+            self.balance = {
+                'USDT': {'free': float(usdt.get('free') or 0), 'used': float(usdt.get('used') or 0),
+                         'total': float(usdt.get('total') or 0)},
+                'free': {'USDT': float(usdt.get('free') or 0)},
+                'used': {'USDT': float(usdt.get('used') or 0)},
+                'total': {'USDT': float(usdt.get('total') or 0)},
+                'info': rest_balance.get('info'),
+                'source': 'rest'
+            }
+
+    def get_status(self) -> Dict:
+        """Private stream status"""
+        now = time.time()
+        return {
+            'enabled': self.is_enabled(),
+            'live': self.is_live(*PRIVATE_CHANNELS),
+            'snapshots': sorted(self.snapshots),
+            'last_update_age': {c: now - t for c, t in self.last_update.items()},
+            **self.stats
+        }
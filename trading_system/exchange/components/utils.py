@@ -13,9 +13,14 @@ import logging
 class ExchangeUtils:
     """Utility functions for exchange operations"""
     
-    def __init__(self, config):
+    def __init__(self, config, market_metadata=None):
         self.config = config
+        self.market_metadata = market_metadata
         self.logger = logging.getLogger(__name__)
+        
+        # Shared REST usage log (all limiters) for rate-limit headroom
+        self.call_log = deque()
+        self.usage_window = 60
     
     def create_rate_limiter(self) -> Dict:
         """Create rate limiter"""
@@ -40,9 +45,35 @@ class ExchangeUtils:
                 self.logger.warning(f"Rate limit 도달, {sleep_time:.2f}초 대기")
                 await asyncio.sleep(sleep_time)
         
-        # Add current call
+        # Add current call (전체 사용량은 track_requests가 요청 단위로 기록)
         rate_limiter['calls'].append(current_time)
     
+    def track_requests(self, exchange):
+        """Record every REST request of the CCXT instance in the shared usage log
+
+        모든 통합/암시적 API 호출은 exchange.request를 거침 - check_rate_limit을 우회하는 경로
+        (load_markets, fetch_tickers, 실행기 직접 호출 등)도 사용량에 포함
+        """
+        if getattr(exchange, '_usage_tracked', False):
+            return
+        request = exchange.request
+        
+        def counted_request(*args, **kwargs):
+            self.call_log.append(time.time())  # 실행기 스레드에서 호출 - deque.append는 스레드 안전
+            return request(*args, **kwargs)
+        
+        exchange.request = counted_request
+        exchange._usage_tracked = True
+    
+    def get_rate_limit_headroom(self) -> float:
+        """Fraction of the per-minute REST budget still unused (0.0 - 1.0)"""
+        cutoff = time.time() - self.usage_window
+        while self.call_log and self.call_log[0] < cutoff:
+            self.call_log.popleft()
+        
+        budget = getattr(self.config, 'API_RATE_BUDGET_PER_MINUTE', 600)
+        return max(0.0, 1.0 - len(self.call_log) / budget)
+    
     def format_symbol(self, symbol: str) -> str:
         """Format symbol for Bitget API"""
         if 'USDT' in symbol:
@@ -54,7 +85,11 @@ class ExchangeUtils:
         return symbol.replace('USDT', 'USDT_UMCBL')
     
     async def calculate_position_size(self, symbol: str, position_value: float, exchange) -> float:
-        """Calculate position size based on value and contract specifications"""
+        """Calculate order amount from a USDT notional
+
+        position_value는 주문 명목가(notional, 증거금 아님) - 증거금에 레버리지를 곱한 값.
+        반환값은 CCXT amount 단위: notional / (price * contractSize), Bitget USDT-M은 contractSize 1 (기초자산 수량)
+        """
         try:
             # Get contract size
             contract_size = self._get_contract_size(symbol)
@@ -71,23 +106,45 @@ class ExchangeUtils:
             precision = self._get_precision(symbol)
             quantity = round(quantity, precision)
             
-            return max(quantity, contract_size)  # Ensure minimum contract size
+            return max(quantity, self._get_min_amount(symbol))  # Ensure minimum order amount
         
         except Exception as e:
             self.logger.error(f"포지션 크기 계산 오류 {symbol}: {e}")
             raise
     
     def _get_contract_size(self, symbol: str) -> float:
-        """Get contract size for symbol"""
-        contract_sizes = {
+        """Get contract size (base units per contract) for symbol"""
+        if self.market_metadata:
+            spec = self.market_metadata.get_spec(self.format_symbol(symbol))
+            if spec:
+                return spec.contract_size
+        
+        # USDT-M linear swaps are quoted in base units
+        return 1.0
+    
+    def _get_min_amount(self, symbol: str) -> float:
+        """Get minimum order amount for symbol"""
+        if self.market_metadata:
+            spec = self.market_metadata.get_spec(self.format_symbol(symbol))
+            if spec:
+                return spec.min_amount
+        
+        # Fallback when market metadata is not loaded yet
+        min_amounts = {
             'BTCUSDT': 0.001,
             'ETHUSDT': 0.01,
             'XRPUSDT': 1.0
         }
-        return contract_sizes.get(symbol, 0.001)
+        return min_amounts.get(symbol, 0.001)
     
     def _get_precision(self, symbol: str) -> int:
         """Get decimal precision for symbol"""
+        if self.market_metadata:
+            spec = self.market_metadata.get_spec(self.format_symbol(symbol))
+            if spec:
+                return spec.amount_precision
+        
+        # Fallback when market metadata is not loaded yet
         precisions = {
             'BTCUSDT': 3,
             'ETHUSDT': 2,
@@ -8,7 +8,7 @@ import logging
 import json
 import time
 from datetime import datetime
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Iterable
 import numpy as np
 import websockets
 
@@ -28,8 +28,9 @@ except ImportError:
 class WebSocketManager:
     """Manages WebSocket connections and real-time data streaming"""
     
-    def __init__(self, config: TradingConfig):
+    def __init__(self, config: TradingConfig, exchange=None):
         self.config = config
+        self.exchange = exchange  # REST 대체 폴링용 CCXT 인스턴스
         self.logger = logging.getLogger(__name__)
         
         # WebSocket connection state
@@ -46,6 +47,17 @@ class WebSocketManager:
         self.last_ws_message_time = None
         self.ws_health_check_interval = self.config.WS_HEALTH_CHECK_INTERVAL
         self.ws_message_timeout = self.config.WS_MESSAGE_TIMEOUT
+        
+        # REST fallback poller state
+        self.fallback_task = None
+        self.fallback_active = False
+        self.tracked_symbols = set(self.config.SYMBOLS)
+        self.open_position_count = 0
+        self.last_ws_tick_time = None
+        self.fallback_stats = {'polls': 0, 'updates': 0, 'skipped': 0, 'errors': 0}
+        
+        # Price listeners (symbol, price) called on every accepted tick
+        self.price_listeners = []
     
     async def start(self):
         """Start WebSocket manager with ResilientWebSocketManager"""
@@ -67,6 +79,10 @@ class WebSocketManager:
             self.ws_health_task = asyncio.create_task(self._websocket_health_monitor())
         else:
             self.logger.error("❌ Resilient WebSocket 연결 실패")
+        
+        # WebSocket 상태와 무관하게 REST 대체 폴러 시작 (WS 정상 시 대기만 함)
+        if self.exchange is not None and (self.fallback_task is None or self.fallback_task.done()):
+            self.fallback_task = asyncio.create_task(self._rest_fallback_loop())
             
         return success
     
@@ -84,6 +100,10 @@ class WebSocketManager:
             
         if self.ws_health_task and not self.ws_health_task.done():
             self.ws_health_task.cancel()
+        
+        if self.fallback_task and not self.fallback_task.done():
+            self.fallback_task.cancel()
+        self.fallback_active = False
     
     async def _handle_ws_message(self, data: Dict[str, Any]):
         """ResilientWebSocketManager용 메시지 핸들러"""
@@ -98,23 +118,14 @@ class WebSocketManager:
             self.logger.error(f"WebSocket 메시지 처리 오류: {e}")
     
     async def _websocket_manager(self):
-        """Enhanced WebSocket manager with better error handling and fallback mode"""
+        """Enhanced WebSocket manager with better error handling (가격 대체 폴링은 _rest_fallback_loop 전담)"""
         max_consecutive_failures = 5
         consecutive_failures = 0
-        fallback_mode = False
         
         while True:
             try:
-                if not fallback_mode:
-                    await self._connect_websocket()
-                    consecutive_failures = 0
-                    if fallback_mode:
-                        self.logger.info("🔄 WebSocket 연결 복구 - 실시간 모드 재개")
-                        fallback_mode = False
-                else:
-                    # Fallback mode: use REST API instead of WebSocket
-                    await self._fallback_price_update()
-                    await asyncio.sleep(5)
+                await self._connect_websocket()
+                consecutive_failures = 0
                     
             except Exception as e:
                 self.ws_connected = False
@@ -124,12 +135,13 @@ class WebSocketManager:
                 error_type = type(e).__name__
                 self.logger.error(f"🚫 WebSocket 오류 ({error_type}) - 시도 {self.ws_reconnect_attempts}: {str(e)[:100]}")
                 
-                # Activate fallback mode after consecutive failures
-                if consecutive_failures >= max_consecutive_failures and not fallback_mode:
-                    self.logger.warning(f"[WARNING] WebSocket 연속 실패 {consecutive_failures}회 - 대체 모드 활성화")
-                    fallback_mode = True
+                # 연속 실패 시 재연결 간격만 늘림 - 그동안 가격은 REST 대체 폴러가 유지
+                if consecutive_failures >= max_consecutive_failures:
+                    self.logger.warning(
+                        f"[WARNING] WebSocket 연속 실패 {consecutive_failures}회 - REST 대체 폴링 유지, 재연결 간격 확대"
+                    )
                     consecutive_failures = 0
-                    await asyncio.sleep(10)
+                    await asyncio.sleep(self.config.PRICE_FALLBACK_POLL_INTERVAL * 10)
                     continue
                     
                 # Calculate wait time based on error type
@@ -300,12 +312,15 @@ class WebSocketManager:
                     clean_symbol = symbol.replace('USDT', 'USDT')
                     
                     # Update price data
-                    self.price_data[clean_symbol] = {
-                        'price': float(ticker_data.get('last', 0)),
-                        'volume': float(ticker_data.get('vol24h', 0)),
-                        'change': float(ticker_data.get('change24h', 0)),
-                        'timestamp': time.time()
-                    }
+                    self.last_ws_tick_time = time.time()
+                    self._store_price(
+                        clean_symbol,
+                        price=float(ticker_data.get('last', 0)),
+                        volume=float(ticker_data.get('vol24h', 0)),
+                        change=float(ticker_data.get('change24h', 0)),
+                        exchange_ts=float(ticker_data.get('ts') or 0),
+                        source='ws'
+                    )
                     
         except Exception as e:
             self.logger.error(f"티커 데이터 처리 오류: {e}")
@@ -324,21 +339,145 @@ class WebSocketManager:
         except Exception as e:
             self.logger.error(f"이벤트 메시지 처리 오류: {e}")
     
+    def _store_price(self, symbol: str, price: float, volume: float, change: float,
+                     exchange_ts: float, source: str) -> bool:
+        """WS/REST 공용 가격 저장소 갱신 - 거래소 타임스탬프가 더 최신일 때만 기록"""
+        if not price:
+            return False
+        
+        current = self.price_data.get(symbol)
+        if current and exchange_ts and exchange_ts <= current.get('exchange_ts', 0):
+            # 이미 같은 틱(또는 더 최신 틱)을 반영함 - 중복 갱신 방지
+            return False
+        
+        self.price_data[symbol] = {
+            'price': price,
+            'volume': volume,
+            'change': change,
+            'timestamp': time.time(),
+            'exchange_ts': exchange_ts,
+            'source': source
+        }
+        
+        for listener in self.price_listeners:
+            try:
+                listener(symbol, price)
+            except Exception as e:
+                self.logger.error(f"가격 리스너 오류: {e}")
+        return True
+    
+    def add_price_listener(self, listener):
+        """Register a callback invoked with (symbol, price) on every accepted tick"""
+        if listener not in self.price_listeners:
+            self.price_listeners.append(listener)
+    
+    def remove_price_listener(self, listener):
+        """Unregister a price callback"""
+        if listener in self.price_listeners:
+            self.price_listeners.remove(listener)
+    
+    def _ws_feed_healthy(self) -> bool:
+        """WebSocket 티커 피드가 살아있는지 확인"""
+        if not self.is_connected() or self.last_ws_tick_time is None:
+            return False
+        return (time.time() - self.last_ws_tick_time) < self.config.PRICE_STALE_TIMEOUT
+    
+    def update_tracked_positions(self, symbols: Iterable[str]):
+        """열린 포지션 심볼 갱신 - 폴링 대상 및 폴링 주기 조정에 사용"""
+        symbols = list(symbols)
+        self.open_position_count = len(symbols)
+        self.tracked_symbols = set(self.config.SYMBOLS) | set(symbols)
+    
+    def get_fallback_poll_interval(self) -> float:
+        """열린 포지션 수에 따라 REST 폴링 간격 계산"""
+        base = self.config.PRICE_FALLBACK_POLL_INTERVAL
+        return max(self.config.PRICE_FALLBACK_MIN_INTERVAL, base / (1 + self.open_position_count))
+    
+    @staticmethod
+    def _normalize_ticker_symbol(market_symbol: str) -> str:
+        """CCXT 통합 심볼(BTC/USDT:USDT)을 내부 심볼(BTCUSDT)로 변환"""
+        return market_symbol.split(':')[0].replace('/', '')
+    
+    async def poll_prices(self, symbols: Optional[List[str]] = None) -> int:
+        """모든 대상 심볼을 한 번의 fetch_tickers 요청으로 갱신"""
+        if self.exchange is None:
+            return 0
+        
+        symbols = sorted(set(symbols) if symbols else self.tracked_symbols)
+        if not symbols:
+            return 0
+        
+        try:
+            tickers = await asyncio.get_event_loop().run_in_executor(
+                None,
+                self.exchange.fetch_tickers,
+                symbols
+            )
+            self.fallback_stats['polls'] += 1
+        except Exception as e:
+            self.fallback_stats['errors'] += 1
+            self.logger.error(f"대체 모드 가격 일괄 조회 오류: {e}")
+            return 0
+        
+        updated = 0
+        for market_symbol, ticker in (tickers or {}).items():
+            symbol = self._normalize_ticker_symbol(ticker.get('symbol') or market_symbol)
+            stored = self._store_price(
+                symbol,
+                price=float(ticker.get('last') or 0),
+                volume=float(ticker.get('quoteVolume') or 0),
+                change=float(ticker.get('percentage') or 0),
+                exchange_ts=float(ticker.get('timestamp') or 0),
+                source='rest'
+            )
+            if stored:
+                updated += 1
+            else:
+                self.fallback_stats['skipped'] += 1
+        
+        self.fallback_stats['updates'] += updated
+        return updated
+    
+    async def _rest_fallback_loop(self):
+        """WebSocket 피드가 끊기거나 지연되면 REST 일괄 폴링으로 가격 저장소 유지"""
+        while True:
+            try:
+                if self._ws_feed_healthy():
+                    if self.fallback_active:
+                        self.logger.info("🔄 WebSocket 가격 피드 복구 - REST 대체 폴링 중지")
+                        self.fallback_active = False
+                    await asyncio.sleep(self.config.PRICE_FALLBACK_MIN_INTERVAL)
+                    continue
+                
+                if not self.fallback_active:
+                    self.logger.warning("⚠️ WebSocket 가격 피드 중단 - REST 대체 폴링 시작")
+                    self.fallback_active = True
+                
+                await self._fallback_price_update()
+                await asyncio.sleep(self.get_fallback_poll_interval())
+                
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"❌ REST 대체 폴링 오류: {e}")
+                await asyncio.sleep(self.config.PRICE_FALLBACK_POLL_INTERVAL)
+    
     async def _fallback_price_update(self):
         """Fallback price update using REST API when WebSocket fails"""
         try:
             self.logger.debug("🔄 REST API 대체 모드로 가격 업데이트")
-            # This would need to be implemented with the exchange REST API
-            # For now, just mark that we're in fallback mode
-            await asyncio.sleep(5)
+            await self.poll_prices()
             
         except Exception as e:
             self.logger.error(f"대체 모드 가격 업데이트 오류: {e}")
     
-    def get_current_price(self, symbol: str) -> Optional[float]:
+    def get_current_price(self, symbol: str, max_age: Optional[float] = None) -> Optional[float]:
         """Get current price for symbol"""
         if symbol in self.price_data:
-            return self.price_data[symbol].get('price')
+            data = self.price_data[symbol]
+            if max_age is not None and time.time() - data.get('timestamp', 0) > max_age:
+                return None
+            return data.get('price')
         return None
     
     def is_connected(self) -> bool:
@@ -358,5 +497,8 @@ class WebSocketManager:
             'resilient_status': resilient_status,
             'last_message_time': self.last_ws_message_time,
             'reconnect_attempts': self.ws_reconnect_attempts,
-            'price_data_count': len(self.price_data)
+            'price_data_count': len(self.price_data),
+            'fallback_active': self.fallback_active,
+            'fallback_poll_interval': self.get_fallback_poll_interval(),
+            'fallback_stats': dict(self.fallback_stats)
         }
\ No newline at end of file
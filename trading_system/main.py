@@ -91,8 +91,8 @@ class TradingSystemLauncher:
             while self.is_running:
                 await self.trading_engine.run_trading_cycle()
                 
-                # Wait between cycles (15 minutes)
-                await asyncio.sleep(900)
+                # Wait until the next symbol is due (adaptive pacing)
+                await asyncio.sleep(self.trading_engine.get_next_cycle_delay())
                 
         except KeyboardInterrupt:
             self.logger.info("[STOP] 사용자에 의한 종료 요청")
@@ -142,8 +142,8 @@ class TradingSystemOrchestrator:
                 # Run one complete trading cycle
                 await self.trading_engine.run_trading_cycle()
                 
-                # Wait before next cycle (configurable interval)
-                await asyncio.sleep(self.config.TRADING_CYCLE_INTERVAL)
+                # Wait until the next symbol is due (adaptive pacing)
+                await asyncio.sleep(self.trading_engine.get_next_cycle_delay())
                 
             except Exception as e:
                 self.logger.error(f"거래 사이클 오류: {e}")
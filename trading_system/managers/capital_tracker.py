@@ -5,6 +5,7 @@ Monitors dynamic allocation limit and provides real-time position tracking
 
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
@@ -45,10 +46,10 @@ class CapitalSnapshot:
     used_capital: float
     available_capital: float
     allocation_percentage: float
-    btc_allocation: float
-    eth_allocation: float
+    symbol_allocations: Dict[str, float]  # 심볼별 사용 증거금
     positions: List[CapitalAllocation]
     within_limit: bool
+    balance_source: str = 'rest'  # 'push' | 'rest' | 'fallback'
     timestamp: datetime = field(default_factory=datetime.now)
 
 
@@ -56,11 +57,14 @@ class CapitalTracker:
     """Real-time capital allocation tracking system"""
     
     def __init__(self, config: TradingConfig, db: EnhancedDatabaseManager, 
-                 notification_manager: NotificationManager, exchange=None):
+                 notification_manager: NotificationManager, exchange=None, reconciler=None,
+                 risk_state=None):
         self.config = config
         self.db = db
         self.notification_manager = notification_manager
         self.exchange = exchange  # Exchange manager for real-time balance
+        self.reconciler = reconciler  # 공유 포지션 대조 스냅샷 (없으면 DB 조회)
+        self.risk_state = risk_state  # 잔고 갱신 시 최고 자본/낙폭 추적
         self.logger = logging.getLogger(__name__)
         
         # 🏦 Dynamic Capital Management Settings (하드코딩 제거)
@@ -69,15 +73,21 @@ class CapitalTracker:
         self.cache_timeout = config.BALANCE_CACHE_TIMEOUT
         self.allocation_limit = config.CAPITAL_ALLOCATION_LIMIT  # 동적 한도 설정
         
-        # 잔고 캐시 시스템
-        self._balance_cache = None
-        self._balance_cache_time = 0
-        
         # Real-time tracking variables
         self.current_snapshot: Optional[CapitalSnapshot] = None
         self.last_update_time: Optional[datetime] = None
         self.tracking_enabled = True
-        self.update_interval = 30  # Update every 30 seconds
+        self.update_interval = 30  # REST 재조회 주기 (잔고 푸시가 없을 때)
+        self.reconcile_interval = config.CAPITAL_RECONCILE_INTERVAL  # 잔고 푸시가 살아있을 때의 REST 재조회 주기
+        
+        # 이벤트로 갱신되는 상태 - 스냅샷은 여기서 메모리 연산으로만 재구성
+        self._balance: Optional[float] = None
+        self._balance_source = 'fallback'
+        self._account_equity = 0.0  # 마지막 REST 조회의 계정 자산 (free + 증거금 + 미실현 손익)
+        self._allocations: List[CapitalAllocation] = []
+        self._by_symbol: Dict[str, List[CapitalAllocation]] = {}
+        self._book_version = -1
+        self._last_rest_update = 0.0
         
         # Alert thresholds
         self.warning_threshold = 0.25  # 25% - Warning
@@ -95,6 +105,9 @@ class CapitalTracker:
         
         # Start tracking task
         self.tracking_task: Optional[asyncio.Task] = None
+        
+        # Set whenever an event rebuilds the snapshot; wakes the loop for alert checks
+        self._push_event: Optional[asyncio.Event] = None
     
     async def initialize(self):
         """Initialize capital tracking system"""
@@ -104,6 +117,17 @@ class CapitalTracker:
             # Initial snapshot
             await self.update_snapshot()
             
+            # 잔고/체결/포지션 푸시, 대조 스냅샷, 가격 틱으로 스냅샷을 증분 갱신
+            self._push_event = asyncio.Event()
+            if self.exchange is not None and hasattr(self.exchange, 'add_private_listener'):
+                self.exchange.add_private_listener('account', self._on_account_push)
+                self.exchange.add_private_listener('fill', self._on_position_event)
+                self.exchange.add_private_listener('positions', self._on_position_event)
+            if self.exchange is not None and hasattr(self.exchange, 'add_price_listener'):
+                self.exchange.add_price_listener(self._on_price)
+            if self.reconciler is not None:
+                self.reconciler.add_listener(self._on_reconciled)
+            
             # Start background tracking
             self.tracking_task = asyncio.create_task(self._tracking_loop())
             
@@ -128,9 +152,10 @@ class CapitalTracker:
         """Main tracking loop"""
         while self.tracking_enabled:
             try:
-                await self.update_snapshot()
+                if time.time() - self._last_rest_update >= self._rest_interval():
+                    await self.update_snapshot()
                 await self._check_alerts()
-                await asyncio.sleep(self.update_interval)
+                await self._wait_for_next_update()
                 
             except Exception as e:
                 self.error_count += 1
@@ -140,63 +165,197 @@ class CapitalTracker:
                 error_delay = min(60, 5 * (2 ** min(self.error_count, 4)))
                 await asyncio.sleep(error_delay)
     
+    def _rest_interval(self) -> float:
+        """Slow cadence while the balance push is live, update_interval otherwise"""
+        stream = getattr(self.exchange, 'private_stream', None)
+        if stream is not None and stream.is_live('account'):
+            return self.reconcile_interval
+        return self.update_interval
+    
+    async def _wait_for_next_update(self):
+        """스냅샷 변경 이벤트 시 즉시(알림 확인), 없으면 다음 REST 재조회 시점까지 대기"""
+        timeout = max(1.0, self._last_rest_update + self._rest_interval() - time.time())
+        if self._push_event is None:
+            await asyncio.sleep(timeout)
+            return
+        try:
+            await asyncio.wait_for(self._push_event.wait(), timeout=timeout)
+            await asyncio.sleep(1.0)  # 연속 이벤트 묶기
+        except asyncio.TimeoutError:
+            pass
+        self._push_event.clear()
+    
+    # ------------------------------------------------------------------ events
+    
+    def _on_account_push(self, balance: Dict):
+        """Private stream balance push"""
+        total_balance = self._extract_usdt_balance(balance)
+        if total_balance > 0:
+            self._set_balance(total_balance, 'push', self._extract_usdt_equity(balance))
+            self._rebuild()
+    
+    def _on_position_event(self, _payload):
+        """Fill/position push - fold book changes in through the reconciliation snapshot (no request)"""
+        if self._sync_positions():
+            self._rebuild()
+    
+    def _on_reconciled(self, snapshot):
+        """Reconciliation snapshot listener"""
+        self._load_positions(snapshot.positions, snapshot.book_version)
+        self._rebuild()
+    
+    def _on_price(self, symbol: str, price: float):
+        """Mark-price tick: reprice only that symbol's allocations"""
+        for allocation in self._by_symbol.get(symbol, ()):
+            allocation.current_price = price
+            allocation.unrealized_pnl = self._unrealized_pnl(allocation.side, allocation.entry_price, price)
+    
+    def _set_balance(self, total_balance: float, source: str, equity: float = 0.0):
+        self._balance = total_balance
+        self._balance_source = source
+        # 설정 기본값(조회 실패)은 최고 자본/낙폭 계산에서 제외
+        # 낙폭/일 시작 자본은 계정 자산 기준 - 가용 잔고는 증거금 사용만으로도 줄어듦
+        if self.risk_state is not None and source != 'fallback':
+            self.risk_state.on_equity(equity or total_balance)
+    
+    def _sync_positions(self, force: bool = False) -> bool:
+        """Reload allocations when the position book changed; True if reloaded"""
+        if self.reconciler is None:
+            if not force:
+                return False
+            self._load_positions(self.db.get_open_positions(), -1)
+            return True
+        snapshot = self.reconciler.get_snapshot()
+        if not force and snapshot.book_version == self._book_version:
+            return False
+        self._load_positions(snapshot.positions, snapshot.book_version)
+        return True
+    
+    def _load_positions(self, positions: List[Dict], book_version: int):
+        self._allocations = self._build_allocations(positions)
+        by_symbol: Dict[str, List[CapitalAllocation]] = {}
+        for allocation in self._allocations:
+            by_symbol.setdefault(allocation.symbol, []).append(allocation)
+        self._by_symbol = by_symbol
+        self._book_version = book_version
+    
+    def _rebuild(self) -> CapitalSnapshot:
+        """Snapshot from in-memory balance and allocations (no I/O)"""
+        total_balance = self._balance if self._balance is not None else self.fallback_balance
+        
+        symbol_allocations = {
+            symbol: sum(pos.market_value for pos in allocations)
+            for symbol, allocations in self._by_symbol.items()
+        }
+        used_capital = sum(symbol_allocations.values())
+        allocation_percentage = used_capital / total_balance if total_balance > 0 else 0
+        
+        self.current_snapshot = CapitalSnapshot(
+            total_balance=total_balance,
+            used_capital=used_capital,
+            available_capital=total_balance * self.allocation_limit - used_capital,
+            allocation_percentage=allocation_percentage,
+            symbol_allocations=symbol_allocations,
+            positions=list(self._allocations),
+            within_limit=allocation_percentage <= self.allocation_limit,
+            balance_source=self._balance_source
+        )
+        self.last_update_time = datetime.now()
+        self.update_count += 1
+        if self._push_event is not None:
+            self._push_event.set()
+        return self.current_snapshot
+    
     async def update_snapshot(self) -> CapitalSnapshot:
-        """Update current capital snapshot"""
+        """REST reconcile: re-read balance and positions, then rebuild"""
         try:
             # Get current balance
             total_balance = await self._get_total_balance()
+            self._set_balance(total_balance, 'fallback' if total_balance == self.fallback_balance else 'rest',
+                              self._account_equity)
+            self._sync_positions(force=True)
+            self._last_rest_update = time.time()
+            snapshot = self._rebuild()
             
-            # Get open positions
-            positions = await self._get_position_allocations()
-            
-            # Calculate totals
-            used_capital = sum(pos.market_value for pos in positions)
-            allocation_percentage = used_capital / total_balance if total_balance > 0 else 0
-            
-            # Calculate symbol-specific allocations
-            btc_allocation = sum(pos.market_value for pos in positions if 'BTC' in pos.symbol)
-            eth_allocation = sum(pos.market_value for pos in positions if 'ETH' in pos.symbol)
-            
-            # Check if within limit
-            within_limit = allocation_percentage <= self.allocation_limit
-            
-            # Create snapshot
-            self.current_snapshot = CapitalSnapshot(
-                total_balance=total_balance,
-                used_capital=used_capital,
-                available_capital=total_balance * self.allocation_limit - used_capital,
-                allocation_percentage=allocation_percentage,
-                btc_allocation=btc_allocation,
-                eth_allocation=eth_allocation,
-                positions=positions,
-                within_limit=within_limit
+            self.logger.debug(
+                f"📊 자본 현황 재조회 #{self.update_count}: "
+                f"{snapshot.allocation_percentage:.1%} 사용 "
+                f"({snapshot.used_capital:,.0f}/{snapshot.total_balance * self.allocation_limit:,.0f})"
             )
-            
-            self.last_update_time = datetime.now()
-            self.update_count += 1
-            
-            # Log periodic updates
-            if self.update_count % 10 == 0:  # Every 10 updates (5 minutes)
-                self.logger.info(
-                    f"📊 자본 현황 업데이트 #{self.update_count}: "
-                    f"{allocation_percentage:.1%} 사용 "
-                    f"({used_capital:,.0f}/{total_balance * self.allocation_limit:,.0f})"
-                )
-            
-            return self.current_snapshot
+            return snapshot
             
         except Exception as e:
             self.logger.error(f"❌ 자본 스냅샷 업데이트 실패: {e}")
             raise
     
+    @staticmethod
+    def _extract_usdt_balance(balance: Dict) -> float:
+        """USDT balance from a ccxt-style / Bitget account payload (same logic as the trading engine)"""
+        total_capital = 0
+        if not balance:
+            return 0.0
+        
+        # 공유 잔고 캐시(BalanceSafeHandler) 정규화 형식
+        if isinstance(balance.get('balances'), dict):
+            usdt = balance['balances'].get('USDT') or {}
+            total_capital = usdt.get('free', 0) or balance.get('available_balance', 0)
+        elif 'USDT' in balance and isinstance(balance['USDT'], dict):
+            total_capital = balance['USDT'].get('free', 0) or balance['USDT'].get('available', 0)
+        elif 'free' in balance and 'USDT' in balance['free']:
+            total_capital = balance['free'].get('USDT', 0)
+        elif 'total' in balance and 'USDT' in balance['total']:
+            total_capital = balance['total'].get('USDT', 0)
+        elif 'info' in balance:
+            info = balance['info']
+            if isinstance(info, list):
+                for item in info:
+                    if isinstance(item, dict):
+                        # 선물 계좌: marginCoin 확인
+                        if item.get('marginCoin') == 'USDT':
+                            available = item.get('available', 0)
+                            account_equity = item.get('accountEquity', 0)
+                            total_capital = float(available or account_equity or 0)
+                            break
+                        # 현물 계좌: coin 확인 (기존 코드)
+                        elif item.get('coin') == 'USDT':
+                            total_capital = float(item.get('available', 0) or item.get('equity', 0))
+                            break
+            elif isinstance(info, dict) and 'USDT' in info:
+                total_capital = float(info['USDT'].get('available', 0))
+        
+        return float(total_capital or 0)
+    
+    @staticmethod
+    def _extract_usdt_equity(balance: Dict) -> float:
+        """USDT account equity (free + used margin + unrealized PnL); 0 when the payload has none"""
+        if not balance:
+            return 0.0
+        
+        if isinstance(balance.get('balances'), dict):
+            usdt = balance['balances'].get('USDT') or {}
+        elif isinstance(balance.get('USDT'), dict):
+            usdt = balance['USDT']
+        elif isinstance(balance.get('total'), dict):
+            usdt = {'total': balance['total'].get('USDT', 0)}
+        else:
+            usdt = {}
+        
+        equity = float(usdt.get('total') or 0) or float(usdt.get('free') or 0) + float(usdt.get('used') or 0)
+        if equity <= 0 and isinstance(balance.get('info'), list):
+            for item in balance['info']:
+                if isinstance(item, dict) and item.get('marginCoin') == 'USDT':
+                    equity = float(item.get('accountEquity') or item.get('usdtEquity') or item.get('equity') or 0)
+                    break
+        return equity
+    
     async def _get_total_balance(self) -> float:
         """Get total account balance from exchange or database"""
+        self._account_equity = 0.0
         try:
-            # Try to get from exchange if available
+            # Try to get from exchange if available (shared single-flight balance cache)
             if self.exchange is not None:
-                self.logger.info(f"🔄 거래소에서 잔고 조회 시도 중...")
                 balance = await self.exchange.get_balance()
-                self.logger.info(f"✅ 거래소 잔고 조회 성공: {balance}")
+                self.logger.debug(f"✅ 거래소 잔고 조회: {balance.get('source')}")
             else:
                 self.logger.warning(f"⚠️ Exchange 객체가 None입니다. 직접 API 호출 시도...")
                 
@@ -230,37 +389,12 @@ class CapitalTracker:
                 except Exception as direct_error:
                     self.logger.error(f"❌ 직접 잔고 조회도 실패: {direct_error}")
                     return self.fallback_balance
-                # Extract USDT balance using same logic as trading engine
-                total_capital = 0
-                
-                if 'USDT' in balance and isinstance(balance['USDT'], dict):
-                    total_capital = balance['USDT'].get('free', 0) or balance['USDT'].get('available', 0)
-                elif 'free' in balance and 'USDT' in balance['free']:
-                    total_capital = balance['free'].get('USDT', 0)
-                elif 'total' in balance and 'USDT' in balance['total']:
-                    total_capital = balance['total'].get('USDT', 0)
-                elif 'info' in balance:
-                    info = balance['info']
-                    if isinstance(info, list):
-                        for item in info:
-                            if isinstance(item, dict):
-                                # 선물 계좌: marginCoin 확인
-                                if item.get('marginCoin') == 'USDT':
-                                    available = item.get('available', 0)
-                                    account_equity = item.get('accountEquity', 0)
-                                    total_capital = float(available or account_equity or 0)
-                                    self.logger.info(f"🎯 선물 계좌 USDT 잔고 발견: ${total_capital:.2f}")
-                                    break
-                                # 현물 계좌: coin 확인 (기존 코드)
-                                elif item.get('coin') == 'USDT':
-                                    total_capital = float(item.get('available', 0) or item.get('equity', 0))
-                                    self.logger.info(f"🎯 현물 계좌 USDT 잔고 발견: ${total_capital:.2f}")
-                                    break
-                    elif isinstance(info, dict) and 'USDT' in info:
-                        total_capital = float(info['USDT'].get('available', 0))
-                
-                if total_capital > 0:
-                    return float(total_capital)
+            
+            # Extract USDT balance using same logic as trading engine
+            total_capital = self._extract_usdt_balance(balance)
+            self._account_equity = self._extract_usdt_equity(balance)
+            if total_capital > 0:
+                return total_capital
             
             # Fallback to database
             balance_data = self.db.get_latest_balance()
@@ -276,10 +410,17 @@ class CapitalTracker:
             self.logger.error(f"❌ 잔고 조회 실패, 설정 기본값 사용: {e}")
             return self.fallback_balance
     
-    async def _get_position_allocations(self) -> List[CapitalAllocation]:
-        """Get current position allocations"""
+    @staticmethod
+    def _unrealized_pnl(side: str, entry_price: float, current_price: float) -> float:
+        if entry_price <= 0:
+            return 0.0
+        if str(side).lower() in ('long', 'buy'):
+            return (current_price - entry_price) / entry_price
+        return (entry_price - current_price) / entry_price
+    
+    def _build_allocations(self, positions: List[Dict]) -> List[CapitalAllocation]:
+        """Position dicts -> allocations"""
         try:
-            positions = self.db.get_open_positions()
             allocations = []
             
             for pos in positions:
@@ -308,12 +449,12 @@ class CapitalTracker:
                     self.logger.warning(f"⚠️ 포지션 값 변환 오류 무시: {symbol} - {e}")
                     continue
                 
-                # Calculate unrealized PnL (simplified)
-                current_price = entry_price  # Would get from real-time data
-                if side == 'long':
-                    unrealized_pnl = (current_price - entry_price) / entry_price
-                else:
-                    unrealized_pnl = (entry_price - current_price) / entry_price
+                # Calculate unrealized PnL (latest tick, else mark price from the reconciliation snapshot)
+                current_price = float(
+                    (self.exchange.get_current_price(symbol) if self.exchange is not None else None)
+                    or pos.get('mark_price') or entry_price
+                )
+                unrealized_pnl = self._unrealized_pnl(side, entry_price, current_price)
                 
                 allocation = CapitalAllocation(
                     symbol=symbol,
@@ -423,6 +564,9 @@ class CapitalTracker:
     
     def can_open_position(self, symbol: str, estimated_cost: float) -> Tuple[bool, str, Dict]:
         """Check if new position can be opened within dynamic allocation limit"""
+        # 포지션 북이 바뀌었으면 메모리에서 즉시 반영 (요청 없음)
+        if self._sync_positions():
+            self._rebuild()
         if not self.current_snapshot:
             return False, "스냅샷 데이터 없음", {}
         
@@ -465,10 +609,7 @@ class CapitalTracker:
             return False
         
         # Calculate current symbol allocation
-        current_symbol_value = sum(
-            pos.market_value for pos in self.current_snapshot.positions 
-            if pos.symbol == symbol
-        )
+        current_symbol_value = self.current_snapshot.symbol_allocations.get(symbol, 0.0)
         
         # Calculate what it would be with new position
         new_symbol_value = current_symbol_value + additional_cost
@@ -490,8 +631,8 @@ class CapitalTracker:
             'within_limit': self.current_snapshot.within_limit,
             'available_capital': self.current_snapshot.available_capital,
             'position_count': len(self.current_snapshot.positions),
-            'btc_allocation': self.current_snapshot.btc_allocation,
-            'eth_allocation': self.current_snapshot.eth_allocation,
+            'symbol_allocations': dict(self.current_snapshot.symbol_allocations),
+            'balance_source': self.current_snapshot.balance_source,
             'update_count': self.update_count,
             'error_count': self.error_count,
             'last_update': self.last_update_time.isoformat() if self.last_update_time else None,
@@ -571,9 +712,6 @@ async def get_available_capital_for_symbol(tracker: CapitalTracker, symbol: str)
     total_target_allocation = tracker.current_snapshot.total_balance * tracker.allocation_limit
     max_symbol_allocation = total_target_allocation * target_weight
     
-    current_symbol_value = sum(
-        pos.market_value for pos in tracker.current_snapshot.positions 
-        if pos.symbol == symbol
-    )
+    current_symbol_value = tracker.current_snapshot.symbol_allocations.get(symbol, 0.0)
     
     return max(0, max_symbol_allocation - current_symbol_value)
\ No newline at end of file
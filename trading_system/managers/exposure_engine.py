@@ -0,0 +1,261 @@
+"""
+Exposure Engine
+Exponentially weighted covariance of symbol returns, portfolio beta-to-BTC and marginal trade risk
+"""
+
+import asyncio
+import logging
+import math
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Import handling for both direct and package imports
+try:
+    from ..config.config import TradingConfig
+except ImportError:
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config.config import TradingConfig
+
+
+def _timeframe_seconds(timeframe: str) -> int:
+    """'15m' -> 900, '1h' -> 3600, '1d' -> 86400"""
+    units = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+    return int(timeframe[:-1]) * units[timeframe[-1].lower()]
+
+
+class ExposureEngine:
+    """
+    RiskMetrics-style EWMA covariance, updated incrementally per closed bar.
+
+    cov <- lambda * cov + (1 - lambda) * r r^T on the symbols that printed the bar. Every exposure
+    figure for the book and for a proposed trade comes from one matrix-vector product cov @ w,
+    so cost is O(n^2) in the number of symbols with no per-pair loops.
+    """
+
+    def __init__(self, config: TradingConfig):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+
+        self.lam = config.EXPOSURE_EWMA_LAMBDA
+        self.timeframe = config.EXPOSURE_TIMEFRAME
+        self.bar_seconds = _timeframe_seconds(self.timeframe)
+        self.bars_per_day = 86400 / self.bar_seconds
+        self.benchmark = config.EXPOSURE_BENCHMARK
+
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.cov = np.zeros((0, 0))
+        self.observations = 0
+        self.returns = np.zeros((0, 0))  # 최근 EXPOSURE_LOOKBACK개 봉의 수익률 (행: 봉, 열: 심볼)
+
+        self.last_close: Dict[str, float] = {}
+        self.last_ts: Dict[str, int] = {}
+        self._pending: Dict[int, Dict[int, float]] = {}  # bar ts -> {symbol index: log return}
+        self.seeded = False
+
+    # ------------------------------------------------------------------ matrix upkeep
+
+    def _ensure(self, symbol: str) -> int:
+        """Index of symbol, growing the matrix by one row/column for a new one"""
+        idx = self.index.get(symbol)
+        if idx is None:
+            idx = len(self.symbols)
+            self.symbols.append(symbol)
+            self.index[symbol] = idx
+            self.cov = np.pad(self.cov, ((0, 1), (0, 1)))
+            self.returns = np.pad(self.returns, ((0, 0), (0, 1)))
+        return idx
+
+    def seed(self, closes: Dict[str, pd.Series]):
+        """Initialize from aligned close histories in one weighted matmul"""
+        frame = pd.DataFrame(closes).sort_index()
+        returns = np.log(frame).diff().iloc[1:]
+        if returns.empty:
+            return
+
+        for symbol in frame.columns:
+            self._ensure(symbol)
+        order = [self.index[s] for s in frame.columns]
+
+        # 가장 최근 바의 가중치가 가장 큼: (1-λ)λ^(T-1-t)
+        data = returns.fillna(0.0).to_numpy()
+        weights = (1 - self.lam) * self.lam ** np.arange(len(data) - 1, -1, -1)
+        seeded = (data * weights[:, None]).T @ data
+
+        self.cov[np.ix_(order, order)] = seeded
+        self.observations = len(data)
+        self.returns = np.zeros((len(data), len(self.symbols)))
+        self.returns[:, order] = data
+        self.returns = self.returns[-self.config.EXPOSURE_LOOKBACK:]
+        for symbol in frame.columns:
+            series = frame[symbol].dropna()
+            if len(series):
+                self.last_close[symbol] = float(series.iloc[-1])
+                self.last_ts[symbol] = int(series.index[-1].timestamp())
+        self._pending.clear()
+        self.seeded = True
+
+    def on_bar(self, symbol: str, timestamp: int, close: float):
+        """One closed bar; the covariance update runs once every active symbol has printed it"""
+        previous = self.last_close.get(symbol)
+        if timestamp <= self.last_ts.get(symbol, -1) or close <= 0:
+            return
+        self.last_close[symbol] = close
+        self.last_ts[symbol] = timestamp
+        if previous:
+            self._pending.setdefault(timestamp, {})[self._ensure(symbol)] = math.log(close / previous)
+        self._commit_ready()
+
+    def _commit_ready(self):
+        """Apply pending bars up to the slowest non-stale symbol"""
+        if not self._pending or not self.last_ts:
+            return
+        newest = max(self.last_ts.values())
+        active = [ts for ts in self.last_ts.values() if newest - ts <= 3 * self.bar_seconds]
+        ready = min(active)
+        for ts in sorted(t for t in self._pending if t <= ready):
+            bar = self._pending.pop(ts)
+            idx = np.fromiter(bar.keys(), dtype=int)
+            r = np.fromiter(bar.values(), dtype=float)
+            block = np.ix_(idx, idx)
+            self.cov[block] = self.lam * self.cov[block] + (1 - self.lam) * np.outer(r, r)
+            self.observations += 1
+
+            row = np.zeros((1, len(self.symbols)))
+            row[0, idx] = r
+            self.returns = np.vstack([self.returns, row])[-self.config.EXPOSURE_LOOKBACK:]
+
+    async def refresh(self, exchange, symbols: Iterable[str]):
+        """Pull cached candles and feed closed bars (full seed on first call or new symbols)"""
+        symbols = list(symbols)
+        frames = await asyncio.gather(*(
+            exchange.fetch_ohlcv_with_cache(symbol, self.timeframe, self.config.EXPOSURE_LOOKBACK)
+            for symbol in symbols
+        ), return_exceptions=True)
+
+        closed = {}
+        for symbol, df in zip(symbols, frames):
+            if isinstance(df, Exception) or df is None or len(df) < 3:
+                continue
+            closed[symbol] = df['close'].iloc[:-1]  # 마지막 봉은 진행 중
+
+        if not closed:
+            return
+        if not self.seeded or any(s not in self.index for s in closed):
+            self.seed(closed)
+            self.logger.info(f"📐 익스포저 공분산 초기화: {len(self.symbols)}개 심볼, {self.observations}개 봉")
+            return
+
+        for symbol, series in closed.items():
+            last = self.last_ts.get(symbol, -1)
+            for ts, close in series.items():
+                ts = int(ts.timestamp())
+                if ts > last:
+                    self.on_bar(symbol, ts, float(close))
+
+    def is_ready(self) -> bool:
+        return (self.seeded and self.benchmark in self.index
+                and self.observations >= self.config.EXPOSURE_MIN_OBSERVATIONS)
+
+    def correlation(self) -> Dict[str, Dict[str, float]]:
+        """Correlation matrix as nested dict"""
+        std = np.sqrt(np.clip(np.diag(self.cov), 1e-18, None))
+        corr = self.cov / np.outer(std, std)
+        return {a: {b: float(corr[i, j]) for j, b in enumerate(self.symbols)} for i, a in enumerate(self.symbols)}
+
+    # ------------------------------------------------------------------ exposure
+
+    def weights(self, positions: Iterable[Dict]) -> np.ndarray:
+        """Signed notional per symbol (mark price when known)"""
+        w = np.zeros(len(self.symbols))
+        for p in positions:
+            idx = self.index.get(p.get('symbol'))
+            if idx is None:
+                continue
+            price = float(p.get('mark_price') or p.get('current_price') or p.get('entry_price') or 0)
+            sign = 1.0 if str(p.get('side')).lower() in ('long', 'buy') else -1.0
+            w[idx] += sign * float(p.get('quantity') or 0) * price
+        return w
+
+    def exposure(self, positions: Iterable[Dict], equity: float) -> Dict:
+        """Net/gross exposure, BTC-equivalent beta, daily vol and per-symbol risk contributions"""
+        w = self.weights(positions)
+        sw = self.cov @ w
+        variance = float(w @ sw)
+        vol = math.sqrt(max(variance, 0.0))
+        b = self.index[self.benchmark]
+        btc_equivalent = float(sw[b] / self.cov[b, b]) if self.cov[b, b] > 0 else 0.0
+        contributions = w * sw / vol if vol > 0 else np.zeros_like(w)
+        equity = equity or 1.0
+        return {
+            'net': float(w.sum()) / equity,
+            'gross': float(np.abs(w).sum()) / equity,
+            'btc_equivalent': btc_equivalent,
+            'beta': btc_equivalent / equity,
+            'daily_vol': vol * math.sqrt(self.bars_per_day) / equity,
+            'risk_contributions': {s: float(contributions[i]) / equity
+                                   for i, s in enumerate(self.symbols) if w[i] != 0}
+        }
+
+    def evaluate_trade(self, positions: Iterable[Dict], symbol: str, side: str,
+                       notional: float, equity: float) -> Optional[Dict]:
+        """Post-trade beta/vol and the trade's marginal risk, from the same cov @ w"""
+        j = self.index.get(symbol)
+        if j is None or not self.is_ready():
+            return None
+        w = self.weights(positions)
+        sw = self.cov @ w
+        variance = float(w @ sw)
+        delta = notional if str(side).lower() in ('long', 'buy') else -notional
+        b = self.index[self.benchmark]
+
+        new_variance = variance + 2 * delta * sw[j] + delta * delta * self.cov[j, j]
+        scale = math.sqrt(self.bars_per_day) / (equity or 1.0)
+        return {
+            'beta_before': float(sw[b] / self.cov[b, b]) / (equity or 1.0),
+            'beta_after': float((sw[b] + delta * self.cov[j, b]) / self.cov[b, b]) / (equity or 1.0),
+            'daily_vol_before': math.sqrt(max(variance, 0.0)) * scale,
+            'daily_vol_after': math.sqrt(max(new_variance, 0.0)) * scale,
+            # d(sigma)/d(notional) at the current book: 증분 1달러당 포트폴리오 변동성 변화
+            'marginal_risk': float(sw[j] / math.sqrt(variance)) * scale if variance > 0
+                             else math.sqrt(self.cov[j, j]) * scale
+        }
+
+    def max_trade_notional(self, positions: Iterable[Dict], symbol: str, side: str,
+                           equity: float) -> Optional[float]:
+        """Largest notional that keeps |beta| <= EXPOSURE_MAX_BETA and daily vol <= EXPOSURE_MAX_DAILY_VOL"""
+        j = self.index.get(symbol)
+        if j is None or not self.is_ready() or equity <= 0:
+            return None
+        w = self.weights(positions)
+        sw = self.cov @ w
+        variance = float(w @ sw)
+        sign = 1.0 if str(side).lower() in ('long', 'buy') else -1.0
+        b = self.index[self.benchmark]
+        bounds = []
+
+        # 베타: btc_eq + sign * x * beta_j 가 ±한도 안에 있어야 함 (x에 대해 선형)
+        if self.cov[b, b] > 0:
+            btc_equivalent = sw[b] / self.cov[b, b]
+            k = sign * self.cov[j, b] / self.cov[b, b]
+            limit = self.config.EXPOSURE_MAX_BETA * equity
+            if k > 0:
+                bounds.append((limit - btc_equivalent) / k)
+            elif k < 0:
+                bounds.append((limit + btc_equivalent) / -k)
+
+        # 변동성: var + 2*sign*x*Sw_j + x^2*S_jj <= V^2 (x에 대해 2차)
+        a = self.cov[j, j]
+        if a > 0:
+            max_variance = (self.config.EXPOSURE_MAX_DAILY_VOL * equity) ** 2 / self.bars_per_day
+            half_b = sign * sw[j]
+            disc = half_b * half_b - a * (variance - max_variance)
+            bounds.append((-half_b + math.sqrt(disc)) / a if disc >= 0 else 0.0)
+
+        if not bounds:
+            return None
+        return max(0.0, float(min(bounds)))
@@ -0,0 +1,124 @@
+"""
+Kelly Tracker
+Rolling per-symbol win rate / average win / average loss, updated in O(1) per closed trade
+"""
+
+import logging
+from collections import deque
+from typing import Deque, Dict, Iterable, List
+
+# Import handling for both direct and package imports
+try:
+    from ..config.config import TradingConfig
+except ImportError:
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config.config import TradingConfig
+
+
+class _SymbolKelly:
+    """
+    Decayed sums over the last `window` trades.
+
+    Each trade enters with weight 1 and is multiplied by `decay` on every later trade; when it leaves
+    the window its remaining weight decay^window is subtracted, so an update never rescans history.
+    """
+
+    __slots__ = ('trades', 'decay', 'evict_weight', 'total', 'wins', 'win_sum', 'losses', 'loss_sum')
+
+    def __init__(self, window: int, decay: float):
+        self.trades: Deque[float] = deque(maxlen=window)
+        self.decay = decay
+        self.evict_weight = decay ** window
+        self.total = self.wins = self.win_sum = self.losses = self.loss_sum = 0.0
+
+    def _apply(self, pnl: float, weight: float):
+        self.total += weight
+        if pnl > 0:
+            self.wins += weight
+            self.win_sum += weight * pnl
+        elif pnl < 0:
+            self.losses += weight
+            self.loss_sum += weight * -pnl
+
+    def add(self, pnl: float):
+        evicted = self.trades[0] if len(self.trades) == self.trades.maxlen else None
+        self.trades.append(pnl)
+        d = self.decay
+        self.total *= d
+        self.wins *= d
+        self.win_sum *= d
+        self.losses *= d
+        self.loss_sum *= d
+        self._apply(pnl, 1.0)
+        if evicted is not None:
+            self._apply(evicted, -self.evict_weight)
+
+    def stats(self) -> Dict[str, float]:
+        win_rate = self.wins / self.total if self.total > 1e-12 else 0.0
+        return {
+            'win_rate': win_rate,
+            'avg_win': self.win_sum / self.wins if self.wins > 1e-12 else 0.0,
+            'avg_loss': self.loss_sum / self.losses if self.losses > 1e-12 else 0.0,
+            'sample_size': len(self.trades)
+        }
+
+
+class KellyTracker:
+    """
+    Per-symbol Kelly fraction from a rolling window of closed-trade returns (KELLY_WINDOW trades,
+    optional exponential decay KELLY_DECAY), read by position sizing without touching the DB.
+
+    Only the trade window is persisted (one row per symbol); the sums are rebuilt from it on load.
+    """
+
+    def __init__(self, config: TradingConfig):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self._symbols: Dict[str, _SymbolKelly] = {}
+        self._fractions: Dict[str, float] = {}
+
+    def _state(self, symbol: str) -> _SymbolKelly:
+        state = self._symbols.get(symbol)
+        if state is None:
+            state = self._symbols[symbol] = _SymbolKelly(self.config.KELLY_WINDOW, self.config.KELLY_DECAY)
+        return state
+
+    def _compute(self, state: _SymbolKelly) -> float:
+        """f = (b*p - q) / b, clamped to [0, KELLY_MAX_FRACTION]"""
+        stats = state.stats()
+        if stats['sample_size'] < self.config.MIN_TRADES_FOR_KELLY:
+            return self.config.KELLY_DEFAULT_FRACTION
+        if stats['avg_win'] <= 0:
+            return 0.0
+        if stats['avg_loss'] <= 0:
+            return self.config.KELLY_MAX_FRACTION
+        b = stats['avg_win'] / stats['avg_loss']
+        p = stats['win_rate']
+        return max(0.0, min((b * p - (1 - p)) / b, self.config.KELLY_MAX_FRACTION))
+
+    def load(self, histories: Dict[str, Iterable[float]]):
+        """Rebuild from persisted trade windows (oldest first)"""
+        for symbol, trades in histories.items():
+            state = self._symbols[symbol] = _SymbolKelly(self.config.KELLY_WINDOW, self.config.KELLY_DECAY)
+            for pnl in list(trades)[-self.config.KELLY_WINDOW:]:
+                state.add(float(pnl))
+            self._fractions[symbol] = self._compute(state)
+
+    def record(self, symbol: str, pnl_percent: float) -> float:
+        """청산 거래 1건 반영 후 새 Kelly 지수 반환"""
+        state = self._state(symbol)
+        state.add(float(pnl_percent))
+        fraction = self._fractions[symbol] = self._compute(state)
+        return fraction
+
+    def fraction(self, symbol: str) -> float:
+        return self._fractions.get(symbol, self.config.KELLY_DEFAULT_FRACTION)
+
+    def trades(self, symbol: str) -> List[float]:
+        """Window to persist"""
+        return list(self._state(symbol).trades)
+
+    def get_status(self, symbol: str) -> Dict:
+        return {**self._state(symbol).stats(), 'kelly_fraction': self.fraction(symbol)}
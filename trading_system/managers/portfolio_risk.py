@@ -0,0 +1,161 @@
+"""
+Portfolio Risk Engine
+Historical-simulation and parametric VaR/CVaR plus stress scenarios, batched over candidate trade sizes
+"""
+
+import logging
+from statistics import NormalDist
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+# Import handling for both direct and package imports
+try:
+    from ..config.config import TradingConfig
+    from .exposure_engine import ExposureEngine
+except ImportError:
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config.config import TradingConfig
+    from managers.exposure_engine import ExposureEngine
+
+
+# 시나리오: benchmark = BTC 충격을 베타로 전파, alts = BTC 외 전 심볼, all = 전 심볼 동일 충격, sigma = 심볼별 일간 σ 배수
+STRESS_SCENARIOS: Dict[str, Dict] = {
+    'btc_down_10': {'type': 'benchmark', 'shock': -0.10},
+    'btc_down_20': {'type': 'benchmark', 'shock': -0.20},
+    'btc_up_10': {'type': 'benchmark', 'shock': 0.10},
+    'alts_down_15': {'type': 'alts', 'shock': -0.15},
+    'market_gap_down_5': {'type': 'all', 'shock': -0.05},
+    'short_squeeze_8': {'type': 'all', 'shock': 0.08},
+    'three_sigma_down': {'type': 'sigma', 'shock': -3.0},
+}
+
+
+class PortfolioRiskEngine:
+    """
+    Forward-looking loss estimates for the position book, using ExposureEngine's return matrix
+    and covariance.
+
+    Positions are valued at leveraged notional (quantity x price); a proposed margin is converted
+    with config.LEVERAGE. Every candidate size is a column of one weight matrix, so VaR, CVaR and all
+    stress scenarios for VAR_SIZE_CANDIDATES sizes are a handful of matrix products.
+    """
+
+    def __init__(self, config: TradingConfig, exposure: ExposureEngine):
+        self.config = config
+        self.exposure = exposure
+        self.logger = logging.getLogger(__name__)
+
+        self.confidence = config.VAR_CONFIDENCE
+        self.horizon = config.VAR_HORIZON_BARS
+        normal = NormalDist()
+        self._z = normal.inv_cdf(self.confidence)
+        self._es_factor = normal.pdf(self._z) / (1 - self.confidence)
+
+    def is_ready(self) -> bool:
+        return self.exposure.is_ready() and len(self.exposure.returns) > self.horizon * 2
+
+    # ------------------------------------------------------------------ building blocks
+
+    def _horizon_returns(self) -> np.ndarray:
+        """Overlapping horizon-bar simple returns (T-h, n) from the per-bar log returns"""
+        cumulative = np.vstack([np.zeros((1, self.exposure.returns.shape[1])),
+                                np.cumsum(self.exposure.returns, axis=0)])
+        return np.expm1(cumulative[self.horizon:] - cumulative[:-self.horizon])
+
+    def _scenario_shocks(self) -> np.ndarray:
+        """(K, n) simple-return shocks for STRESS_SCENARIOS"""
+        exposure = self.exposure
+        cov = exposure.cov
+        b = exposure.index[exposure.benchmark]
+        beta = cov[:, b] / cov[b, b] if cov[b, b] > 0 else np.zeros(len(cov))
+        daily_sigma = np.sqrt(np.clip(np.diag(cov), 0, None) * exposure.bars_per_day)
+        alts = np.ones(len(cov))
+        alts[b] = 0.0
+
+        rows = []
+        for scenario in STRESS_SCENARIOS.values():
+            kind, shock = scenario['type'], scenario['shock']
+            if kind == 'benchmark':
+                rows.append(beta * shock)
+            elif kind == 'alts':
+                rows.append(alts * shock)
+            elif kind == 'sigma':
+                rows.append(np.maximum(daily_sigma * shock, -0.99))
+            else:
+                rows.append(np.full(len(cov), shock))
+        return np.vstack(rows)
+
+    def _metrics(self, weights: np.ndarray) -> Dict[str, np.ndarray]:
+        """VaR/CVaR (historical + parametric) and stress losses for each column of weights (n, m)"""
+        pnl = self._horizon_returns() @ weights  # (T-h, m)
+        losses = -pnl
+        hist_var = np.quantile(losses, self.confidence, axis=0)
+        tail = losses >= hist_var
+        hist_cvar = (losses * tail).sum(axis=0) / np.maximum(tail.sum(axis=0), 1)
+
+        variance = np.einsum('im,im->m', weights, self.exposure.cov @ weights)
+        sigma = np.sqrt(np.clip(variance, 0, None) * self.horizon)
+
+        stress = -(self._scenario_shocks() @ weights)  # (K, m) 손실이 양수
+        return {
+            'hist_var': hist_var,
+            'hist_cvar': hist_cvar,
+            'param_var': self._z * sigma,
+            'param_cvar': self._es_factor * sigma,
+            'stress': stress
+        }
+
+    # ------------------------------------------------------------------ public
+
+    def assess(self, positions: Iterable[Dict], equity: float) -> Optional[Dict]:
+        """Current book: VaR/CVaR and each stress scenario as a fraction of equity"""
+        if not self.is_ready() or equity <= 0:
+            return None
+        metrics = self._metrics(self.exposure.weights(positions)[:, None])
+        return {
+            'confidence': self.confidence,
+            'horizon_bars': self.horizon,
+            'hist_var': float(metrics['hist_var'][0]) / equity,
+            'hist_cvar': float(metrics['hist_cvar'][0]) / equity,
+            'param_var': float(metrics['param_var'][0]) / equity,
+            'param_cvar': float(metrics['param_cvar'][0]) / equity,
+            'stress': {name: float(loss) / equity
+                       for name, loss in zip(STRESS_SCENARIOS, metrics['stress'][:, 0])}
+        }
+
+    def evaluate_sizes(self, positions: Iterable[Dict], symbol: str, side: str,
+                       notionals: np.ndarray) -> Optional[Dict[str, np.ndarray]]:
+        """Metrics for the book plus each candidate trade notional, in one batch"""
+        j = self.exposure.index.get(symbol)
+        if j is None or not self.is_ready():
+            return None
+        notionals = np.asarray(notionals, dtype=float)
+        sign = 1.0 if str(side).lower() in ('long', 'buy') else -1.0
+        weights = np.repeat(self.exposure.weights(positions)[:, None], len(notionals), axis=1)
+        weights[j] += sign * notionals
+        return self._metrics(weights)
+
+    def max_trade_notional(self, positions: Iterable[Dict], symbol: str, side: str,
+                           equity: float, upper: float) -> Optional[float]:
+        """Largest notional in [0, upper] keeping CVaR <= VAR_MAX_CVAR and worst stress <= STRESS_MAX_LOSS"""
+        if upper <= 0 or equity <= 0:
+            return None
+        notionals = np.linspace(0.0, upper, self.config.VAR_SIZE_CANDIDATES)
+        metrics = self.evaluate_sizes(positions, symbol, side, notionals)
+        if metrics is None:
+            return None
+
+        cvar = np.maximum(metrics['hist_cvar'], metrics['param_cvar'])
+        worst_stress = metrics['stress'].max(axis=0)
+        # 이미 한도를 넘은 북은 현재보다 나빠지지 않는 크기만 허용 (위험 축소 거래는 통과)
+        cvar_limit = max(self.config.VAR_MAX_CVAR * equity, cvar[0])
+        stress_limit = max(self.config.STRESS_MAX_LOSS * equity, worst_stress[0])
+        feasible = (cvar <= cvar_limit) & (worst_stress <= stress_limit)
+
+        # 첫 위반 직전 크기까지 (크기에 대해 위험이 단조 증가한다고 보지 않고 연속 구간만 인정)
+        blocked = np.flatnonzero(~feasible)
+        last = (blocked[0] - 1) if len(blocked) else len(notionals) - 1
+        return float(notionals[last]) if last >= 0 else 0.0
@@ -0,0 +1,192 @@
+"""
+Position Book
+Authoritative in-memory open positions with coalesced write-behind persistence
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+# Import handling for both direct and package imports
+try:
+    from ..config.config import TradingConfig
+    from ..database.db_manager import EnhancedDatabaseManager
+except ImportError:
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config.config import TradingConfig
+    from database.db_manager import EnhancedDatabaseManager
+
+
+class PositionBook:
+    """Open positions live in memory; changed fields are merged and flushed to the DB in one batch"""
+
+    def __init__(self, config: TradingConfig, db: EnhancedDatabaseManager, flush_interval: float = None):
+        self.config = config
+        self.db = db
+        self.flush_interval = flush_interval or config.POSITION_FLUSH_INTERVAL
+        self.logger = logging.getLogger(__name__)
+
+        self.positions: Dict[int, Dict] = {}
+        self._dirty: Dict[int, Dict] = {}
+        self._flush_event: Optional[asyncio.Event] = None
+        self._flush_task = None
+        self.version = 0  # 변경될 때마다 증가 - 스냅샷 재사용 판단용
+
+        self.stats = {'updates': 0, 'flushes': 0, 'rows_written': 0, 'flush_errors': 0}
+
+    def load(self) -> int:
+        """DB의 열린 포지션으로 북 초기화"""
+        self.positions = {p['id']: dict(p) for p in self.db.get_open_positions()}
+        self.version += 1
+        return len(self.positions)
+
+    def get(self, position_id: int) -> Optional[Dict]:
+        """Open position by id"""
+        return self.positions.get(position_id)
+
+    def get_open(self, symbol: str = None) -> List[Dict]:
+        """Open positions, optionally for one symbol"""
+        if symbol is None:
+            return list(self.positions.values())
+        return [p for p in self.positions.values() if p['symbol'] == symbol]
+
+    def add(self, position: Dict):
+        """신규 포지션 등록 (DB insert는 호출자가 이미 수행)"""
+        self.positions[position['id']] = dict(position)
+        self.version += 1
+
+    def update(self, position_id: int, fields: Dict, flush: bool = False):
+        """Apply fields in memory and mark them dirty; flush=True for state transitions"""
+        position = self.positions.get(position_id)
+        if position is not None:
+            position.update(fields)
+        self._dirty.setdefault(position_id, {}).update(fields)
+        self.version += 1
+        self.stats['updates'] += 1
+        if flush:
+            self._request_flush()
+
+    def close(self, position_id: int, fields: Dict) -> Optional[Dict]:
+        """Remove a position from the open book and persist its final state promptly"""
+        position = self.positions.pop(position_id, None)
+        self.version += 1
+        self._dirty.setdefault(position_id, {}).update({**fields, 'status': 'closed'})
+        self._request_flush()
+        return position
+
+    def _request_flush(self):
+        if self._flush_event is not None:
+            self._flush_event.set()
+
+    async def flush(self) -> int:
+        """Write every dirty position in a single transaction"""
+        if not self._dirty:
+            return 0
+
+        pending, self._dirty = self._dirty, {}
+        try:
+            written = await asyncio.get_event_loop().run_in_executor(
+                None, self.db.update_positions_batch, pending
+            )
+            self.stats['flushes'] += 1
+            self.stats['rows_written'] += written
+            return written
+        except Exception as e:
+            # 실패한 변경분은 이후 변경과 병합해 다음 flush에서 재시도
+            for position_id, fields in pending.items():
+                self._dirty[position_id] = {**fields, **self._dirty.get(position_id, {})}
+            self.stats['flush_errors'] += 1
+            self.logger.error(f"❌ 포지션 일괄 저장 실패 ({len(pending)}건): {e}")
+            return 0
+
+    async def _flush_loop(self):
+        """주기적 flush, 상태 전이 시에는 즉시 flush"""
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._flush_event.clear()
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"❌ 포지션 flush 루프 오류: {e}")
+
+    def start(self):
+        """Start the write-behind loop"""
+        self._flush_event = asyncio.Event()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the loop and persist anything still dirty"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+
+    @staticmethod
+    def _normalize_symbol(symbol: str) -> str:
+        """'BTC/USDT:USDT' -> 'BTCUSDT'"""
+        return symbol.split(':')[0].replace('/', '')
+
+    async def reconcile(self, exchange) -> Dict:
+        """시작 시 DB와 거래소 포지션을 대조해 북 구성"""
+        loaded = self.load()
+        report = {'loaded': loaded, 'closed_missing': [], 'untracked': [], 'quantity_fixed': []}
+
+        if self.config.PAPER_TRADING:
+            self.logger.info(f"📒 포지션 북 로드: {loaded}개 (PAPER_TRADING - 거래소 대조 생략)")
+            return report
+
+        try:
+            # 오류를 빈 목록으로 삼키지 않도록 ccxt를 직접 호출
+            raw_positions = await asyncio.get_event_loop().run_in_executor(
+                None, exchange.exchange.fetch_positions
+            )
+        except Exception as e:
+            self.logger.warning(f"⚠️ 거래소 포지션 조회 실패 - DB 기준으로 시작: {e}")
+            return report
+
+        live: Dict[str, List[Dict]] = {}
+        for p in raw_positions or []:
+            if float(p.get('contracts') or 0) > 0:
+                live.setdefault(self._normalize_symbol(p['symbol']), []).append(p)
+
+        for position in list(self.positions.values()):
+            symbol = position['symbol']
+            if symbol not in live:
+                self.close(position['id'], {})
+                report['closed_missing'].append(position['id'])
+                continue
+
+            book_entries = self.get_open(symbol)
+            if len(book_entries) == 1 and len(live[symbol]) == 1:
+                contracts = float(live[symbol][0]['contracts'])
+                if abs(contracts - float(position.get('quantity') or 0)) > 1e-12:
+                    self.update(position['id'], {'quantity': contracts}, flush=True)
+                    report['quantity_fixed'].append(position['id'])
+
+        tracked_symbols = {p['symbol'] for p in self.positions.values()}
+        for symbol, entries in live.items():
+            if symbol not in tracked_symbols:
+                report['untracked'].extend(
+                    {'symbol': symbol, 'side': e.get('side'), 'contracts': e.get('contracts')} for e in entries
+                )
+
+        if report['closed_missing'] or report['untracked'] or report['quantity_fixed']:
+            self.logger.warning(
+                f"⚠️ 포지션 대조: 거래소에 없음 {len(report['closed_missing'])}개 종료, "
+                f"수량 보정 {len(report['quantity_fixed'])}개, 미추적 {len(report['untracked'])}개"
+            )
+            self.db.log_system_event('WARNING', 'PositionBook', "시작 시 포지션 불일치", report)
+        self.logger.info(f"📒 포지션 북 로드: {len(self.positions)}개 오픈")
+        await self.flush()
+        return report
+
+    def get_stats(self) -> Dict:
+        """북/flush 통계"""
+        return {**self.stats, 'open_positions': len(self.positions), 'dirty_positions': len(self._dirty)}
@@ -6,15 +6,21 @@ Advanced position management with complete trailing stop implementation
 import asyncio
 import json
 import logging
+import time
 import numpy as np
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
 
 # Import handling for both direct and package imports
 try:
     from ..config.config import TradingConfig
     from ..database.db_manager import EnhancedDatabaseManager
     from .risk_manager import RiskManager
+    from .tick_risk_evaluator import TickRiskEvaluator
+    from .position_book import PositionBook
+    from .reconciliation_service import ReconciliationService
+    from .risk_state import RiskState
+    from ..utils.atr_calculator import OHLCV_COLUMNS
 except ImportError:
     import sys
     import os
@@ -22,6 +28,11 @@ except ImportError:
     from config.config import TradingConfig
     from database.db_manager import EnhancedDatabaseManager
     from managers.risk_manager import RiskManager
+    from managers.tick_risk_evaluator import TickRiskEvaluator
+    from managers.position_book import PositionBook
+    from managers.reconciliation_service import ReconciliationService
+    from managers.risk_state import RiskState
+    from utils.atr_calculator import OHLCV_COLUMNS
 
 
 class PositionManager:
@@ -34,190 +45,292 @@ class PositionManager:
         self.notifier = notifier
         self.logger = logging.getLogger(__name__)
         
+        # In-memory risk counters fed by this manager's open/close events, shared with RiskManager
+        self.risk_state = RiskState(config, db)
+        
         # Initialize RiskManager instance
-        self.risk_manager = RiskManager(config, db)
+        self.risk_manager = RiskManager(config, db, risk_state=self.risk_state)
         
-        # Track positions in memory for faster access
-        self.active_positions = {}
+        # Authoritative in-memory positions, persisted write-behind
+        self.book = PositionBook(config, db)
+        self.active_positions = self.book.positions
         self._position_lock = asyncio.Lock()
+        # 분할 실행 중(락 해제 상태)인 진입 심볼 - 같은 심볼 중복 진입 차단
+        self._opening: Set[str] = set()
+        
+        # Batched exchange pull per interval; the snapshot other managers read
+        self.reconciler = ReconciliationService(config, exchange, self.book, db)
+        self.reconciler.add_listener(self._on_reconciled)
+        self.reconciler.close_handler = self._close_missing_position
+        
+        # Tick-driven stop/take-profit evaluation
+        self.tick_evaluator = TickRiskEvaluator(config, self)
+        
+        # 진입 전 손절/익절 사전 계산용 ATR 캐시: symbol -> (계산 시각, ATR)
+        self._atr_cache: Dict[str, Tuple[float, float]] = {}
     
     async def initialize(self):
-        """Initialize position manager (async compatibility)"""
-        # Already initialized in __init__, this is for compatibility
+        """Reconcile the position book, then subscribe to price ticks"""
+        await self.book.reconcile(self.exchange)
+        self.active_positions = self.book.positions
+        self.book.start()
+        self.tick_evaluator.sync(self.book.get_open())
+        self.tick_evaluator.start(self.exchange)
+        self.reconciler.start()
+        self.risk_state.start()
         return True
     
+    async def shutdown(self):
+        """Stop tick evaluation and flush pending position changes"""
+        self.tick_evaluator.stop()
+        await self.reconciler.stop()
+        await self.risk_state.stop()
+        await self.book.stop()
+    
+    def _on_reconciled(self, snapshot):
+        """대조로 북에서 종료된 포지션의 트리거 즉시 해제, 리스크 상태의 오픈 수 보정"""
+        self.risk_state.sync_positions(snapshot.positions)
+        if snapshot.diff.get('closed_missing'):
+            self.tick_evaluator.sync(self.book.get_open())
+    
     async def open_position(self, symbol: str, signal: Dict, allocated_capital: float) -> Optional[Dict]:
         """Open a new position with comprehensive checks"""
-        async with self._position_lock:
-            try:
-                # Double-check risk limits
-                current_positions = self.db.get_open_positions(symbol)
-                if len(current_positions) >= self.config.MAX_POSITIONS[symbol]:
-                    self.logger.warning(f"{symbol} 포지션 한도 도달")
-                    return None
-                
-                # Calculate position size with slippage consideration
-                size_ratio = self._calculate_position_size_ratio(symbol, signal)
-                
-                # 🔥 CRITICAL: Enhanced defensive programming for None values
-                if size_ratio is None:
-                    self.logger.error(f"❌ {symbol} size_ratio가 None입니다")
-                    return None
-                    
-                if allocated_capital is None:
-                    self.logger.error(f"❌ {symbol} allocated_capital이 None입니다")
-                    return None
-                
-                # Additional type and value checks
-                try:
-                    size_ratio = float(size_ratio)
-                    allocated_capital = float(allocated_capital)
-                    
-                    if size_ratio <= 0:
-                        self.logger.error(f"❌ {symbol} 잘못된 size_ratio: {size_ratio}")
-                        return None
-                        
-                    if allocated_capital <= 0:
-                        self.logger.error(f"❌ {symbol} 잘못된 allocated_capital: {allocated_capital}")
-                        return None
-                        
-                except (ValueError, TypeError) as e:
-                    self.logger.error(f"❌ {symbol} 포지션 파라미터 변환 오류: size_ratio={size_ratio}, allocated_capital={allocated_capital}, error={e}")
-                    return None
-                
-                position_value = allocated_capital * size_ratio
-                self.logger.info(f"💰 {symbol} 포지션 값 계산: ${allocated_capital:.2f} × {size_ratio:.3f} = ${position_value:.2f}")
-                
-                # Account for fees
-                taker_fee = float(self.config.TAKER_FEE or 0.0006)  # Default 0.06%
-                position_value *= (1 - taker_fee)
-                
-                # Get contract size
-                contracts = await self.exchange.calculate_position_size(symbol, position_value)
-                
-                if contracts <= 0:
-                    self.logger.warning(f"{symbol} 잘못된 포지션 크기")
-                    return None
-                
-                # Place order
-                side = 'buy' if signal['direction'] == 'long' else 'sell'
-                order = await self.exchange.place_order(symbol, side, contracts)
-                
-                if not order or not order.get('id'):
-                    self.logger.error(f"{symbol} 주문 실행 실패")
+        try:
+            async with self._position_lock:
+                entry = await self._prepare_entry(symbol, signal, allocated_capital)
+                if entry is None:
                     return None
+                if entry['algo'] == 'market':
+                    order = await self._send_entry(symbol, entry)
+                    return await self._record_entry(symbol, signal, entry, order)
+                # TWAP 등 분할 실행은 수 분 걸릴 수 있음 - 심볼만 예약하고 락 밖에서 실행
+                self._opening.add(symbol)
+            
+            try:
+                order = await self._send_entry(symbol, entry)
+                async with self._position_lock:
+                    return await self._record_entry(symbol, signal, entry, order)
+            finally:
+                self._opening.discard(symbol)
+            
+        except Exception as e:
+            self.logger.error(f"포지션 개시 오류: {e}")
+            self.db.log_system_event('ERROR', 'PositionManager', 
+                                   f"{symbol} 포지션 개시 실패", 
+                                   {'error': str(e)})
+            return None
+    
+    async def _prepare_entry(self, symbol: str, signal: Dict, allocated_capital: float) -> Optional[Dict]:
+        """Limit checks, order size, stops and execution algorithm (called under the position lock)"""
+        # Double-check risk limits
+        if symbol in self._opening:
+            self.logger.warning(f"{symbol} 분할 진입 진행 중 - 중복 진입 건너뜀")
+            return None
+        current_positions = self.book.get_open(symbol)
+        if len(current_positions) >= self.config.MAX_POSITIONS[symbol]:
+            self.logger.warning(f"{symbol} 포지션 한도 도달")
+            return None
+        
+        # Calculate position size with slippage consideration
+        size_ratio = self._calculate_position_size_ratio(symbol, signal)
+        
+        # 🔥 CRITICAL: Enhanced defensive programming for None values
+        if size_ratio is None:
+            self.logger.error(f"❌ {symbol} size_ratio가 None입니다")
+            return None
+            
+        if allocated_capital is None:
+            self.logger.error(f"❌ {symbol} allocated_capital이 None입니다")
+            return None
+        
+        # Additional type and value checks
+        try:
+            size_ratio = float(size_ratio)
+            allocated_capital = float(allocated_capital)
+            
+            if size_ratio <= 0:
+                self.logger.error(f"❌ {symbol} 잘못된 size_ratio: {size_ratio}")
+                return None
                 
-                # Get fill details
-                fill_price = order.get('price') or order.get('average', 0)
-                actual_contracts = order.get('filled', contracts)
-                
-                # Calculate fees
-                fees = position_value * self.config.TAKER_FEE
-                slippage = order.get('slippage', 0)
-                
-                # Get Kelly fraction used
-                kelly_fraction = self.db.get_kelly_fraction(symbol)
-                
-                # 🔥 ATR 기반 동적 손절/익절 계산
-                dynamic_stops = await self._calculate_dynamic_stops(symbol, fill_price, side)
-                stop_loss = dynamic_stops['stop_loss']
-                take_profit = dynamic_stops['take_profit']
-                
-                # Save to database
-                trade_data = {
-                    'symbol': symbol,
-                    'side': side,
-                    'price': fill_price,
-                    'quantity': actual_contracts,
-                    'leverage': self.config.LEVERAGE[symbol],
-                    'order_id': order.get('id'),
-                    'status': 'open',
-                    'reason': f"시그널: {signal['score']:.2f}, 신뢰도: {signal['confidence']:.1f}%",
-                    'multi_tf_score': signal.get('alignment_score', 0),
-                    'regime': signal.get('regime', 'unknown'),
-                    'entry_signal_strength': signal['score'],
-                    'fees_paid': fees,
-                    'slippage': slippage,
-                    # 🔥 ATR 정보 추가
-                    'atr_value': dynamic_stops.get('atr_value', 0.0),
-                    'stop_distance_pct': dynamic_stops.get('stop_distance_pct', 0.0),
-                    'profit_distance_pct': dynamic_stops.get('profit_distance_pct', 0.0),
-                    'kelly_fraction': kelly_fraction
-                }
-                
-                trade_id = self.db.save_trade(trade_data)
-                
-                # Save position
-                position_data = {
-                    'symbol': symbol,
-                    'trade_id': trade_id,
-                    'entry_price': fill_price,
-                    'quantity': actual_contracts,
-                    'side': side,
-                    'stop_loss': stop_loss,
-                    'take_profit': json.dumps(take_profit)
-                }
-                
-                position_id = self.db.save_position(position_data)
-                
-                # Place stop loss order
-                sl_side = 'sell' if side == 'buy' else 'buy'
-                sl_order = await self.exchange.place_stop_loss_order(
-                    symbol, sl_side, actual_contracts, stop_loss
-                )
-                
-                if sl_order and sl_order.get('id'):
-                    self.db.update_position(position_id, {'stop_order_id': sl_order['id']})
-                
-                # Track in memory
-                self.active_positions[position_id] = {
-                    'symbol': symbol,
-                    'position_id': position_id,
-                    'trade_id': trade_id,
-                    'entry_price': fill_price,
-                    'side': side,
-                    'quantity': actual_contracts,
-                    'stop_loss': stop_loss,
-                    'take_profit': take_profit,
-                    'max_profit': 0,
-                    'trailing_active': False
-                }
-                
-                self.logger.info(
-                    f"✅ 포지션 개시: {symbol} {side} {actual_contracts} @ {fill_price} "
-                    f"(손절: {stop_loss:.2f}, 익절: {take_profit[0]['price'] if take_profit else 'None'})"
-                )
-                
-                # Log to system
-                self.db.log_system_event(
-                    'INFO', 'PositionManager', 
-                    f"포지션 개시: {symbol} {side}",
-                    {'trade_id': trade_id, 'position_id': position_id, 'signal': signal}
-                )
-                
-                return {
-                    'trade_id': trade_id,
-                    'position_id': position_id,
-                    'order': order,
-                    'position_data': self.active_positions[position_id]
-                }
-                
-            except Exception as e:
-                self.logger.error(f"포지션 개시 오류: {e}")
-                self.db.log_system_event('ERROR', 'PositionManager', 
-                                       f"{symbol} 포지션 개시 실패", 
-                                       {'error': str(e)})
+            if allocated_capital <= 0:
+                self.logger.error(f"❌ {symbol} 잘못된 allocated_capital: {allocated_capital}")
                 return None
+                
+        except (ValueError, TypeError) as e:
+            self.logger.error(f"❌ {symbol} 포지션 파라미터 변환 오류: size_ratio={size_ratio}, allocated_capital={allocated_capital}, error={e}")
+            return None
+        
+        # allocated_capital은 증거금 (리스크 매니저/자본 추적기와 동일) - 주문 명목가는 레버리지를 곱한 값
+        leverage = self.config.LEVERAGE.get(symbol, 10)
+        position_value = allocated_capital * size_ratio * leverage
+        self.logger.info(
+            f"💰 {symbol} 포지션 명목가 계산: ${allocated_capital:.2f} × {size_ratio:.3f} × {leverage}x = ${position_value:.2f}"
+        )
+        
+        # Account for fees
+        taker_fee = float(self.config.TAKER_FEE or 0.0006)  # Default 0.06%
+        position_value *= (1 - taker_fee)
+        
+        # Get contract size
+        contracts = await self.exchange.calculate_position_size(symbol, position_value)
+        
+        if contracts <= 0:
+            self.logger.warning(f"{symbol} 잘못된 포지션 크기")
+            return None
+        
+        # 캐시된 ATR로 손절/익절을 주문 전에 계산 - 단일 주문이면 프리셋 TP/SL로 첨부해 한 번에 보호
+        side = 'buy' if signal['direction'] == 'long' else 'sell'
+        precomputed = self._precomputed_stops(symbol, side, signal)
+        algo = await self.exchange.execution.choose_algo(symbol, side, contracts)
+        attached = self.config.ATTACHED_TPSL_ENABLED and precomputed is not None and algo == 'market'
+        
+        return {'side': side, 'contracts': contracts, 'position_value': position_value,
+                'precomputed': precomputed, 'algo': algo, 'attached': attached}
+    
+    async def _send_entry(self, symbol: str, entry: Dict) -> Dict:
+        """Entry order (sliced by an execution algorithm when large relative to book depth)"""
+        side, contracts = entry['side'], entry['contracts']
+        if entry['attached']:
+            return await self.exchange.execute_order(
+                symbol, side, contracts, 'market', params=self._preset_tpsl_params(symbol, entry['precomputed'])
+            )
+        return await self.exchange.execute_order(symbol, side, contracts, entry['algo'])
+    
+    async def _record_entry(self, symbol: str, signal: Dict, entry: Dict, order: Dict) -> Optional[Dict]:
+        """Persist, protect and track a filled entry (called under the position lock)"""
+        side, contracts = entry['side'], entry['contracts']
+        position_value, precomputed, attached = entry['position_value'], entry['precomputed'], entry['attached']
+        
+        if not order or not order.get('id'):
+            self.logger.error(f"{symbol} 주문 실행 실패")
+            return None
+        
+        # Get fill details
+        fill_price = order.get('price') or order.get('average', 0)
+        actual_contracts = order.get('filled', contracts)
+        if not actual_contracts or float(actual_contracts) <= 0:
+            self.logger.error(f"{symbol} 진입 주문 체결량 0 - 포지션 기록 안 함 ({order.get('id')})")
+            return None
+        
+        # Calculate fees
+        fees = position_value * self.config.TAKER_FEE
+        slippage = order.get('slippage', 0)
+        
+        # Get Kelly fraction used
+        kelly_fraction = self.risk_manager.get_kelly_fraction(symbol)
+        
+        # 🔥 ATR 기반 동적 손절/익절 계산 (사전 계산값이 있으면 거래소에 첨부된 것과 동일한 레벨 사용)
+        dynamic_stops = precomputed or await self._calculate_dynamic_stops(
+            symbol, fill_price, side, signal.get('regime')
+        )
+        stop_loss = dynamic_stops['stop_loss']
+        take_profit = dynamic_stops['take_profit']
+        if attached and take_profit:
+            # 마지막 익절 단계는 거래소가 실행 - 틱 평가/부분 청산 대상에서 제외
+            take_profit[-1]['exchange'] = True
+        
+        # Save to database
+        trade_data = {
+            'symbol': symbol,
+            'side': side,
+            'price': fill_price,
+            'quantity': actual_contracts,
+            'leverage': self.config.LEVERAGE[symbol],
+            'order_id': order.get('id'),
+            'status': 'open',
+            'reason': f"시그널: {signal['score']:.2f}, 신뢰도: {signal['confidence']:.1f}%",
+            'multi_tf_score': signal.get('alignment_score', 0),
+            'regime': signal.get('regime', 'unknown'),
+            'entry_signal_strength': signal['score'],
+            'fees_paid': fees,
+            'slippage': slippage,
+            # 🔥 ATR 정보 추가
+            'atr_value': dynamic_stops.get('atr_value', 0.0),
+            'stop_distance_pct': dynamic_stops.get('stop_distance_pct', 0.0),
+            'profit_distance_pct': dynamic_stops.get('profit_distance_pct', 0.0),
+            'kelly_fraction': kelly_fraction
+        }
+        
+        trade_id = self.db.save_trade(trade_data)
+        
+        # Save position
+        position_data = {
+            'symbol': symbol,
+            'trade_id': trade_id,
+            'entry_price': fill_price,
+            'quantity': actual_contracts,
+            'side': side,
+            'stop_loss': stop_loss,
+            'take_profit': json.dumps(take_profit),
+            'attached_tpsl': attached
+        }
+        
+        position_id = self.db.save_position(position_data)
+        
+        # Place stop loss order (프리셋 TP/SL이 첨부됐으면 거래소가 이미 보호 중 - 추가 왕복 없음)
+        sl_order = None
+        if not attached:
+            sl_side = 'sell' if side == 'buy' else 'buy'
+            sl_order = await self.exchange.place_stop_loss_order(
+                symbol, sl_side, actual_contracts, stop_loss
+            )
+        
+        # Track in the position book (stop_order_id/max_profit/trailing live in memory only)
+        self.book.add({
+            **position_data,
+            'id': position_id,
+            'status': 'open',
+            'current_price': fill_price,
+            'stop_order_id': sl_order.get('id') if sl_order else None,
+            'regime': signal.get('regime'),
+            'entry_time': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+            'max_profit': 0,
+            'trailing_stop_active': False
+        })
+        
+        # Arm tick-driven stop/take-profit triggers
+        self.tick_evaluator.track(self.book.get(position_id))
+        if attached:
+            # 첨부 손절 플랜 ID를 미리 확보 - 추적손절 수정 시 다른 포지션의 플랜을 건드리지 않도록
+            asyncio.ensure_future(self._attached_stop_id(self.book.get(position_id)))
+        self.risk_state.on_open(symbol, side)
+        
+        self.logger.info(
+            f"✅ 포지션 개시: {symbol} {side} {actual_contracts} @ {fill_price} "
+            f"(손절: {stop_loss:.2f}, 익절: {take_profit[0]['price'] if take_profit else 'None'}"
+            f"{', 주문 첨부 TP/SL' if attached else ''})"
+        )
+        
+        # Log to system
+        self.db.log_system_event(
+            'INFO', 'PositionManager', 
+            f"포지션 개시: {symbol} {side}",
+            {'trade_id': trade_id, 'position_id': position_id, 'signal': signal}
+        )
+        
+        return {
+            'trade_id': trade_id,
+            'position_id': position_id,
+            'order': order,
+            'position_data': self.book.get(position_id)
+        }
     
     async def manage_positions(self):
         """Manage all open positions with enhanced logic"""
-        positions = self.db.get_open_positions()
+        positions = self.book.get_open()
         
         if not positions:
             return
         
-        # Update active positions cache
-        await self._sync_active_positions(positions)
+        # Keep the tick trigger index aligned with the book
+        self.tick_evaluator.sync(positions)
+        
+        # Refresh missing prices with a single batched request instead of per-position tickers
+        symbols = {p['symbol'] for p in positions}
+        self.exchange.update_tracked_positions(symbols)
+        missing = [s for s in symbols if not self.exchange.get_current_price(s)]
+        if missing:
+            await self.exchange.refresh_prices(missing)
         
         # Process each position
         tasks = []
@@ -228,56 +341,31 @@ class PositionManager:
         # Execute position management in parallel
         await asyncio.gather(*tasks, return_exceptions=True)
     
-    async def _sync_active_positions(self, db_positions: List[Dict]):
-        """Sync in-memory positions with database"""
-        db_position_ids = {p['id'] for p in db_positions}
-        memory_position_ids = set(self.active_positions.keys())
-        
-        # Remove closed positions from memory
-        for pos_id in memory_position_ids - db_position_ids:
-            del self.active_positions[pos_id]
-        
-        # Add new positions to memory
-        for pos in db_positions:
-            if pos['id'] not in self.active_positions:
-                self.active_positions[pos['id']] = {
-                    'symbol': pos['symbol'],
-                    'position_id': pos['id'],
-                    'trade_id': pos['trade_id'],
-                    'entry_price': pos['entry_price'],
-                    'side': pos['side'],
-                    'quantity': pos['quantity'],
-                    'stop_loss': pos['stop_loss'],
-                    'take_profit': json.loads(pos.get('take_profit', '[]')),
-                    'max_profit': pos.get('max_profit', 0),
-                    'trailing_active': pos.get('trailing_stop_active', False)
-                }
-    
-    async def _manage_single_position(self, position: Dict):
+    async def _manage_single_position(self, position: Dict, current_price: Optional[float] = None):
         """Manage a single position with complete logic"""
         try:
             symbol = position['symbol']
             position_id = position['id']
             
+            # Stored sides are 'buy'/'sell'; exit logic below works on 'long'/'short'
+            position = {**position, 'side': {'buy': 'long', 'sell': 'short'}.get(position['side'], position['side'])}
+            
             # Get current price
-            current_price = self.exchange.get_current_price(symbol)
             if not current_price:
-                ticker = await self.exchange.exchange.fetch_ticker(
-                    self.exchange._format_symbol(symbol)
-                )
-                current_price = ticker['last']
-            
-            # Update position in database
-            self.db.update_position(position_id, {'current_price': current_price})
+                current_price = self.exchange.get_current_price(symbol)
+            if not current_price:
+                self.logger.warning(f"⚠️ {symbol} 가격 정보 없음 - 포지션 {position_id} 관리 건너뜀")
+                return
             
             # Calculate P&L
             pnl_data = self._calculate_pnl(position, current_price)
             
-            # Update max profit
-            if pnl_data['pnl_percent'] > position.get('max_profit', 0):
-                self.db.update_position(position_id, {'max_profit': pnl_data['pnl_percent']})
-                if position_id in self.active_positions:
-                    self.active_positions[position_id]['max_profit'] = pnl_data['pnl_percent']
+            # Mark-to-market in the book (flushed in the next batch)
+            updates = {'current_price': current_price, 'pnl_percent': pnl_data['pnl_percent'] * 100}
+            if pnl_data['pnl_percent'] > (position.get('max_profit') or 0):
+                updates['max_profit'] = pnl_data['pnl_percent']
+            self.book.update(position_id, updates)
+            position.update(updates)
             
             # Check for trailing stop
             await self._manage_trailing_stop(position, current_price, pnl_data)
@@ -285,8 +373,8 @@ class PositionManager:
             # Check for partial take profits
             await self._check_take_profit(position, current_price, pnl_data)
             
-            # Check stop loss
-            if self._should_stop_loss(position, current_price):
+            # Check stop loss (첨부된 거래소 손절이 있으면 거래소가 청산 - 대조에서 종료 기록)
+            if self._stop_on_tick(position) and self._should_stop_loss(position, current_price):
                 await self._close_position(position, '손절', current_price)
                 return
             
@@ -354,8 +442,8 @@ class PositionManager:
             # Update trailing stop if price moved favorably
             await self._update_trailing_stop(position, current_price, trailing_config)
             
-            # Check if trailing stop would be hit
-            if self._check_trailing_stop_hit(position, current_price):
+            # Check if trailing stop would be hit (첨부 손절은 위에서 거래소 주문을 옮겼으므로 거래소가 청산)
+            if self._stop_on_tick(position) and self._check_trailing_stop_hit(position, current_price):
                 await self._close_position(position, '추적손절', current_price)
     
     async def _activate_trailing_stop(self, position: Dict, current_price: float, config: Dict):
@@ -375,25 +463,18 @@ class PositionManager:
         if side == 'short' and trailing_stop_price >= original_sl:
             return
         
-        # Update database
-        self.db.update_position(position['id'], {
+        # Update book
+        self.book.update(position['id'], {
             'trailing_stop_active': True,
             'trailing_stop_price': trailing_stop_price,
             'stop_loss': trailing_stop_price
         })
         
         # Update stop order on exchange
-        if position.get('stop_order_id'):
-            await self.exchange.modify_stop_loss(
-                position['symbol'],
-                position['stop_order_id'],
-                trailing_stop_price
-            )
+        await self._amend_exchange_stop(position, trailing_stop_price)
         
-        # Update memory
-        if position['id'] in self.active_positions:
-            self.active_positions[position['id']]['trailing_active'] = True
-            self.active_positions[position['id']]['stop_loss'] = trailing_stop_price
+        self.tick_evaluator.on_stop_moved(position['id'], trailing_stop_price,
+                                          tick_stop=position.get('tick_stop', False))
         
         self.logger.info(
             f"📈 추적손절 활성화: {position['symbol']} @ {trailing_stop_price:.2f}"
@@ -416,20 +497,45 @@ class PositionManager:
     
     async def _set_new_trailing_stop(self, position: Dict, new_stop_price: float):
         """Set new trailing stop price"""
-        self.db.update_position(position['id'], {
+        self.book.update(position['id'], {
             'trailing_stop_price': new_stop_price,
             'stop_loss': new_stop_price
         })
         
-        if position.get('stop_order_id'):
-            await self.exchange.modify_stop_loss(
+        await self._amend_exchange_stop(position, new_stop_price)
+        
+        self.tick_evaluator.on_stop_moved(position['id'], new_stop_price,
+                                          tick_stop=position.get('tick_stop', False))
+    
+    @staticmethod
+    def _stop_on_tick(position: Dict) -> bool:
+        """Whether this process enforces the stop (no exchange-attached plan, or the plan could not be moved)"""
+        return not position.get('attached_tpsl') or bool(position.get('tick_stop'))
+    
+    async def _amend_exchange_stop(self, position: Dict, new_stop_price: float) -> bool:
+        """Move the exchange stop order and follow it if the exchange replaced it"""
+        stop_order_id = position.get('stop_order_id') or await self._attached_stop_id(position)
+        order = None
+        if stop_order_id:
+            order = await self.exchange.modify_stop_loss(
                 position['symbol'],
-                position['stop_order_id'],
-                new_stop_price
+                stop_order_id,
+                new_stop_price,
+                'sell' if position['side'] in ('long', 'buy') else 'buy',
+                position['quantity']
             )
         
-        if position['id'] in self.active_positions:
-            self.active_positions[position['id']]['stop_loss'] = new_stop_price
+        new_order_id = order.get('id') if order else None
+        if new_order_id and new_order_id != stop_order_id:
+            self.book.update(position['id'], {'stop_order_id': new_order_id})
+            position['stop_order_id'] = new_order_id
+        
+        if not new_order_id and position.get('attached_tpsl') and not position.get('tick_stop'):
+            # 첨부 손절 플랜을 옮기지 못함 - 강화된 손절은 틱 평가가 대신 집행
+            self.logger.warning(f"⚠️ {position['symbol']} 포지션 {position['id']} 거래소 손절 수정 실패 - 틱 손절로 전환")
+            self.book.update(position['id'], {'tick_stop': True})
+            position['tick_stop'] = True
+        return bool(new_order_id)
     
     def _check_trailing_stop_hit(self, position: Dict, current_price: float) -> bool:
         """Check if trailing stop is hit"""
@@ -449,7 +555,7 @@ class PositionManager:
             return
         
         for tp in take_profit_levels:
-            if tp.get('executed', False):
+            if tp.get('executed', False) or tp.get('exchange', False):
                 continue
             
             tp_hit = False
@@ -465,15 +571,17 @@ class PositionManager:
                 
                 # Mark as executed
                 tp['executed'] = True
-                self.db.update_position(position['id'], {
+                self.book.update(position['id'], {
                     'take_profit': json.dumps(take_profit_levels)
-                })
+                }, flush=True)
     
     async def _close_partial_position(self, position: Dict, quantity: float, reason: str, current_price: float):
         """Close partial position"""
         try:
             side = 'sell' if position['side'] == 'long' else 'buy'
-            order = await self.exchange.place_order(position['symbol'], side, quantity)
+            order = await self.exchange.place_order(
+                position['symbol'], side, quantity, params={'reduceOnly': True}
+            )
             
             if order:
                 self.logger.info(
@@ -481,9 +589,18 @@ class PositionManager:
                     f"{quantity} 계약 @ {current_price} - 사유: {reason}"
                 )
                 
+                # Realized part counts toward daily/weekly PnL - DB에도 기록해 교차 검증과 일치시킴
+                pnl_value = self._calculate_pnl({**position, 'quantity': quantity}, current_price)['pnl_value']
+                self.risk_state.on_fill(position['symbol'], pnl_value)
+                self.db.save_realized_fill(
+                    trade_id=position.get('trade_id'), symbol=position['symbol'], quantity=quantity,
+                    price=current_price, pnl=pnl_value, reason=reason
+                )
+                
                 # Update remaining quantity
                 new_quantity = position['quantity'] - quantity
-                self.db.update_position(position['id'], {'quantity': new_quantity})
+                self.book.update(position['id'], {'quantity': new_quantity}, flush=True)
+                position['quantity'] = new_quantity
                 
         except Exception as e:
             self.logger.error(f"부분 포지션 마감 실패: {e}")
@@ -528,51 +645,10 @@ class PositionManager:
                 return
             
             # Get actual close price from order
-            actual_close_price = order.get('price', close_price)
+            actual_close_price = self._close_fill_price(order, close_price)
             
-            # Calculate final P&L
-            pnl_data = self._calculate_pnl(position, actual_close_price)
-            
-            # Update database
-            self.db.update_position(position['id'], {
-                'status': 'closed',
-                'current_price': actual_close_price
-            })
-            
-            # Calculate hold duration
-            with self.db._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT timestamp FROM trades WHERE id = ?", 
-                    (position['trade_id'],)
-                )
-                trade = cursor.fetchone()
-            
-            if trade:
-                hold_duration = (datetime.now() - datetime.fromisoformat(trade['timestamp'])).seconds // 60
-            else:
-                hold_duration = 0
-            
-            # Update trade
-            self.db.update_trade(position['trade_id'], {
-                'status': 'closed',
-                'close_price': actual_close_price,
-                'close_time': datetime.now(),
-                'pnl': pnl_data['pnl_value'],
-                'pnl_percent': pnl_data['pnl_percent'] * 100,
-                'reason': reason,
-                'hold_duration': hold_duration,
-                'max_profit': position.get('max_profit', 0),
-                'trailing_stop_activated': position.get('trailing_stop_active', False)
-            })
-            
-            # Update Kelly tracking
-            risk_manager = RiskManager(self.config, self.db)
-            risk_manager.update_kelly_after_trade(position['symbol'], pnl_data['pnl_percent'])
-            
-            # Remove from active positions
-            if position['id'] in self.active_positions:
-                del self.active_positions[position['id']]
+            pnl_data = self._apply_close(position, actual_close_price)
+            self._persist_close(position, reason, actual_close_price, pnl_data)
             
             # Log
             emoji = '💰' if pnl_data['pnl_percent'] > 0 else '🛑'
@@ -581,56 +657,7 @@ class PositionManager:
                 f"손익: {pnl_data['pnl_percent']:.2%} (${pnl_data['pnl_value']:.2f})"
             )
             
-            self.db.log_system_event(
-                'INFO', 'PositionManager',
-                f"포지션 종료: {position['symbol']} - {reason}",
-                {
-                    'position_id': position['id'],
-                    'pnl_percent': pnl_data['pnl_percent'],
-                    'reason': reason
-                }
-            )
-            
-            # Send Telegram notification for position closure
-            if self.notifier:
-                try:
-                    # Determine action type based on reason and P&L
-                    if pnl_data['pnl_percent'] > 0:
-                        action = 'close_profit'
-                    elif reason in ['손절', '조기손절']:
-                        action = 'close_loss'
-                    elif reason == '추적손절':
-                        action = 'trailing_stop'
-                    else:
-                        action = 'close_neutral'
-                    
-                    # Get position entry time
-                    entry_time = position.get('timestamp', datetime.now())
-                    if isinstance(entry_time, str):
-                        entry_time = datetime.fromisoformat(entry_time)
-                    
-                    # Calculate hold duration
-                    hold_duration = datetime.now() - entry_time
-                    hold_hours = hold_duration.total_seconds() / 3600
-                    
-                    await self.notifier.send_trade_notification(
-                        position['symbol'],
-                        action,
-                        {
-                            'price': actual_close_price,
-                            'quantity': position.get('quantity', 0),
-                            'pnl': pnl_data['pnl_percent'] * 100,  # Convert to percentage
-                            'pnl_value': pnl_data['pnl_value'],
-                            'entry_price': position.get('entry_price', 0),
-                            'reason': reason,
-                            'hold_duration_hours': round(hold_hours, 1),
-                            'position_type': position.get('direction', 'unknown'),
-                            'leverage': position.get('leverage', 1)
-                        }
-                    )
-                    self.logger.info(f"✅ 포지션 청산 알림 전송 완료: {position['symbol']} - {reason}")
-                except Exception as e:
-                    self.logger.error(f"❌ 포지션 청산 알림 전송 실패: {e}")
+            await self._notify_close(position, reason, actual_close_price, pnl_data)
             
         except Exception as e:
             self.logger.error(f"포지션 마감 오류: {e}")
@@ -640,6 +667,295 @@ class PositionManager:
                 {'position_id': position['id'], 'error': str(e)}
             )
     
+    @staticmethod
+    def _close_fill_price(order: Dict, fallback: float) -> float:
+        """Average fill of the exchange close orders, else the caller's reference price"""
+        for close_order in order.get('orders') or []:
+            price = (close_order or {}).get('average') or (close_order or {}).get('price')
+            if price:
+                return float(price)
+        return order.get('price') or fallback
+    
+    def _apply_close(self, position: Dict, close_price: float) -> Dict:
+        """In-memory close: book, risk counters and Kelly (no exchange/DB round trip)"""
+        # Book/DB sides are 'buy'/'sell'; _calculate_pnl works on 'long'/'short'
+        side = {'buy': 'long', 'sell': 'short'}.get(position.get('side'), position.get('side'))
+        
+        # Calculate final P&L
+        pnl_data = self._calculate_pnl({**position, 'side': side}, close_price)
+        
+        # Drop from the book and persist the final state immediately
+        self.book.close(position['id'], {
+            'current_price': close_price,
+            'pnl': pnl_data['pnl_value'],
+            'pnl_percent': pnl_data['pnl_percent'] * 100
+        })
+        
+        # Update risk counters and Kelly tracking
+        self.risk_state.on_close(position['symbol'], position['side'], pnl_data['pnl_value'])
+        self.risk_manager.update_kelly_after_trade(position['symbol'], pnl_data['pnl_percent'])
+        return pnl_data
+    
+    def _persist_close(self, position: Dict, reason: str, close_price: float, pnl_data: Dict):
+        """Trade row and system event for a closed position (blocking DB work)"""
+        # Calculate hold duration
+        with self.db._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT timestamp FROM trades WHERE id = ?", 
+                (position['trade_id'],)
+            )
+            trade = cursor.fetchone()
+        
+        if trade:
+            hold_duration = (datetime.now() - datetime.fromisoformat(trade['timestamp'])).seconds // 60
+        else:
+            hold_duration = 0
+        
+        # Update trade
+        self.db.update_trade(position['trade_id'], {
+            'status': 'closed',
+            'close_price': close_price,
+            'close_time': datetime.now(),
+            'pnl': pnl_data['pnl_value'],
+            'pnl_percent': pnl_data['pnl_percent'] * 100,
+            'reason': reason,
+            'hold_duration': hold_duration,
+            'max_profit': position.get('max_profit', 0),
+            'trailing_stop_activated': position.get('trailing_stop_active', False)
+        })
+        
+        self.db.log_system_event(
+            'INFO', 'PositionManager',
+            f"포지션 종료: {position['symbol']} - {reason}",
+            {
+                'position_id': position['id'],
+                'pnl_percent': pnl_data['pnl_percent'],
+                'reason': reason
+            }
+        )
+    
+    async def _notify_close(self, position: Dict, reason: str, close_price: float, pnl_data: Dict):
+        """Send Telegram notification for position closure"""
+        if not self.notifier:
+            return
+        try:
+            # Determine action type based on reason and P&L
+            if pnl_data['pnl_percent'] > 0:
+                action = 'close_profit'
+            elif reason in ['손절', '조기손절']:
+                action = 'close_loss'
+            elif reason == '추적손절':
+                action = 'trailing_stop'
+            else:
+                action = 'close_neutral'
+            
+            # Get position entry time
+            entry_time = position.get('timestamp', datetime.now())
+            if isinstance(entry_time, str):
+                entry_time = datetime.fromisoformat(entry_time)
+            
+            # Calculate hold duration
+            hold_duration = datetime.now() - entry_time
+            hold_hours = hold_duration.total_seconds() / 3600
+            
+            await self.notifier.send_trade_notification(
+                position['symbol'],
+                action,
+                {
+                    'price': close_price,
+                    'quantity': position.get('quantity', 0),
+                    'pnl': pnl_data['pnl_percent'] * 100,  # Convert to percentage
+                    'pnl_value': pnl_data['pnl_value'],
+                    'entry_price': position.get('entry_price', 0),
+                    'reason': reason,
+                    'hold_duration_hours': round(hold_hours, 1),
+                    'position_type': position.get('direction', 'unknown'),
+                    'leverage': position.get('leverage', 1)
+                }
+            )
+            self.logger.info(f"✅ 포지션 청산 알림 전송 완료: {position['symbol']} - {reason}")
+        except Exception as e:
+            self.logger.error(f"❌ 포지션 청산 알림 전송 실패: {e}")
+    
+    # 🚨 긴급 일괄 청산 (동시 주문 → 거래소 확인 후 DB/알림)
+    def _emergency_concurrency(self, targets: int) -> int:
+        """Concurrent closes allowed by the remaining REST budget (two calls per symbol close)"""
+        try:
+            headroom = self.exchange.get_rate_limit_headroom()
+        except Exception:
+            headroom = 1.0
+        remaining_calls = int(headroom * self.config.API_RATE_BUDGET_PER_MINUTE)
+        return max(1, min(targets, self.config.EMERGENCY_MAX_CONCURRENT_CLOSES, remaining_calls // 2))
+    
+    async def emergency_flatten(self, symbols: Optional[List[str]] = None, reason: str = '긴급_청산') -> Dict:
+        """
+        Flatten every open position (or those of symbols) as fast as the exchange allows
+        
+        One close per symbol is fired concurrently within the rate budget; book/risk state is updated
+        as soon as the exchange acknowledges, and DB writes and notifications run only after that.
+        
+        Returns:
+            Dict: time_to_flat (초), flattened/failed 심볼, 심볼별 확인 시간 등
+        """
+        started = time.monotonic()
+        by_symbol: Dict[str, List[Dict]] = {}
+        for position in self.book.get_open():
+            if symbols is None or position['symbol'] in symbols:
+                by_symbol.setdefault(position['symbol'], []).append(position)
+        
+        # 북에 없어도 최근 대조 스냅샷에 거래소 포지션이 있으면 청산 (거래소 close_position은 심볼 전체 청산)
+        live = {symbol for symbol, _ in self.reconciler.get_snapshot().exchange_positions}
+        targets = sorted(set(by_symbol) | (set(symbols) & live if symbols else live))
+        concurrency = self._emergency_concurrency(len(targets))
+        limit = asyncio.Semaphore(concurrency)
+        acks: Dict[str, float] = {}
+        orders: Dict[str, Dict] = {}
+        
+        async def close(symbol: str) -> Optional[Dict]:
+            async with limit:
+                order = await self.exchange.close_position(symbol, reason)
+            if order:
+                acks[symbol] = time.monotonic() - started
+            return order
+        
+        pending = targets
+        for attempt in range(self.config.EMERGENCY_CLOSE_RETRIES + 1):
+            results = await asyncio.gather(*(close(symbol) for symbol in pending), return_exceptions=True)
+            for symbol, result in zip(pending, results):
+                if result and not isinstance(result, Exception):
+                    orders[symbol] = result
+            pending = [symbol for symbol in pending if symbol not in orders]
+            if not pending:
+                break
+            self.logger.warning(f"⚠️ 긴급 청산 실패 {', '.join(pending)} - 재시도 {attempt + 1}")
+        
+        time_to_flat = time.monotonic() - started
+        
+        # 거래소 확인 직후 인메모리 상태만 갱신
+        closed = []
+        for symbol, order in orders.items():
+            for position in by_symbol.get(symbol, []):
+                fallback = position.get('current_price') or self.exchange.get_current_price(symbol) or position['entry_price']
+                price = self._close_fill_price(order, fallback)
+                closed.append((position, price, self._apply_close(position, price)))
+        
+        report = {
+            'symbols': targets,
+            'flattened': sorted(orders),
+            'failed': pending,
+            'positions_closed': len(closed),
+            'concurrency': concurrency,
+            'acks': acks,
+            'time_to_flat': time_to_flat
+        }
+        self.logger.warning(
+            f"🚨 긴급 청산: {len(orders)}/{len(targets)}개 심볼, 포지션 {len(closed)}개 - "
+            f"플랫까지 {time_to_flat:.2f}초" + (f" (실패: {', '.join(pending)})" if pending else "")
+        )
+        
+        if targets:
+            self.reconciler.request_refresh()
+        
+        # 지연된 DB 기록과 알림
+        await self._finalize_closes(closed, reason)
+        report['total_time'] = time.monotonic() - started
+        return report
+    
+    def _persist_closes(self, closed: List[Tuple[Dict, float, Dict]], reason: str):
+        for position, price, pnl_data in closed:
+            try:
+                self._persist_close(position, reason, price, pnl_data)
+            except Exception as e:
+                self.logger.error(f"포지션 {position['id']} 종료 기록 실패: {e}")
+    
+    async def _finalize_closes(self, closed: List[Tuple[Dict, float, Dict]], reason: str):
+        """Deferred bookkeeping after an emergency flatten: DB writes off the loop, then notifications"""
+        if not closed:
+            return
+        await asyncio.get_event_loop().run_in_executor(None, self._persist_closes, closed, reason)
+        await asyncio.gather(
+            *(self._notify_close(position, reason, price, pnl_data) for position, price, pnl_data in closed),
+            return_exceptions=True
+        )
+    
+    # 🔄 거래소에서 이미 닫힌 포지션 (프리셋 TP/SL, 청산, 수동 종료)
+    @staticmethod
+    def _entry_ms(position: Dict) -> Optional[int]:
+        """positions.entry_time (UTC, SQLite CURRENT_TIMESTAMP 형식) -> epoch ms"""
+        entry_time = position.get('entry_time')
+        try:
+            if isinstance(entry_time, str):
+                entry_time = datetime.fromisoformat(entry_time)
+            if isinstance(entry_time, datetime):
+                if entry_time.tzinfo is None:
+                    entry_time = entry_time.replace(tzinfo=timezone.utc)
+                return int(entry_time.timestamp() * 1000)
+        except ValueError:
+            pass
+        return None
+    
+    @staticmethod
+    def _vwap(fills: List[Tuple[float, float]]) -> Optional[float]:
+        amount = sum(a for _, a in fills)
+        return sum(p * a for p, a in fills) / amount if amount > 0 else None
+    
+    async def _exchange_close_price(self, position: Dict) -> Optional[float]:
+        """Closing-side fill VWAP since entry: pushed fills first, then fetch_my_trades"""
+        symbol = position['symbol']
+        close_side = 'sell' if str(position['side']).lower() in ('buy', 'long') else 'buy'
+        since = self._entry_ms(position)
+        
+        stream = getattr(self.exchange, 'private_stream', None)
+        if stream is not None:
+            fills = [
+                (float(f.get('price') or 0), float(f.get('baseVolume') or f.get('size') or 0))
+                for f in list(stream.fills)
+                if stream._internal_symbol(f.get('symbol') or f.get('instId') or '') == symbol
+                and str(f.get('side')).lower() == close_side
+                and (since is None or int(f.get('cTime') or 0) >= since)
+            ]
+            price = self._vwap(fills)
+            if price:
+                return price
+        
+        try:
+            trades = await asyncio.get_event_loop().run_in_executor(
+                None, self.exchange.exchange.fetch_my_trades, self.exchange.format_symbol(symbol), since
+            )
+        except Exception as e:
+            self.logger.warning(f"⚠️ {symbol} 체결 내역 조회 실패: {e}")
+            return None
+        return self._vwap([
+            (float(t.get('price') or 0), float(t.get('amount') or 0))
+            for t in trades or [] if t.get('side') == close_side
+        ])
+    
+    async def _close_missing_position(self, position: Dict):
+        """대조에서 거래소에 없는 것으로 확인된 포지션의 종료 기록 (_close_position과 같은 경로)"""
+        if self.book.get(position['id']) is None:
+            return
+        price = (
+            await self._exchange_close_price(position)
+            or self.exchange.get_current_price(position['symbol'])
+            or position.get('current_price')
+            or position['entry_price']
+        )
+        
+        is_long = str(position['side']).lower() in ('buy', 'long')
+        stop_loss = position.get('stop_loss')
+        if stop_loss and (price <= stop_loss if is_long else price >= stop_loss):
+            reason = '손절'
+        else:
+            reason = '거래소_청산'
+        
+        pnl_data = self._apply_close(position, price)
+        self.logger.info(
+            f"🔄 거래소에서 종료된 포지션 기록: {position['symbol']} - {reason} @ {price} - "
+            f"손익: {pnl_data['pnl_percent']:.2%} (${pnl_data['pnl_value']:.2f})"
+        )
+        await self._finalize_closes([(position, price, pnl_data)], reason)
+    
     def _calculate_position_size_ratio(self, symbol: str, signal: Dict) -> float:
         """Calculate position size ratio based on signal strength and market conditions"""
         try:
@@ -701,19 +1017,112 @@ class PositionManager:
             self.logger.error(f"Position size ratio calculation error: {e}")
             return 0.2  # Safe default
     
-    async def _calculate_dynamic_stops(self, symbol: str, entry_price: float, side: str) -> Dict[str, any]:
+    def _match_stop_plan(self, position: Dict, orders: List[Dict]) -> Optional[str]:
+        """Stop-loss plan for this position: same hold side, size equal to its quantity, not claimed by another entry"""
+        direction = 'long' if position['side'] in ('long', 'buy') else 'short'
+        siblings = [p for p in self.book.get_open(position['symbol']) if p['id'] != position['id']]
+        claimed = {str(p['stop_order_id']) for p in siblings if p.get('stop_order_id')}
+        # 수량 없는 포지션 전체 플랜은 같은 방향 항목이 하나뿐일 때만 이 포지션 것으로 간주
+        sole = not any(('long' if p['side'] in ('long', 'buy') else 'short') == direction for p in siblings)
+        quantity = float(position.get('quantity') or 0)
+        
+        for order in orders:
+            info = order.get('info') or {}
+            if info.get('planType') not in ('pos_loss', 'loss_plan') or str(order.get('id')) in claimed:
+                continue
+            hold_side = str(info.get('holdSide') or info.get('posSide') or '').lower()
+            if hold_side in ('long', 'short'):
+                if hold_side != direction:
+                    continue
+            elif order.get('side') == ('buy' if direction == 'long' else 'sell'):
+                continue
+            size = float(info.get('size') or order.get('amount') or 0)
+            if (size > 0 and abs(size - quantity) <= 1e-9 * max(1.0, quantity)) or (size <= 0 and sole):
+                return order.get('id')
+        return None
+    
+    async def _attached_stop_id(self, position: Dict) -> Optional[str]:
+        """Id of the stop-loss plan the exchange created from the entry's preset TP/SL"""
+        if not position or not position.get('attached_tpsl'):
+            return None
+        plan_id = self._match_stop_plan(position, self.reconciler.get_snapshot().orders_for(position['symbol']))
+        if plan_id is None:
+            # 진입 직후에는 대조 스냅샷에 플랜이 아직 없음 - 거래소에서 직접 조회
+            try:
+                plan_id = self._match_stop_plan(position, await self.exchange.fetch_tpsl_plans(position['symbol']))
+            except Exception as e:
+                self.logger.warning(f"⚠️ {position['symbol']} 첨부 손절 플랜 조회 실패: {e}")
+        if plan_id:
+            self.book.update(position['id'], {'stop_order_id': plan_id})
+            position['stop_order_id'] = plan_id
+        return plan_id
+    
+    async def _refresh_atr(self, symbol: str) -> Optional[float]:
+        """ATR from cached 1h candles into the pre-trade cache"""
+        candles = await self._get_recent_candles(symbol, limit=50)
+        if len(candles) < 20:
+            return None
+        atr = self.risk_manager.atr_calculator.calculate_atr(candles, self.config.ATR_SETTINGS[symbol]['period'])
+        if atr <= 0 or not self.risk_manager.atr_calculator.validate_atr_quality(atr, candles):
+            return None
+        self._atr_cache[symbol] = (time.time(), atr)
+        return atr
+    
+    async def prime_stop_inputs(self, symbols: List[str]):
+        """Refresh stale ATR entries so open_position never waits on candles"""
+        stale = [s for s in symbols if s in self.config.ATR_SETTINGS
+                 and time.time() - self._atr_cache.get(s, (0.0, 0.0))[0] > self.config.ATR_CACHE_TTL]
+        results = await asyncio.gather(*(self._refresh_atr(s) for s in stale), return_exceptions=True)
+        for symbol, result in zip(stale, results):
+            if isinstance(result, Exception):
+                self.logger.warning(f"⚠️ {symbol} ATR 사전 계산 실패: {result}")
+    
+    def _precomputed_stops(self, symbol: str, side: str, signal: Dict) -> Optional[Dict]:
+        """Stops around the current price from cached ATR, in _calculate_dynamic_stops' shape (no I/O)"""
+        cached = self._atr_cache.get(symbol)
+        if cached is None or time.time() - cached[0] > self.config.ATR_CACHE_TTL:
+            return None
+        reference_price = self.exchange.get_current_price(symbol) or signal.get('price')
+        if not reference_price:
+            return None
+        
+        stops = self.risk_manager.calculate_stops_from_atr(
+            symbol, float(reference_price), side, cached[1], signal.get('regime')
+        )
+        return {
+            'stop_loss': stops['stop_loss'],
+            'take_profit': [{'price': stops['take_profit'], 'size': 1.0, 'executed': False}],
+            'atr_value': stops.get('atr_value', cached[1]),
+            'stop_distance_pct': stops['stop_distance_pct'],
+            'profit_distance_pct': stops['profit_distance_pct']
+        }
+    
+    def _preset_tpsl_params(self, symbol: str, stops: Dict) -> Dict:
+        """Bitget preset TP/SL on the entry order: SL plus the final take-profit rung (earlier rungs stay tick-managed)"""
+        tick = self.exchange.market_metadata.get_tick_size(symbol) or 0
+        
+        def to_tick(price: float) -> str:
+            return str(round(round(price / tick) * tick, 12)) if tick else str(price)
+        
+        params = {'presetStopLossPrice': to_tick(stops['stop_loss'])}
+        if stops['take_profit']:
+            params['presetStopSurplusPrice'] = to_tick(stops['take_profit'][-1]['price'])
+        return params
+    
+    async def _calculate_dynamic_stops(self, symbol: str, entry_price: float, side: str,
+                                       regime: Optional[str] = None) -> Dict[str, any]:
         """🔥 ATR 기반 동적 손절/익절 계산"""
         try:
             # 최근 캔들 데이터 조회 (50개)
             recent_candles = await self._get_recent_candles(symbol, limit=50)
             
-            if not recent_candles or len(recent_candles) < 20:
+            if len(recent_candles) < 20:
                 self.logger.warning(f"⚠️ {symbol} 캔들 데이터 부족, 폴백 모드 사용")
                 return self._get_fallback_stops(symbol, entry_price, side)
             
             # RiskManager의 ATR 기반 계산 사용
             stops = self.risk_manager.calculate_position_stops(
-                symbol, entry_price, side, recent_candles
+                symbol, entry_price, side, recent_candles, regime=regime
             )
             
             # 익절 레벨 리스트 형태로 변환 (기존 호환성 유지)
@@ -774,31 +1183,21 @@ class PositionManager:
             'executed': False
         }]
     
-    async def _get_recent_candles(self, symbol: str, limit: int = 50) -> List[Dict]:
-        """최근 캔들 데이터 조회"""
+    async def _get_recent_candles(self, symbol: str, limit: int = 50) -> np.ndarray:
+        """최근 캔들 데이터 조회 - (봉 × OHLCV_COLUMNS) float 배열"""
         try:
             # Exchange manager의 캔들 데이터 조회 메서드 사용
             df = await self.exchange.fetch_ohlcv_with_cache(symbol, '1h', limit)
             
             if df is None or df.empty:
-                return []
-            
-            # DataFrame을 Dict 리스트로 변환
-            candles = []
-            for _, row in df.iterrows():
-                candles.append({
-                    'open': float(row['open']),
-                    'high': float(row['high']),
-                    'low': float(row['low']),
-                    'close': float(row['close']),
-                    'volume': float(row['volume'])
-                })
+                return np.empty((0, len(OHLCV_COLUMNS)))
             
-            return candles
+            # 행 단위 변환 없이 컬럼 배열로 바로 변환
+            return df[list(OHLCV_COLUMNS)].to_numpy(dtype=float)
             
         except Exception as e:
             self.logger.error(f"캔들 데이터 조회 오류: {e}")
-            return []
+            return np.empty((0, len(OHLCV_COLUMNS)))
     
     def _get_fallback_stops(self, symbol: str, entry_price: float, side: str) -> Dict[str, any]:
         """ATR 실패 시 폴백 손절/익절"""
@@ -835,18 +1234,28 @@ class PositionManager:
     async def monitor_and_adjust_stops(self):
         """🔥 실시간 ATR 변화에 따른 손절/익절 조정"""
         try:
-            open_positions = self.db.get_open_positions()
+            open_positions = self.book.get_open()
             
             if not open_positions:
                 return
                 
             self.logger.info(f"📊 {len(open_positions)}개 포지션 ATR 모니터링 시작")
             
+            # 심볼별 캔들은 한 번만 조회하고 ATR은 전체 심볼을 한 번에 계산
+            symbols = sorted({position['symbol'] for position in open_positions})
+            fetched = await asyncio.gather(*(self._get_recent_candles(symbol) for symbol in symbols))
+            candles = {symbol: data for symbol, data in zip(symbols, fetched) if len(data) >= 20}
+            periods = {symbol: self.config.ATR_SETTINGS.get(symbol, {}).get('period', 14) for symbol in candles}
+            atrs = self.risk_manager.atr_calculator.calculate_atr_batch(candles, periods)
+            
             for position in open_positions:
+                if position['symbol'] not in candles:
+                    continue
                 try:
-                    await self._monitor_single_position_atr(position)
-                    # 각 포지션 간 짧은 딜레이 (API 제한 회피)
-                    await asyncio.sleep(0.5)
+                    symbol = position['symbol']
+                    if await self._monitor_single_position_atr(position, atrs[symbol], candles[symbol]):
+                        # 손절 변경 후 짧은 딜레이 (API 제한 회피)
+                        await asyncio.sleep(0.5)
                     
                 except Exception as e:
                     self.logger.error(f"포지션 {position['id']} ATR 모니터링 오류: {e}")
@@ -855,8 +1264,9 @@ class PositionManager:
         except Exception as e:
             self.logger.error(f"ATR 모니터링 시스템 오류: {e}")
     
-    async def _monitor_single_position_atr(self, position: Dict):
-        """개별 포지션 ATR 모니터링"""
+    async def _monitor_single_position_atr(self, position: Dict, current_atr: float,
+                                           recent_candles: np.ndarray) -> bool:
+        """개별 포지션 ATR 모니터링 (배치 계산된 ATR 사용), 손절을 옮겼으면 True"""
         try:
             symbol = position['symbol']
             position_id = position['id']
@@ -864,15 +1274,8 @@ class PositionManager:
             side = position['side']
             original_atr = position.get('atr_value', 0)
             
-            # 현재 ATR 재계산
-            recent_candles = await self._get_recent_candles(symbol)
-            if not recent_candles or len(recent_candles) < 20:
-                return
-                
-            current_atr = self.risk_manager.atr_calculator.calculate_atr(recent_candles)
-            
             if current_atr <= 0 or original_atr <= 0:
-                return
+                return False
                 
             # ATR 변화율 확인
             atr_change_rate = (current_atr - original_atr) / original_atr
@@ -887,7 +1290,8 @@ class PositionManager:
                 
                 # 새로운 손절/익절 계산
                 new_stops = self.risk_manager.calculate_position_stops(
-                    symbol, entry_price, side, recent_candles
+                    symbol, entry_price, side, recent_candles,
+                    current_atr=current_atr, regime=position.get('regime')
                 )
                 
                 # 손절은 불리하게 조정하지 않음 (안전장치)
@@ -923,32 +1327,31 @@ class PositionManager:
                         f"**사유**: {update_reason}",
                         priority='normal'
                     )
+                    return True
+            
+            return False
                     
         except Exception as e:
             self.logger.error(f"개별 포지션 ATR 모니터링 오류: {e}")
+            return False
     
     async def _update_position_stops(self, position_id: int, new_stops: Dict, reason: str):
         """포지션 손절/익절 업데이트"""
         try:
-            # 데이터베이스 업데이트
-            self.db.execute_query(
-                """UPDATE positions 
-                   SET stop_loss = ?, 
-                       atr_value = ?,
-                       stop_distance_pct = ?,
-                       profit_distance_pct = ?,
-                       updated_at = CURRENT_TIMESTAMP
-                   WHERE id = ?""",
-                (new_stops['stop_loss'], 
-                 new_stops.get('atr_value', 0),
-                 new_stops.get('stop_distance_pct', 0),
-                 new_stops.get('profit_distance_pct', 0),
-                 position_id)
-            )
+            # 포지션 북 업데이트 (손절 변경은 즉시 저장)
+            self.book.update(position_id, {
+                'stop_loss': new_stops['stop_loss'],
+                'atr_value': new_stops.get('atr_value', 0),
+                'stop_distance_pct': new_stops.get('stop_distance_pct', 0),
+                'profit_distance_pct': new_stops.get('profit_distance_pct', 0)
+            }, flush=True)
             
-            # 메모리 캐시 업데이트
-            if position_id in self.active_positions:
-                self.active_positions[position_id]['stop_loss'] = new_stops['stop_loss']
+            # 거래소 손절 주문/첨부 플랜도 같은 레벨로 이동 (첨부 플랜을 못 옮기면 틱 손절로 전환)
+            position = self.book.get(position_id)
+            if position:
+                await self._amend_exchange_stop(position, new_stops['stop_loss'])
+            self.tick_evaluator.on_stop_moved(position_id, new_stops['stop_loss'], trailing_active=False,
+                                              tick_stop=bool(position and position.get('tick_stop')))
             
             self.logger.info(f"✅ 포지션 {position_id} 손절 업데이트 완료 - {reason}")
             
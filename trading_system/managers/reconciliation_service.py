@@ -0,0 +1,307 @@
+"""
+Reconciliation Service
+One batched exchange pull of positions and open orders per interval, diffed against the position book
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Import handling for both direct and package imports
+try:
+    from ..config.config import TradingConfig
+    from ..database.db_manager import EnhancedDatabaseManager
+    from .position_book import PositionBook
+except ImportError:
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config.config import TradingConfig
+    from database.db_manager import EnhancedDatabaseManager
+    from managers.position_book import PositionBook
+
+
+PositionKey = Tuple[str, str]  # (symbol, 'long' | 'short')
+
+
+def _direction(side: str) -> str:
+    """'buy'/'long' -> 'long', 'sell'/'short' -> 'short'"""
+    return 'long' if str(side).lower() in ('buy', 'long') else 'short'
+
+
+@dataclass
+class ReconciliationSnapshot:
+    """What every manager reads instead of querying positions itself"""
+    positions: List[Dict]  # 포지션 북 기준 오픈 포지션 (side는 long/short, 거래소 mark 가격 포함)
+    exchange_positions: Dict[PositionKey, Dict]
+    open_orders: List[Dict]
+    diff: Dict[str, List]
+    source: str  # 'rest' | 'stream' | 'paper'
+    book_version: int = 0
+    exchange_time: float = 0.0  # 거래소 상태를 마지막으로 가져온 시각
+    timestamp: float = field(default_factory=time.time)
+
+    def positions_for(self, symbol: str) -> List[Dict]:
+        return [p for p in self.positions if p['symbol'] == symbol]
+
+    def orders_for(self, symbol: str) -> List[Dict]:
+        return [o for o in self.open_orders if o['symbol'] == symbol]
+
+    def age(self) -> float:
+        """Seconds since exchange state was pulled"""
+        return time.time() - self.exchange_time if self.exchange_time else float('inf')
+
+
+class ReconciliationService:
+    """
+    Pulls all positions and open (including trigger) orders in a fixed number of requests per
+    interval, regardless of how many symbols are traded, and diffs them against the book.
+
+    Positions missing on the exchange are closed in the book only after RECONCILE_CONFIRMATIONS
+    consecutive snapshots, so a fill racing the pull is not mistaken for a close. close_handler
+    (set by the position manager) records the trade close; without it the book entry is dropped.
+    """
+
+    def __init__(self, config: TradingConfig, exchange, book: PositionBook, db: EnhancedDatabaseManager):
+        self.config = config
+        self.exchange = exchange
+        self.book = book
+        self.db = db
+        self.logger = logging.getLogger(__name__)
+
+        self.interval = config.RECONCILE_INTERVAL
+        self._exchange_positions: Dict[PositionKey, Dict] = {}
+        self._open_orders: List[Dict] = []
+        self._exchange_time = 0.0
+        self._source = 'paper' if config.PAPER_TRADING else 'rest'
+        self._last_diff: Dict[str, List] = {}
+        self._missing_streak: Dict[int, int] = {}
+        self.close_handler: Optional[Callable] = None  # async close_handler(position) - 청산 기록/알림
+
+        self._snapshot: Optional[ReconciliationSnapshot] = None
+        self._listeners: List[Callable] = []
+        self._refresh_event: Optional[asyncio.Event] = None
+        self._task = None
+        self._lock = asyncio.Lock()
+
+        self.stats = {'pulls': 0, 'requests': 0, 'errors': 0, 'closed_missing': 0,
+                      'quantity_fixed': 0, 'untracked': 0, 'orphan_orders': 0}
+
+    # ------------------------------------------------------------------ pulls
+
+    async def _fetch_exchange_state(self) -> Tuple[List[Dict], List[Dict]]:
+        """All positions + regular and trigger open orders: at most three requests"""
+        loop = asyncio.get_event_loop()
+        stream = getattr(self.exchange, 'private_stream', None)
+        ccxt_exchange = self.exchange.exchange
+
+        requests = []
+        if stream is not None and stream.is_live('positions'):
+            self._source = 'stream'
+            positions_future = None
+        else:
+            self._source = 'rest'
+            positions_future = loop.run_in_executor(None, ccxt_exchange.fetch_positions)
+            requests.append(positions_future)
+
+        orders_future = loop.run_in_executor(None, ccxt_exchange.fetch_open_orders)
+        triggers_future = loop.run_in_executor(
+            None, lambda: ccxt_exchange.fetch_open_orders(None, None, None, {'trigger': True})
+        )
+        requests.extend([orders_future, triggers_future])
+
+        # 오류를 빈 목록으로 삼키지 않음 - 실패하면 이번 주기 대조 자체를 건너뜀
+        results = await asyncio.gather(*requests)
+        self.stats['requests'] += len(requests)
+
+        positions = results[0] if positions_future is not None else stream.get_positions()
+        orders = list(results[-2] or []) + list(results[-1] or [])
+        return positions or [], orders
+
+    async def refresh(self) -> Optional[ReconciliationSnapshot]:
+        """Pull exchange state once, reconcile the book and publish a new snapshot"""
+        async with self._lock:
+            if self.config.PAPER_TRADING:
+                return self.publish()
+
+            try:
+                raw_positions, raw_orders = await self._fetch_exchange_state()
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.logger.warning(f"⚠️ 포지션/주문 일괄 조회 실패 - 이전 스냅샷 유지: {e}")
+                return self._snapshot
+
+            live: Dict[PositionKey, Dict] = {}
+            for p in raw_positions:
+                contracts = float(p.get('contracts') or 0)
+                if contracts > 0:
+                    key = (PositionBook._normalize_symbol(p['symbol']), _direction(p.get('side')))
+                    live[key] = {**p, 'contracts': contracts}
+
+            orders = [{**o, 'symbol': PositionBook._normalize_symbol(o.get('symbol') or '')} for o in raw_orders]
+
+            self._exchange_positions = live
+            self._open_orders = orders
+            self._exchange_time = time.time()
+            self.stats['pulls'] += 1
+            self._last_diff = await self._reconcile(live, orders)
+            return self.publish()
+
+    async def _reconcile(self, live: Dict[PositionKey, Dict], orders: List[Dict]) -> Dict[str, List]:
+        """Set-based diff of book vs exchange; apply confirmed closes and quantity fixes"""
+        by_key: Dict[PositionKey, List[Dict]] = {}
+        for position in self.book.get_open():
+            by_key.setdefault((position['symbol'], _direction(position['side'])), []).append(position)
+
+        book_keys: Set[PositionKey] = set(by_key)
+        live_keys: Set[PositionKey] = set(live)
+        diff = {'closed_missing': [], 'quantity_fixed': [], 'untracked': [], 'missing_stops': [], 'orphan_orders': []}
+
+        # 거래소에 없는 포지션: 연속 확인 후 북에서 종료
+        missing = {p['id']: p for key in book_keys - live_keys for p in by_key[key]}
+        self._missing_streak = {pid: self._missing_streak.get(pid, 0) + 1 for pid in missing}
+        for position_id, streak in list(self._missing_streak.items()):
+            if streak >= self.config.RECONCILE_CONFIRMATIONS:
+                await self._close_missing(missing[position_id])
+                del self._missing_streak[position_id]
+                diff['closed_missing'].append(position_id)
+
+        # 수량 보정: (심볼, 방향)당 북 항목이 하나일 때만 거래소 수량을 채택
+        for key in book_keys & live_keys:
+            entries = by_key[key]
+            contracts = live[key]['contracts']
+            if len(entries) == 1 and abs(contracts - float(entries[0].get('quantity') or 0)) > 1e-12:
+                self.book.update(entries[0]['id'], {'quantity': contracts}, flush=True)
+                diff['quantity_fixed'].append(entries[0]['id'])
+
+        diff['untracked'] = sorted(live_keys - book_keys)
+
+        # 스탑 주문: 북이 기억하는 ID 중 거래소에 없는 것 / 포지션 없는 심볼에 남은 reduce-only 주문
+        open_ids = {str(o.get('id')) for o in orders}
+        stop_ids = {str(p['stop_order_id']) for entries in by_key.values() for p in entries if p.get('stop_order_id')}
+        diff['missing_stops'] = sorted(stop_ids - open_ids)
+        live_symbols = {symbol for symbol, _ in live_keys}
+        diff['orphan_orders'] = sorted(
+            str(o.get('id')) for o in orders
+            if o['symbol'] not in live_symbols and (o.get('reduceOnly') or o.get('triggerPrice'))
+        )
+
+        self.stats['closed_missing'] += len(diff['closed_missing'])
+        self.stats['quantity_fixed'] += len(diff['quantity_fixed'])
+        self.stats['untracked'] = len(diff['untracked'])
+        self.stats['orphan_orders'] = len(diff['orphan_orders'])
+
+        if diff['closed_missing'] or diff['quantity_fixed'] or diff['untracked']:
+            self.logger.warning(
+                f"⚠️ 포지션 대조: 거래소에 없음 {len(diff['closed_missing'])}개 종료, "
+                f"수량 보정 {len(diff['quantity_fixed'])}개, 미추적 {len(diff['untracked'])}개"
+            )
+            self.db.log_system_event('WARNING', 'ReconciliationService', "포지션 불일치", diff)
+        if diff['missing_stops'] or diff['orphan_orders']:
+            self.logger.warning(
+                f"⚠️ 주문 대조: 사라진 스탑 {len(diff['missing_stops'])}개, 고아 주문 {len(diff['orphan_orders'])}개"
+            )
+        return diff
+
+    async def _close_missing(self, position: Dict):
+        """거래소에서 사라진 포지션 종료 - 핸들러가 없거나 실패하면 북에서만 제거"""
+        if self.close_handler is not None:
+            try:
+                await self.close_handler(position)
+                if position['id'] not in self.book.positions:
+                    return
+            except Exception as e:
+                self.logger.error(f"❌ 포지션 {position['id']} 거래소 청산 기록 실패: {e}")
+        self.book.close(position['id'], {})
+
+    # --------------------------------------------------------------- snapshot
+
+    def _build(self, diff: Dict[str, List]) -> ReconciliationSnapshot:
+        """Snapshot from the book and the last pulled exchange state (no requests, no listeners)"""
+        positions = []
+        for position in self.book.get_open():
+            direction = _direction(position['side'])
+            exchange_position = self._exchange_positions.get((position['symbol'], direction), {})
+            positions.append({
+                **position,
+                'side': direction,
+                'mark_price': exchange_position.get('markPrice'),
+                'unrealized_pnl': exchange_position.get('unrealizedPnl')
+            })
+
+        self._snapshot = ReconciliationSnapshot(
+            positions=positions,
+            exchange_positions=dict(self._exchange_positions),
+            open_orders=list(self._open_orders),
+            diff=diff,
+            source=self._source,
+            book_version=self.book.version,
+            exchange_time=self._exchange_time
+        )
+        return self._snapshot
+
+    def publish(self) -> ReconciliationSnapshot:
+        """Rebuild the snapshot with the latest diff and notify listeners (called from refresh only)"""
+        snapshot = self._build(self._last_diff)
+        self._last_diff = {}
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                self.logger.error(f"대조 스냅샷 리스너 오류: {e}")
+        return snapshot
+
+    def get_snapshot(self) -> ReconciliationSnapshot:
+        """Latest snapshot; book changes (marks, adds, closes) are folded in without a pull or listener calls"""
+        if self._snapshot is None:
+            return self._build({})
+        if self._snapshot.book_version != self.book.version:
+            # 마지막 대조의 diff는 그대로 유지 - 읽기만으로 소비되지 않음
+            return self._build(self._snapshot.diff)
+        return self._snapshot
+
+    def add_listener(self, listener: Callable):
+        """listener(snapshot) on every publish"""
+        self._listeners.append(listener)
+
+    def request_refresh(self):
+        """다음 주기를 기다리지 않고 즉시 대조"""
+        if self._refresh_event is not None:
+            self._refresh_event.set()
+
+    # -------------------------------------------------------------- lifecycle
+
+    async def _loop(self):
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self._refresh_event.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._refresh_event.clear()
+                await self.refresh()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"❌ 포지션 대조 루프 오류: {e}")
+
+    def start(self):
+        """Start periodic reconciliation"""
+        self._refresh_event = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    def get_status(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            **self.stats,
+            'source': self._source,
+            'snapshot_age': snapshot.age() if snapshot else None,
+            'pending_missing': dict(self._missing_streak)
+        }
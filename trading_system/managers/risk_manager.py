@@ -3,15 +3,19 @@ Risk Manager
 Comprehensive risk management system with dynamic Kelly Criterion
 """
 
+import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 # Import handling for both direct and package imports
 try:
     from ..config.config import TradingConfig
     from ..database.db_manager import EnhancedDatabaseManager
     from ..utils.atr_calculator import ATRCalculator
+    from .risk_state import RiskState
+    from .exposure_engine import ExposureEngine
+    from .portfolio_risk import PortfolioRiskEngine
 except ImportError:
     import sys
     import os
@@ -19,19 +23,32 @@ except ImportError:
     from config.config import TradingConfig
     from database.db_manager import EnhancedDatabaseManager
     from utils.atr_calculator import ATRCalculator
+    from managers.risk_state import RiskState
+    from managers.exposure_engine import ExposureEngine
+    from managers.portfolio_risk import PortfolioRiskEngine
 
 
 class RiskManager:
     """Comprehensive risk management system with dynamic Kelly Criterion"""
     
-    def __init__(self, config: TradingConfig, db: EnhancedDatabaseManager):
+    def __init__(self, config: TradingConfig, db: EnhancedDatabaseManager, impact_estimator=None,
+                 risk_state: RiskState = None):
         self.config = config
         self.db = db
+        self.impact_estimator = impact_estimator  # 호가 깊이 기반 사전 체결 영향 추정 (없으면 제한 생략)
+        
+        # 리스크 체크용 인메모리 상태 (포지션 매니저와 공유, 단독 사용 시 첫 체크에서 DB로 초기화)
+        self.risk_state = risk_state or RiskState(config, db)
         self.logger = logging.getLogger(__name__)
         
         # 🔥 ATR 계산기 초기화
         self.atr_calculator = ATRCalculator(config)
         
+        # EWMA 공분산 기반 포트폴리오 익스포저 (베타/변동성 한도)
+        self.exposure = ExposureEngine(config)
+        # 같은 수익률 행렬/공분산 위의 VaR/CVaR 및 스트레스 시나리오
+        self.portfolio_risk = PortfolioRiskEngine(config, self.exposure)
+        
         # Track risk metrics
         self.risk_metrics = {
             'daily_pnl': 0,
@@ -42,7 +59,10 @@ class RiskManager:
         }
     
     async def check_risk_limits(self, symbol: str) -> Dict[str, bool]:
-        """Check all risk limits before trading"""
+        """Check all risk limits before trading (in-memory reads from RiskState)"""
+        if not self.risk_state.loaded:
+            self.risk_state.load()
+        
         checks = {
             'daily_loss': await self._check_daily_loss_limit(),
             'weekly_loss': await self._check_weekly_loss_limit(),
@@ -71,22 +91,17 @@ class RiskManager:
     
     async def _check_daily_loss_limit(self) -> bool:
         """Check if daily loss limit exceeded"""
-        today_performance = self.db.get_daily_performance()
+        daily_pnl = self.risk_state.daily_pnl
         
-        if today_performance['total_pnl_percent'] <= -self.config.DAILY_LOSS_LIMIT:
-            self.logger.warning(f"일일 손실 한도 도달: {today_performance['total_pnl_percent']:.2%}")
+        if daily_pnl <= -self.config.DAILY_LOSS_LIMIT:
+            self.logger.warning(f"일일 손실 한도 도달: {daily_pnl:.2%}")
             return False
         
         return True
     
     async def _check_weekly_loss_limit(self) -> bool:
         """Check weekly loss limit"""
-        # Get last 7 days performance
-        weekly_pnl = 0
-        for i in range(7):
-            date = (datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d')
-            daily_perf = self.db.get_daily_performance(date)
-            weekly_pnl += daily_perf.get('total_pnl_percent', 0)
+        weekly_pnl = self.risk_state.weekly_pnl
         
         if weekly_pnl <= -self.config.WEEKLY_LOSS_LIMIT:
             self.logger.warning(f"주간 손실 한도 도달: {weekly_pnl:.2%}")
@@ -97,16 +112,17 @@ class RiskManager:
     async def _check_symbol_trade_limits(self, symbol: str) -> bool:
         """Check symbol-specific trade limits"""
         limits = self.config.DAILY_TRADE_LIMITS[symbol]
-        today_trades = self.db.get_symbol_trades_today(symbol)
+        total = self.risk_state.trades_today.get(symbol, 0)
+        losses = self.risk_state.losses_today.get(symbol, 0)
         
         # Check total trades
-        if today_trades['total'] >= limits['max_trades']:
-            self.logger.warning(f"{symbol} 일일 거래 한도 도달: {today_trades['total']}")
+        if total >= limits['max_trades']:
+            self.logger.warning(f"{symbol} 일일 거래 한도 도달: {total}")
             return False
         
         # Check loss trades
-        if today_trades['losses'] >= limits['max_loss_trades']:
-            self.logger.warning(f"{symbol} 일일 손실 거래 한도 도달: {today_trades['losses']}")
+        if losses >= limits['max_loss_trades']:
+            self.logger.warning(f"{symbol} 일일 손실 거래 한도 도달: {losses}")
             return False
         
         return True
@@ -114,10 +130,9 @@ class RiskManager:
     async def _check_cooldown_period(self, symbol: str) -> bool:
         """Check if in cooldown period"""
         limits = self.config.DAILY_TRADE_LIMITS[symbol]
-        today_trades = self.db.get_symbol_trades_today(symbol)
+        last_trade_time = self.risk_state.last_trade.get(symbol)
         
-        if today_trades['last_trade']:
-            last_trade_time = datetime.fromisoformat(today_trades['last_trade'])
+        if last_trade_time:
             cooldown_end = last_trade_time + timedelta(minutes=limits['cooldown_minutes'])
             
             if datetime.now() < cooldown_end:
@@ -129,29 +144,21 @@ class RiskManager:
     
     async def _check_position_limits(self, symbol: str) -> bool:
         """Check position limits"""
-        open_positions = self.db.get_open_positions(symbol)
+        open_count = self.risk_state.open_counts.get(symbol, 0)
         max_positions = self.config.MAX_POSITIONS[symbol]
         
-        if len(open_positions) >= max_positions:
-            self.logger.warning(f"{symbol} 포지션 한도 도달: {len(open_positions)}")
+        if open_count >= max_positions:
+            self.logger.warning(f"{symbol} 포지션 한도 도달: {open_count}")
             return False
         
         return True
     
     async def _check_correlation_limits(self) -> bool:
         """Check correlation between positions"""
-        # Get all open positions
-        all_positions = self.db.get_open_positions()
-        
-        if not all_positions:
-            return True
-        
-        # Group by direction
-        long_positions = [p for p in all_positions if p['side'] == 'long']
-        short_positions = [p for p in all_positions if p['side'] == 'short']
+        directions = self.risk_state.open_directions
         
         # Simple check: avoid all positions in same direction
-        if len(long_positions) >= len(self.config.SYMBOLS) or len(short_positions) >= len(self.config.SYMBOLS):
+        if directions['long'] >= len(self.config.SYMBOLS) or directions['short'] >= len(self.config.SYMBOLS):
             self.logger.warning("모든 포지션이 같은 방향 - 상관관계 리스크 회피")
             return False
         
@@ -159,12 +166,10 @@ class RiskManager:
     
     async def _check_drawdown_limit(self) -> bool:
         """Check maximum drawdown"""
-        # This would track peak equity and calculate drawdown
-        # For now, simplified implementation
-        today_performance = self.db.get_daily_performance()
+        drawdown = self.risk_state.drawdown
         
-        if today_performance['max_drawdown'] >= self.config.MAX_DRAWDOWN:
-            self.logger.warning(f"최대 낙폭 도달: {today_performance['max_drawdown']:.2%}")
+        if drawdown >= self.config.MAX_DRAWDOWN:
+            self.logger.warning(f"최대 낙폭 도달: {drawdown:.2%}")
             return False
         
         return True
@@ -176,7 +181,7 @@ class RiskManager:
         return True
     
     def calculate_position_allocation(self, symbol: str, total_capital: float, 
-                                    current_positions: List[Dict]) -> float:
+                                    current_positions: List[Dict], side: str = None) -> float:
         """Calculate position allocation using Kelly Criterion with full allocated capital"""
         # 💰 OPTIMIZED: Use full allocated capital (already pre-allocated by user)
         max_allowed_capital = total_capital * self.config.MAX_TOTAL_ALLOCATION
@@ -194,11 +199,11 @@ class RiskManager:
                 
             try:
                 # 올바른 선물 포지션 증거금 계산
-                symbol = pos.get('symbol', '')
+                pos_symbol = pos.get('symbol', '')
                 nominal_value = float(quantity) * float(entry_price)
                 
                 # 레버리지로 나누어 실제 증거금 계산
-                leverage = self.config.LEVERAGE.get(symbol, 10)
+                leverage = self.config.LEVERAGE.get(pos_symbol, 10)
                 actual_margin = nominal_value / leverage
                 
                 current_total_used += actual_margin
@@ -240,8 +245,8 @@ class RiskManager:
         # Ensure we don't over-allocate
         max_position_size = target_symbol_allocation / self.config.MAX_POSITIONS[symbol]
         
-        # Get Kelly fraction from database
-        kelly_fraction = self.db.get_kelly_fraction(symbol)
+        # Rolling Kelly fraction (in-memory, no DB access)
+        kelly_fraction = self.get_kelly_fraction(symbol)
         
         # Apply safety margin (use only 25% of Kelly suggestion)
         safe_kelly = kelly_fraction * self.config.KELLY_FRACTION
@@ -257,6 +262,45 @@ class RiskManager:
             available_under_limit  # 할당 한도 내에서만
         )
         
+        # 예상 시장 충격 제한: 호가 깊이로 허용 슬리피지 내 최대 명목가치를 구해 증거금으로 환산
+        impact_cap = self._impact_capped_allocation(symbol, side)
+        if impact_cap is not None and impact_cap < final_allocation:
+            self.logger.info(
+                f"🌊 {symbol} 호가 깊이 제한: ${final_allocation:.2f} -> ${impact_cap:.2f} "
+                f"(예상 슬리피지 {self.config.PRETRADE_MAX_SLIPPAGE_BPS:.0f}bp 이내)"
+            )
+            final_allocation = impact_cap
+        
+        # 포트폴리오 베타/변동성 한도: 공분산으로 허용 가능한 최대 명목가치를 구해 증거금으로 환산
+        if side and self.exposure.is_ready():
+            max_notional = self.exposure.max_trade_notional(current_positions, symbol, side, total_capital)
+            leverage = self.config.LEVERAGE.get(symbol, 10)
+            if max_notional is not None and max_notional / leverage < final_allocation:
+                trade = self.exposure.evaluate_trade(
+                    current_positions, symbol, side, final_allocation * leverage, total_capital
+                )
+                self.logger.info(
+                    f"📐 {symbol} 익스포저 제한: ${final_allocation:.2f} -> ${max_notional / leverage:.2f} "
+                    f"(베타 {trade['beta_before']:.2f}->{trade['beta_after']:.2f}, "
+                    f"일간 변동성 {trade['daily_vol_before']:.2%}->{trade['daily_vol_after']:.2%})"
+                )
+                final_allocation = max_notional / leverage
+        
+        # 포트폴리오 CVaR/스트레스 손실 한도: 후보 크기들을 한 번의 행렬 연산으로 평가
+        if side and final_allocation > 0 and self.portfolio_risk.is_ready():
+            leverage = self.config.LEVERAGE.get(symbol, 10)
+            max_notional = self.portfolio_risk.max_trade_notional(
+                current_positions, symbol, side, total_capital, final_allocation * leverage
+            )
+            if max_notional is not None and max_notional / leverage < final_allocation:
+                risk = self.portfolio_risk.assess(current_positions, total_capital)
+                self.logger.info(
+                    f"🧯 {symbol} VaR/스트레스 제한: ${final_allocation:.2f} -> ${max_notional / leverage:.2f} "
+                    f"(현재 CVaR {max(risk['hist_cvar'], risk['param_cvar']):.2%}, "
+                    f"최악 시나리오 {max(risk['stress'].values()):.2%})"
+                )
+                final_allocation = max_notional / leverage
+        
         # Log Kelly calculation with allocation limit
         self.logger.info(
             f"💰 {symbol} 자금 할당:\n"
@@ -267,6 +311,26 @@ class RiskManager:
         
         return final_allocation
     
+    def _impact_capped_allocation(self, symbol: str, side: str = None):
+        """Margin whose leveraged notional keeps expected VWAP within PRETRADE_MAX_SLIPPAGE_BPS of mid"""
+        if not self.impact_estimator or not side:
+            return None
+        max_notional = self.impact_estimator.max_notional(symbol, side, self.config.PRETRADE_MAX_SLIPPAGE_BPS)
+        if max_notional is None:
+            return None
+        return max_notional / self.config.LEVERAGE.get(symbol, 10)
+    
+    async def refresh_exposure(self, exchange):
+        """Feed newly closed bars into the covariance and publish the correlation matrix"""
+        observations = self.exposure.observations
+        await self.exposure.refresh(exchange, self.config.SYMBOLS)
+        if self.exposure.observations != observations:
+            self.risk_metrics['correlation_matrix'] = self.exposure.correlation()
+    
+    def get_portfolio_risk(self, positions: List[Dict], equity: float) -> Dict:
+        """Current book VaR/CVaR and stress losses (fractions of equity), empty until the history is ready"""
+        return self.portfolio_risk.assess(positions, equity) or {}
+    
     def calculate_tp_sl(self, symbol: str, entry_price: float, direction: str) -> Dict[str, float]:
         """
         ATR 기반 동적 TP/SL 계산
@@ -353,9 +417,22 @@ class RiskManager:
                     "profit_multiplier": 0
                 }
     
+    def get_kelly_fraction(self, symbol: str) -> float:
+        """Current rolling Kelly fraction for symbol"""
+        if not self.risk_state.loaded:
+            self.risk_state.load()
+        return self.risk_state.kelly.fraction(symbol)
+    
     def update_kelly_after_trade(self, symbol: str, trade_pnl_percent: float):
-        """Update Kelly tracking after trade closes"""
-        self.db.update_kelly_tracking(symbol, trade_pnl_percent)
+        """Update Kelly tracking after trade closes (O(1) in memory, persisted off the event loop)"""
+        kelly = self.risk_state.kelly
+        fraction = kelly.record(symbol, trade_pnl_percent)
+        args = (symbol, kelly.trades(symbol), kelly.get_status(symbol))
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self.db.save_kelly_state, *args)
+        except RuntimeError:
+            self.db.save_kelly_state(*args)
+        self.logger.debug(f"🎯 {symbol} Kelly 갱신: {fraction:.3f}")
     
     def get_current_total_allocation_ratio(self, total_capital: float, current_positions: List[Dict]) -> float:
         """현재 총 자금 사용 비율 계산 (defensive)"""
@@ -414,26 +491,21 @@ class RiskManager:
     
     # 🔥 ATR 기반 동적 손절/익절 시스템
     def calculate_position_stops(self, symbol: str, entry_price: float, 
-                                position_side: str, recent_candles: List[Dict]) -> Dict[str, float]:
-        """ATR 기반 포지션별 동적 손절/익절 계산"""
+                                position_side: str, recent_candles,
+                                current_atr: Optional[float] = None,
+                                regime: Optional[str] = None) -> Dict[str, float]:
+        """ATR 기반 포지션별 동적 손절/익절 계산 (current_atr가 있으면 재계산 생략)"""
         try:
             # ATR 계산
-            atr_period = self.config.ATR_SETTINGS[symbol]['period']
-            current_atr = self.atr_calculator.calculate_atr(recent_candles, atr_period)
+            if current_atr is None:
+                atr_period = self.config.ATR_SETTINGS[symbol]['period']
+                current_atr = self.atr_calculator.calculate_atr(recent_candles, atr_period)
             
             if current_atr <= 0 or not self.atr_calculator.validate_atr_quality(current_atr, recent_candles):
                 self.logger.warning(f"⚠️ {symbol} ATR 품질 불량, 폴백 모드 사용")
                 return self._get_fallback_stops(symbol, entry_price, position_side)
             
-            # 동적 손절/익절 계산
-            stops = self.atr_calculator.calculate_dynamic_stops(
-                symbol, entry_price, current_atr, position_side
-            )
-            
-            # 레버리지 검증
-            if not self.validate_stop_levels_with_leverage(symbol, stops['stop_distance_pct']):
-                # 손절 거리 조정
-                stops = self.adjust_stops_for_leverage(symbol, stops, entry_price, position_side)
+            stops = self.calculate_stops_from_atr(symbol, entry_price, position_side, current_atr, regime)
             
             # 상세 로깅
             self.logger.info(
@@ -452,6 +524,20 @@ class RiskManager:
             self.logger.error(f"ATR 손절/익절 계산 오류: {e}")
             return self._get_fallback_stops(symbol, entry_price, position_side)
     
+    def calculate_stops_from_atr(self, symbol: str, entry_price: float, position_side: str,
+                                 current_atr: float, regime: Optional[str] = None) -> Dict[str, float]:
+        """Stop/target levels from an already computed ATR (no candle access)"""
+        # 동적 손절/익절 계산 (최적화 테이블의 체제별 배수 우선)
+        stops = self.atr_calculator.calculate_dynamic_stops(
+            symbol, entry_price, current_atr, position_side, regime
+        )
+        
+        # 레버리지 검증
+        if not self.validate_stop_levels_with_leverage(symbol, stops['stop_distance_pct']):
+            # 손절 거리 조정
+            stops = self.adjust_stops_for_leverage(symbol, stops, entry_price, position_side)
+        return stops
+    
     def validate_stop_levels_with_leverage(self, symbol: str, stop_distance_pct: float) -> bool:
         """레버리지 대비 손절 거리 검증"""
         try:
@@ -0,0 +1,263 @@
+"""
+Risk State
+Incrementally maintained counters behind the pre-trade risk checks
+"""
+
+import asyncio
+import logging
+from collections import deque
+from datetime import date, datetime, timedelta
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+# Import handling for both direct and package imports
+try:
+    from ..config.config import TradingConfig
+    from ..database.db_manager import EnhancedDatabaseManager
+    from .kelly_tracker import KellyTracker
+except ImportError:
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config.config import TradingConfig
+    from database.db_manager import EnhancedDatabaseManager
+    from managers.kelly_tracker import KellyTracker
+
+
+class RiskState:
+    """
+    Rolling daily/weekly PnL, per-symbol trade/loss counts, last trade time, open-position counts
+    and peak equity, updated on open/close/fill events so every pre-trade check is a dict read.
+
+    The DB stays the record: load() seeds from it, and a background cross-check re-reads it every
+    RISK_STATE_CROSS_CHECK_INTERVAL seconds and adopts whichever side is more conservative.
+    """
+
+    def __init__(self, config: TradingConfig, db: EnhancedDatabaseManager):
+        self.config = config
+        self.db = db
+        self.logger = logging.getLogger(__name__)
+
+        # 최근 7일 일별 손익 (자본 대비 비율), 오늘이 마지막 원소
+        self._days: Deque[Tuple[date, float]] = deque(maxlen=7)
+        # 일별 손익 비율의 분모 (DB의 USDT 손익을 같은 기준으로 환산하기 위해 보관)
+        self._day_reference: Dict[date, float] = {}
+        self._symbol_day: Optional[date] = None
+        self.trades_today: Dict[str, int] = {}
+        self.losses_today: Dict[str, int] = {}
+        self.last_trade: Dict[str, datetime] = {}
+
+        self.open_counts: Dict[str, int] = {}
+        self.open_directions = {'long': 0, 'short': 0}
+
+        self.equity = 0.0
+        self.peak_equity = 0.0
+        self.day_start_equity = 0.0
+
+        # 심볼별 롤링 Kelly 통계 (청산 거래마다 O(1) 갱신)
+        self.kelly = KellyTracker(config)
+
+        self.loaded = False
+        self._task = None
+        self.stats = {'events': 0, 'cross_checks': 0, 'drift': 0}
+
+    # ------------------------------------------------------------------ rolling windows
+
+    def _roll(self, now: Optional[datetime] = None):
+        """Advance day buckets and reset per-symbol daily counters at midnight"""
+        today = (now or datetime.now()).date()
+        if not self._days or self._days[-1][0] != today:
+            self._days.append((today, 0.0))
+            self.day_start_equity = self.equity
+        if self._symbol_day != today:
+            self._symbol_day = today
+            self.trades_today.clear()
+            self.losses_today.clear()
+
+    def _reference(self, day: Optional[date] = None) -> float:
+        """Equity a day's PnL is expressed against"""
+        return (self._day_reference.get(day) or self.day_start_equity or self.equity
+                or self.config.FALLBACK_BALANCE)
+
+    def _add_pnl(self, pnl_value: float):
+        day, pnl = self._days[-1]
+        reference = self.day_start_equity or self.equity or self.config.FALLBACK_BALANCE
+        self._day_reference[day] = reference
+        self._days[-1] = (day, pnl + pnl_value / reference)
+
+    @property
+    def daily_pnl(self) -> float:
+        """오늘 실현 손익 (자본 대비 비율)"""
+        self._roll()
+        return self._days[-1][1]
+
+    @property
+    def weekly_pnl(self) -> float:
+        """최근 7일 실현 손익 합 (자본 대비 비율)"""
+        self._roll()
+        cutoff = datetime.now().date() - timedelta(days=6)
+        return sum(pnl for day, pnl in self._days if day >= cutoff)
+
+    @property
+    def drawdown(self) -> float:
+        """Current equity drawdown from peak"""
+        if self.peak_equity <= 0 or self.equity <= 0:
+            return 0.0
+        return max(0.0, (self.peak_equity - self.equity) / self.peak_equity)
+
+    # ------------------------------------------------------------------ events
+
+    @staticmethod
+    def _direction(side: str) -> str:
+        return 'long' if str(side).lower() in ('buy', 'long') else 'short'
+
+    def on_open(self, symbol: str, side: str, when: Optional[datetime] = None):
+        """새 포지션 개시"""
+        when = when or datetime.now()
+        self._roll(when)
+        self.trades_today[symbol] = self.trades_today.get(symbol, 0) + 1
+        self.last_trade[symbol] = when
+        self.open_counts[symbol] = self.open_counts.get(symbol, 0) + 1
+        self.open_directions[self._direction(side)] += 1
+        self.stats['events'] += 1
+
+    def on_fill(self, symbol: str, pnl_value: float):
+        """Realized PnL from a partial close"""
+        self._roll()
+        self._add_pnl(pnl_value)
+        self.stats['events'] += 1
+
+    def on_close(self, symbol: str, side: str, pnl_value: float):
+        """포지션 종료 - 실현 손익과 손실 거래 수 반영"""
+        self._roll()
+        self._add_pnl(pnl_value)
+        if pnl_value < 0:
+            self.losses_today[symbol] = self.losses_today.get(symbol, 0) + 1
+        self.open_counts[symbol] = max(0, self.open_counts.get(symbol, 0) - 1)
+        direction = self._direction(side)
+        self.open_directions[direction] = max(0, self.open_directions[direction] - 1)
+        self.stats['events'] += 1
+
+    def on_equity(self, equity: float):
+        """Latest account equity (capital tracker updates)"""
+        if equity <= 0:
+            return
+        self.equity = equity
+        self.peak_equity = max(self.peak_equity, equity)
+        self._roll()
+        if not self.day_start_equity:
+            self.day_start_equity = equity
+
+    def sync_positions(self, positions: Iterable[Dict]):
+        """Replace open counts from an authoritative position list (reconciliation snapshot)"""
+        counts: Dict[str, int] = {}
+        directions = {'long': 0, 'short': 0}
+        for position in positions:
+            counts[position['symbol']] = counts.get(position['symbol'], 0) + 1
+            directions[self._direction(position['side'])] += 1
+        self.open_counts = counts
+        self.open_directions = directions
+
+    # ------------------------------------------------------------------ DB seed / cross-check
+
+    def _read_db(self) -> Dict:
+        """DB에서 같은 지표를 다시 계산 (executor에서 실행) - 일별 손익은 청산 거래의 USDT 합계"""
+        today = datetime.now().date()
+        realized = self.db.get_daily_realized_pnl((today - timedelta(days=6)).strftime('%Y-%m-%d'))
+        days = []
+        for offset in range(6, -1, -1):
+            day = today - timedelta(days=offset)
+            days.append((day, float(realized.get(day.strftime('%Y-%m-%d'), 0) or 0)))
+        symbols = {}
+        for symbol in self.config.SYMBOLS:
+            symbols[symbol] = self.db.get_symbol_trades_today(symbol)
+        return {'days': days, 'symbols': symbols, 'positions': self.db.get_open_positions()}
+
+    def _apply_db(self, snapshot: Dict, seed: bool):
+        """Seed from DB, or on cross-check keep the more conservative value and count drift"""
+        drift = 0
+        today = datetime.now().date()
+        memory_days = dict(self._days)
+        self._days.clear()
+        for day, db_pnl_usdt in snapshot['days']:
+            # 메모리와 같은 분모로 환산해 비교 (지난 날은 시드 시점 분모로 고정)
+            reference = self._reference(day)
+            if seed and day != today:
+                self._day_reference[day] = reference
+            db_pnl = db_pnl_usdt / reference
+            pnl = db_pnl if seed else min(db_pnl, memory_days.get(day, 0.0))
+            drift += (not seed and abs(db_pnl - memory_days.get(day, 0.0)) > 1e-6)
+            self._days.append((day, pnl))
+        self._symbol_day = today
+        window = {day for day, _ in self._days}
+        self._day_reference = {day: ref for day, ref in self._day_reference.items() if day in window}
+
+        for symbol, trades in snapshot['symbols'].items():
+            total, losses = int(trades.get('total', 0) or 0), int(trades.get('losses', 0) or 0)
+            if not seed:
+                drift += (total != self.trades_today.get(symbol, 0)) + (losses != self.losses_today.get(symbol, 0))
+                total = max(total, self.trades_today.get(symbol, 0))
+                losses = max(losses, self.losses_today.get(symbol, 0))
+            self.trades_today[symbol] = total
+            self.losses_today[symbol] = losses
+            if trades.get('last_trade'):
+                db_last = datetime.fromisoformat(trades['last_trade'])
+                self.last_trade[symbol] = max(db_last, self.last_trade.get(symbol, db_last))
+
+        if seed:
+            self.sync_positions(snapshot['positions'])
+        return drift
+
+    def load(self):
+        """Seed all counters from the DB (startup)"""
+        self._apply_db(self._read_db(), seed=True)
+        self.kelly.load(self.db.get_kelly_windows(self.config.KELLY_WINDOW))
+        self.loaded = True
+        self.logger.info(
+            f"🛡️ 리스크 상태 로드: 일일 {self.daily_pnl:.2%}, 주간 {self.weekly_pnl:.2%}, "
+            f"오픈 {sum(self.open_counts.values())}개"
+        )
+
+    async def cross_check(self) -> int:
+        """Re-read the DB off the event loop and reconcile counters"""
+        snapshot = await asyncio.get_event_loop().run_in_executor(None, self._read_db)
+        drift = self._apply_db(snapshot, seed=False)
+        self.stats['cross_checks'] += 1
+        if drift:
+            self.stats['drift'] += drift
+            self.logger.warning(f"⚠️ 리스크 상태와 DB 불일치 {drift}건 - 보수적인 값으로 보정")
+        return drift
+
+    async def _cross_check_loop(self):
+        while True:
+            try:
+                await asyncio.sleep(self.config.RISK_STATE_CROSS_CHECK_INTERVAL)
+                await self.cross_check()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"❌ 리스크 상태 교차 검증 오류: {e}")
+
+    def start(self):
+        """Seed if needed and start the periodic DB cross-check"""
+        if not self.loaded:
+            self.load()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._cross_check_loop())
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    def get_status(self) -> Dict:
+        return {
+            **self.stats,
+            'daily_pnl': self.daily_pnl,
+            'weekly_pnl': self.weekly_pnl,
+            'drawdown': self.drawdown,
+            'peak_equity': self.peak_equity,
+            'trades_today': dict(self.trades_today),
+            'losses_today': dict(self.losses_today),
+            'open_counts': dict(self.open_counts),
+            'open_directions': dict(self.open_directions),
+            'kelly': {symbol: self.kelly.fraction(symbol) for symbol in self.config.SYMBOLS}
+        }
@@ -0,0 +1,216 @@
+"""
+Tick Risk Evaluator
+Evaluates stop, trailing, take-profit and early-cut conditions on every price tick
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+# Import handling for both direct and package imports
+try:
+    from ..config.config import TradingConfig
+    from ..utils.trigger_index import TriggerIndex, Trigger
+except ImportError:
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config.config import TradingConfig
+    from utils.trigger_index import TriggerIndex, Trigger
+
+
+class TickRiskEvaluator:
+    """Subscribes to the price store and evaluates only positions whose triggers were crossed"""
+
+    def __init__(self, config: TradingConfig, position_manager, min_reeval_interval: float = 1.0):
+        self.config = config
+        self.position_manager = position_manager
+        self.min_reeval_interval = min_reeval_interval
+        self.logger = logging.getLogger(__name__)
+
+        self.index = TriggerIndex()
+        self.positions: Dict[int, Dict] = {}
+        self.in_flight: Set[int] = set()
+        self.last_eval: Dict[int, float] = {}
+        self.running = False
+
+        self.stats = {'ticks': 0, 'triggers_fired': 0, 'evaluations': 0}
+
+    def start(self, exchange):
+        """Subscribe to price updates"""
+        exchange.add_price_listener(self.on_tick)
+        self.running = True
+        self.logger.info("✅ 틱 기반 리스크 평가 시작")
+
+    def stop(self):
+        """Stop reacting to ticks"""
+        self.running = False
+
+    @staticmethod
+    def _is_long(position: Dict) -> bool:
+        """Positions are stored with 'buy'/'sell' sides; managed with 'long'/'short'"""
+        return position.get('side') in ('long', 'buy')
+
+    def sync(self, positions: List[Dict]):
+        """DB 포지션 목록과 트리거 인덱스 동기화"""
+        current_ids = {p['id'] for p in positions}
+        for position_id in list(self.positions.keys()):
+            if position_id not in current_ids:
+                self.untrack(position_id)
+
+        for position in positions:
+            if position['id'] not in self.in_flight:
+                self.track(position)
+
+    def track(self, position: Dict):
+        """(Re)arm all trigger levels for a position atomically"""
+        symbol = position['symbol']
+        position_id = position['id']
+        self.positions[position_id] = position
+
+        triggers = [
+            Trigger((position_id, kind, n), symbol, position_id, kind, level, direction)
+            for n, (level, kind, direction) in enumerate(self._trigger_levels(position))
+            if level and level > 0
+        ]
+        self.index.replace_position(position_id, triggers)
+
+    def untrack(self, position_id: int):
+        """Drop a closed position"""
+        self.positions.pop(position_id, None)
+        self.index.remove_position(position_id)
+        self.last_eval.pop(position_id, None)
+
+    def on_stop_moved(self, position_id: int, new_stop: float, trailing_active: bool = True,
+                      tick_stop: bool = False):
+        """Trailing/ATR stop moved - swap the position's stop and ratchet triggers in one step"""
+        position = self.positions.get(position_id)
+        if position is None:
+            return
+        updated = {**position, 'stop_loss': new_stop}
+        if tick_stop:
+            # 거래소 첨부 손절을 옮기지 못한 포지션 - 손절 트리거를 직접 무장
+            updated['tick_stop'] = True
+        if trailing_active:
+            updated['trailing_stop_active'] = True
+            updated['trailing_stop_price'] = new_stop
+        if position_id in self.in_flight:
+            # 평가 종료 시 재무장되므로 상태만 갱신
+            self.positions[position_id] = updated
+        else:
+            self.track(updated)
+
+    def _trigger_levels(self, position: Dict) -> List[Tuple[float, str, str]]:
+        """포지션 상태에서 가격 트리거 레벨 계산 - PositionManager 판정식과 동일한 경계"""
+        symbol = position['symbol']
+        entry = float(position.get('entry_price') or 0)
+        if entry <= 0:
+            return []
+
+        is_long = self._is_long(position)
+        below, above = ('below', 'above') if is_long else ('above', 'below')
+        sign = 1 if is_long else -1
+        fees = self.config.TAKER_FEE * 2
+        levels = []
+
+        # Stop loss (also the trailing stop once trailing is active)
+        # 거래소에 첨부된 손절은 거래소가 실행하므로 트리거로 등록하지 않음 (수정 실패로 틱 손절 전환 시 제외)
+        stop_loss = position.get('stop_loss')
+        if stop_loss and (not position.get('attached_tpsl') or position.get('tick_stop')):
+            levels.append((float(stop_loss), 'stop_loss', below))
+
+        # Early cut: pnl_percent < -FALLBACK_STOP_LOSS * 0.7
+        early_cut = self.config.FALLBACK_STOP_LOSS.get(symbol)
+        if early_cut:
+            levels.append((entry * (1 - sign * (early_cut * 0.7 - fees)), 'early_cut', below))
+
+        # Trailing stop: activation, then ratchet on every favourable move
+        trailing = self.config.TRAILING_STOP.get(symbol)
+        if trailing:
+            if not position.get('trailing_stop_active'):
+                levels.append((entry * (1 + sign * (trailing['activate'] + fees)), 'trailing_activate', above))
+            else:
+                current = float(position.get('trailing_stop_price') or stop_loss or 0)
+                if current > 0:
+                    step = (1 - trailing['distance']) if is_long else (1 + trailing['distance'])
+                    levels.append((current / step, 'trailing_ratchet', above))
+
+        # Partial take-profit ladder
+        take_profit = position.get('take_profit') or '[]'
+        if isinstance(take_profit, str):
+            try:
+                take_profit = json.loads(take_profit)
+            except (ValueError, TypeError):
+                take_profit = []
+        for tp in take_profit:
+            if not tp.get('executed', False) and not tp.get('exchange', False) and tp.get('price'):
+                levels.append((float(tp['price']), 'take_profit', above))
+
+        return levels
+
+    def on_tick(self, symbol: str, price: float):
+        """Price store listener - only crossed triggers are touched"""
+        if not self.running:
+            return
+        self.stats['ticks'] += 1
+
+        crossed = self.index.pop_crossed(symbol, price)
+        if not crossed:
+            return
+
+        self.stats['triggers_fired'] += len(crossed)
+        now = time.time()
+        for position_id in {t.position_id for t in crossed}:
+            if position_id in self.in_flight:
+                continue
+            if now - self.last_eval.get(position_id, 0) < self.min_reeval_interval:
+                # 직전 평가 직후 - 다음 틱에서 다시 검사하도록 재무장
+                position = self.positions.get(position_id)
+                if position:
+                    self.track(position)
+                continue
+            self.in_flight.add(position_id)
+            asyncio.ensure_future(self._evaluate(position_id, price))
+
+    async def _evaluate(self, position_id: int, price: float):
+        """교차된 포지션만 전체 청산/추적손절/익절 로직 실행"""
+        try:
+            position = self.positions.get(position_id)
+            if not position:
+                return
+
+            self.stats['evaluations'] += 1
+            self.last_eval[position_id] = time.time()
+            await self.position_manager._manage_single_position(position, current_price=price)
+
+            # 평가 후 최신 상태로 재무장 (종료된 포지션은 제거)
+            refreshed = self._reload_position(position['symbol'], position_id)
+            if refreshed:
+                self.positions[position_id] = refreshed
+            else:
+                self.positions.pop(position_id, None)
+
+        except Exception as e:
+            self.logger.error(f"❌ 포지션 {position_id} 틱 평가 오류: {e}")
+        finally:
+            self.in_flight.discard(position_id)
+            position = self.positions.get(position_id)
+            if position:
+                self.track(position)
+            else:
+                self.untrack(position_id)
+
+    def _reload_position(self, symbol: str, position_id: int) -> Optional[Dict]:
+        """평가 후 변경된 손절/익절 상태를 포지션 북에서 재조회"""
+        return self.position_manager.book.get(position_id)
+
+    def get_stats(self) -> Dict:
+        """평가 통계"""
+        return {
+            **self.stats,
+            'tracked_positions': len(self.positions),
+            'armed_triggers': len(self.index),
+            'in_flight': len(self.in_flight)
+        }
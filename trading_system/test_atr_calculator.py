@@ -0,0 +1,75 @@
+"""
+calculate_atr_batch against per-symbol calculate_atr
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('dotenv')
+
+from config.config import TradingConfig
+from utils.atr_calculator import ATRCalculator
+
+
+def _candles(bars, seed, start=100.0):
+    """OHLCV ndarray (OHLCV_COLUMNS order) from a random walk"""
+    rng = np.random.default_rng(seed)
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    open_ = np.concatenate(([start], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.005, bars))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.005, bars))
+    return np.column_stack((open_, high, low, close, rng.uniform(1, 10, bars)))
+
+
+def _calculator():
+    config = TradingConfig()
+    config.ATR_MULTIPLIER_TABLE_PATH = None
+    return ATRCalculator(config)
+
+
+def test_batch_matches_scalar_for_mixed_lengths_and_periods():
+    calc = _calculator()
+    candles = {
+        'BTCUSDT': _candles(200, 1, 60000.0),
+        'ETHUSDT': _candles(16, 2, 3000.0),   # period + 2봉 - 행렬 앞쪽 NaN 패딩
+        'SOLUSDT': _candles(40, 3, 150.0),
+        'XRPUSDT': _candles(100, 4, 0.5),
+    }
+    periods = {'SOLUSDT': 30, 'XRPUSDT': 7}
+
+    batch = calc.calculate_atr_batch(candles, periods)
+    for symbol, data in candles.items():
+        expected = calc.calculate_atr(data, periods.get(symbol, 14))
+        assert expected > 0
+        assert batch[symbol] == pytest.approx(expected, rel=1e-12)
+
+
+def test_batch_accepts_every_input_form():
+    calc = _calculator()
+    data = _candles(60, 5)
+    frame = pd.DataFrame(data, columns=['open', 'high', 'low', 'close', 'volume'])
+    rows = frame.to_dict('records')
+    indicators = {'atr': pd.Series([np.nan, 1.5, 2.25])}
+
+    batch = calc.calculate_atr_batch({'A': data, 'B': frame, 'C': rows, 'D': indicators})
+    assert batch['A'] == pytest.approx(calc.calculate_atr(data))
+    assert batch['B'] == pytest.approx(batch['A'])
+    assert batch['C'] == pytest.approx(batch['A'])
+    assert batch['D'] == calc.calculate_atr(indicators) == 2.25
+
+
+def test_batch_short_and_degenerate_inputs_match_scalar():
+    calc = _calculator()
+    flat = np.tile([100.0, 100.0, 100.0, 100.0, 1.0], (30, 1))
+    gappy = _candles(40, 6)
+    gappy[-3:, 1:4] = np.nan  # 최근 봉 결측 - 최근 변동폭 평균으로 폴백
+
+    candles = {'SHORT': _candles(10, 7), 'FLAT': flat, 'GAPPY': gappy, 'BAD': 'not candles'}
+    batch = calc.calculate_atr_batch(candles)
+
+    assert batch['SHORT'] == calc.calculate_atr(candles['SHORT']) == 0.0
+    assert batch['FLAT'] == calc.calculate_atr(flat) == 0.0
+    assert batch['BAD'] == 0.0
+    assert batch['GAPPY'] > 0
+    assert batch['GAPPY'] == pytest.approx(calc.calculate_atr(gappy), rel=1e-12)
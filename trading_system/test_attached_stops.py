@@ -0,0 +1,149 @@
+"""
+Exchange-attached stop plans: matching the plan to its position and tick fallback when it cannot be moved
+"""
+
+import asyncio
+import logging
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('dotenv')
+
+from config.config import TradingConfig
+from managers.position_book import PositionBook
+from managers.position_manager import PositionManager
+from managers.tick_risk_evaluator import TickRiskEvaluator
+
+SYMBOL = 'BTCUSDT'
+
+
+class NullDB:
+    """DB stand-in for the position book"""
+
+    def log_system_event(self, *args, **kwargs):
+        pass
+
+
+class Snapshot:
+    def __init__(self, orders):
+        self.orders = orders
+
+    def orders_for(self, symbol):
+        return [o for o in self.orders if o['symbol'] == symbol]
+
+
+class Reconciler:
+    def __init__(self, orders=()):
+        self.orders = list(orders)
+
+    def get_snapshot(self):
+        return Snapshot(self.orders)
+
+
+class PlanExchange:
+    """Exchange stand-in: TP/SL plans by REST, stop amends recorded"""
+
+    def __init__(self, plans=(), amend_ok=True):
+        self.plans = list(plans)
+        self.amend_ok = amend_ok
+        self.amended = []
+        self.plan_requests = 0
+
+    async def fetch_tpsl_plans(self, symbol):
+        self.plan_requests += 1
+        return [p for p in self.plans if p['symbol'] == symbol]
+
+    async def modify_stop_loss(self, symbol, order_id, new_stop_price, side=None, amount=None):
+        self.amended.append((order_id, new_stop_price, side, amount))
+        return {'id': order_id} if self.amend_ok else {}
+
+
+def _plan(plan_id, hold_side, size, plan_type='loss_plan'):
+    return {'id': plan_id, 'symbol': SYMBOL, 'side': 'sell' if hold_side == 'long' else 'buy',
+            'info': {'planType': plan_type, 'holdSide': hold_side, 'size': str(size)}}
+
+
+def _manager(exchange, snapshot_orders=()):
+    config = TradingConfig()
+    manager = PositionManager.__new__(PositionManager)
+    manager.config = config
+    manager.logger = logging.getLogger('test')
+    manager.exchange = exchange
+    manager.book = PositionBook(config, NullDB())
+    manager.reconciler = Reconciler(snapshot_orders)
+    manager.tick_evaluator = TickRiskEvaluator(config, manager)
+    return manager
+
+
+def _add(manager, position_id, side, quantity, **extra):
+    position = {'id': position_id, 'symbol': SYMBOL, 'side': side, 'quantity': quantity,
+                'entry_price': 100.0, 'stop_loss': 98.0 if side == 'buy' else 102.0,
+                'take_profit': '[]', 'attached_tpsl': True, **extra}
+    manager.book.add(position)
+    manager.tick_evaluator.track(manager.book.get(position_id))
+    return manager.book.get(position_id)
+
+
+def test_plan_matched_on_side_and_quantity():
+    plans = [_plan('p-short', 'short', 0.01), _plan('p-big', 'long', 0.05), _plan('p-mine', 'long', 0.01)]
+    manager = _manager(PlanExchange())
+    position = _add(manager, 1, 'buy', 0.01)
+    _add(manager, 2, 'buy', 0.05)
+
+    assert manager._match_stop_plan(position, plans) == 'p-mine'
+
+
+def test_plan_claimed_by_another_entry_is_skipped():
+    plans = [_plan('p-1', 'long', 0.01), _plan('p-2', 'long', 0.01)]
+    manager = _manager(PlanExchange())
+    _add(manager, 1, 'buy', 0.01, stop_order_id='p-1')
+    position = _add(manager, 2, 'buy', 0.01)
+
+    assert manager._match_stop_plan(position, plans) == 'p-2'
+
+
+def test_whole_position_plan_only_for_sole_entry():
+    plans = [_plan('p-pos', 'long', 0, plan_type='pos_loss')]
+    manager = _manager(PlanExchange())
+    position = _add(manager, 1, 'buy', 0.01)
+    assert manager._match_stop_plan(position, plans) == 'p-pos'
+
+    _add(manager, 2, 'buy', 0.02)
+    assert manager._match_stop_plan(position, plans) is None
+
+
+def test_plan_fetched_when_snapshot_lacks_it():
+    exchange = PlanExchange([_plan('p-1', 'long', 0.01)])
+    manager = _manager(exchange)
+    position = _add(manager, 1, 'buy', 0.01)
+
+    assert asyncio.run(manager._attached_stop_id(position)) == 'p-1'
+    assert exchange.plan_requests == 1
+    assert manager.book.get(1)['stop_order_id'] == 'p-1'
+
+
+def test_atr_stop_update_amends_attached_plan():
+    exchange = PlanExchange([_plan('p-1', 'long', 0.01)])
+    manager = _manager(exchange)
+    _add(manager, 1, 'buy', 0.01)
+
+    asyncio.run(manager._update_position_stops(1, {'stop_loss': 99.0}, 'ATR'))
+    assert exchange.amended == [('p-1', 99.0, 'sell', 0.01)]
+    assert not manager.book.get(1).get('tick_stop')
+    levels = {kind for _, kind, _ in manager.tick_evaluator._trigger_levels(manager.tick_evaluator.positions[1])}
+    assert 'stop_loss' not in levels
+
+
+def test_unmovable_plan_falls_back_to_tick_stop():
+    manager = _manager(PlanExchange())
+    _add(manager, 1, 'buy', 0.01)
+
+    asyncio.run(manager._update_position_stops(1, {'stop_loss': 99.0}, 'ATR'))
+    position = manager.book.get(1)
+    assert position['tick_stop']
+    assert manager._stop_on_tick(position)
+
+    levels = {kind: level for level, kind, _ in
+              manager.tick_evaluator._trigger_levels(manager.tick_evaluator.positions[1])}
+    assert levels['stop_loss'] == 99.0
@@ -0,0 +1,72 @@
+"""
+BackfillManager listing detection: empty chunks before the listing are only skipped once confirmed
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+
+from exchange.components.backfill_manager import BackfillManager
+
+MINUTE = 60_000
+CHUNK = 10  # 청크당 캔들 수
+
+
+class CandleExchange:
+    """1m candles from first_ms to end, with optional gaps and market info"""
+
+    def __init__(self, first_ms, end_ms, gaps=(), created=None):
+        self.timestamps = [t for t in range(first_ms, end_ms, MINUTE)
+                           if not any(start <= t < end for start, end in gaps)]
+        self.created = created
+
+    def parse_timeframe(self, timeframe):
+        return 60
+
+    def market(self, symbol):
+        return {'created': self.created}
+
+    def fetch_ohlcv(self, symbol, timeframe, since, limit):
+        return [[t, 1.0, 1.0, 1.0, 1.0, 1.0] for t in self.timestamps if t >= since][:limit]
+
+
+def _run(exchange, tmp_path, chunks=4):
+    manager = BackfillManager(exchange, max_concurrency=2)
+    return asyncio.run(manager.backfill('BTC/USDT:USDT', '1m', 0, chunks * CHUNK * MINUTE,
+                                        str(tmp_path / 'candles.npz'), candles_per_chunk=CHUNK))
+
+
+def test_inferred_listing_confirmed_on_retry(tmp_path):
+    # 상장이 세 번째 청크 중간 - 앞선 두 청크는 비어 있음
+    exchange = CandleExchange(25 * MINUTE, 40 * MINUTE)
+
+    first = _run(exchange, tmp_path)
+    assert first['chunks_empty'] == 2
+    assert first['chunks_pre_listing'] == 0
+    assert not first['complete']
+
+    second = _run(exchange, tmp_path)
+    assert second['chunks_pre_listing'] == 2
+    assert second['complete']
+    assert second['candles'] == 15
+
+
+def test_gap_after_data_is_never_marked_done(tmp_path):
+    # 첫 청크에 데이터, 두 번째 청크 장애로 비어 있음, 세 번째 청크는 중간부터 재개
+    exchange = CandleExchange(0, 40 * MINUTE, gaps=[(10 * MINUTE, 25 * MINUTE)])
+
+    for _ in range(3):
+        result = _run(exchange, tmp_path)
+        assert result['chunks_pre_listing'] == 0
+        assert not result['complete']
+
+
+def test_market_created_time_trusted_immediately(tmp_path):
+    exchange = CandleExchange(25 * MINUTE, 40 * MINUTE, created=20 * MINUTE)
+
+    result = _run(exchange, tmp_path)
+    assert result['chunks_pre_listing'] == 2
+    assert result['complete']
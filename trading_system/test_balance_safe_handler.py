@@ -0,0 +1,131 @@
+"""
+BalanceSafeHandler single-flight fetches, pushes and invalidation during an in-flight fetch
+"""
+
+import asyncio
+
+from utils.balance_safe_handler import BalanceSafeHandler
+
+
+def _ccxt_balance(total, free=None):
+    return {'total': {'USDT': total}, 'free': {'USDT': total if free is None else free}, 'used': {'USDT': 0.0}}
+
+
+class GatedExchange:
+    """Exchange stand-in whose fetch blocks until released"""
+
+    def __init__(self, *totals):
+        self.totals = list(totals)
+        self.calls = 0
+        self.gate = asyncio.Event()
+
+    async def get_balance_async(self):
+        self.calls += 1
+        total = self.totals[min(self.calls, len(self.totals)) - 1]
+        await self.gate.wait()
+        return _ccxt_balance(total)
+
+
+def test_concurrent_misses_share_one_fetch():
+    async def run():
+        handler = BalanceSafeHandler()
+        exchange = GatedExchange(1000.0)
+        waiters = [asyncio.ensure_future(handler.get_safe_balance(exchange)) for _ in range(5)]
+        await asyncio.sleep(0)
+        exchange.gate.set()
+        results = await asyncio.gather(*waiters)
+
+        assert exchange.calls == 1
+        assert all(r['total_balance'] == 1000.0 for r in results)
+        assert handler.stats['fetches'] == 1
+        assert handler.stats['coalesced'] == 4
+
+        # 캐시 적중 - 추가 조회 없음
+        await handler.get_safe_balance(exchange)
+        assert exchange.calls == 1
+        assert handler.stats['cache_hits'] == 1
+
+    asyncio.run(run())
+
+
+def test_invalidate_during_fetch_does_not_cache_stale_result():
+    async def run():
+        handler = BalanceSafeHandler()
+        exchange = GatedExchange(1000.0, 900.0)
+        pending = asyncio.ensure_future(handler.get_safe_balance(exchange))
+        await asyncio.sleep(0)
+
+        # 조회 중 체결 발생
+        handler.invalidate()
+        exchange.gate.set()
+        assert (await pending)['total_balance'] == 1000.0
+        assert not handler._is_cache_valid(60)
+
+        # 다음 조회는 거래소에서 새로 가져와 캐시
+        assert (await handler.get_safe_balance(exchange))['total_balance'] == 900.0
+        assert exchange.calls == 2
+        assert handler._is_cache_valid(60)
+
+    asyncio.run(run())
+
+
+def test_push_during_fetch_wins_over_fetch_result():
+    async def run():
+        handler = BalanceSafeHandler()
+        exchange = GatedExchange(1000.0)
+        pending = asyncio.ensure_future(handler.get_safe_balance(exchange))
+        await asyncio.sleep(0)
+
+        handler.update_from_push(_ccxt_balance(1200.0))
+        exchange.gate.set()
+        await pending
+
+        cached = await handler.get_safe_balance(exchange)
+        assert cached['total_balance'] == 1200.0
+        assert cached['source'] == 'ws'
+        assert exchange.calls == 1
+
+    asyncio.run(run())
+
+
+def test_invalidate_forces_refetch_and_keeps_fallback():
+    async def run():
+        handler = BalanceSafeHandler()
+        handler.update_from_push(_ccxt_balance(500.0))
+        handler.invalidate()
+        assert not handler._is_cache_valid(60)
+
+        fallback = handler._get_fallback_balance()
+        assert fallback['total_balance'] == 500.0
+        assert fallback['source'] == 'cached'
+
+        exchange = GatedExchange(800.0)
+        exchange.gate.set()
+        assert (await handler.get_safe_balance(exchange))['total_balance'] == 800.0
+        assert exchange.calls == 1
+
+    asyncio.run(run())
+
+
+def test_caller_after_invalidate_starts_new_fetch():
+    async def run():
+        handler = BalanceSafeHandler()
+        exchange = GatedExchange(1000.0, 900.0)
+        first = asyncio.ensure_future(handler.get_safe_balance(exchange))
+        await asyncio.sleep(0)
+
+        # 조회 중 체결 - 이후 호출자는 진행 중 조회에 합류하지 않음
+        handler.invalidate()
+        second = asyncio.ensure_future(handler.get_safe_balance(exchange))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert exchange.calls == 2
+
+        exchange.gate.set()
+        assert (await first)['total_balance'] == 1000.0
+        assert (await second)['total_balance'] == 900.0
+        assert handler._is_cache_valid(60)
+        assert (await handler.get_safe_balance(exchange))['total_balance'] == 900.0
+        assert exchange.calls == 2
+
+    asyncio.run(run())
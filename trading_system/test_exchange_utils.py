@@ -0,0 +1,84 @@
+"""
+ExchangeUtils.calculate_position_size against known contract specs; REST usage accounting
+"""
+
+import asyncio
+
+import pytest
+
+from exchange.components.market_metadata import MarketSpec
+from exchange.components.utils import ExchangeUtils
+
+
+def _spec(symbol, contract_size, lot_size, min_amount):
+    return MarketSpec(symbol=symbol, market_symbol=f"{symbol[:-4]}/USDT:USDT", contract_size=contract_size,
+                      tick_size=0.1, lot_size=lot_size, min_amount=min_amount, min_notional=5.0,
+                      maker_fee=0.0002, taker_fee=0.0006)
+
+
+class Metadata:
+    def __init__(self, *specs):
+        self.specs = {spec.symbol: spec for spec in specs}
+
+    def get_spec(self, symbol):
+        return self.specs.get(symbol)
+
+
+class PricedExchange:
+    def __init__(self, **prices):
+        self.price_data = {symbol: {'price': price} for symbol, price in prices.items()}
+
+
+class Budget:
+    API_RATE_BUDGET_PER_MINUTE = 100
+
+
+def _size(utils, symbol, notional, exchange):
+    return asyncio.run(utils.calculate_position_size(symbol, notional, exchange))
+
+
+def test_notional_sized_in_base_units_for_unit_contracts():
+    utils = ExchangeUtils(None, Metadata(_spec('BTCUSDT', 1.0, 0.001, 0.001)))
+    exchange = PricedExchange(BTCUSDT=60000.0)
+
+    # 6000 USDT 명목가 @ 60000 → 0.1 BTC (0.001 BTC 최소 수량은 계약 크기가 아님)
+    assert _size(utils, 'BTCUSDT', 6000.0, exchange) == pytest.approx(0.1)
+    assert _size(utils, 'BTCUSDT', 1000.0, exchange) == pytest.approx(0.017)
+    # 최소 주문 수량 미만은 최소 수량으로
+    assert _size(utils, 'BTCUSDT', 10.0, exchange) == pytest.approx(0.001)
+
+
+def test_contract_size_divides_amount():
+    utils = ExchangeUtils(None, Metadata(_spec('ETHUSDT', 0.1, 1.0, 1.0)))
+    exchange = PricedExchange(ETHUSDT=3000.0)
+
+    # 계약당 0.1 ETH: 3000 USDT → 1 ETH → 10 계약
+    assert _size(utils, 'ETHUSDT', 3000.0, exchange) == 10
+
+
+def test_fallback_without_metadata_uses_unit_contracts():
+    utils = ExchangeUtils(None)
+    exchange = PricedExchange(ETHUSDT=2000.0)
+
+    assert _size(utils, 'ETHUSDT', 500.0, exchange) == pytest.approx(0.25)
+
+
+def test_every_ccxt_request_counts_toward_headroom():
+    ccxt = pytest.importorskip('ccxt')
+    exchange = ccxt.bitget({'enableRateLimit': False})
+    exchange.fetch = lambda *args, **kwargs: {'code': '00000', 'data': {'serverTime': '0'}}
+    utils = ExchangeUtils(Budget())
+    utils.track_requests(exchange)
+    utils.track_requests(exchange)  # 중복 래핑 없음
+
+    # check_rate_limit을 거치지 않는 직접 호출도 집계
+    for _ in range(3):
+        exchange.public_common_get_v2_public_time()
+    assert utils.get_rate_limit_headroom() == pytest.approx(0.97)
+
+    # 리미터 통과 자체는 요청이 아님 - 이중 집계 없음
+    limiter = utils.create_rate_limiter()
+    asyncio.run(utils.check_rate_limit(limiter))
+    exchange.public_common_get_v2_public_time()
+    assert len(utils.call_log) == 4
+    assert len(limiter['calls']) == 1
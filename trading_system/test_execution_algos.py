@@ -0,0 +1,119 @@
+"""
+Execution algorithm behaviour against SimulatedMatchingEngine
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('ccxt')
+pytest.importorskip('dotenv')
+
+from config.config import TradingConfig
+from exchange.components.execution_algos import ExecutionAlgoEngine
+from exchange.components.sim_matching import SimulatedMatchingEngine
+from utils.impact_estimator import ImpactEstimator
+
+SYMBOL = 'BTCUSDT'
+
+
+class CountingVenue(SimulatedMatchingEngine):
+    """Simulated venue that counts order book requests"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.book_requests = 0
+
+    async def get_orderbook(self, symbol, limit=50):
+        self.book_requests += 1
+        return await super().get_orderbook(symbol, limit)
+
+
+class IdOnlyVenue(SimulatedMatchingEngine):
+    """Venue whose order responses carry only the id (like Bitget create_order)"""
+
+    async def place_order(self, *args, **kwargs):
+        order = await super().place_order(*args, **kwargs)
+        return {'id': order['id']}
+
+
+def _run(engine, algo, amount, side='buy', **kwargs):
+    async def go():
+        return await engine.wait(engine.start(algo, SYMBOL, side, amount, **kwargs))
+    return asyncio.run(go())
+
+
+def test_choose_algo_market_when_book_absorbs_order():
+    engine = ExecutionAlgoEngine(TradingConfig(), SimulatedMatchingEngine())
+    # 범위 내 깊이 ≈ 55.6, 자식 최대 20% ≈ 11.1
+    assert asyncio.run(engine.choose_algo(SYMBOL, 'buy', 2.0)) == 'market'
+    assert asyncio.run(engine.choose_algo(SYMBOL, 'buy', 30.0)) == engine.config.EXECUTION_DEFAULT_ALGO
+
+
+def test_choose_algo_reuses_fresh_estimator_book():
+    venue = CountingVenue()
+    estimator = ImpactEstimator(max_age=5.0)
+    estimator.update(SYMBOL, asyncio.run(SimulatedMatchingEngine().get_orderbook(SYMBOL)))
+    engine = ExecutionAlgoEngine(TradingConfig(), venue, impact_estimator=estimator)
+
+    asyncio.run(engine.choose_algo(SYMBOL, 'buy', 2.0))
+    assert venue.book_requests == 0
+
+    # 오래된 호가는 REST로 다시 조회
+    estimator.max_age = 0.0
+    asyncio.run(engine.choose_algo(SYMBOL, 'buy', 2.0))
+    assert venue.book_requests == 1
+
+
+def test_twap_splits_into_equal_slices():
+    engine = ExecutionAlgoEngine(TradingConfig(), SimulatedMatchingEngine())
+    report = _run(engine, 'twap', 5.0, duration=0.2, slices=4)
+
+    assert len(report.child_orders) == 4
+    assert report.filled == pytest.approx(5.0)
+    assert [c['amount'] for c in report.child_orders] == pytest.approx([1.25] * 4)
+
+
+def test_twap_child_capped_by_book_depth():
+    engine = ExecutionAlgoEngine(TradingConfig(), SimulatedMatchingEngine())
+    report = _run(engine, 'twap', 40.0, duration=0.1, slices=2)
+
+    depth = SimulatedMatchingEngine().ask_amounts.sum()
+    cap = depth * engine.config.EXECUTION_MAX_BOOK_FRACTION
+    assert all(c['amount'] <= cap + 1e-6 for c in report.child_orders)
+    assert report.filled < 40.0
+
+
+def test_iceberg_shows_only_display_size_at_touch():
+    engine = ExecutionAlgoEngine(TradingConfig(), SimulatedMatchingEngine())
+    report = _run(engine, 'iceberg', 1.0, side='sell', display_size=0.3, refresh=0.02, max_duration=0.3)
+
+    assert report.child_orders
+    assert all(c['type'] == 'limit' for c in report.child_orders)
+    assert all(c['amount'] <= 0.3 + 1e-9 for c in report.child_orders)
+    assert 0 < report.filled <= 1.0 + 1e-9
+
+
+def test_participation_stays_under_rate_of_printed_volume():
+    venue = SimulatedMatchingEngine(volume_rate=5.0)
+    engine = ExecutionAlgoEngine(TradingConfig(), venue)
+    start_ms = int(venue._last * 1000)
+    report = _run(engine, 'participation', 5.0, rate=0.5, interval=0.05, max_duration=0.5)
+
+    printed = sum(t['amount'] for t in venue.trades if t['timestamp'] >= start_ms)
+    assert report.filled <= 0.5 * printed + 1e-9
+    assert report.filled < 5.0
+
+
+def test_unknown_child_fill_counts_as_zero():
+    engine = ExecutionAlgoEngine(TradingConfig(), IdOnlyVenue())
+    report = _run(engine, 'iceberg', 1.0, display_size=0.3, refresh=0.02, max_duration=0.1)
+
+    assert report.child_orders
+    assert report.filled == 0.0
+    assert all(c['filled'] == 0.0 for c in report.child_orders)
+
+    order = asyncio.run(engine.execute(SYMBOL, 'buy', 1.0, algo='market'))
+    assert order['filled'] == 0.0
+    assert order['status'] == 'partial'
@@ -0,0 +1,89 @@
+"""
+ExposureEngine.max_trade_notional bounds against beta and daily volatility limits
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+pytest.importorskip('dotenv')
+
+from config.config import TradingConfig
+from managers.exposure_engine import ExposureEngine
+
+EQUITY = 10000.0
+
+
+def _engine(max_beta=5.0, max_daily_vol=0.15):
+    """1h bars, BTC σ 1%, ETH σ 2%, correlation 0.75"""
+    config = TradingConfig()
+    config.EXPOSURE_TIMEFRAME = '1h'
+    config.EXPOSURE_BENCHMARK = 'BTCUSDT'
+    config.EXPOSURE_MAX_BETA = max_beta
+    config.EXPOSURE_MAX_DAILY_VOL = max_daily_vol
+    engine = ExposureEngine(config)
+    for symbol in ('BTCUSDT', 'ETHUSDT'):
+        engine._ensure(symbol)
+    engine.cov = np.array([[1e-4, 1.5e-4], [1.5e-4, 4e-4]])
+    engine.observations = config.EXPOSURE_MIN_OBSERVATIONS
+    engine.seeded = True
+    return engine
+
+
+def _long(symbol, notional):
+    return {'symbol': symbol, 'side': 'buy', 'quantity': notional / 100.0, 'entry_price': 100.0}
+
+
+def _within_limits(engine, positions, symbol, side, notional):
+    after = engine.evaluate_trade(positions, symbol, side, notional, EQUITY)
+    assert abs(after['beta_after']) <= engine.config.EXPOSURE_MAX_BETA + 1e-9
+    assert after['daily_vol_after'] <= engine.config.EXPOSURE_MAX_DAILY_VOL + 1e-9
+    return after
+
+
+def test_not_ready_or_unknown_symbol_returns_none():
+    engine = _engine()
+    assert engine.max_trade_notional([], 'SOLUSDT', 'buy', EQUITY) is None
+    assert engine.max_trade_notional([], 'BTCUSDT', 'buy', 0.0) is None
+
+    engine.observations = 0
+    assert engine.max_trade_notional([], 'BTCUSDT', 'buy', EQUITY) is None
+
+
+def test_volatility_bound_is_binding_on_empty_book():
+    engine = _engine()
+    limit = engine.max_trade_notional([], 'BTCUSDT', 'buy', EQUITY)
+
+    # 일간 σ 15% / 자본: x * 1% * sqrt(24) = 1500 → x ≈ 30619 (베타 한도 50000보다 작음)
+    assert limit == pytest.approx(1500 / (0.01 * np.sqrt(24)))
+    after = _within_limits(engine, [], 'BTCUSDT', 'buy', limit)
+    assert after['daily_vol_after'] == pytest.approx(0.15)
+    assert engine.evaluate_trade([], 'BTCUSDT', 'buy', limit * 1.01, EQUITY)['daily_vol_after'] > 0.15
+
+
+def test_beta_bound_is_binding_when_tighter():
+    engine = _engine(max_beta=1.0, max_daily_vol=10.0)
+    limit = engine.max_trade_notional([], 'ETHUSDT', 'buy', EQUITY)
+
+    # ETH 베타 1.5 → BTC 환산 1.5x <= 10000
+    assert limit == pytest.approx(10000 / 1.5)
+    after = _within_limits(engine, [], 'ETHUSDT', 'buy', limit)
+    assert after['beta_after'] == pytest.approx(1.0)
+
+
+def test_hedging_trade_allowed_beyond_same_side_limit():
+    engine = _engine()
+    book = [_long('BTCUSDT', 20000.0)]
+    same_side = engine.max_trade_notional(book, 'ETHUSDT', 'buy', EQUITY)
+    hedge = engine.max_trade_notional(book, 'ETHUSDT', 'sell', EQUITY)
+
+    assert 0 < same_side < hedge
+    _within_limits(engine, book, 'ETHUSDT', 'buy', same_side)
+    _within_limits(engine, book, 'ETHUSDT', 'sell', hedge)
+
+
+def test_book_over_limit_allows_nothing_more_on_same_side():
+    engine = _engine()
+    book = [_long('BTCUSDT', 60000.0)]
+    assert engine.max_trade_notional(book, 'BTCUSDT', 'buy', EQUITY) == 0.0
+    assert engine.max_trade_notional(book, 'BTCUSDT', 'sell', EQUITY) > 0.0
@@ -0,0 +1,86 @@
+"""
+Order-book impact cap carried from calculate_position_allocation through to the entry order size
+"""
+
+import asyncio
+import logging
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('dotenv')
+
+from config.config import TradingConfig
+from exchange.components.utils import ExchangeUtils
+from managers.position_manager import PositionManager
+from managers.risk_manager import RiskManager
+
+SYMBOL = 'BTCUSDT'
+PRICE = 50000.0
+
+
+class DepthEstimator:
+    """Impact estimator stand-in: fixed maximum notional within the slippage budget"""
+
+    def __init__(self, max_notional):
+        self.limit = max_notional
+
+    def max_notional(self, symbol, side, max_slippage_bps):
+        return self.limit
+
+
+class Execution:
+    async def choose_algo(self, symbol, side, amount):
+        return 'market'
+
+
+class SizingExchange:
+    """Exchange stand-in sizing orders with the real ExchangeUtils"""
+
+    def __init__(self):
+        self.utils = ExchangeUtils(None)
+        self.price_data = {SYMBOL: {'price': PRICE}}
+        self.execution = Execution()
+
+    async def calculate_position_size(self, symbol, position_value):
+        return await self.utils.calculate_position_size(symbol, position_value, self)
+
+
+def _risk_manager(config, max_notional):
+    risk_manager = RiskManager(config, None, impact_estimator=DepthEstimator(max_notional))
+    risk_manager.risk_state.loaded = True
+    return risk_manager
+
+
+def _position_manager(config, risk_manager):
+    manager = PositionManager.__new__(PositionManager)
+    manager.config = config
+    manager.logger = logging.getLogger('test')
+    manager.exchange = SizingExchange()
+    manager.risk_manager = risk_manager
+    manager._opening = set()
+    manager._atr_cache = {}
+    manager.book = type('Book', (), {'get_open': lambda self, symbol: []})()
+    return manager
+
+
+def test_impact_cap_bounds_the_order_notional_sent():
+    config = TradingConfig()
+    max_notional = 2000.0
+    risk_manager = _risk_manager(config, max_notional)
+
+    allocation = risk_manager.calculate_position_allocation(SYMBOL, 100000.0, [], 'buy')
+    leverage = config.LEVERAGE[SYMBOL]
+    # 할당은 증거금 - 명목가 한도를 레버리지로 나눈 값
+    assert allocation == pytest.approx(max_notional / leverage)
+
+    manager = _position_manager(config, risk_manager)
+    signal = {'direction': 'long', 'score': 0.9, 'confidence': 90}
+    entry = asyncio.run(manager._prepare_entry(SYMBOL, signal, allocation))
+
+    ratio = manager._calculate_position_size_ratio(SYMBOL, signal)
+    expected = max_notional * ratio * (1 - config.TAKER_FEE)
+    sent_notional = entry['contracts'] * PRICE
+    assert entry['position_value'] == pytest.approx(expected)
+    assert sent_notional <= max_notional
+    assert sent_notional == pytest.approx(expected, abs=PRICE * 0.001)
@@ -0,0 +1,103 @@
+"""
+Kelly window decay and eviction against a full rescan
+"""
+
+import random
+
+import pytest
+
+pytest.importorskip('dotenv')
+
+from config.config import TradingConfig
+from managers.kelly_tracker import KellyTracker, _SymbolKelly
+
+
+def _rescan(trades, decay):
+    """Reference stats: newest trade weight 1, each older one multiplied by decay"""
+    weights = [decay ** age for age in range(len(trades) - 1, -1, -1)]
+    total = sum(weights)
+    wins = sum(w for w, pnl in zip(weights, trades) if pnl > 0)
+    losses = sum(w for w, pnl in zip(weights, trades) if pnl < 0)
+    win_sum = sum(w * pnl for w, pnl in zip(weights, trades) if pnl > 0)
+    loss_sum = sum(w * -pnl for w, pnl in zip(weights, trades) if pnl < 0)
+    return {
+        'win_rate': wins / total if total else 0.0,
+        'avg_win': win_sum / wins if wins else 0.0,
+        'avg_loss': loss_sum / losses if losses else 0.0,
+        'sample_size': len(trades)
+    }
+
+
+@pytest.mark.parametrize('decay', [1.0, 0.95, 0.8])
+def test_incremental_sums_match_rescan_across_evictions(decay):
+    window = 10
+    state = _SymbolKelly(window, decay)
+    rng = random.Random(7)
+    history = []
+
+    for _ in range(window * 5):
+        pnl = rng.choice([0.0, rng.uniform(-3, -0.1), rng.uniform(0.1, 5)])
+        state.add(pnl)
+        history.append(pnl)
+
+        expected = _rescan(history[-window:], decay)
+        stats = state.stats()
+        assert stats['sample_size'] == expected['sample_size']
+        for key in ('win_rate', 'avg_win', 'avg_loss'):
+            assert stats[key] == pytest.approx(expected[key], abs=1e-9)
+
+
+def test_evicted_trade_leaves_no_residue():
+    state = _SymbolKelly(3, 0.9)
+    state.add(-2.0)
+    for _ in range(3):
+        state.add(1.0)
+
+    # 손실 거래가 윈도우 밖으로 밀려난 뒤 손실 합계는 0
+    assert state.losses == pytest.approx(0.0, abs=1e-12)
+    assert state.loss_sum == pytest.approx(0.0, abs=1e-12)
+    assert state.stats()['win_rate'] == pytest.approx(1.0)
+    assert state.stats()['avg_loss'] == 0.0
+
+
+def test_decay_favours_recent_trades():
+    flat, decayed = _SymbolKelly(4, 1.0), _SymbolKelly(4, 0.5)
+    for pnl in (-1.0, -1.0, 1.0, 1.0):
+        flat.add(pnl)
+        decayed.add(pnl)
+
+    assert flat.stats()['win_rate'] == pytest.approx(0.5)
+    # 가중치 1/8, 1/4 (손실) vs 1/2, 1 (수익)
+    assert decayed.stats()['win_rate'] == pytest.approx(1.5 / 1.875)
+
+
+def test_tracker_load_matches_record_sequence():
+    config = TradingConfig()
+    config.KELLY_WINDOW = 5
+    config.KELLY_DECAY = 0.9
+    config.MIN_TRADES_FOR_KELLY = 3
+    trades = [2.0, -1.0, 3.0, -1.5, 2.5, 1.0, -0.5]
+
+    recorded = KellyTracker(config)
+    for pnl in trades:
+        fraction = recorded.record('BTCUSDT', pnl)
+
+    loaded = KellyTracker(config)
+    loaded.load({'BTCUSDT': trades})
+
+    assert loaded.trades('BTCUSDT') == trades[-5:]
+    assert loaded.fraction('BTCUSDT') == pytest.approx(fraction)
+    assert loaded.get_status('BTCUSDT')['win_rate'] == pytest.approx(recorded.get_status('BTCUSDT')['win_rate'])
+
+
+def test_fraction_defaults_and_clamps():
+    config = TradingConfig()
+    config.MIN_TRADES_FOR_KELLY = 2
+    tracker = KellyTracker(config)
+
+    assert tracker.record('BTCUSDT', 1.0) == config.KELLY_DEFAULT_FRACTION
+    assert tracker.record('BTCUSDT', 1.0) == config.KELLY_MAX_FRACTION
+
+    for _ in range(2):
+        tracker.record('ETHUSDT', -1.0)
+    assert tracker.fraction('ETHUSDT') == 0.0
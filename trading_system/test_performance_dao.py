@@ -0,0 +1,46 @@
+"""
+Daily realized PnL from closed trades plus partial-close fills
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('cachetools')
+
+from database.dao.performance_dao import PerformanceDAO
+
+
+@pytest.fixture
+def dao(tmp_path):
+    path = str(tmp_path / 'perf.db')
+    with sqlite3.connect(path) as conn:
+        # trades 테이블은 TradeDAO 소유 - 집계에 쓰는 컬럼만 생성
+        conn.execute("CREATE TABLE trades (id INTEGER PRIMARY KEY, status TEXT, close_time DATETIME, pnl REAL)")
+    return PerformanceDAO(path)
+
+
+def _close_trade(dao, trade_id, pnl, when, status='closed'):
+    with dao._get_connection() as conn:
+        conn.execute("INSERT INTO trades (id, status, close_time, pnl) VALUES (?, ?, ?, ?)",
+                     (trade_id, status, when.strftime('%Y-%m-%d %H:%M:%S'), pnl))
+
+
+def test_partial_fills_count_on_their_own_day(dao):
+    now = datetime.now()
+    yesterday = now - timedelta(days=1)
+    today, prev = now.strftime('%Y-%m-%d'), yesterday.strftime('%Y-%m-%d')
+
+    # 어제 부분 익절, 오늘 잔량 청산
+    dao.save_realized_fill({'trade_id': 1, 'symbol': 'BTCUSDT', 'quantity': 0.5, 'price': 61000.0,
+                            'pnl': 150.0, 'reason': '익절1', 'timestamp': yesterday})
+    _close_trade(dao, 1, -50.0, now)
+    # 아직 열린 거래의 부분 익절도 실현 손익
+    dao.save_realized_fill({'trade_id': 2, 'symbol': 'ETHUSDT', 'quantity': 1.0, 'price': 3100.0,
+                            'pnl': 40.0, 'timestamp': now})
+    _close_trade(dao, 3, 999.0, now, status='open')
+
+    realized = dao.get_daily_realized_pnl((now - timedelta(days=6)).strftime('%Y-%m-%d'))
+    assert realized == {prev: pytest.approx(150.0), today: pytest.approx(-10.0)}
+    assert dao.get_daily_realized_pnl(today) == {today: pytest.approx(-10.0)}
@@ -0,0 +1,45 @@
+"""
+PrivateStreamManager snapshot tracking and position push mapping
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip('websockets')
+pytest.importorskip('dotenv')
+
+from config.config import TradingConfig
+from exchange.components.private_stream import PrivateStreamManager
+
+
+def _push(channel, action, data):
+    return {'action': action, 'arg': {'instType': 'USDT-FUTURES', 'channel': channel}, 'data': data}
+
+
+def _position(total, mark='60123.5'):
+    return {'instId': 'BTCUSDT', 'holdSide': 'long', 'total': str(total), 'openPriceAvg': '60000',
+            'markPrice': mark, 'unrealizedPL': '12.3', 'leverage': '10', 'marginMode': 'crossed'}
+
+
+def test_only_snapshot_pushes_mark_channel_complete():
+    stream = PrivateStreamManager(TradingConfig(), None)
+
+    asyncio.run(stream._handle_message(_push('positions', 'update', [_position(0.01)])))
+    assert 'positions' not in stream.snapshots
+
+    asyncio.run(stream._handle_message(_push('positions', 'snapshot', [_position(0.02)])))
+    assert 'positions' in stream.snapshots
+
+
+def test_position_push_carries_mark_price():
+    stream = PrivateStreamManager(TradingConfig(), None)
+    asyncio.run(stream._handle_message(_push('positions', 'snapshot', [_position(0.02)])))
+
+    position = stream.get_positions()[0]
+    assert position['contracts'] == 0.02
+    assert position['markPrice'] == 60123.5
+    assert position['entryPrice'] == 60000.0
+
+    asyncio.run(stream._handle_message(_push('positions', 'update', [_position(0.02, mark='')])))
+    assert stream.get_positions()[0]['markPrice'] is None
@@ -0,0 +1,136 @@
+"""
+Reconciliation confirmation streaks and missing-position close routing
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip('dotenv')
+
+from config.config import TradingConfig
+from managers.position_book import PositionBook
+from managers.reconciliation_service import ReconciliationService
+
+
+class EventLog:
+    """DB stand-in recording system events only"""
+
+    def __init__(self):
+        self.events = []
+
+    def log_system_event(self, level, component, message, details=None):
+        self.events.append((level, component, message, details))
+
+
+def _service(confirmations=2):
+    config = TradingConfig()
+    config.RECONCILE_CONFIRMATIONS = confirmations
+    db = EventLog()
+    book = PositionBook(config, db)
+    book.add({'id': 1, 'symbol': 'BTCUSDT', 'side': 'buy', 'quantity': 0.01, 'entry_price': 60000})
+    book.add({'id': 2, 'symbol': 'ETHUSDT', 'side': 'sell', 'quantity': 0.5, 'entry_price': 3000})
+    return ReconciliationService(config, None, book, db), book
+
+
+LIVE_BOTH = {('BTCUSDT', 'long'): {'contracts': 0.01}, ('ETHUSDT', 'short'): {'contracts': 0.5}}
+LIVE_ETH = {('ETHUSDT', 'short'): {'contracts': 0.5}}
+
+
+def test_missing_position_closed_only_after_confirmations():
+    service, book = _service(confirmations=3)
+
+    for streak in (1, 2):
+        diff = asyncio.run(service._reconcile(LIVE_ETH, []))
+        assert diff['closed_missing'] == []
+        assert service._missing_streak == {1: streak}
+        assert book.get(1) is not None
+
+    diff = asyncio.run(service._reconcile(LIVE_ETH, []))
+    assert diff['closed_missing'] == [1]
+    assert book.get(1) is None
+    assert book.get(2) is not None
+    assert service._missing_streak == {}
+
+
+def test_streak_resets_when_position_reappears():
+    service, book = _service(confirmations=2)
+
+    asyncio.run(service._reconcile(LIVE_ETH, []))
+    assert service._missing_streak == {1: 1}
+
+    asyncio.run(service._reconcile(LIVE_BOTH, []))
+    assert service._missing_streak == {}
+
+    diff = asyncio.run(service._reconcile(LIVE_ETH, []))
+    assert diff['closed_missing'] == []
+    assert book.get(1) is not None
+
+
+def test_confirmed_close_goes_through_close_handler():
+    service, book = _service(confirmations=1)
+    handled = []
+
+    async def close_handler(position):
+        handled.append(position['id'])
+        book.close(position['id'], {'current_price': 61000})
+
+    service.close_handler = close_handler
+    diff = asyncio.run(service._reconcile(LIVE_ETH, []))
+
+    assert handled == [1]
+    assert diff['closed_missing'] == [1]
+    assert book._dirty[1] == {'current_price': 61000, 'status': 'closed'}
+
+
+def test_failed_close_handler_still_drops_book_entry():
+    service, book = _service(confirmations=1)
+
+    async def close_handler(position):
+        raise RuntimeError('fetch_my_trades down')
+
+    service.close_handler = close_handler
+    asyncio.run(service._reconcile(LIVE_ETH, []))
+    assert book.get(1) is None
+
+
+def test_quantity_fixed_from_exchange():
+    service, book = _service()
+    live = {**LIVE_BOTH, ('BTCUSDT', 'long'): {'contracts': 0.02}}
+
+    diff = asyncio.run(service._reconcile(live, []))
+    assert diff['quantity_fixed'] == [1]
+    assert book.get(1)['quantity'] == 0.02
+
+
+def test_book_changes_fold_in_without_notifying_listeners():
+    service, book = _service(confirmations=1)
+    seen = []
+    service.add_listener(lambda snapshot: seen.append(snapshot.diff))
+
+    asyncio.run(service._reconcile(LIVE_BOTH, []))
+    service.publish()
+    assert len(seen) == 1
+
+    # 평가손익 갱신 등 북 변경은 스냅샷에 반영되지만 리스너는 호출되지 않음
+    book.update(2, {'current_price': 2950})
+    snapshot = service.get_snapshot()
+    assert snapshot.book_version == book.version
+    assert {p['id']: p.get('current_price') for p in snapshot.positions}[2] == 2950
+    assert len(seen) == 1
+
+
+def test_closed_missing_diff_not_consumed_by_reads():
+    service, book = _service(confirmations=1)
+    seen = []
+    service.add_listener(lambda snapshot: seen.append(snapshot.diff))
+
+    service._last_diff = asyncio.run(service._reconcile(LIVE_ETH, []))
+    book.update(2, {'current_price': 2950})
+    service.get_snapshot()
+    snapshot = service.publish()
+
+    assert seen[-1]['closed_missing'] == [1]
+    assert snapshot.diff['closed_missing'] == [1]
+    book.update(2, {'current_price': 2900})
+    assert service.get_snapshot().diff['closed_missing'] == [1]
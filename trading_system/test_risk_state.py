@@ -0,0 +1,159 @@
+"""
+RiskState day rollover and DB cross-check
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('dotenv')
+
+from config.config import TradingConfig
+from managers.risk_state import RiskState
+
+
+class TradesDB:
+    """DB stand-in serving realized PnL per day and per-symbol trade counts"""
+
+    def __init__(self):
+        self.realized = {}
+        self.trades = {}
+
+    def get_daily_realized_pnl(self, since):
+        return {day: pnl for day, pnl in self.realized.items() if day >= since}
+
+    def save_realized_fill(self, **fill):
+        day = _today()
+        self.realized[day] = self.realized.get(day, 0.0) + fill['pnl']
+
+    def get_symbol_trades_today(self, symbol):
+        return self.trades.get(symbol, {'total': 0, 'losses': 0})
+
+    def get_open_positions(self):
+        return []
+
+    def get_kelly_windows(self, window):
+        return {}
+
+
+def _today():
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+def test_rollover_starts_new_day_bucket():
+    state = RiskState(TradingConfig(), TradesDB())
+    yesterday = datetime.now() - timedelta(days=1)
+
+    state.equity = 10000.0
+    state._roll(yesterday)
+    state.on_open('BTCUSDT', 'buy', when=yesterday)
+    state._add_pnl(-200.0)
+    assert state.trades_today == {'BTCUSDT': 1}
+
+    state.equity = 9800.0
+    assert state.daily_pnl == 0.0
+    assert state.trades_today == {}
+    assert state.day_start_equity == 9800.0
+    assert state.weekly_pnl == pytest.approx(-0.02)
+
+    state.on_close('BTCUSDT', 'buy', -98.0)
+    assert state.daily_pnl == pytest.approx(-0.01)
+    assert state.weekly_pnl == pytest.approx(-0.03)
+    assert state.losses_today == {'BTCUSDT': 1}
+    assert state.open_counts['BTCUSDT'] == 0
+    assert state.open_directions['long'] == 0
+
+
+def test_drawdown_follows_equity_peak():
+    state = RiskState(TradingConfig(), TradesDB())
+    state.on_equity(10000.0)
+    state.on_equity(12000.0)
+    state.on_equity(9000.0)
+    assert state.peak_equity == 12000.0
+    assert state.drawdown == pytest.approx(0.25)
+    assert state.day_start_equity == 10000.0
+
+
+def test_cross_check_compares_usdt_pnl_on_same_equity():
+    db = TradesDB()
+    db.realized[_today()] = -100.0
+    state = RiskState(TradingConfig(), db)
+    state.on_equity(10000.0)
+    state.load()
+    assert state.daily_pnl == pytest.approx(-0.01)
+
+    # 메모리와 DB가 같은 청산을 기록 - 불일치 없음
+    state.on_open('BTCUSDT', 'buy')
+    state.on_close('BTCUSDT', 'buy', -100.0)
+    db.realized[_today()] = -200.0
+    db.trades['BTCUSDT'] = {'total': 1, 'losses': 1}
+    assert asyncio.run(state.cross_check()) == 0
+    assert state.daily_pnl == pytest.approx(-0.02)
+
+
+def test_cross_check_adopts_more_conservative_side():
+    db = TradesDB()
+    state = RiskState(TradingConfig(), db)
+    state.on_equity(10000.0)
+    state.load()
+
+    # 메모리가 놓친 청산 손실 + 거래 수
+    db.realized[_today()] = -300.0
+    db.trades['ETHUSDT'] = {'total': 2, 'losses': 1}
+    drift = asyncio.run(state.cross_check())
+
+    assert drift == 3
+    assert state.daily_pnl == pytest.approx(-0.03)
+    assert state.trades_today['ETHUSDT'] == 2
+    assert state.losses_today['ETHUSDT'] == 1
+
+    # 메모리가 더 나쁜 경우 메모리 값 유지
+    state.on_close('ETHUSDT', 'sell', -200.0)
+    asyncio.run(state.cross_check())
+    assert state.daily_pnl == pytest.approx(-0.05)
+
+
+class ReduceOnlyExchange:
+    """Exchange stand-in accepting reduce-only partial closes"""
+
+    async def place_order(self, symbol, side, amount, order_type='market', price=None, params=None):
+        return {'id': 'close-1', 'filled': amount}
+
+
+def test_partial_close_then_cross_check_has_no_drift():
+    pytest.importorskip('numpy')
+    from managers.position_book import PositionBook
+    from managers.position_manager import PositionManager
+
+    config = TradingConfig()
+    db = TradesDB()
+    state = RiskState(config, db)
+    state.on_equity(10000.0)
+    state.load()
+
+    manager = PositionManager.__new__(PositionManager)
+    manager.config, manager.db, manager.risk_state = config, db, state
+    manager.logger = logging.getLogger('test')
+    manager.exchange = ReduceOnlyExchange()
+    manager.book = PositionBook(config, db)
+    position = {'id': 1, 'trade_id': 1, 'symbol': 'BTCUSDT', 'side': 'long', 'entry_price': 60000.0, 'quantity': 0.1}
+    manager.book.add(dict(position))
+    state.on_open('BTCUSDT', 'buy')
+    db.trades['BTCUSDT'] = {'total': 1, 'losses': 0}
+
+    # 부분 익절: 메모리(on_fill)와 DB(realized_fills)에 같은 손익
+    asyncio.run(manager._close_partial_position(position, 0.05, '익절1', 61200.0))
+    partial = db.realized[_today()]
+    assert partial > 0
+    assert asyncio.run(state.cross_check()) == 0
+
+    # 잔량 청산은 trades.pnl로 기록
+    state.on_close('BTCUSDT', 'buy', -20.0)
+    db.realized[_today()] += -20.0
+    db.trades['BTCUSDT'] = {'total': 1, 'losses': 1}
+
+    assert asyncio.run(state.cross_check()) == 0
+    assert state.daily_pnl == pytest.approx((partial - 20.0) / 10000.0)
+    assert state.weekly_pnl == pytest.approx(state.daily_pnl)
@@ -0,0 +1,96 @@
+"""
+Tick trigger levels and directions for long/short positions
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('dotenv')
+
+from config.config import TradingConfig
+from managers.tick_risk_evaluator import TickRiskEvaluator
+
+
+class RecordingManager:
+    """Position manager stand-in: records evaluations, book keeps the positions"""
+
+    def __init__(self):
+        self.evaluated = []
+        self.book = self
+        self.positions = {}
+
+    def get(self, position_id):
+        return self.positions.get(position_id)
+
+    async def _manage_single_position(self, position, current_price=None):
+        self.evaluated.append((position['id'], current_price))
+
+
+def _position(side, stop_loss, take_profit, **extra):
+    return {'id': 1, 'symbol': 'BTCUSDT', 'side': side, 'entry_price': 100.0, 'quantity': 1.0,
+            'stop_loss': stop_loss, 'take_profit': json.dumps(take_profit), **extra}
+
+
+def _levels(position):
+    evaluator = TickRiskEvaluator(TradingConfig(), RecordingManager())
+    return {kind: (round(level, 6), direction) for level, kind, direction in evaluator._trigger_levels(position)}
+
+
+def test_long_levels_and_directions():
+    levels = _levels(_position('buy', 98.0, [{'price': 103.0, 'size': 0.5}]))
+    assert levels['stop_loss'] == (98.0, 'below')
+    assert levels['early_cut'] == (pytest.approx(100 * (1 - (0.01 * 0.7 - 0.0012))), 'below')
+    assert levels['trailing_activate'] == (pytest.approx(100 * (1 + 0.01 + 0.0012)), 'above')
+    assert levels['take_profit'] == (103.0, 'above')
+
+
+def test_short_levels_mirror_long():
+    levels = _levels(_position('sell', 102.0, [{'price': 97.0, 'size': 0.5}]))
+    assert levels['stop_loss'] == (102.0, 'above')
+    assert levels['early_cut'] == (pytest.approx(100 * (1 + (0.01 * 0.7 - 0.0012))), 'above')
+    assert levels['trailing_activate'] == (pytest.approx(100 * (1 - 0.01 - 0.0012)), 'below')
+    assert levels['take_profit'] == (97.0, 'below')
+
+
+def test_trailing_ratchet_replaces_activation():
+    levels = _levels(_position('long', 99.5, [], trailing_stop_active=True, trailing_stop_price=99.5))
+    assert 'trailing_activate' not in levels
+    assert levels['trailing_ratchet'] == (pytest.approx(99.5 / (1 - 0.005)), 'above')
+
+
+def test_executed_and_exchange_levels_not_armed():
+    take_profit = [{'price': 102.0, 'size': 0.5, 'executed': True},
+                   {'price': 104.0, 'size': 1.0, 'exchange': True}]
+    levels = _levels(_position('buy', 98.0, take_profit, attached_tpsl=True))
+    assert 'take_profit' not in levels
+    assert 'stop_loss' not in levels
+
+
+def test_tick_evaluates_only_crossed_positions():
+    async def run():
+        manager = RecordingManager()
+        evaluator = TickRiskEvaluator(TradingConfig(), manager, min_reeval_interval=0.0)
+        evaluator.running = True
+        long_position = _position('buy', 98.0, [])
+        short_position = {**_position('sell', 102.0, []), 'id': 2}
+        manager.positions = {1: long_position, 2: short_position}
+        evaluator.sync([long_position, short_position])
+
+        evaluator.on_tick('BTCUSDT', 100.0)
+        await asyncio.sleep(0)
+        assert manager.evaluated == []
+
+        # 하락: 롱 손절/조기손절과 숏 추적손절 활성화 레벨을 동시에 통과
+        evaluator.on_tick('BTCUSDT', 97.0)
+        await asyncio.sleep(0.01)
+        assert sorted(manager.evaluated) == [(1, 97.0), (2, 97.0)]
+
+        # 평가 후 재무장되므로 같은 가격에서 다시 평가
+        manager.evaluated.clear()
+        evaluator.on_tick('BTCUSDT', 97.0)
+        await asyncio.sleep(0.01)
+        assert sorted(manager.evaluated) == [(1, 97.0), (2, 97.0)]
+
+    asyncio.run(run())
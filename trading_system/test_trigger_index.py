@@ -0,0 +1,98 @@
+"""
+TriggerIndex crossing directions, moves and lazy deletion
+"""
+
+from utils.trigger_index import Trigger, TriggerIndex
+
+SYMBOL = 'BTCUSDT'
+
+
+def _index(*specs):
+    index = TriggerIndex()
+    for trigger_id, level, direction in specs:
+        index.add(Trigger(trigger_id, SYMBOL, trigger_id // 10, 'stop_loss', level, direction))
+    return index
+
+
+def _ids(triggers):
+    return sorted(t.trigger_id for t in triggers)
+
+
+def test_below_fires_at_or_under_level():
+    index = _index((1, 100.0, 'below'))
+    assert index.pop_crossed(SYMBOL, 100.5) == []
+    assert _ids(index.pop_crossed(SYMBOL, 100.0)) == [1]
+    assert len(index) == 0
+
+
+def test_above_fires_at_or_over_level():
+    index = _index((1, 110.0, 'above'))
+    assert index.pop_crossed(SYMBOL, 109.9) == []
+    assert _ids(index.pop_crossed(SYMBOL, 111.0)) == [1]
+
+
+def test_gap_pops_every_crossed_level_once():
+    index = _index((1, 99.0, 'below'), (2, 98.0, 'below'), (3, 95.0, 'below'), (4, 110.0, 'above'))
+    assert _ids(index.pop_crossed(SYMBOL, 97.5)) == [1, 2]
+    assert index.pop_crossed(SYMBOL, 97.5) == []
+    assert _ids(index.pop_crossed(SYMBOL, 120.0)) == [4]
+    assert len(index) == 1
+
+
+def test_other_symbol_untouched():
+    index = _index((1, 100.0, 'below'))
+    assert index.pop_crossed('ETHUSDT', 1.0) == []
+    assert len(index) == 1
+
+
+def test_move_retires_old_level():
+    index = _index((1, 100.0, 'below'))
+    assert index.move(1, 105.0)
+    assert _ids(index.pop_crossed(SYMBOL, 104.0)) == [1]
+
+    index = _index((1, 100.0, 'below'))
+    index.move(1, 95.0)
+    assert index.pop_crossed(SYMBOL, 99.0) == []
+    assert _ids(index.pop_crossed(SYMBOL, 95.0)) == [1]
+    assert not index.move(99, 1.0)
+
+
+def test_readd_replaces_level():
+    index = _index((1, 100.0, 'below'))
+    index.add(Trigger(1, SYMBOL, 0, 'stop_loss', 90.0, 'below'))
+    assert index.pop_crossed(SYMBOL, 95.0) == []
+    assert _ids(index.pop_crossed(SYMBOL, 90.0)) == [1]
+
+
+def test_remove_and_replace_position():
+    index = _index((10, 100.0, 'below'), (11, 110.0, 'above'), (20, 99.0, 'below'))
+    index.remove(11)
+    assert index.pop_crossed(SYMBOL, 120.0) == []
+
+    index.replace_position(1, [Trigger(12, SYMBOL, 1, 'take_profit', 105.0, 'above')])
+    assert _ids(index.triggers_for(1)) == [12]
+    assert _ids(index.pop_crossed(SYMBOL, 99.0)) == [20]
+    assert _ids(index.pop_crossed(SYMBOL, 105.0)) == [12]
+
+    index.remove_position(2)
+    assert len(index) == 0
+
+
+def test_nearest_skips_stale_entries():
+    index = _index((1, 100.0, 'below'), (2, 98.0, 'below'), (3, 110.0, 'above'), (4, 112.0, 'above'))
+    index.remove(1)
+    index.move(3, 115.0)
+    assert index.nearest(SYMBOL) == (98.0, 112.0)
+    assert index.nearest('ETHUSDT') == (None, None)
+
+
+def test_compaction_bounds_stale_entries():
+    index = TriggerIndex()
+    for i in range(500):
+        index.add(Trigger(i, SYMBOL, i, 'stop_loss', 100.0 - i * 0.01, 'below'))
+    for i in range(450):
+        index.remove(i)
+
+    heaps = index._heaps[SYMBOL]
+    assert len(heaps.below) <= len(index) + max(64, len(index))
+    assert _ids(index.pop_crossed(SYMBOL, 0.0)) == list(range(450, 500))
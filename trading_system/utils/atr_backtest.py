@@ -3,9 +3,16 @@ ATR 기반 손절/익절 백테스팅 시스템
 고정 % vs ATR 기반 시스템 성과 비교
 """
 
+import hashlib
+import json
+import math
+import os
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
 import logging
 from datetime import datetime, timedelta
 
@@ -369,4 +376,355 @@ def run_atr_backtest(historical_data: pd.DataFrame, config: TradingConfig,
                     symbol: str = 'BTCUSDT') -> Dict:
     """ATR 백테스트 실행 래퍼"""
     backtester = ATRBacktester(config)
-    return backtester.backtest_atr_stops(historical_data, symbol)
\ No newline at end of file
+    return backtester.backtest_atr_stops(historical_data, symbol)
+
+
+# ---------------------------------------------------------------------------
+# ATR 배수 그리드 최적화 (워커 프로세스 + 공유 메모리 + successive halving)
+# ---------------------------------------------------------------------------
+
+# MarketRegimeAnalyzer 체제명 - 공유 행렬에는 인덱스(코드)로 저장
+REGIMES = ('trending_up', 'trending_down', 'ranging', 'volatile')
+
+# 공유 메모리 행렬의 행 순서 (atr/진입/regime은 진입 봉 기준 직전 봉까지의 값)
+MATRIX_ROWS = ('close', 'high', 'low', 'atr', 'long_entry', 'short_entry', 'regime')
+
+# 방향별로 따로 시뮬레이션해 테이블도 방향별로 저장 (하락 추세 배수는 주로 숏에 쓰임)
+SIDES = ('long', 'short')
+
+WARMUP_BARS = 50
+
+# 워커 프로세스별 공유 메모리 연결 (작업마다 배열을 pickle하지 않고 이름으로 한 번만 연결)
+_attached: Dict[str, Tuple[shared_memory.SharedMemory, np.ndarray]] = {}
+
+
+def _attach(name: str, shape: Tuple[int, int]) -> np.ndarray:
+    if name not in _attached:
+        block = shared_memory.SharedMemory(name=name)
+        _attached[name] = (block, np.ndarray(shape, dtype=np.float64, buffer=block.buf))
+    return _attached[name][1]
+
+
+def _simulate(data: np.ndarray, start: int, stop_mult: float, profit_mult: float,
+              limits: Tuple[float, float, float, float], side: str = 'long') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    한 방향 ATR 손절/익절 시뮬레이션 (ATRCalculator.calculate_dynamic_stops와 같은 손절/익절 거리)
+    
+    Returns:
+        (거래별 레버리지 수익률, 진입 체제 코드)
+    """
+    close, high, low, atr, long_entry, short_entry, regime = data
+    min_stop, max_stop, leverage_factor, leverage = limits
+    is_long = side == 'long'
+    sign = 1.0 if is_long else -1.0
+    entry = long_entry if is_long else short_entry
+    candidates = np.flatnonzero(entry[start:] > 0) + start
+    returns, regimes = [], []
+    
+    cursor = 0
+    while cursor < len(candidates):
+        i = candidates[cursor]
+        price = close[i]
+        stop_distance = min(max(atr[i] * stop_mult, price * min_stop), price * max_stop) * leverage_factor
+        stop_loss, take_profit = price - sign * stop_distance, price + sign * atr[i] * profit_mult
+        
+        if is_long:
+            hit_stop, hit_profit = low[i + 1:] <= stop_loss, high[i + 1:] >= take_profit
+        else:
+            hit_stop, hit_profit = high[i + 1:] >= stop_loss, low[i + 1:] <= take_profit
+        hits = np.flatnonzero(hit_stop | hit_profit)
+        if not len(hits):
+            break  # 기간 끝까지 미청산
+        
+        # 같은 봉에서 둘 다 닿으면 손절 우선 (보수적)
+        exit_price = stop_loss if hit_stop[hits[0]] else take_profit
+        returns.append(sign * (exit_price - price) / price * leverage)
+        regimes.append(regime[i])
+        cursor = np.searchsorted(candidates, i + 1 + hits[0], side='right')
+    
+    return np.asarray(returns, dtype=float), np.asarray(regimes, dtype=float)
+
+
+def _evaluate_chunk(name: str, shape: Tuple[int, int], start: int,
+                    limits: Tuple[float, float, float, float],
+                    grid: List[Tuple[float, float]]) -> List[Tuple[Tuple[float, float], Dict]]:
+    """워커 작업: 배수 조합 묶음을 평가해 방향/체제별 (거래 수, 평균, 표준편차) 반환"""
+    data = _attach(name, shape)
+    results = []
+    for stop_mult, profit_mult in grid:
+        by_side = {}
+        for side in SIDES:
+            returns, regimes = _simulate(data, start, stop_mult, profit_mult, limits, side)
+            buckets = {'all': returns}
+            for code, regime in enumerate(REGIMES):
+                buckets[regime] = returns[regimes == code]
+            by_side[side] = {
+                bucket: (len(values), float(values.mean()) if len(values) else 0.0,
+                         float(values.std()) if len(values) else 0.0)
+                for bucket, values in buckets.items()
+            }
+        results.append(((stop_mult, profit_mult), by_side))
+    return results
+
+
+class ATRStopOptimizer:
+    """
+    심볼/방향/체제별 ATR 손절·익절 배수 그리드 최적화
+    
+    - 심볼별 가격/ATR/진입/체제 배열은 공유 메모리에 한 번만 올리고 워커는 이름으로 연결
+    - 평가 결과는 (데이터 지문, 구간, 배수, 한도) 해시로 캐시
+    - successive halving: 최근 일부 구간으로 전체 그리드를 평가하고 상위 1/eta만 더 긴 구간으로 재평가
+    - 결과는 ATR_MULTIPLIER_TABLE_PATH 테이블로 저장되어 ATRCalculator가 시작 시 로드
+    """
+    
+    def __init__(self, config: TradingConfig):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.atr_calculator = ATRCalculator(config)
+        self._cache: Dict[str, Dict[str, Tuple[int, float, float]]] = {}
+        self.stats = {'evaluated': 0, 'cache_hits': 0}
+    
+    # ------------------------------------------------------------------ data
+    
+    @staticmethod
+    def _label_regimes(close: np.ndarray, atr: np.ndarray) -> np.ndarray:
+        """봉별 체제 코드 - MarketRegimeAnalyzer의 EMA 정렬/변동성 판정을 단순화한 벡터 근사"""
+        ema_fast = pd.Series(close).ewm(span=20, adjust=False).mean().to_numpy()
+        ema_slow = pd.Series(close).ewm(span=50, adjust=False).mean().to_numpy()
+        atr_pct = atr / close
+        reference = pd.Series(atr_pct).rolling(100, min_periods=20).median().to_numpy()
+        
+        codes = np.full(len(close), REGIMES.index('ranging'), dtype=float)
+        codes[(ema_fast > ema_slow) & (close > ema_fast)] = REGIMES.index('trending_up')
+        codes[(ema_fast < ema_slow) & (close < ema_fast)] = REGIMES.index('trending_down')
+        codes[atr_pct > 1.5 * reference] = REGIMES.index('volatile')
+        return codes
+    
+    def _prepare(self, symbol: str, df: pd.DataFrame) -> np.ndarray:
+        """MATRIX_ROWS 순서의 (7 × 봉) 행렬 - 배수와 무관한 계산은 여기서 한 번만"""
+        period = int(self.config.ATR_SETTINGS[symbol]['period'])
+        high, low, close = self.atr_calculator.to_arrays(df)
+        atr = pd.Series(self.atr_calculator.true_range(high, low, close)).rolling(
+            period, min_periods=period).mean().to_numpy()
+        
+        # 롱 RSI(14) < 30 (ATRBacktester._generate_entry_signal과 같은 단순 이동평균 RSI), 숏은 대칭인 > 70
+        delta = np.diff(close, prepend=np.nan)
+        gain = pd.Series(np.where(delta > 0, delta, 0.0)).rolling(14).mean()
+        loss = pd.Series(np.where(delta < 0, -delta, 0.0)).rolling(14).mean()
+        rsi = (100 - 100 / (1 + gain / loss)).to_numpy()
+        
+        def lagged(values: np.ndarray) -> np.ndarray:
+            return np.concatenate(([np.nan], values[:-1]))
+        
+        atr_prev, rsi_prev = lagged(atr), lagged(rsi)
+        long_entry = ((rsi_prev < 30) & (atr_prev > 0)).astype(float)
+        short_entry = ((rsi_prev > 70) & (atr_prev > 0)).astype(float)
+        return np.vstack([close, high, low, atr_prev, long_entry, short_entry,
+                          lagged(self._label_regimes(close, atr))])
+    
+    def _limits(self, symbol: str) -> Tuple[float, float, float, float]:
+        """ATRCalculator.calculate_dynamic_stops와 같은 손절 거리 한도와 레버리지 보정"""
+        settings = self.config.ATR_SETTINGS[symbol]
+        leverage = self.config.LEVERAGE.get(symbol, 10)
+        return (settings['min_stop_distance'], settings['max_stop_distance'],
+                min(1.0, 10.0 / leverage), float(leverage))
+    
+    # ------------------------------------------------------------------ search
+    
+    @staticmethod
+    def _score(stats: Tuple[int, float, float], min_trades: int) -> float:
+        """거래 수익률의 t-통계량 (평균 / 표준편차 × √거래수)"""
+        trades, mean, std = stats
+        if trades < max(min_trades, 2):
+            return float('-inf')
+        return mean / max(std, 1e-9) * math.sqrt(trades)
+    
+    @staticmethod
+    def _cache_key(fingerprint: str, start: int, pair: Tuple[float, float], limits: Tuple) -> str:
+        return hashlib.sha1(repr((fingerprint, start, pair, limits)).encode()).hexdigest()
+    
+    def _start_bar(self, bars: int, rung: int) -> int:
+        """단계별 평가 시작 봉 - 마지막 단계는 전체, 이전 단계는 최근 1/eta^k 구간"""
+        remaining = self.config.ATR_OPT_RUNGS - 1 - rung
+        budget = int((bars - WARMUP_BARS) / self.config.ATR_OPT_ETA ** remaining)
+        return max(WARMUP_BARS, bars - budget)
+    
+    def _run_rung(self, pool: ProcessPoolExecutor, states: Dict[str, Dict], rung: int, workers: int):
+        """한 단계의 남은 조합을 전 심볼에 걸쳐 워커로 분배 (캐시 적중은 건너뜀)"""
+        futures = []
+        for symbol, state in states.items():
+            start = self._start_bar(state['shape'][1], rung)
+            state['start'], state['results'] = start, {}
+            pending = []
+            for pair in state['grid']:
+                cached = self._cache.get(self._cache_key(state['fingerprint'], start, pair, state['limits']))
+                if cached is not None:
+                    state['results'][pair] = cached
+                    self.stats['cache_hits'] += 1
+                else:
+                    pending.append(pair)
+            
+            chunk = max(1, math.ceil(len(pending) / workers))
+            for offset in range(0, len(pending), chunk):
+                futures.append((symbol, pool.submit(
+                    _evaluate_chunk, state['block'].name, state['shape'], start,
+                    state['limits'], pending[offset:offset + chunk]
+                )))
+        
+        for symbol, future in futures:
+            state = states[symbol]
+            for pair, stats in future.result():
+                self._cache[self._cache_key(state['fingerprint'], state['start'], pair, state['limits'])] = stats
+                state['results'][pair] = stats
+                self.stats['evaluated'] += 1
+    
+    def _halve(self, state: Dict) -> List[Tuple[float, float]]:
+        """방향/체제별(전체 포함) 상위 1/eta의 합집합만 다음 단계로"""
+        grid, results = state['grid'], state['results']
+        keep = max(1, math.ceil(len(grid) / self.config.ATR_OPT_ETA))
+        survivors = set()
+        for side, bucket in product(SIDES, ('all',) + REGIMES):
+            ranked = sorted(grid, key=lambda pair: self._score(results[pair][side][bucket], 2), reverse=True)
+            survivors.update(ranked[:keep])
+        return [pair for pair in grid if pair in survivors]
+    
+    def _table_entry(self, symbol: str, state: Dict) -> Dict[str, Dict[str, Dict]]:
+        """최종 단계(전체 기간) 결과에서 방향/체제별 최적 배수 - 최소 거래 수 미달 체제는 제외"""
+        entry = {}
+        for side in SIDES:
+            side_entry = {}
+            for bucket in ('all',) + REGIMES:
+                scored = [(self._score(stats[side][bucket], self.config.ATR_OPT_MIN_TRADES), pair, stats[side][bucket])
+                          for pair, stats in state['results'].items()]
+                if not scored:
+                    continue
+                score, (stop_mult, profit_mult), (trades, mean, _) = max(scored)
+                if not np.isfinite(score):
+                    continue
+                side_entry[bucket] = {
+                    'stop_multiplier': stop_mult,
+                    'profit_multiplier': profit_mult,
+                    'score': round(score, 4),
+                    'trades': trades,
+                    'avg_return': round(mean, 6)
+                }
+            
+            if 'all' not in side_entry:
+                self.logger.warning(f"⚠️ {symbol} {side} 최적화 거래 수 부족 - 기본 ATR 배수 유지")
+            entry[side] = side_entry
+        return entry
+    
+    def optimize(self, historical_data: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, Dict]]:
+        """
+        심볼별 OHLCV로 ATR 배수 테이블 생성 (워커 프로세스 풀을 동기적으로 돌리므로 이벤트 루프에서 호출 금지)
+        
+        Args:
+            historical_data: {심볼: OHLCV DataFrame}
+            
+        Returns:
+            Dict: {심볼: {'long' | 'short': {'all' | 체제명: {'stop_multiplier', 'profit_multiplier',
+                   'score', 'trades', 'avg_return'}}}}
+        """
+        states: Dict[str, Dict] = {}
+        try:
+            for symbol, df in historical_data.items():
+                if symbol not in self.config.ATR_SETTINGS or len(df) < WARMUP_BARS * 2:
+                    self.logger.warning(f"⚠️ {symbol} ATR 최적화 건너뜀 (설정 없음 또는 데이터 부족)")
+                    continue
+                matrix = self._prepare(symbol, df)
+                block = shared_memory.SharedMemory(create=True, size=matrix.nbytes)
+                np.ndarray(matrix.shape, dtype=np.float64, buffer=block.buf)[:] = matrix
+                states[symbol] = {
+                    'block': block,
+                    'shape': matrix.shape,
+                    'fingerprint': hashlib.sha1(matrix.tobytes()).hexdigest(),
+                    'limits': self._limits(symbol),
+                    'grid': list(product(self.config.ATR_OPT_STOP_GRID, self.config.ATR_OPT_PROFIT_GRID))
+                }
+            if not states:
+                return {}
+            
+            workers = self.config.ATR_OPT_WORKERS or os.cpu_count() or 1
+            self.logger.info(
+                f"🔍 ATR 배수 최적화 시작: {', '.join(states)} "
+                f"({len(next(iter(states.values()))['grid'])}개 조합, 워커 {workers}개)"
+            )
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for rung in range(self.config.ATR_OPT_RUNGS):
+                    self._run_rung(pool, states, rung, workers)
+                    if rung < self.config.ATR_OPT_RUNGS - 1:
+                        for state in states.values():
+                            state['grid'] = self._halve(state)
+            
+            table = {symbol: self._table_entry(symbol, state) for symbol, state in states.items()}
+            self.logger.info(
+                f"✅ ATR 배수 최적화 완료: 평가 {self.stats['evaluated']}회, 캐시 적중 {self.stats['cache_hits']}회"
+            )
+            return table
+            
+        finally:
+            for state in states.values():
+                state['block'].close()
+                state['block'].unlink()
+    
+    def save_table(self, table: Dict[str, Dict[str, Dict]], path: Optional[str] = None) -> str:
+        """ATRCalculator가 시작 시 읽는 배수 테이블 저장"""
+        path = path or self.config.ATR_MULTIPLIER_TABLE_PATH
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'generated_at': datetime.now().isoformat(), 'symbols': table}, f, indent=2)
+        self.logger.info(f"💾 ATR 배수 테이블 저장: {path}")
+        return path
+
+
+def run_atr_optimization(historical_data: Dict[str, pd.DataFrame], config: TradingConfig,
+                         save: bool = True, path: Optional[str] = None) -> Dict[str, Dict[str, Dict]]:
+    """ATR 배수 최적화 실행 래퍼"""
+    optimizer = ATRStopOptimizer(config)
+    table = optimizer.optimize(historical_data)
+    if save and table:
+        optimizer.save_table(table, path)
+    return table
+
+
+def _load_history(path: str) -> pd.DataFrame:
+    """BackfillManager .npz 또는 OHLCV CSV (첫 열 타임스탬프)"""
+    if path.endswith('.npz'):
+        try:
+            from ..exchange.components.backfill_manager import load_candles
+        except ImportError:
+            from exchange.components.backfill_manager import load_candles
+        return load_candles(path)
+    return pd.read_csv(path, index_col=0, parse_dates=True)
+
+
+def main(argv: Optional[List[str]] = None):
+    """오프라인 ATR 배수 최적화: 심볼별 캔들 파일 -> ATR_MULTIPLIER_TABLE_PATH"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='ATR stop/take-profit multiplier optimization')
+    parser.add_argument('data', nargs='+', metavar='SYMBOL=PATH',
+                        help='candles per symbol, e.g. BTCUSDT=BTCUSDT_1h.npz (.npz backfill or OHLCV csv)')
+    parser.add_argument('--output', help='table path (default: config ATR_MULTIPLIER_TABLE_PATH)')
+    parser.add_argument('--workers', type=int, help='worker processes (default: config ATR_OPT_WORKERS)')
+    parser.add_argument('--dry-run', action='store_true', help='print the table without saving')
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    config = TradingConfig()
+    if args.workers is not None:
+        config.ATR_OPT_WORKERS = args.workers
+    
+    historical_data = {}
+    for item in args.data:
+        symbol, _, path = item.partition('=')
+        if not path:
+            parser.error(f"SYMBOL=PATH 형식이 아님: {item}")
+        historical_data[symbol.upper()] = _load_history(path)
+    
+    table = run_atr_optimization(historical_data, config, save=not args.dry_run, path=args.output)
+    print(json.dumps(table, indent=2))
+
+
+# 워커 프로세스(spawn)가 모듈을 다시 import해도 최적화가 재실행되지 않도록 가드
+if __name__ == '__main__':
+    main()
@@ -3,78 +3,190 @@ ATR(Average True Range) 기반 동적 손절/익절 계산기
 시장 변동성에 적응하는 유연한 리스크 관리 시스템
 """
 
+import asyncio
+import json
+import os
+import warnings
+from collections.abc import Mapping
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 import logging
 
 
+# 배열 입력(2차원 ndarray)의 컬럼 순서 - ccxt OHLCV 행에서 timestamp를 뺀 순서
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# EnhancedTechnicalIndicators.calculate_all_indicators의 'atr' 기간
+INDICATOR_ATR_PERIOD = 14
+
+# ATR이 비정상일 때 폴백으로 쓰는 최근 True Range 개수
+FALLBACK_RANGE_BARS = 20
+
+
 class ATRCalculator:
     """ATR 기반 동적 손절/익절 계산 클래스"""
     
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self.multiplier_table = self.load_multiplier_table(config.ATR_MULTIPLIER_TABLE_PATH)
+    
+    def load_multiplier_table(self, path: Optional[str]) -> Dict[str, Dict[str, Dict]]:
+        """오프라인 최적화 결과 (utils.atr_backtest.ATRStopOptimizer) 로드 - 없으면 ATR_SETTINGS만 사용"""
+        if not path or not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                table = json.load(f).get('symbols', {})
+            self.logger.info(f"📐 ATR 배수 테이블 로드: {', '.join(table) or '없음'} ({path})")
+            return table
+        except Exception as e:
+            self.logger.warning(f"⚠️ ATR 배수 테이블 로드 실패, 기본 설정 사용: {e}")
+            return {}
+    
+    def get_settings(self, symbol: str, regime: Optional[str] = None,
+                     side: Optional[str] = None) -> Dict[str, float]:
+        """ATR_SETTINGS에 최적화 배수를 덮어쓴 설정 (방향의 체제별 > 방향 전체 > 기본값)"""
+        settings = dict(self.config.ATR_SETTINGS[symbol])
+        if side is None:
+            return settings
+        direction = 'long' if str(side).lower() in ('long', 'buy') else 'short'
+        table = self.multiplier_table.get(symbol, {})
+        if 'long' in table or 'short' in table:
+            table = table.get(direction, {})
+        elif direction == 'short':
+            # 방향 구분 없는 이전 형식은 롱 전용 시뮬레이션 결과 - 숏에는 적용하지 않음
+            table = {}
+        tuned = table.get(regime) or table.get('all')
+        if tuned:
+            settings['stop_multiplier'] = tuned['stop_multiplier']
+            settings['profit_multiplier'] = tuned['profit_multiplier']
+        return settings
+    
+    @staticmethod
+    def to_arrays(candles: Any) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        high/low/close float 배열 추출
         
-    def calculate_atr(self, candles: List[Dict], period: int = 14) -> float:
+        ndarray(OHLCV_COLUMNS 순서), DataFrame, 컬럼 dict, 캔들 dict 리스트를 모두 받는다.
+        """
+        if isinstance(candles, np.ndarray):
+            data = np.asarray(candles, dtype=float)
+            return data[:, 1], data[:, 2], data[:, 3]
+        if isinstance(candles, (pd.DataFrame, Mapping)):
+            return tuple(np.asarray(candles[col], dtype=float) for col in ('high', 'low', 'close'))
+        rows = np.array([[c['high'], c['low'], c['close']] for c in candles], dtype=float).reshape(-1, 3)
+        return rows[:, 0], rows[:, 1], rows[:, 2]
+    
+    @staticmethod
+    def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+        """TR = max(high-low, |high-prev_close|, |low-prev_close|), 마지막 축 기준 (배치 행렬 지원)"""
+        pad = np.full(close.shape[:-1] + (1,), np.nan)
+        prev_close = np.concatenate((pad, close[..., :-1]), axis=-1)
+        # fmax는 NaN을 무시하므로 첫 봉은 high-low
+        return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    
+    @staticmethod
+    def _latest_atr(true_range: np.ndarray, period: int) -> np.ndarray:
+        """마지막 period개 TR의 단순 평균, 비정상이면 최근 FALLBACK_RANGE_BARS개 평균 변동폭"""
+        atr = true_range[..., -period:].mean(axis=-1)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            fallback = np.nanmean(true_range[..., -FALLBACK_RANGE_BARS:], axis=-1)
+        atr = np.where(np.isfinite(atr) & (atr > 0), atr, fallback)
+        return np.nan_to_num(atr, nan=0.0)
+    
+    @staticmethod
+    def _indicator_atr(candles: Any, period: int) -> Optional[float]:
+        """이미 계산된 지표 dict의 'atr' 시리즈 재사용 (기간이 같을 때만)"""
+        if not isinstance(candles, Mapping) or 'atr' not in candles or period != INDICATOR_ATR_PERIOD:
+            return None
+        values = np.asarray(candles['atr'], dtype=float)
+        values = values[np.isfinite(values)]
+        if not len(values) or values[-1] <= 0:
+            return None
+        return float(values[-1])
+        
+    def calculate_atr(self, candles: Any, period: int = 14) -> float:
         """
         ATR(Average True Range) 계산
         
         Args:
-            candles: OHLCV 캔들 데이터 리스트
+            candles: OHLCV ndarray/DataFrame/캔들 리스트, 또는 'atr'이 포함된 지표 dict
             period: ATR 계산 기간 (기본 14)
             
         Returns:
             float: ATR 값
         """
         try:
-            if len(candles) < period + 1:
-                self.logger.warning(f"캔들 데이터 부족: {len(candles)} < {period + 1}")
-                return 0.0
+            reused = self._indicator_atr(candles, period)
+            if reused is not None:
+                return reused
             
-            # DataFrame으로 변환
-            df = pd.DataFrame(candles)
-            if df.empty:
+            high, low, close = self.to_arrays(candles)
+            if len(close) < period + 1:
+                self.logger.warning(f"캔들 데이터 부족: {len(close)} < {period + 1}")
                 return 0.0
-                
-            # OHLC 컬럼 확인 및 변환
-            required_cols = ['high', 'low', 'close']
-            for col in required_cols:
-                if col not in df.columns:
-                    self.logger.error(f"필수 컬럼 누락: {col}")
-                    return 0.0
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # True Range 계산
-            df['prev_close'] = df['close'].shift(1)
-            
-            # TR = max(high-low, abs(high-prev_close), abs(low-prev_close))
-            df['tr1'] = df['high'] - df['low']
-            df['tr2'] = abs(df['high'] - df['prev_close'])
-            df['tr3'] = abs(df['low'] - df['prev_close'])
             
-            df['true_range'] = df[['tr1', 'tr2', 'tr3']].max(axis=1)
-            
-            # ATR 계산 (Simple Moving Average)
-            atr_values = df['true_range'].rolling(window=period, min_periods=period).mean()
-            
-            # 최신 ATR 값 반환
-            latest_atr = atr_values.iloc[-1]
-            
-            if pd.isna(latest_atr) or latest_atr <= 0:
-                # 폴백: 최근 20개 캔들의 평균 변동폭 사용
-                recent_ranges = df['true_range'].tail(20).mean()
-                latest_atr = recent_ranges if not pd.isna(recent_ranges) else 0.0
+            latest_atr = float(self._latest_atr(self.true_range(high, low, close), period))
             
             self.logger.debug(f"ATR 계산 완료: {latest_atr:.6f}")
-            return float(latest_atr)
+            return latest_atr
             
         except Exception as e:
             self.logger.error(f"ATR 계산 오류: {e}")
             return 0.0
     
+    def calculate_atr_batch(self, candles_by_symbol: Dict[str, Any],
+                            periods: Optional[Dict[str, int]] = None) -> Dict[str, float]:
+        """
+        여러 심볼의 ATR을 한 번에 계산
+        
+        같은 기간의 심볼들은 최근 봉만 잘라 (심볼 × 봉) 행렬로 쌓아 한 번의 배열 연산으로 처리한다.
+        
+        Returns:
+            Dict[str, float]: 심볼별 ATR (계산 불가 시 0.0)
+        """
+        periods = periods or {}
+        result: Dict[str, float] = {}
+        groups: Dict[int, List[Tuple[str, Tuple[np.ndarray, ...]]]] = {}
+        
+        for symbol, candles in candles_by_symbol.items():
+            period = periods.get(symbol, 14)
+            try:
+                reused = self._indicator_atr(candles, period)
+                if reused is not None:
+                    result[symbol] = reused
+                    continue
+                arrays = self.to_arrays(candles)
+            except Exception as e:
+                self.logger.error(f"{symbol} ATR 입력 변환 오류: {e}")
+                result[symbol] = 0.0
+                continue
+            if len(arrays[2]) < period + 1:
+                self.logger.warning(f"{symbol} 캔들 데이터 부족: {len(arrays[2])} < {period + 1}")
+                result[symbol] = 0.0
+                continue
+            groups.setdefault(period, []).append((symbol, arrays))
+        
+        for period, members in groups.items():
+            # 최신 ATR과 폴백 평균에 필요한 봉만 사용, 짧은 심볼은 앞쪽을 NaN으로 채움
+            bars = max(period, FALLBACK_RANGE_BARS) + 1
+            matrix = np.full((3, len(members), bars), np.nan)
+            for row, (_, arrays) in enumerate(members):
+                for col, values in enumerate(arrays):
+                    tail = values[-bars:]
+                    matrix[col, row, bars - len(tail):] = tail
+            latest = self._latest_atr(self.true_range(*matrix), period)
+            for (symbol, _), atr in zip(members, latest):
+                result[symbol] = float(atr)
+        
+        return result
+    
     def calculate_dynamic_stops(self, symbol: str, entry_price: float, 
-                               current_atr: float, position_side: str) -> Dict[str, float]:
+                               current_atr: float, position_side: str,
+                               regime: Optional[str] = None) -> Dict[str, float]:
         """
         동적 손절/익절 가격 계산
         
@@ -83,6 +195,7 @@ class ATRCalculator:
             entry_price: 진입 가격
             current_atr: 현재 ATR 값
             position_side: 포지션 방향 ('long' or 'short')
+            regime: 시장 체제 (최적화 테이블에 체제별 배수가 있으면 사용)
             
         Returns:
             Dict: {
@@ -97,7 +210,7 @@ class ATRCalculator:
             if symbol not in self.config.ATR_SETTINGS:
                 raise ValueError(f"ATR 설정이 없는 심볼: {symbol}")
                 
-            settings = self.config.ATR_SETTINGS[symbol]
+            settings = self.get_settings(symbol, regime, position_side)
             leverage = self.config.LEVERAGE.get(symbol, 10)
             
             # ATR 기반 거리 계산
@@ -182,17 +295,18 @@ class ATRCalculator:
             'atr_value': 0.0
         }
     
-    def validate_atr_quality(self, atr_value: float, recent_candles: List[Dict]) -> bool:
+    def validate_atr_quality(self, atr_value: float, recent_candles: Any) -> bool:
         """ATR 품질 검증"""
         try:
             if atr_value <= 0:
                 return False
                 
             # 최근 평균 변동폭과 비교
-            if len(recent_candles) >= 5:
-                df = pd.DataFrame(recent_candles[-5:])
-                avg_range = ((df['high'] - df['low']) / df['close']).mean()
-                atr_ratio = atr_value / df['close'].iloc[-1]
+            high, low, close = self.to_arrays(recent_candles)
+            if len(close) >= 5:
+                high, low, close = high[-5:], low[-5:], close[-5:]
+                avg_range = float(np.mean((high - low) / close))
+                atr_ratio = atr_value / close[-1]
                 
                 # ATR이 최근 평균 변동의 0.5~3배 범위 내인지 확인
                 if not (0.5 * avg_range <= atr_ratio <= 3.0 * avg_range):
@@ -204,14 +318,32 @@ class ATRCalculator:
         except Exception:
             return False
     
-    def calculate_optimal_multipliers(self, symbol: str, historical_data: pd.DataFrame) -> Dict[str, float]:
+    def calculate_optimal_multipliers(self, symbol: str, historical_data: pd.DataFrame,
+                                      side: str = 'long') -> Dict[str, float]:
         """
         역사적 데이터 기반 최적 ATR 배수 계산
-        (백테스팅용 - 추후 구현)
+        (ATRStopOptimizer 그리드 탐색, 거래 수 부족 시 현재 설정)
+        
+        프로세스 풀을 동기적으로 실행하는 블로킹 호출 - 이벤트 루프 스레드에서는 거부되므로
+        run_in_executor로 감싸거나 오프라인(python -m utils.atr_backtest)으로 실행할 것.
         """
-        # TODO: 백테스팅을 통한 최적 배수 도출
-        settings = self.config.ATR_SETTINGS.get(symbol, {})
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("calculate_optimal_multipliers는 이벤트 루프에서 호출할 수 없음 - run_in_executor 사용")
+        
+        try:
+            from .atr_backtest import ATRStopOptimizer
+        except ImportError:
+            from utils.atr_backtest import ATRStopOptimizer
+        
+        direction = 'long' if side.lower() in ('long', 'buy') else 'short'
+        table = ATRStopOptimizer(self.config).optimize({symbol: historical_data}).get(symbol, {})
+        best = table.get(direction, {}).get('all')
+        settings = best or self.get_settings(symbol, side=side)
         return {
             'stop_multiplier': settings.get('stop_multiplier', 2.0),
             'profit_multiplier': settings.get('profit_multiplier', 3.0)
-        }
\ No newline at end of file
+        }
@@ -10,7 +10,12 @@ from datetime import datetime, timedelta
 
 
 class BalanceSafeHandler:
-    """잔고 데이터 안전 처리 클래스"""
+    """
+    잔고 데이터 안전 처리 클래스
+    
+    Process-wide balance cache shared by the engine, capital tracker and API. Concurrent misses
+    share one in-flight fetch, account pushes refresh the cache directly, and fills invalidate it.
+    """
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
@@ -19,6 +24,11 @@ class BalanceSafeHandler:
         self._retry_count = 0
         self._max_retries = 3
         self._retry_delay = 2.0  # 초
+        
+        self._inflight: Optional[asyncio.Future] = None
+        self._generation = 0  # 무효화/푸시마다 증가 - 진행 중이던 조회 결과는 캐시하지 않음
+        self.stats = {'requests': 0, 'cache_hits': 0, 'fetches': 0, 'coalesced': 0,
+                      'pushes': 0, 'invalidations': 0}
     
     async def get_safe_balance(self, exchange_manager, symbols: List[str] = None,
                               use_cache: bool = True, max_cache_age: int = 60) -> Dict[str, Any]:
@@ -34,32 +44,66 @@ class BalanceSafeHandler:
         Returns:
             안전하게 처리된 잔고 데이터
         """
+        self.stats['requests'] += 1
         try:
             # 캐시 확인
             if use_cache and self._is_cache_valid(max_cache_age):
+                self.stats['cache_hits'] += 1
                 self.logger.debug("캐시된 잔고 데이터 사용")
                 return self._cached_balance.copy()
             
-            # 잔고 조회 시도
-            balance_data = await self._fetch_balance_with_retry(exchange_manager, symbols)
-            
-            if balance_data:
-                # 성공적으로 조회된 경우
-                self._cached_balance = balance_data
-                self._last_successful_fetch = datetime.now()
-                self._retry_count = 0
-                
-                self.logger.debug(f"잔고 데이터 조회 성공: {len(balance_data.get('balances', {}))}개 항목")
-                return balance_data
-            
+            # 동시에 들어온 조회는 진행 중인 요청 하나를 공유
+            if self._inflight is None or self._inflight.done():
+                self._inflight = asyncio.ensure_future(
+                    self._refresh(exchange_manager, symbols, self._generation))
+                self.stats['fetches'] += 1
             else:
-                # 조회 실패 시 캐시된 데이터나 기본값 반환
-                return self._get_fallback_balance()
+                self.stats['coalesced'] += 1
+            
+            balance_data = await asyncio.shield(self._inflight)
+            return balance_data.copy()
             
         except Exception as e:
             self.logger.error(f"잔고 조회 중 예외 발생: {e}")
             return self._get_fallback_balance()
     
+    async def _refresh(self, exchange_manager, symbols: List[str] = None,
+                       generation: int = 0) -> Dict[str, Any]:
+        """Single fetch shared by every waiter (generation is taken when the fetch is scheduled)"""
+        balance_data = await self._fetch_balance_with_retry(exchange_manager, symbols)
+        
+        if not balance_data:
+            # 조회 실패 시 캐시된 데이터나 기본값 반환
+            return self._get_fallback_balance()
+        
+        # 조회 중 체결/푸시가 있었으면 이 결과는 이미 낡았으므로 캐시하지 않음
+        if generation == self._generation:
+            self._store(balance_data)
+        self._retry_count = 0
+        self.logger.debug(f"잔고 데이터 조회 성공: {len(balance_data.get('balances', {}))}개 항목")
+        return balance_data
+    
+    def _store(self, balance_data: Dict[str, Any]):
+        self._cached_balance = balance_data
+        self._last_successful_fetch = datetime.now()
+    
+    def update_from_push(self, raw_balance: Dict[str, Any]):
+        """Private stream account push -> shared cache (no request)"""
+        normalized = self._normalize_balance_data(raw_balance)
+        if normalized:
+            normalized['source'] = 'ws'
+            self._generation += 1
+            self._inflight = None  # 진행 중 조회에 합류하지 않음 (기존 대기자는 그 결과를 그대로 받음)
+            self._store(normalized)
+            self.stats['pushes'] += 1
+    
+    def invalidate(self, *_):
+        """체결 등으로 잔고가 바뀌었을 때 캐시 무효화 (이전 값은 실패 시 대체용으로 유지)"""
+        self._generation += 1
+        self._inflight = None  # 무효화 이후 호출자는 새 조회를 시작
+        self._last_successful_fetch = None
+        self.stats['invalidations'] += 1
+    
     async def _fetch_balance_with_retry(self, exchange_manager, symbols: List[str] = None) -> Optional[Dict[str, Any]]:
         """재시도 로직을 포함한 잔고 조회"""
         for attempt in range(self._max_retries):
@@ -203,6 +247,8 @@ class BalanceSafeHandler:
             'cache_valid': self._is_cache_valid(300),  # 5분
             'cached_balances_count': len(self._cached_balance.get('balances', {})),
             'max_retries': self._max_retries,
+            'source': self._cached_balance.get('source'),
+            **self.stats,
             'status': 'healthy' if self._retry_count < 5 else 'degraded'
         }
 
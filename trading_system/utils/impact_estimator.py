@@ -0,0 +1,191 @@
+"""
+Pre-trade Impact Estimator
+Expected VWAP, slippage and market impact for a given size from local order book depth
+"""
+
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class ImpactEstimate:
+    """Walk of one side of the book for a hypothetical market order"""
+    side: str
+    requested: float  # 요청 수량 (계약)
+    fillable: float  # 호가 깊이 안에서 체결 가능한 수량
+    notional: float  # 체결 가능 수량의 명목가치
+    vwap: float
+    mid: float
+    slippage_bps: float  # VWAP vs mid (불리한 방향이 양수)
+    impact_bps: float  # 마지막으로 소진된 호가 vs mid
+    levels_consumed: int
+
+    @property
+    def fill_ratio(self) -> float:
+        return self.fillable / self.requested if self.requested > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        return {**asdict(self), 'fill_ratio': self.fill_ratio}
+
+
+class _BookSide:
+    """One side of a snapshot with cumulative amount/notional precomputed once per update"""
+
+    __slots__ = ('prices', 'amounts', 'cum_amount', 'cum_notional')
+
+    def __init__(self, levels):
+        levels = np.array([level[:2] for level in levels or []], dtype=float).reshape(-1, 2)
+        levels = levels[levels[:, 1] > 0]
+        self.prices = levels[:, 0]
+        self.amounts = levels[:, 1]
+        self.cum_amount = np.cumsum(self.amounts)
+        self.cum_notional = np.cumsum(self.prices * self.amounts)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+
+class ImpactEstimator:
+    """
+    Per-symbol order book cache with O(log n) impact queries.
+
+    update() does the single cumulative-sum pass over the book; estimate(), estimate_many()
+    and max_notional() are then searchsorted lookups, cheap enough to run on every signal.
+    """
+
+    def __init__(self, max_age: float = 5.0):
+        self.max_age = max_age
+        self._books: Dict[str, Tuple[float, float, _BookSide, _BookSide]] = {}  # symbol -> (ts, mid, bids, asks)
+
+    @staticmethod
+    def _is_buy(side: str) -> bool:
+        return side.lower() in ('buy', 'long')
+
+    def update(self, symbol: str, orderbook: Dict) -> bool:
+        """Store a ccxt-shaped order book snapshot; returns False when it has no levels"""
+        if not orderbook:
+            return False
+        bids = _BookSide(orderbook.get('bids'))
+        asks = _BookSide(orderbook.get('asks'))
+        if not len(bids) and not len(asks):
+            return False
+
+        if len(bids) and len(asks):
+            mid = (bids.prices[0] + asks.prices[0]) / 2
+        else:
+            mid = asks.prices[0] if len(asks) else bids.prices[0]
+
+        timestamp = orderbook.get('timestamp')
+        ts = timestamp / 1000 if timestamp else time.time()
+        self._books[symbol] = (ts, float(mid), bids, asks)
+        return True
+
+    def book_age(self, symbol: str) -> Optional[float]:
+        """Seconds since the cached snapshot, None if there is none"""
+        entry = self._books.get(symbol)
+        return time.time() - entry[0] if entry else None
+
+    def has_book(self, symbol: str) -> bool:
+        """캐시된 호가가 max_age 이내인지"""
+        age = self.book_age(symbol)
+        return age is not None and age <= self.max_age
+
+    def get_levels(self, symbol: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Fresh (bids, asks) as (N, 2) arrays of price, amount, None when stale or missing"""
+        if not self.has_book(symbol):
+            return None
+        _, _, bids, asks = self._books[symbol]
+        return np.column_stack([bids.prices, bids.amounts]), np.column_stack([asks.prices, asks.amounts])
+
+    def _side(self, symbol: str, side: str) -> Optional[Tuple[float, _BookSide]]:
+        """(mid, opposite side) for a fresh book"""
+        if not self.has_book(symbol):
+            return None
+        _, mid, bids, asks = self._books[symbol]
+        levels = asks if self._is_buy(side) else bids
+        return (mid, levels) if len(levels) and mid > 0 else None
+
+    def _walk(self, levels: _BookSide, amounts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(fillable, notional, last level index) for each requested amount"""
+        amounts = np.maximum(amounts, 0.0)
+        idx = np.minimum(np.searchsorted(levels.cum_amount, amounts, side='left'), len(levels) - 1)
+        before_amount = levels.cum_amount[idx] - levels.amounts[idx]
+        before_notional = levels.cum_notional[idx] - levels.prices[idx] * levels.amounts[idx]
+        partial = np.clip(amounts - before_amount, 0.0, levels.amounts[idx])
+        return before_amount + partial, before_notional + partial * levels.prices[idx], idx
+
+    def estimate_many(self, symbol: str, side: str, amounts) -> Optional[Dict[str, np.ndarray]]:
+        """Vectorized estimate for an array of candidate sizes"""
+        book = self._side(symbol, side)
+        if book is None:
+            return None
+        mid, levels = book
+        amounts = np.atleast_1d(np.asarray(amounts, dtype=float))
+        fillable, notional, idx = self._walk(levels, amounts)
+
+        sign = 1.0 if self._is_buy(side) else -1.0
+        vwap = np.divide(notional, fillable, out=np.full_like(notional, mid), where=fillable > 0)
+        return {
+            'fillable': fillable,
+            'notional': notional,
+            'vwap': vwap,
+            'slippage_bps': sign * (vwap - mid) / mid * 1e4,
+            'impact_bps': np.where(fillable > 0, sign * (levels.prices[idx] - mid) / mid * 1e4, 0.0),
+            'levels_consumed': np.where(fillable > 0, idx + 1, 0)
+        }
+
+    def estimate(self, symbol: str, side: str, amount: float = None,
+                 notional: float = None) -> Optional[ImpactEstimate]:
+        """Expected fill for a market order sized in contracts (amount) or quote currency (notional)"""
+        book = self._side(symbol, side)
+        if book is None:
+            return None
+        mid, levels = book
+
+        if amount is None:
+            # 명목가치 기준 요청은 누적 명목가치에서 수량으로 환산
+            target = max(float(notional or 0.0), 0.0)
+            i = min(int(np.searchsorted(levels.cum_notional, target, side='left')), len(levels) - 1)
+            before_amount = levels.cum_amount[i] - levels.amounts[i]
+            before_notional = levels.cum_notional[i] - levels.prices[i] * levels.amounts[i]
+            amount = before_amount + max(target - before_notional, 0.0) / levels.prices[i]
+
+        result = self.estimate_many(symbol, side, amount)
+        return ImpactEstimate(
+            side=side,
+            requested=float(amount),
+            fillable=float(result['fillable'][0]),
+            notional=float(result['notional'][0]),
+            vwap=float(result['vwap'][0]),
+            mid=mid,
+            slippage_bps=float(result['slippage_bps'][0]),
+            impact_bps=float(result['impact_bps'][0]),
+            levels_consumed=int(result['levels_consumed'][0])
+        )
+
+    def max_notional(self, symbol: str, side: str, max_slippage_bps: float) -> Optional[float]:
+        """Largest quote notional whose expected VWAP stays within max_slippage_bps of mid"""
+        book = self._side(symbol, side)
+        if book is None:
+            return None
+        mid, levels = book
+        sign = 1.0 if self._is_buy(side) else -1.0
+        limit_price = mid * (1 + sign * max_slippage_bps / 1e4)
+
+        # 레벨 끝 지점의 VWAP은 단조 증가(매수)/감소(매도) - 처음 한도를 넘는 레벨을 찾음
+        level_vwap = levels.cum_notional / levels.cum_amount
+        over = sign * (level_vwap - limit_price) > 0
+        if not over.any():
+            return float(levels.cum_notional[-1])
+
+        i = int(np.argmax(over))
+        before_amount = levels.cum_amount[i] - levels.amounts[i]
+        before_notional = levels.cum_notional[i] - levels.prices[i] * levels.amounts[i]
+        price = levels.prices[i]
+        # (N + p*q) / (Q + q) = limit_price 를 q에 대해 풀이
+        extra = (limit_price * before_amount - before_notional) / (price - limit_price)
+        extra = min(max(extra, 0.0), levels.amounts[i])
+        return float(before_notional + price * extra)
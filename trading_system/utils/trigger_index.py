@@ -0,0 +1,235 @@
+"""
+Price Trigger Index
+Per-symbol heaps of pending trigger prices (SL, TP levels, trailing) with O(log n) crossed queries
+"""
+
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+@dataclass
+class Trigger:
+    """Pending price trigger"""
+    trigger_id: Hashable
+    symbol: str
+    position_id: Hashable
+    kind: str  # 'stop_loss', 'take_profit', 'trailing_ratchet', ...
+    level: float
+    direction: str  # 'below': fires when price <= level, 'above': fires when price >= level
+    version: int = 0
+    payload: Dict = field(default_factory=dict)
+
+
+class _SymbolHeaps:
+    """Two heaps per symbol: max-heap of 'below' levels, min-heap of 'above' levels"""
+
+    __slots__ = ('below', 'above')
+
+    def __init__(self):
+        self.below: List[Tuple[float, int, Hashable, int]] = []  # (-level, seq, trigger_id, version)
+        self.above: List[Tuple[float, int, Hashable, int]] = []  # (level, seq, trigger_id, version)
+
+
+class TriggerIndex:
+    """
+    Trigger index with lazy deletion.
+
+    - add / move / remove: O(log n)
+    - pop_crossed(price): O(log n) per crossed trigger, O(1) when nothing crossed
+    - move() and replace_position() are atomic with respect to pop_crossed()
+    """
+
+    def __init__(self):
+        self._heaps: Dict[str, _SymbolHeaps] = {}
+        self._triggers: Dict[Hashable, Trigger] = {}
+        self._by_position: Dict[Hashable, set] = {}
+        self._seq = itertools.count()
+        self._stale = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._triggers)
+
+    def get(self, trigger_id: Hashable) -> Optional[Trigger]:
+        """Live trigger by id"""
+        return self._triggers.get(trigger_id)
+
+    def _push(self, trigger: Trigger):
+        heaps = self._heaps.setdefault(trigger.symbol, _SymbolHeaps())
+        if trigger.direction == 'below':
+            heapq.heappush(heaps.below, (-trigger.level, next(self._seq), trigger.trigger_id, trigger.version))
+        else:
+            heapq.heappush(heaps.above, (trigger.level, next(self._seq), trigger.trigger_id, trigger.version))
+
+    def add(self, trigger: Trigger):
+        """Add or replace a trigger"""
+        with self._lock:
+            if trigger.trigger_id in self._triggers:
+                trigger.version = self._triggers[trigger.trigger_id].version + 1
+                self._stale += 1
+            self._triggers[trigger.trigger_id] = trigger
+            self._by_position.setdefault(trigger.position_id, set()).add(trigger.trigger_id)
+            self._push(trigger)
+
+    def move(self, trigger_id: Hashable, new_level: float) -> bool:
+        """Atomically move a trigger to a new level (e.g. trailing stop ratchet)"""
+        with self._lock:
+            trigger = self._triggers.get(trigger_id)
+            if trigger is None:
+                return False
+            trigger.level = new_level
+            trigger.version += 1
+            self._stale += 1
+            self._push(trigger)
+            return True
+
+    def remove(self, trigger_id: Hashable) -> bool:
+        """Remove a trigger (heap entry becomes stale)"""
+        with self._lock:
+            trigger = self._triggers.pop(trigger_id, None)
+            if trigger is None:
+                return False
+            ids = self._by_position.get(trigger.position_id)
+            if ids is not None:
+                ids.discard(trigger_id)
+                if not ids:
+                    del self._by_position[trigger.position_id]
+            self._stale += 1
+            self._maybe_compact()
+            return True
+
+    def remove_position(self, position_id: Hashable):
+        """Remove every trigger of a position"""
+        with self._lock:
+            for trigger_id in list(self._by_position.get(position_id, ())):
+                self.remove(trigger_id)
+
+    def replace_position(self, position_id: Hashable, triggers: Iterable[Trigger]):
+        """Atomically swap all triggers of a position"""
+        with self._lock:
+            self.remove_position(position_id)
+            for trigger in triggers:
+                self.add(trigger)
+
+    def triggers_for(self, position_id: Hashable) -> List[Trigger]:
+        """Live triggers of a position"""
+        with self._lock:
+            return [self._triggers[t] for t in self._by_position.get(position_id, ())]
+
+    def _is_live(self, trigger_id: Hashable, version: int) -> bool:
+        trigger = self._triggers.get(trigger_id)
+        return trigger is not None and trigger.version == version
+
+    def pop_crossed(self, symbol: str, price: float) -> List[Trigger]:
+        """Remove and return every trigger of symbol crossed by price"""
+        with self._lock:
+            heaps = self._heaps.get(symbol)
+            if heaps is None:
+                return []
+
+            crossed = []
+            below = heaps.below
+            while below and -below[0][0] >= price:
+                _, _, trigger_id, version = heapq.heappop(below)
+                if self._is_live(trigger_id, version):
+                    crossed.append(self._triggers[trigger_id])
+                else:
+                    self._stale -= 1
+
+            above = heaps.above
+            while above and above[0][0] <= price:
+                _, _, trigger_id, version = heapq.heappop(above)
+                if self._is_live(trigger_id, version):
+                    crossed.append(self._triggers[trigger_id])
+                else:
+                    self._stale -= 1
+
+            for trigger in crossed:
+                # 이미 heap에서 빠졌으므로 stale 카운트 없이 레지스트리에서만 제거
+                del self._triggers[trigger.trigger_id]
+                ids = self._by_position.get(trigger.position_id)
+                if ids is not None:
+                    ids.discard(trigger.trigger_id)
+                    if not ids:
+                        del self._by_position[trigger.position_id]
+
+            return crossed
+
+    def _maybe_compact(self):
+        """stale 항목이 live보다 많아지면 heap 재구성"""
+        if self._stale <= max(64, len(self._triggers)):
+            return
+        self._heaps = {}
+        self._stale = 0
+        for trigger in self._triggers.values():
+            self._push(trigger)
+
+    def nearest(self, symbol: str) -> Tuple[Optional[float], Optional[float]]:
+        """(highest 'below' level, lowest 'above' level) for symbol"""
+        with self._lock:
+            heaps = self._heaps.get(symbol)
+            if heaps is None:
+                return None, None
+            for heap in (heaps.below, heaps.above):
+                while heap and not self._is_live(heap[0][2], heap[0][3]):
+                    heapq.heappop(heap)
+                    self._stale -= 1
+            low = -heaps.below[0][0] if heaps.below else None
+            high = heaps.above[0][0] if heaps.above else None
+            return low, high
+
+
+def _benchmark(n_triggers: int = 10_000, n_ticks: int = 10_000, seed: int = 7):
+    """10k synthetic triggers: heap index vs linear scan over every trigger"""
+    import random
+    import time
+
+    rng = random.Random(seed)
+    base = 60_000.0
+    specs = []
+    for i in range(n_triggers):
+        direction = 'below' if i % 2 == 0 else 'above'
+        offset = rng.uniform(0.005, 0.05) * base
+        level = base - offset if direction == 'below' else base + offset
+        specs.append((i, direction, level))
+
+    prices = [base]
+    for _ in range(n_ticks - 1):
+        prices.append(prices[-1] * (1 + rng.gauss(0, 0.0003)))
+
+    # Heap index; crossed triggers are re-armed 2% further out, like a ratcheting stop
+    index = TriggerIndex()
+    for i, direction, level in specs:
+        index.add(Trigger(i, 'BTCUSDT', i // 4, 'stop_loss', level, direction))
+
+    started = time.perf_counter()
+    fired_heap = 0
+    for price in prices:
+        for trigger in index.pop_crossed('BTCUSDT', price):
+            fired_heap += 1
+            trigger.level = price * (0.98 if trigger.direction == 'below' else 1.02)
+            index.add(trigger)
+    heap_elapsed = time.perf_counter() - started
+
+    # Linear scan baseline with identical re-arm rule
+    levels = {i: (direction, level) for i, direction, level in specs}
+    started = time.perf_counter()
+    fired_linear = 0
+    for price in prices:
+        for i, (direction, level) in levels.items():
+            if (direction == 'below' and price <= level) or (direction == 'above' and price >= level):
+                fired_linear += 1
+                levels[i] = (direction, price * (0.98 if direction == 'below' else 1.02))
+    linear_elapsed = time.perf_counter() - started
+
+    print(f"triggers={n_triggers} ticks={n_ticks}")
+    print(f"heap index : {heap_elapsed * 1e6 / n_ticks:8.2f} us/tick, fired={fired_heap}")
+    print(f"linear scan: {linear_elapsed * 1e6 / n_ticks:8.2f} us/tick, fired={fired_linear}")
+    print(f"speedup    : {linear_elapsed / max(heap_elapsed, 1e-12):.1f}x")
+
+
+if __name__ == '__main__':
+    _benchmark()
@@ -31,7 +31,7 @@ class ResilientWebSocketManager:
         self.response_timeout = 90  # 초
     
     async def connect(self, name: str, url: str, params: Dict[str, Any] = None,
-                     message_handler: Callable = None) -> bool:
+                     message_handler: Callable = None, on_connect: Callable = None) -> bool:
         """
         WebSocket 연결 생성
         
@@ -40,6 +40,7 @@ class ResilientWebSocketManager:
             url: WebSocket URL
             params: 연결 파라미터
             message_handler: 메시지 처리 함수
+            on_connect: 구독 전에 매 연결(재연결 포함)마다 호출되는 코루틴 (로그인 등)
             
         Returns:
             연결 성공 여부
@@ -51,6 +52,7 @@ class ResilientWebSocketManager:
             self.connections[name] = {
                 'url': url,
                 'params': params or {},
+                'on_connect': on_connect,
                 'websocket': None,
                 'last_ping': None,
                 'last_pong': None,
@@ -101,6 +103,10 @@ class ResilientWebSocketManager:
             conn_info['status'] = 'connected'
             conn_info['last_ping'] = time.time()
             
+            # 인증 등 연결 직후 처리 (수신 태스크 시작 전이므로 직접 recv 가능)
+            if conn_info.get('on_connect'):
+                await conn_info['on_connect'](websocket)
+            
             # 구독 메시지 전송 (필요한 경우)
             if conn_info['params']:
                 await self._send_subscription(name, conn_info['params'])